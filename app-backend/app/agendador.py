@@ -0,0 +1,212 @@
+"""
+Agendador de jobs em segundo plano (lançamento das contas recorrentes e consolidações noturnas).
+
+O agendador é iniciado no ``lifespan`` da aplicação (``app.main``): uma tarefa assíncrona
+verifica periodicamente os jobs vencidos e os executa em um pool de threads próprio, então
+nem o event loop nem as threads que atendem requisições ficam ocupados com eles.
+
+O estado de cada job (próxima execução, última execução, duração, atraso e erro) é gravado
+no repositório ``agendador``. Assim, com o SQLite, o agendador retoma de onde parou após uma
+reinicialização: execuções perdidas durante a parada são recuperadas com uma única execução
+imediata (os jobs são idempotentes e cobrem todo o intervalo desde a última execução). Com
+vários workers, cada execução é reivindicada avançando a próxima execução na mesma transação
+em que ela é lida, e só o worker que conseguiu avançá-la executa o job.
+
+Os módulos registram seus jobs ao serem importados, com ``agendador.registrar``. O agendador só
+é iniciado com ``DUCKBILLS_AGENDADOR=1``, que o servidor (``python main.py``) define por padrão:
+importar a aplicação em testes, benchmarks ou scripts não lança nada nos dados.
+"""
+
+
+import asyncio
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+from app.di.dependency_injection import Repositorio, criar_repositorio
+from app.schemas import ExecucaoJobSchema, JobAgendadoSchema
+
+logger = logging.getLogger(__name__)
+
+# Intervalo entre as verificações de jobs vencidos, em segundos
+INTERVALO_VERIFICACAO = 30.0
+# Espera antes de repetir um job que falhou
+REPETICAO_APOS_ERRO = timedelta(minutes=5)
+WORKERS = 2
+
+# Recebe o horário agendado da execução e o da execução anterior (``None`` na primeira)
+FuncaoJob = Callable[[datetime, Optional[datetime]], None]
+
+
+class Agenda(NamedTuple):
+    """Quando um job roda: a cada ``intervalo`` ou diariamente no ``horario`` (hora, minuto)."""
+    intervalo: Optional[timedelta] = None
+    horario: Optional[tuple] = None
+
+    def proxima(self, apos: datetime) -> datetime:
+        """Retorna o primeiro horário agendado depois de ``apos``."""
+        if self.intervalo is not None:
+            return apos + self.intervalo
+        hora, minuto = self.horario
+        candidato = apos.replace(hour=hora, minute=minuto, second=0, microsecond=0)
+        return candidato if candidato > apos else candidato + timedelta(days=1)
+
+    def descricao(self) -> str:
+        if self.intervalo is not None:
+            return f"a cada {int(self.intervalo.total_seconds())} s"
+        return f"diariamente às {self.horario[0]:02d}:{self.horario[1]:02d}"
+
+
+def a_cada(**intervalo: float) -> Agenda:
+    """Agenda de um job periódico (``a_cada(hours=1)``)."""
+    return Agenda(intervalo=timedelta(**intervalo))
+
+
+def diariamente(hora: int, minuto: int = 0) -> Agenda:
+    """Agenda de um job diário."""
+    return Agenda(horario=(hora, minuto))
+
+
+class _Job(NamedTuple):
+    nome: str
+    agenda: Agenda
+    funcao: FuncaoJob
+
+
+class Agendador:
+    """Executa jobs registrados, em um pool de threads, conforme suas agendas."""
+
+    def __init__(self, estado: Repositorio[ExecucaoJobSchema], workers: int = WORKERS):
+        self._estado = estado
+        self._workers = workers
+        self._jobs: Dict[str, _Job] = {}
+        self._em_execucao: Dict[str, datetime] = {}
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._tarefa: Optional[asyncio.Task] = None
+        self._execucoes: List[asyncio.Future] = []
+
+    def registrar(self, nome: str, agenda: Agenda, funcao: FuncaoJob) -> None:
+        """Registra um job; a primeira execução acontece assim que o agendador iniciar."""
+        self._jobs[nome] = _Job(nome, agenda, funcao)
+
+    def _registro(self, nome: str) -> Optional[ExecucaoJobSchema]:
+        registros = self._estado.buscar(nome=nome)
+        return registros[0] if registros else None
+
+    def _reivindicar(self, job: _Job, agora: datetime) -> Optional[ExecucaoJobSchema]:
+        """Avança a próxima execução do job, se ela venceu, e retorna o estado anterior."""
+        registro = self._registro(job.nome)
+        # Leitura sem transação primeiro: a verificação periódica não deve disputar escrita
+        if registro is not None and registro.proxima_execucao > agora:
+            return None
+        with self._estado.transacao():
+            registro = self._registro(job.nome)
+            if registro is None:
+                registro = self._estado.criar(ExecucaoJobSchema(id=0, nome=job.nome, proxima_execucao=agora))
+            elif registro.proxima_execucao > agora:
+                return None
+            self._estado.atualizar(
+                registro.id, registro.model_copy(update={"proxima_execucao": job.agenda.proxima(agora)})
+            )
+            return registro
+
+    def executar_pendentes(self, agora: Optional[datetime] = None) -> List[str]:
+        """Executa, na thread atual, os jobs vencidos; retorna os nomes dos executados."""
+        executados = []
+        for job in list(self._jobs.values()):
+            if self._executar(job, agora or datetime.now()):
+                executados.append(job.nome)
+        return executados
+
+    def _executar(self, job: _Job, agora: datetime) -> bool:
+        with self._lock:
+            if job.nome in self._em_execucao:
+                return False
+            self._em_execucao[job.nome] = agora
+        try:
+            anterior = self._reivindicar(job, agora)
+            if anterior is None:
+                return False
+            agendada = anterior.proxima_execucao
+            inicio = time.perf_counter()
+            erro = None
+            try:
+                job.funcao(agendada, anterior.ultima_execucao)
+            except Exception as excecao:
+                logger.exception("Job %s falhou.", job.nome)
+                erro = repr(excecao)
+            duracao = time.perf_counter() - inicio
+            with self._estado.transacao():
+                registro = self._registro(job.nome)
+                alteracoes = {
+                    "inicio": agora,
+                    "duracao": duracao,
+                    "atraso": max((agora - agendada).total_seconds(), 0.0),
+                    "execucoes": registro.execucoes + 1,
+                    "erro": erro,
+                }
+                if erro is None:
+                    alteracoes["ultima_execucao"] = agendada
+                else:
+                    # Tenta de novo antes da próxima execução agendada
+                    alteracoes["proxima_execucao"] = min(registro.proxima_execucao, agora + REPETICAO_APOS_ERRO)
+                registro = registro.model_copy(update=alteracoes)
+                self._estado.atualizar(registro.id, registro)
+            logger.info("Job %s executado em %.3f s (atraso de %.1f s).", job.nome, registro.duracao, registro.atraso)
+            return True
+        finally:
+            with self._lock:
+                del self._em_execucao[job.nome]
+
+    def iniciar(self) -> None:
+        """Inicia a verificação periódica no event loop atual (chamado no ``lifespan``)."""
+        if os.environ.get("DUCKBILLS_AGENDADOR", "0") != "1" or self._tarefa is not None:
+            return
+        self._executor = ThreadPoolExecutor(self._workers, thread_name_prefix="agendador")
+        self._tarefa = asyncio.get_running_loop().create_task(self._verificar())
+
+    async def parar(self) -> None:
+        """Interrompe a verificação e espera os jobs em andamento terminarem."""
+        if self._tarefa is None:
+            return
+        self._tarefa.cancel()
+        try:
+            await self._tarefa
+        except asyncio.CancelledError:
+            pass
+        if self._execucoes:
+            await asyncio.gather(*self._execucoes, return_exceptions=True)
+        self._executor.shutdown()
+        self._tarefa = self._executor = None
+
+    async def _verificar(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            agora = datetime.now()
+            self._execucoes = [execucao for execucao in self._execucoes if not execucao.done()]
+            for job in self._jobs.values():
+                if job.nome not in self._em_execucao:
+                    self._execucoes.append(loop.run_in_executor(self._executor, self._executar, job, agora))
+            await asyncio.sleep(INTERVALO_VERIFICACAO)
+
+    def estado(self) -> List[JobAgendadoSchema]:
+        """Estado de cada job registrado, com a agenda e se está em execução agora."""
+        resultado = []
+        for job in self._jobs.values():
+            registro = self._registro(job.nome)
+            dados = registro.model_dump(exclude={"id", "nome"}) if registro is not None else {}
+            resultado.append(JobAgendadoSchema(
+                **dados,
+                nome=job.nome,
+                agenda=job.agenda.descricao(),
+                em_execucao=job.nome in self._em_execucao,
+            ))
+        return resultado
+
+
+agendador = Agendador(criar_repositorio("agendador", ExecucaoJobSchema, indices=("nome",)))
@@ -0,0 +1,245 @@
+"""
+Feed de alterações (``/changes``), para o frontend sincronizar só o que mudou.
+
+Toda escrita em categorias, despesas, rendas, contas recorrentes, orçamentos e metas (pelas
+rotas, pela importação, pelos lotes ou pelos jobs) é gravada por um observador do repositório
+no registro de alterações (``app.armazenamento.alteracoes``), com uma sequência monotônica e o
+estado do registro depois dela. O cliente:
+
+1. chama ``GET /changes`` sem ``since`` para obter o cursor atual (``ultimo``) e carrega as
+   listagens completas uma vez; ou começa com ``since=0``, que parte da alteração retida mais
+   antiga;
+2. depois, chama ``GET /changes?since=<ultimo>`` e aplica as alterações recebidas (cada uma
+   traz o registro inteiro, ou ``removido``), repetindo enquanto ``mais`` for verdadeiro; ou
+   abre ``GET /changes/stream?since=<ultimo>`` (server-sent events) e recebe cada alteração
+   assim que ela é gravada.
+
+Um cursor diferente de zero que a retenção (``DUCKBILLS_ALTERACOES_RETENCAO`` alterações,
+padrão 100 mil) já descartou responde ``410 Gone``; no stream, vem o evento ``reiniciar``, com o cursor atual. Nos
+dois casos o cliente deve recarregar as listagens. Com ``X-Usuario-Id``, ou com ``usuario_id``
+(o ``EventSource`` do navegador não envia cabeçalhos), só vêm as alterações dos registros do
+usuário e as das categorias.
+"""
+
+
+import asyncio
+import os
+import threading
+import time
+from contextlib import contextmanager
+from functools import partial
+from typing import AsyncIterator, Callable, Iterator, List, Optional, Set, Tuple, TypeVar
+
+import anyio.to_thread
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
+
+# Os repositórios observados são criados e registrados ao importar seus módulos
+import app.categorias  # noqa: F401
+import app.contas_recorrentes  # noqa: F401
+import app.despesas  # noqa: F401
+import app.metas  # noqa: F401
+import app.orcamentos  # noqa: F401
+import app.rendas  # noqa: F401
+from app.armazenamento import Alteracao, apos_confirmar
+from app.armazenamento.alteracoes import RETENCAO_PADRAO
+from app.contexto import ContextoUsuario, contexto_do_stream
+from app.di.dependency_injection import criar_registro_alteracoes, obter_repositorio
+from app.schemas import AlteracoesSchema
+
+router = APIRouter(prefix="/changes", tags=["Alterações"])
+
+ENTIDADES = ("categorias", "despesas", "rendas", "contas_recorrentes", "orcamentos", "metas")
+LIMITE_PADRAO = 500
+LIMITE_MAXIMO = 1000
+# Intervalo entre as consultas do stream ao registro, em segundos: as escritas deste processo
+# acordam o stream na hora, mas as de outros workers (SQLite) só são vistas na consulta
+INTERVALO_CONSULTA = 1.0
+# Comentário enviado a um stream ocioso, para que proxies não encerrem a conexão
+INTERVALO_PING = 15.0
+
+R = TypeVar("R")
+
+registro_alteracoes = criar_registro_alteracoes(
+    int(os.environ.get("DUCKBILLS_ALTERACOES_RETENCAO", RETENCAO_PADRAO))
+)
+
+
+class CursorExpirado(Exception):
+    """O cursor é anterior às alterações retidas (ou de outro registro): sincronize do zero."""
+
+
+class _Avisos:
+    """Acorda os streams abertos neste processo quando uma alteração é gravada."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._eventos: Set[Tuple[asyncio.AbstractEventLoop, asyncio.Event]] = set()
+
+    @contextmanager
+    def assinar(self) -> Iterator[asyncio.Event]:
+        assinatura = (asyncio.get_running_loop(), asyncio.Event())
+        with self._lock:
+            self._eventos.add(assinatura)
+        try:
+            yield assinatura[1]
+        finally:
+            with self._lock:
+                self._eventos.discard(assinatura)
+
+    def avisar(self) -> None:
+        # Os observadores rodam nas threads das escritas, fora do event loop dos streams
+        if not self._eventos:
+            return
+        with self._lock:
+            assinaturas = list(self._eventos)
+        for loop, evento in assinaturas:
+            try:
+                loop.call_soon_threadsafe(evento.set)
+            except RuntimeError:
+                pass  # event loop já encerrado
+
+
+avisos = _Avisos()
+
+
+def _observador(entidade: str):
+    """Cria o observador que grava as escritas de uma entidade no registro de alterações."""
+    def observar(antigo, novo) -> None:
+        registro = novo if novo is not None else antigo
+        dados = None if novo is None else novo.model_dump_json()
+        registrar = partial(registro_alteracoes.registrar, entidade, registro.id, getattr(registro, "usuario_id", None), dados)
+        # No SQLite, a alteração é gravada na transação da escrita e desfeita com ela; em memória,
+        # só é registrada quando a escrita é confirmada (um lote desfeito não deixa alterações)
+        if registro_alteracoes.bloqueante:
+            registrar()
+        else:
+            apos_confirmar(registrar)
+        apos_confirmar(avisos.avisar)
+    return observar
+
+
+for _entidade in ENTIDADES:
+    obter_repositorio(_entidade).observar(_observador(_entidade))
+
+
+def consultar(desde: int, limite: int, usuario_id: Optional[int] = None) -> Tuple[List[Alteracao], int, bool]:
+    """Retorna as alterações após ``desde``, o cursor da próxima consulta e se há mais alterações.
+
+    Com ``desde`` igual a zero, parte da alteração retida mais antiga. Levanta ``CursorExpirado``
+    se ``desde`` estiver fora do registro.
+    """
+    do_inicio = desde == 0
+    while True:
+        if do_inicio:
+            desde = registro_alteracoes.descartadas_ate()
+        ultima = registro_alteracoes.ultima()
+        if desde > ultima:
+            raise CursorExpirado()
+        alteracoes = registro_alteracoes.listar(desde, limite, usuario_id)
+        # Conferido depois da leitura: um descarte durante ela também é detectado (do início,
+        # a leitura é refeita a partir do novo limite)
+        if desde >= registro_alteracoes.descartadas_ate():
+            break
+        if not do_inicio:
+            raise CursorExpirado()
+    if len(alteracoes) == limite:
+        return alteracoes, alteracoes[-1].seq, True
+    # Sem mais alterações do usuário, o cursor avança até a última sequência lida antes da
+    # consulta, pulando as alterações dos outros usuários
+    return alteracoes, max(ultima, alteracoes[-1].seq if alteracoes else desde), False
+
+
+async def _executar(funcao: Callable[..., R], *argumentos) -> R:
+    if registro_alteracoes.bloqueante:
+        return await anyio.to_thread.run_sync(partial(funcao, *argumentos))
+    return funcao(*argumentos)
+
+
+def _json(alteracao: Alteracao) -> str:
+    # O registro já está serializado no registro de alterações e é embutido como está
+    usuario = "null" if alteracao.usuario_id is None else alteracao.usuario_id
+    removido = "true" if alteracao.dados is None else "false"
+    return (
+        f'{{"seq":{alteracao.seq},"entidade":"{alteracao.entidade}","id":{alteracao.registro_id},'
+        f'"usuario_id":{usuario},"removido":{removido},"registro":{alteracao.dados or "null"}}}'
+    )
+
+
+_CURSOR_EXPIRADO = "Cursor fora do registro de alterações: recarregue as listagens e sincronize a partir do 'ultimo' atual."
+
+
+@router.get("", response_model=AlteracoesSchema)
+def listar_alteracoes(
+    since: Optional[int] = Query(
+        None,
+        ge=0,
+        description="Cursor: o 'ultimo' da consulta anterior, ou 0 para começar da alteração retida mais antiga. "
+        "Sem ele, só retorna o cursor atual.",
+    ),
+    limit: int = Query(LIMITE_PADRAO, ge=1, le=LIMITE_MAXIMO, description="Máximo de alterações retornadas."),
+    usuario_id: Optional[int] = None,
+    contexto: ContextoUsuario = Depends(),
+) -> Response:
+    """Alterações (criações, atualizações e exclusões) feitas depois do cursor ``since``, em ordem.
+
+    Cada registro alterado aparece uma única vez, com o seu estado atual.
+    """
+    usuario_id = contexto.filtro(usuario_id)
+    if since is None:
+        alteracoes, ultimo, mais = [], registro_alteracoes.ultima(), False
+    else:
+        try:
+            alteracoes, ultimo, mais = consultar(since, limit, usuario_id)
+        except CursorExpirado:
+            raise HTTPException(status_code=410, detail=_CURSOR_EXPIRADO)
+    corpo = f'{{"ultimo":{ultimo},"mais":{"true" if mais else "false"},"alteracoes":[{",".join(map(_json, alteracoes))}]}}'
+    return Response(content=corpo, media_type="application/json")
+
+
+async def _eventos(desde: Optional[int], usuario_id: Optional[int]) -> AsyncIterator[str]:
+    with avisos.assinar() as aviso:
+        if desde is None:
+            desde = await _executar(registro_alteracoes.ultima)
+        ultimo_envio = time.monotonic()
+        while True:
+            # Limpo antes da consulta: uma escrita durante ela acorda o próximo ciclo
+            aviso.clear()
+            try:
+                alteracoes, desde, mais = await _executar(consultar, desde, LIMITE_MAXIMO, usuario_id)
+            except CursorExpirado:
+                desde = await _executar(registro_alteracoes.ultima)
+                yield f'id: {desde}\nevent: reiniciar\ndata: {{"ultimo":{desde}}}\n\n'
+                continue
+            for alteracao in alteracoes:
+                yield f"id: {alteracao.seq}\nevent: alteracao\ndata: {_json(alteracao)}\n\n"
+            if alteracoes:
+                ultimo_envio = time.monotonic()
+            if mais:
+                continue
+            try:
+                await asyncio.wait_for(aviso.wait(), INTERVALO_CONSULTA)
+            except asyncio.TimeoutError:
+                if time.monotonic() - ultimo_envio >= INTERVALO_PING:
+                    yield ": ping\n\n"
+                    ultimo_envio = time.monotonic()
+
+
+@router.get("/stream", response_class=StreamingResponse)
+async def transmitir_alteracoes(
+    since: Optional[int] = Query(
+        None, ge=0, description="Cursor inicial (0: desde a alteração retida mais antiga). Sem ele, só as de agora em diante."
+    ),
+    ultimo_evento: Optional[int] = Header(
+        None, alias="Last-Event-ID", description="Enviado pelo EventSource ao reconectar; tem precedência sobre since."
+    ),
+    contexto: ContextoUsuario = Depends(contexto_do_stream),
+) -> StreamingResponse:
+    """Stream (server-sent events) das alterações: um evento ``alteracao`` por registro alterado,
+    com a sequência como ``id``, e ``reiniciar`` quando o cursor expira."""
+    desde = ultimo_evento if ultimo_evento is not None else since
+    return StreamingResponse(
+        _eventos(desde, contexto.usuario_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,45 @@
+"""
+Backends de armazenamento da API DuckBills.
+
+Todos os backends implementam a interface ``Repositorio``; as rotas não sabem qual deles
+está em uso. A escolha é feita em ``app.di.dependency_injection``.
+"""
+
+from app.armazenamento.base import Repositorio, Sequencia, adiar_efeitos, apos_confirmar
+from app.armazenamento.alteracoes import (
+    Alteracao,
+    RegistroAlteracoes,
+    RegistroAlteracoesMemoria,
+    RegistroAlteracoesSQLite,
+)
+from app.armazenamento.assincrono import RepositorioAssincrono
+from app.armazenamento.colunar import RepositorioColunar
+from app.armazenamento.memoria import RepositorioMemoria
+from app.armazenamento.particionado import RepositorioParticionado, TotaisParticionados, particao
+from app.armazenamento.sqlite import ConexoesSQLite, RepositorioSQLite, SequenciaSQLite
+from app.armazenamento.totais import Lancamento, TotaisMensais, TotaisMensaisMemoria, TotaisMensaisSQLite, TotalMensal
+
+__all__ = [
+    "Repositorio",
+    "Sequencia",
+    "adiar_efeitos",
+    "apos_confirmar",
+    "RepositorioAssincrono",
+    "RepositorioColunar",
+    "RepositorioMemoria",
+    "RepositorioParticionado",
+    "TotaisParticionados",
+    "particao",
+    "ConexoesSQLite",
+    "RepositorioSQLite",
+    "SequenciaSQLite",
+    "Lancamento",
+    "TotaisMensais",
+    "TotaisMensaisMemoria",
+    "TotaisMensaisSQLite",
+    "TotalMensal",
+    "Alteracao",
+    "RegistroAlteracoes",
+    "RegistroAlteracoesMemoria",
+    "RegistroAlteracoesSQLite",
+]
@@ -0,0 +1,233 @@
+"""
+Registro das alterações dos dados, em ordem de sequência (feed de alterações da API).
+
+Cada escrita de uma entidade grava o estado do registro depois dela (o JSON do registro, ou
+``None`` se ele foi removido) com um número de sequência monotônico. Um cliente que guarda a
+última sequência recebida sincroniza só o que mudou desde ela.
+
+O registro é compactado na própria escrita: cada registro de cada entidade tem no máximo uma
+entrada, a da sua última alteração, que troca a anterior e recebe a nova sequência. Como cada
+entrada traz o estado completo do registro, descartar as anteriores não muda o resultado de
+uma sincronização. A retenção é limitada a ``retencao`` entradas; as mais antigas além disso
+são descartadas, e ``descartadas_ate`` passa a marcar a maior sequência descartada: cursores
+abaixo dela já não podem ser atendidos e exigem uma sincronização completa.
+
+A sequência começa no horário da criação do registro, em microssegundos, e ``descartadas_ate``
+começa logo antes dela. Assim, cursores de um registro anterior (uma base em memória antes da
+reinicialização, ou um arquivo SQLite recriado) ficam abaixo do limite, em vez de coincidir
+com as sequências novas.
+"""
+
+
+import threading
+import time
+from abc import ABC, abstractmethod
+from bisect import bisect_right
+from collections import OrderedDict
+from contextlib import nullcontext
+from typing import ContextManager, List, NamedTuple, Optional, Tuple
+
+from app.armazenamento.sqlite import ConexoesSQLite
+
+RETENCAO_PADRAO = 100_000
+
+
+class Alteracao(NamedTuple):
+    """Última alteração de um registro."""
+    seq: int
+    entidade: str
+    registro_id: int
+    usuario_id: Optional[int]  # None: registro sem usuário (categorias), visto por todos
+    dados: Optional[str]  # JSON do registro após a alteração; None: removido
+
+
+def _inicio() -> int:
+    return time.time_ns() // 1000
+
+
+class RegistroAlteracoes(ABC):
+    """Registro compactado e de retenção limitada das alterações dos dados."""
+
+    # Indica se as operações fazem E/S bloqueante (como em ``Repositorio``)
+    bloqueante: bool = False
+
+    def __init__(self, retencao: int = RETENCAO_PADRAO):
+        if retencao < 1:
+            raise ValueError("A retenção deve ser de pelo menos uma alteração.")
+        self.retencao = retencao
+
+    def transacao(self) -> ContextManager:
+        """Transação em que as alterações gravadas no bloco são confirmadas ou desfeitas juntas."""
+        return nullcontext()
+
+    @abstractmethod
+    def registrar(self, entidade: str, registro_id: int, usuario_id: Optional[int], dados: Optional[str]) -> None:
+        """Grava a alteração de um registro, substituindo a anterior dele."""
+
+    @abstractmethod
+    def listar(self, desde: int, limite: int, usuario_id: Optional[int] = None) -> List[Alteracao]:
+        """Retorna, em ordem, até ``limite`` alterações com sequência maior que ``desde``.
+
+        Com ``usuario_id``, só as dos registros desse usuário e as dos registros sem usuário.
+        """
+
+    @abstractmethod
+    def ultima(self) -> int:
+        """Maior sequência já atribuída (ou ``descartadas_ate``, se nenhuma foi mantida)."""
+
+    @abstractmethod
+    def descartadas_ate(self) -> int:
+        """Maior sequência descartada pela retenção: cursores menores exigem sincronização completa."""
+
+    @abstractmethod
+    def limitar(self) -> int:
+        """Descarta as alterações mais antigas além da retenção e retorna quantas foram descartadas."""
+
+
+class RegistroAlteracoesMemoria(RegistroAlteracoes):
+    """Registro em memória, em ordem de sequência, com uma entrada por registro.
+
+    Além do dicionário por registro, as sequências atribuídas ficam em uma lista crescente
+    (com a chave de cada uma), para que a leitura a partir de um cursor seja uma busca binária.
+    As posições de entradas já substituídas ou descartadas são puladas na leitura, e a lista é
+    refeita quando elas passam a ser a maioria.
+    """
+
+    def __init__(self, retencao: int = RETENCAO_PADRAO):
+        super().__init__(retencao)
+        self._lock = threading.Lock()
+        # (entidade, registro_id) -> alteração; a ordem de inserção é a ordem de sequência
+        self._alteracoes: "OrderedDict[Tuple[str, int], Alteracao]" = OrderedDict()
+        self._seqs: List[int] = []
+        self._chaves: List[Tuple[str, int]] = []
+        self._descartadas_ate = _inicio()
+        self._ultima = self._descartadas_ate
+
+    def registrar(self, entidade: str, registro_id: int, usuario_id: Optional[int], dados: Optional[str]) -> None:
+        chave = (entidade, registro_id)
+        with self._lock:
+            self._ultima += 1
+            self._alteracoes.pop(chave, None)
+            self._alteracoes[chave] = Alteracao(self._ultima, entidade, registro_id, usuario_id, dados)
+            self._seqs.append(self._ultima)
+            self._chaves.append(chave)
+            if len(self._alteracoes) > self.retencao:
+                self._descartar(len(self._alteracoes) - self.retencao)
+            else:
+                self._refazer_seqs()
+
+    def _descartar(self, quantidade: int) -> None:
+        for _ in range(quantidade):
+            _, alteracao = self._alteracoes.popitem(last=False)
+            self._descartadas_ate = alteracao.seq
+        self._refazer_seqs()
+
+    def _refazer_seqs(self) -> None:
+        # Refeita só quando as posições mortas superam as vivas: custo amortizado constante
+        if len(self._seqs) > 2 * len(self._alteracoes):
+            self._seqs = [alteracao.seq for alteracao in self._alteracoes.values()]
+            self._chaves = list(self._alteracoes)
+
+    def listar(self, desde: int, limite: int, usuario_id: Optional[int] = None) -> List[Alteracao]:
+        novas: List[Alteracao] = []
+        with self._lock:
+            seqs, chaves, alteracoes = self._seqs, self._chaves, self._alteracoes
+            for posicao in range(bisect_right(seqs, desde), len(seqs)):
+                alteracao = alteracoes.get(chaves[posicao])
+                # Entrada substituída por uma alteração mais nova do registro, ou descartada
+                if alteracao is None or alteracao.seq != seqs[posicao]:
+                    continue
+                if usuario_id is None or alteracao.usuario_id in (None, usuario_id):
+                    novas.append(alteracao)
+                    if len(novas) == limite:
+                        break
+        return novas
+
+    def ultima(self) -> int:
+        return self._ultima
+
+    def descartadas_ate(self) -> int:
+        return self._descartadas_ate
+
+    def limitar(self) -> int:
+        with self._lock:
+            excesso = max(0, len(self._alteracoes) - self.retencao)
+            self._descartar(excesso)
+        return excesso
+
+
+class RegistroAlteracoesSQLite(RegistroAlteracoes):
+    """Registro na tabela ``alteracoes``, gravado na transação da escrita.
+
+    A sequência é a chave ``AUTOINCREMENT`` da tabela: as transações de escrita de um arquivo são
+    serializadas, então as sequências ficam visíveis na ordem em que são atribuídas, em todos os
+    workers. A compactação é um ``INSERT OR REPLACE`` pela chave (entidade, registro). O excesso
+    sobre a retenção é descartado a cada ``intervalo_limpeza`` alterações gravadas pelo processo.
+    """
+
+    bloqueante = True
+
+    def __init__(self, conexoes: ConexoesSQLite, retencao: int = RETENCAO_PADRAO, intervalo_limpeza: int = 1000):
+        super().__init__(retencao)
+        self._conexoes = conexoes
+        self._intervalo_limpeza = intervalo_limpeza
+        self._gravadas = 0
+        with conexoes.transacao() as conexao:
+            conexao.execute(
+                "CREATE TABLE IF NOT EXISTS alteracoes ("
+                "seq INTEGER PRIMARY KEY AUTOINCREMENT, entidade TEXT NOT NULL, registro_id INTEGER NOT NULL, "
+                "usuario_id INTEGER, dados TEXT, UNIQUE (entidade, registro_id))"
+            )
+            conexao.execute("CREATE INDEX IF NOT EXISTS idx_alteracoes_usuario_id_seq ON alteracoes (usuario_id, seq)")
+            conexao.execute(
+                "CREATE TABLE IF NOT EXISTS alteracoes_descartadas (id INTEGER PRIMARY KEY CHECK (id = 1), ate INTEGER NOT NULL)"
+            )
+            if conexao.execute("SELECT 1 FROM alteracoes_descartadas").fetchone() is None:
+                inicio = _inicio()
+                conexao.execute("INSERT INTO alteracoes_descartadas VALUES (1, ?)", (inicio,))
+                conexao.execute("DELETE FROM sqlite_sequence WHERE name = 'alteracoes'")
+                conexao.execute("INSERT INTO sqlite_sequence (name, seq) VALUES ('alteracoes', ?)", (inicio,))
+
+    def transacao(self) -> ContextManager:
+        return self._conexoes.transacao()
+
+    def registrar(self, entidade: str, registro_id: int, usuario_id: Optional[int], dados: Optional[str]) -> None:
+        with self._conexoes.transacao() as conexao:
+            conexao.execute(
+                "INSERT OR REPLACE INTO alteracoes (entidade, registro_id, usuario_id, dados) VALUES (?, ?, ?, ?)",
+                (entidade, registro_id, usuario_id, dados),
+            )
+            self._gravadas += 1
+            if self._gravadas % self._intervalo_limpeza == 0:
+                self.limitar()
+
+    def listar(self, desde: int, limite: int, usuario_id: Optional[int] = None) -> List[Alteracao]:
+        sql = "SELECT seq, entidade, registro_id, usuario_id, dados FROM alteracoes WHERE seq > ?"
+        valores: list = [desde]
+        if usuario_id is not None:
+            sql += " AND (usuario_id = ? OR usuario_id IS NULL)"
+            valores.append(usuario_id)
+        sql += " ORDER BY seq LIMIT ?"
+        valores.append(limite)
+        return [Alteracao(*linha) for linha in self._conexoes.conexao().execute(sql, valores)]
+
+    def ultima(self) -> int:
+        linha = self._conexoes.conexao().execute(
+            "SELECT MAX((SELECT seq FROM sqlite_sequence WHERE name = 'alteracoes'), "
+            "(SELECT ate FROM alteracoes_descartadas))"
+        ).fetchone()
+        return linha[0]
+
+    def descartadas_ate(self) -> int:
+        return self._conexoes.conexao().execute("SELECT ate FROM alteracoes_descartadas").fetchone()[0]
+
+    def limitar(self) -> int:
+        with self._conexoes.transacao() as conexao:
+            linha = conexao.execute(
+                "SELECT seq FROM alteracoes ORDER BY seq DESC LIMIT 1 OFFSET ?", (self.retencao,)
+            ).fetchone()
+            if linha is None:
+                return 0
+            descartadas = conexao.execute("DELETE FROM alteracoes WHERE seq <= ?", (linha[0],)).rowcount
+            conexao.execute("UPDATE alteracoes_descartadas SET ate = MAX(ate, ?)", (linha[0],))
+        return descartadas
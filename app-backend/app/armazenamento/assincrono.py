@@ -0,0 +1,84 @@
+"""
+Interface assíncrona dos repositórios, para as rotas ``async def``.
+
+As leituras de backends em memória não fazem E/S, mas esperam pelo lock do repositório,
+que outras threads podem segurar por muito tempo (uma importação, um lote, a reconstrução dos
+totais, os jobs). Por isso elas só rodam direto no event loop, sem o salto para o threadpool,
+quando o lock está livre (``Repositorio.sem_espera``); caso contrário, e em backends com E/S
+bloqueante (``bloqueante = True``, como o SQLite), rodam em uma thread de trabalho. As escritas
+sempre rodam em uma thread de trabalho: os observadores que elas disparam usam os locks de
+outros repositórios e índices, que o loop não deve esperar.
+"""
+
+
+from datetime import date
+from functools import partial
+from typing import Any, Callable, Generic, List, Optional, Sequence, TypeVar
+
+import anyio.to_thread
+
+from app.armazenamento.base import Repositorio, T
+
+R = TypeVar("R")
+
+
+class RepositorioAssincrono(Generic[T]):
+    """Fachada assíncrona de um ``Repositorio``."""
+
+    def __init__(self, repositorio: Repositorio[T]):
+        self.sincrono = repositorio
+
+    async def _executar(self, funcao: Callable[..., R], *argumentos: Any, **nomeados: Any) -> R:
+        return await anyio.to_thread.run_sync(partial(funcao, *argumentos, **nomeados))
+
+    async def _ler(self, funcao: Callable[..., R], *argumentos: Any, **nomeados: Any) -> R:
+        if not self.sincrono.bloqueante:
+            # Com o repositório reservado, a leitura não espera por outra thread
+            with self.sincrono.sem_espera() as livre:
+                if livre:
+                    return funcao(*argumentos, **nomeados)
+        return await self._executar(funcao, *argumentos, **nomeados)
+
+    async def obter(self, registro_id: int) -> Optional[T]:
+        return await self._ler(self.sincrono.obter, registro_id)
+
+    async def consultar(
+        self,
+        apos: Optional[int] = None,
+        limite: Optional[int] = None,
+        data_de: Optional[date] = None,
+        data_ate: Optional[date] = None,
+        **criterios: Any,
+    ) -> List[T]:
+        return await self._ler(self.sincrono.consultar, apos, limite, data_de, data_ate, **criterios)
+
+    async def buscar(self, **criterios: Any) -> List[T]:
+        return await self._ler(self.sincrono.buscar, **criterios)
+
+    async def criar(self, registro: T) -> T:
+        return await self._executar(self.sincrono.criar, registro)
+
+    async def criar_varios(self, registros: Sequence[T]) -> Sequence[T]:
+        return await self._executar(self.sincrono.criar_varios, registros)
+
+    async def atualizar(self, registro_id: int, registro: T) -> Optional[T]:
+        return await self._executar(self.sincrono.atualizar, registro_id, registro)
+
+    async def remover(self, registro_id: int) -> Optional[T]:
+        return await self._executar(self.sincrono.remover, registro_id)
+
+    def particao_do_usuario(self, usuario_id: Optional[int]) -> "RepositorioAssincrono[T]":
+        """Fachada da partição que guarda os registros do usuário (ou do próprio repositório)."""
+        particao = self.sincrono.particao_do_usuario(usuario_id)
+        return self if particao is self.sincrono else RepositorioAssincrono(particao)
+
+    async def em_transacao(self, funcao: Callable[[Repositorio[T]], R]) -> R:
+        """Executa ``funcao(repositorio)`` em uma transação, de forma atômica.
+
+        É o caminho para leituras seguidas de escrita (incrementos, escritas condicionais):
+        a função é síncrona, então nenhuma outra requisição intercala no meio dela.
+        """
+        def executar() -> R:
+            with self.sincrono.transacao():
+                return funcao(self.sincrono)
+        return await self._executar(executar)
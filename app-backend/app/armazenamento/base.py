@@ -0,0 +1,251 @@
+"""
+Interface comum aos repositórios e gerador de IDs.
+"""
+
+
+import threading
+from abc import ABC, abstractmethod
+from contextlib import contextmanager, nullcontext
+from datetime import date
+from typing import Any, Callable, ContextManager, Generic, Iterable, Iterator, List, Optional, Sequence, Type, TypeVar
+
+from pydantic import BaseModel
+
+T = TypeVar("T", bound=BaseModel)
+
+# Função chamada a cada escrita com (antigo, novo): criação (None, novo),
+# atualização (antigo, novo) e exclusão (antigo, None)
+Observador = Callable[[Optional[T], Optional[T]], None]
+
+
+@contextmanager
+def sem_espera(lock: Any) -> Iterator[bool]:
+    """Tenta adquirir ``lock`` sem esperar; entra com ``True`` se conseguiu (e o libera na saída)."""
+    livre = lock.acquire(blocking=False)
+    try:
+        yield livre
+    finally:
+        if livre:
+            lock.release()
+
+
+# Efeitos adiados (``apos_confirmar``) do escopo ``adiar_efeitos`` aberto na thread
+_efeitos = threading.local()
+
+
+def apos_confirmar(funcao: Callable[[], None]) -> None:
+    """Executa um efeito de uma escrita (alerta, aviso, registro fora da transação) depois dela.
+
+    Fora de um escopo ``adiar_efeitos``, a função é chamada na hora; dentro, só quando o
+    escopo terminar sem erro.
+    """
+    pendentes = getattr(_efeitos, "pendentes", None)
+    if pendentes is None:
+        funcao()
+    else:
+        pendentes.append(funcao)
+
+
+@contextmanager
+def adiar_efeitos() -> Iterator[None]:
+    """Adia os efeitos de ``apos_confirmar`` até o fim do bloco e os descarta se ele falhar.
+
+    Escopos aninhados valem pelo mais externo, que é o que confirma (ou desfaz) as escritas.
+    """
+    if getattr(_efeitos, "pendentes", None) is not None:
+        yield
+        return
+    _efeitos.pendentes = []
+    try:
+        yield
+    except BaseException:
+        _efeitos.pendentes = None
+        raise
+    pendentes, _efeitos.pendentes = _efeitos.pendentes, None
+    for funcao in pendentes:
+        funcao()
+
+
+def ordenar_periodo(periodo: int, do_usuario: int, restantes: int, limite: Optional[int]) -> bool:
+    """Decide como paginar o período de um usuário nos índices em memória.
+
+    Ordenar por ID as ``periodo`` entradas do período custa O(p log p) a cada página; percorrer
+    os IDs do usuário a partir do cursor, descartando as datas fora do período, custa cerca de
+    ``limite`` vezes a razão entre os registros do usuário e os do período (no máximo, os
+    ``restantes`` após o cursor). Retorna ``True`` se ordenar o período for mais barato.
+    """
+    ordenar = periodo * max(periodo.bit_length(), 1)
+    percorrer = restantes if limite is None else min(restantes, limite * do_usuario // max(periodo, 1))
+    return ordenar < percorrer
+
+
+class Sequencia:
+    """Gerador monotônico de IDs em memória, seguro para uso concorrente entre threads.
+
+    A alocação é O(1) e IDs excluídos nunca são reutilizados.
+    """
+
+    def __init__(self, inicio: int = 1):
+        self._lock = threading.Lock()
+        self._proximo = inicio
+
+    @property
+    def proximo_valor(self) -> int:
+        """Próximo ID que será alocado (sem alocá-lo)."""
+        return self._proximo
+
+    def proximo(self) -> int:
+        """Aloca e retorna um novo ID."""
+        return self.reservar(1).start
+
+    def reservar(self, quantidade: int) -> range:
+        """Aloca ``quantidade`` IDs consecutivos de uma só vez (útil em inserções em lote)."""
+        if quantidade < 0:
+            raise ValueError("A quantidade reservada não pode ser negativa.")
+        with self._lock:
+            inicio = self._proximo
+            self._proximo += quantidade
+            return range(inicio, self._proximo)
+
+    def avancar(self, valor: int) -> None:
+        """Garante que os próximos IDs sejam maiores que ``valor``."""
+        with self._lock:
+            if valor >= self._proximo:
+                self._proximo = valor + 1
+
+
+class Repositorio(ABC, Generic[T]):
+    """Interface de um repositório de registros Pydantic identificados por ``id``."""
+
+    # Indica se as operações fazem E/S bloqueante (e devem sair do event loop nas rotas async)
+    bloqueante: bool = False
+
+    def __init__(self, modelo: Type[T], sequencia: Sequencia):
+        self.modelo = modelo
+        self.sequencia = sequencia
+        self._observadores: List[Observador] = []
+
+    def observar(self, observador: Observador) -> None:
+        """Registra um observador das escritas do repositório.
+
+        Os observadores rodam dentro da mesma transação da escrita, o que permite manter
+        agregados e índices derivados sempre consistentes com os dados.
+        """
+        self._observadores.append(observador)
+
+    def _notificar(self, antigo: Optional[T], novo: Optional[T]) -> None:
+        for observador in self._observadores:
+            observador(antigo, novo)
+
+    def __iter__(self) -> Iterator[T]:
+        return iter(self.listar())
+
+    def __contains__(self, registro_id: int) -> bool:
+        return self.obter(registro_id) is not None
+
+    @abstractmethod
+    def __len__(self) -> int:
+        ...
+
+    @abstractmethod
+    def ids(self) -> Iterable[int]:
+        """Retorna os IDs cadastrados."""
+
+    @abstractmethod
+    def listar(self) -> List[T]:
+        """Lista todos os registros, em ordem de ID."""
+
+    @abstractmethod
+    def obter(self, registro_id: int) -> Optional[T]:
+        """Retorna o registro com o ID informado, ou ``None``."""
+
+    @abstractmethod
+    def inserir(self, registro: T) -> T:
+        """Insere um registro com o ID já definido. O ID deve ser único."""
+
+    def inserir_varios(self, registros: Sequence[T]) -> Sequence[T]:
+        """Insere vários registros com IDs já definidos."""
+        for registro in registros:
+            self.inserir(registro)
+        return registros
+
+    @abstractmethod
+    def atualizar(self, registro_id: int, registro: T) -> Optional[T]:
+        """Substitui o registro de mesmo ID. Retorna ``None`` se ele não existir."""
+
+    @abstractmethod
+    def remover(self, registro_id: int) -> Optional[T]:
+        """Remove e retorna o registro com o ID informado, ou ``None``."""
+
+    def buscar(self, **criterios: Any) -> List[T]:
+        """Retorna os registros cujos campos são iguais aos critérios informados."""
+        return self.consultar(**criterios)
+
+    @abstractmethod
+    def consultar(
+        self,
+        apos: Optional[int] = None,
+        limite: Optional[int] = None,
+        data_de: Optional[date] = None,
+        data_ate: Optional[date] = None,
+        **criterios: Any,
+    ) -> List[T]:
+        """Consulta paginada por cursor (keyset), em ordem de ID.
+
+        Retorna até ``limite`` registros com ID maior que ``apos`` cujos campos são iguais
+        aos ``criterios`` e cuja ``data`` está entre ``data_de`` e ``data_ate`` (inclusive).
+        Critérios com valor ``None`` são ignorados.
+        """
+
+    def iterar(
+        self,
+        tamanho_pagina: int = 1000,
+        data_de: Optional[date] = None,
+        data_ate: Optional[date] = None,
+        **criterios: Any,
+    ) -> Iterator[T]:
+        """Percorre os registros que atendem aos critérios, página a página, em ordem de ID.
+
+        Só uma página fica em memória por vez, o que permite exportar tabelas inteiras.
+        """
+        apos = None
+        while True:
+            pagina = self.consultar(apos, tamanho_pagina, data_de, data_ate, **criterios)
+            yield from pagina
+            if len(pagina) < tamanho_pagina:
+                return
+            apos = pagina[-1].id
+
+    def _validar_campos(self, campos: Iterable[str]) -> None:
+        desconhecidos = set(campos) - set(self.modelo.model_fields)
+        if desconhecidos:
+            raise AttributeError(f"Campos inexistentes: {', '.join(sorted(desconhecidos))}")
+
+    def transacao(self) -> ContextManager:
+        """Agrupa as escritas do bloco em uma única transação, quando o backend oferece suporte."""
+        return nullcontext()
+
+    def sem_espera(self) -> ContextManager[bool]:
+        """Reserva o repositório para uma operação que não pode esperar por outras threads.
+
+        Entra com ``True`` se nenhuma outra thread o está usando: as operações dentro do bloco
+        rodam sem bloquear. Com ``False`` (o padrão, para backends sem essa garantia), a
+        operação deve sair do event loop.
+        """
+        return nullcontext(False)
+
+    def particao_do_usuario(self, usuario_id: Optional[int]) -> "Repositorio[T]":
+        """Repositório que guarda os registros do usuário: a partição dele, se o repositório for
+        particionado (``RepositorioParticionado``), ou o próprio repositório."""
+        return self
+
+    def criar(self, registro: T) -> T:
+        """Atribui um novo ID ao registro, a partir da sequência, e o insere."""
+        registro.id = self.sequencia.proximo()
+        return self.inserir(registro)
+
+    def criar_varios(self, registros: Sequence[T]) -> Sequence[T]:
+        """Insere vários registros, reservando o bloco de IDs de uma só vez."""
+        for registro, registro_id in zip(registros, self.sequencia.reservar(len(registros))):
+            registro.id = registro_id
+        return self.inserir_varios(registros)
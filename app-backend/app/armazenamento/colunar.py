@@ -0,0 +1,351 @@
+"""
+Repositório em memória colunar, para tabelas grandes de lançamentos (despesas e rendas).
+
+Em vez de um objeto Pydantic por linha (com ``__dict__``, ``float``, ``date`` e ``str``
+próprios), cada campo é guardado em um ``array`` tipado:
+
+- ``id``: int64; demais inteiros (``usuario_id``, ``categoria_id``): int32;
+- ``Decimal`` (valores monetários, ``Dinheiro``): int64 em centavos;
+- ``date``: int32 com o ordinal do dia;
+- ``bool``: int8;
+- ``str``: int32 com a posição no pool de textos, em que cada descrição distinta é
+  guardada uma única vez (-1 representa ``None``).
+
+As linhas ficam ordenadas por ``id``, então a busca por ID é binária e a paginação por
+cursor é uma fatia. Os objetos Pydantic só são criados nas leituras, na fronteira da API.
+"""
+
+
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import date
+from decimal import Decimal
+from typing import Any, Callable, ContextManager, Dict, Iterable, Iterator, List, Optional, Sequence, Type, Union, get_args, get_origin
+
+from app.armazenamento.base import Repositorio, Sequencia, T, ordenar_periodo, sem_espera
+from app.dinheiro import centavos, reais
+
+# Tipo lógico da coluna -> código do array
+_CODIGOS = {"id": "q", "int": "i", "centavos": "q", "data": "i", "bool": "b", "texto": "i"}
+_SEM_TEXTO = -1
+# As chaves do índice por usuário combinam (dia, id) em um único int64
+_DESLOCAMENTO_DATA = 32
+
+
+class _Ausente:
+    """Valor de consulta que não existe na tabela (por exemplo, texto fora do pool)."""
+
+
+_AUSENTE = _Ausente()
+
+
+def _tipo_logico(campo: str, anotacao: Any) -> str:
+    if get_origin(anotacao) is Union:
+        argumentos = [a for a in get_args(anotacao) if a is not type(None)]
+        if len(argumentos) == 1 and argumentos[0] is str:
+            return "texto"
+        raise TypeError(f"Campo opcional não suportado no repositório colunar: {campo}")
+    if campo == "id":
+        return "id"
+    # bool antes de int, pois bool é subclasse de int
+    for tipo, logico in ((bool, "bool"), (int, "int"), (Decimal, "centavos"), (date, "data"), (str, "texto")):
+        if anotacao is tipo:
+            return logico
+    raise TypeError(f"Tipo não suportado no repositório colunar: {campo}: {anotacao!r}")
+
+
+class RepositorioColunar(Repositorio[T]):
+    """Repositório em memória com uma coluna tipada por campo e pool de textos.
+
+    Oferece os mesmos índices do ``RepositorioMemoria`` (igualdade em ``indices`` e período
+    por usuário), guardados como arrays ordenados de IDs.
+    """
+
+    def __init__(
+        self,
+        modelo: Type[T],
+        registros: Iterable[T] = (),
+        indices: Sequence[str] = (),
+        sequencia: Optional[Sequencia] = None,
+    ):
+        super().__init__(modelo, sequencia or Sequencia())
+        self._lock = threading.RLock()
+        self._tipos: Dict[str, str] = {
+            campo: _tipo_logico(campo, info.annotation) for campo, info in modelo.model_fields.items()
+        }
+        self._colunas: Dict[str, array] = {campo: array(_CODIGOS[tipo]) for campo, tipo in self._tipos.items()}
+        self._ids = self._colunas["id"]
+        self._textos: List[str] = []
+        self._posicao_texto: Dict[str, int] = {}
+        self._leitura = [
+            (campo, self._colunas[campo], self._conversor(tipo)) for campo, tipo in self._tipos.items()
+        ]
+        self._validar = modelo.__pydantic_validator__.validate_python
+        self._indices: Dict[str, Dict[int, array]] = {campo: {} for campo in indices}
+        self._por_usuario_data: Optional[Dict[int, array]] = (
+            {} if {"usuario_id", "data"} <= set(self._tipos) else None
+        )
+        self.inserir_varios(list(registros))
+
+    # Conversão entre valores do modelo e valores brutos das colunas
+
+    def _para_bruto(self, campo: str, valor: Any, consulta: bool = False) -> Any:
+        tipo = self._tipos[campo]
+        if tipo == "centavos":
+            return centavos(valor)
+        if tipo == "data":
+            return valor.toordinal()
+        if tipo == "bool":
+            return int(bool(valor))
+        if tipo == "texto":
+            if valor is None:
+                return _SEM_TEXTO
+            posicao = self._posicao_texto.get(valor)
+            if posicao is None:
+                if consulta:
+                    return _AUSENTE
+                posicao = self._posicao_texto[valor] = len(self._textos)
+                self._textos.append(valor)
+            return posicao
+        return valor
+
+    def _conversor(self, tipo: str) -> Optional[Callable[[int], Any]]:
+        """Retorna a função que converte o valor bruto da coluna no valor do modelo."""
+        if tipo == "centavos":
+            return reais
+        if tipo == "data":
+            return date.fromordinal
+        if tipo == "bool":
+            return bool
+        if tipo == "texto":
+            textos = self._textos
+            return lambda bruto: None if bruto == _SEM_TEXTO else textos[bruto]
+        return None
+
+    def _linha(self, registro: T) -> Dict[str, Any]:
+        return {campo: self._para_bruto(campo, getattr(registro, campo)) for campo in self._tipos}
+
+    def _materializar(self, posicao: int) -> T:
+        # O validador do modelo é mais rápido que ``model_construct`` para estes tipos simples
+        return self._validar({
+            campo: coluna[posicao] if conversor is None else conversor(coluna[posicao])
+            for campo, coluna, conversor in self._leitura
+        })
+
+    def _posicao(self, registro_id: int) -> Optional[int]:
+        posicao = bisect_left(self._ids, registro_id)
+        if posicao < len(self._ids) and self._ids[posicao] == registro_id:
+            return posicao
+        return None
+
+    # Interface do repositório
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __iter__(self) -> Iterator[T]:
+        return (self._materializar(posicao) for posicao in range(len(self._ids)))
+
+    def __contains__(self, registro_id: int) -> bool:
+        return self._posicao(registro_id) is not None
+
+    def ids(self) -> Iterable[int]:
+        return self._ids.tolist()
+
+    def listar(self) -> List[T]:
+        return list(self)
+
+    def obter(self, registro_id: int) -> Optional[T]:
+        posicao = self._posicao(registro_id)
+        return None if posicao is None else self._materializar(posicao)
+
+    def transacao(self) -> ContextManager:
+        return self._lock
+
+    def sem_espera(self) -> ContextManager[bool]:
+        return sem_espera(self._lock)
+
+    def inserir(self, registro: T) -> T:
+        with self._lock:
+            posicao = bisect_left(self._ids, registro.id)
+            if posicao < len(self._ids) and self._ids[posicao] == registro.id:
+                raise KeyError(f"ID {registro.id} já existe.")
+            self.sequencia.avancar(registro.id)
+            linha = self._linha(registro)
+            for campo, coluna in self._colunas.items():
+                coluna.insert(posicao, linha[campo])
+            self._indexar(linha)
+            self._notificar(None, registro)
+        return registro
+
+    def inserir_varios(self, registros: Sequence[T]) -> Sequence[T]:
+        """Insere vários registros; IDs crescentes e maiores que os existentes viram um ``extend``."""
+        with self._lock:
+            ids = [registro.id for registro in registros]
+            if len(set(ids)) != len(ids) or any(i in self for i in ids):
+                raise KeyError("IDs repetidos ou já existentes no lote.")
+            if not ids:
+                return registros
+            crescentes = all(a < b for a, b in zip(ids, ids[1:]))
+            if not crescentes or (self._ids and ids[0] < self._ids[-1]):
+                for registro in registros:
+                    self.inserir(registro)
+                return registros
+            self.sequencia.avancar(ids[-1])
+            linhas = [self._linha(registro) for registro in registros]
+            for campo, coluna in self._colunas.items():
+                coluna.extend(linha[campo] for linha in linhas)
+            # IDs novos são os maiores, então as listas de IDs dos índices seguem ordenadas
+            for campo, indice in self._indices.items():
+                for linha in linhas:
+                    indice.setdefault(linha[campo], array("q")).append(linha["id"])
+            if self._por_usuario_data is not None:
+                novas: Dict[int, List[int]] = {}
+                for linha in linhas:
+                    novas.setdefault(linha["usuario_id"], []).append(self._chave_data(linha))
+                for usuario_id, chaves in novas.items():
+                    self._mesclar(self._por_usuario_data.setdefault(usuario_id, array("q")), chaves)
+            for registro in registros:
+                self._notificar(None, registro)
+        return registros
+
+    def atualizar(self, registro_id: int, registro: T) -> Optional[T]:
+        with self._lock:
+            posicao = self._posicao(registro_id)
+            if posicao is None:
+                return None
+            antigo = self._materializar(posicao)
+            registro.id = registro_id
+            linha_antiga = {campo: coluna[posicao] for campo, coluna in self._colunas.items()}
+            linha = self._linha(registro)
+            self._desindexar(linha_antiga)
+            for campo, coluna in self._colunas.items():
+                coluna[posicao] = linha[campo]
+            self._indexar(linha)
+            self._notificar(antigo, registro)
+        return registro
+
+    def remover(self, registro_id: int) -> Optional[T]:
+        with self._lock:
+            posicao = self._posicao(registro_id)
+            if posicao is None:
+                return None
+            antigo = self._materializar(posicao)
+            linha = {campo: coluna[posicao] for campo, coluna in self._colunas.items()}
+            for coluna in self._colunas.values():
+                del coluna[posicao]
+            self._desindexar(linha)
+            self._notificar(antigo, None)
+        return antigo
+
+    def consultar(
+        self,
+        apos: Optional[int] = None,
+        limite: Optional[int] = None,
+        data_de: Optional[date] = None,
+        data_ate: Optional[date] = None,
+        **criterios: Any,
+    ) -> List[T]:
+        criterios = {campo: valor for campo, valor in criterios.items() if valor is not None}
+        self._validar_campos(list(criterios) + (["data"] if data_de or data_ate else []))
+        resultado: List[T] = []
+        if limite == 0:
+            return resultado
+        brutos = {campo: self._para_bruto(campo, valor, consulta=True) for campo, valor in criterios.items()}
+        if any(bruto is _AUSENTE for bruto in brutos.values()):
+            return resultado
+        dia_de = data_de.toordinal() if data_de else None
+        dia_ate = data_ate.toordinal() if data_ate else None
+        filtros = [(self._colunas[campo], bruto) for campo, bruto in brutos.items()]
+        datas = self._colunas.get("data")
+        with self._lock:
+            for posicao in self._candidatos(brutos, apos, limite, dia_de, dia_ate):
+                if dia_de is not None and datas[posicao] < dia_de:
+                    continue
+                if dia_ate is not None and datas[posicao] > dia_ate:
+                    continue
+                if all(coluna[posicao] == bruto for coluna, bruto in filtros):
+                    resultado.append(self._materializar(posicao))
+                    if len(resultado) == limite:
+                        break
+        return resultado
+
+    # Índices
+
+    def _candidatos(
+        self,
+        brutos: Dict[str, Any],
+        apos: Optional[int],
+        limite: Optional[int],
+        dia_de: Optional[int],
+        dia_ate: Optional[int],
+    ) -> Iterable[int]:
+        """Escolhe o índice mais seletivo e retorna as posições candidatas, em ordem de ID."""
+        inicio = 0 if apos is None else apos + 1
+
+        # Período de um usuário: ordena por ID só as entradas do período, ou percorre os IDs do
+        # usuário a partir do cursor quando o período cobre boa parte deles
+        if self._por_usuario_data is not None and "usuario_id" in brutos and (dia_de or dia_ate):
+            chaves = self._por_usuario_data.get(brutos["usuario_id"], array("q"))
+            de = bisect_left(chaves, dia_de << _DESLOCAMENTO_DATA) if dia_de else 0
+            ate = bisect_left(chaves, (dia_ate + 1) << _DESLOCAMENTO_DATA) if dia_ate else len(chaves)
+            do_usuario = self._indices["usuario_id"].get(brutos["usuario_id"]) if "usuario_id" in self._indices else None
+            if do_usuario is None or ordenar_periodo(
+                ate - de, len(do_usuario), len(do_usuario) - bisect_left(do_usuario, inicio), limite
+            ):
+                mascara = (1 << _DESLOCAMENTO_DATA) - 1
+                ids = sorted(i for i in (chave & mascara for chave in chaves[de:ate]) if i >= inicio)
+                return (self._posicao(i) for i in ids)
+            return (self._posicao(do_usuario[i]) for i in range(bisect_left(do_usuario, inicio), len(do_usuario)))
+
+        listas = [self._indices[c].get(v, array("q")) for c, v in brutos.items() if c in self._indices]
+        if listas:
+            ids = min(listas, key=len)
+            return (self._posicao(ids[i]) for i in range(bisect_left(ids, inicio), len(ids)))
+
+        return range(bisect_left(self._ids, inicio), len(self._ids))
+
+    @staticmethod
+    def _chave_data(linha: Dict[str, Any]) -> int:
+        return linha["data"] << _DESLOCAMENTO_DATA | linha["id"]
+
+    @staticmethod
+    def _mesclar(chaves: array, novas: List[int]) -> None:
+        novas.sort()
+        posicao = bisect_right(chaves, novas[0])
+        if posicao == len(chaves):
+            chaves.extend(novas)
+        else:
+            chaves[posicao:] = array("q", sorted(chaves[posicao:].tolist() + novas))
+
+    def _indexar(self, linha: Dict[str, Any]) -> None:
+        for campo, indice in self._indices.items():
+            ids = indice.setdefault(linha[campo], array("q"))
+            if not ids or ids[-1] < linha["id"]:
+                ids.append(linha["id"])
+            else:
+                ids.insert(bisect_left(ids, linha["id"]), linha["id"])
+        if self._por_usuario_data is not None:
+            chaves = self._por_usuario_data.setdefault(linha["usuario_id"], array("q"))
+            chave = self._chave_data(linha)
+            chaves.insert(bisect_left(chaves, chave), chave)
+
+    def _desindexar(self, linha: Dict[str, Any]) -> None:
+        for campo, indice in self._indices.items():
+            ids = indice.get(linha[campo])
+            if ids is not None:
+                posicao = bisect_left(ids, linha["id"])
+                if posicao < len(ids) and ids[posicao] == linha["id"]:
+                    del ids[posicao]
+                if not ids:
+                    del indice[linha[campo]]
+        if self._por_usuario_data is not None:
+            chaves = self._por_usuario_data.get(linha["usuario_id"])
+            if chaves is not None:
+                chave = self._chave_data(linha)
+                posicao = bisect_left(chaves, chave)
+                if posicao < len(chaves) and chaves[posicao] == chave:
+                    del chaves[posicao]
+                if not chaves:
+                    del self._por_usuario_data[linha["usuario_id"]]
@@ -0,0 +1,234 @@
+"""
+Repositório em memória, indexado por ``id`` e por campos secundários.
+
+É o backend padrão em desenvolvimento e testes: não persiste nada entre reinícios.
+"""
+
+
+import threading
+from bisect import bisect_left, bisect_right, insort
+from datetime import date
+from typing import Any, ContextManager, Dict, Iterable, List, Optional, Sequence, Tuple, Type
+
+from app.armazenamento.base import Repositorio, Sequencia, T, ordenar_periodo, sem_espera
+
+
+def _inserir_ordenado(lista: list, valor: Any) -> None:
+    # IDs novos são sempre os maiores, então o caso comum é um append
+    if not lista or lista[-1] < valor:
+        lista.append(valor)
+    else:
+        insort(lista, valor)
+
+
+def _remover_ordenado(lista: list, valor: Any) -> None:
+    posicao = bisect_left(lista, valor)
+    if posicao < len(lista) and lista[posicao] == valor:
+        del lista[posicao]
+
+
+def _mesclar_cauda(lista: list, tamanho: int) -> None:
+    """Reordena ``lista`` cujos primeiros ``tamanho`` itens já estão ordenados.
+
+    Só o trecho a partir da posição do menor item novo é reordenado; em extratos
+    cronológicos, isso é praticamente só a cauda recém-inserida.
+    """
+    cauda = sorted(lista[tamanho:])
+    del lista[tamanho:]
+    posicao = bisect_right(lista, cauda[0])
+    # O Timsort mescla as duas sequências já ordenadas em tempo linear
+    lista[posicao:] = sorted(lista[posicao:] + cauda)
+
+
+class RepositorioMemoria(Repositorio[T]):
+    """Repositório em memória de registros Pydantic, indexado por ``id``.
+
+    Consultas, atualizações e exclusões por ID custam O(1). Os índices secundários mapeiam
+    ``valor do campo -> lista ordenada de IDs``, o que permite paginar por cursor com busca
+    binária. Quando o modelo tem ``usuario_id`` e ``data``, mantém também, por usuário, a
+    lista ordenada de ``(data, id)`` para consultas por período.
+
+    Escritas e consultas são serializadas por um ``RLock``, que também é o retorno de
+    ``transacao()``: um bloco de leitura e escrita dentro dela é atômico em relação às
+    demais escritas.
+    """
+
+    def __init__(
+        self,
+        modelo: Type[T],
+        registros: Iterable[T] = (),
+        indices: Sequence[str] = (),
+        sequencia: Optional[Sequencia] = None,
+    ):
+        super().__init__(modelo, sequencia or Sequencia())
+        self._lock = threading.RLock()
+        self._registros: Dict[int, T] = {}
+        self._indices: Dict[str, Dict[Any, List[int]]] = {campo: {} for campo in indices}
+        self._por_usuario_data: Optional[Dict[int, List[Tuple[date, int]]]] = (
+            {} if {"usuario_id", "data"} <= set(modelo.model_fields) else None
+        )
+        for registro in registros:
+            self.inserir(registro)
+
+    def __len__(self) -> int:
+        return len(self._registros)
+
+    def __iter__(self):
+        return iter(self._registros.values())
+
+    def __contains__(self, registro_id: int) -> bool:
+        return registro_id in self._registros
+
+    def ids(self) -> Iterable[int]:
+        return self._registros.keys()
+
+    def listar(self) -> List[T]:
+        return list(self._registros.values())
+
+    def obter(self, registro_id: int) -> Optional[T]:
+        return self._registros.get(registro_id)
+
+    def transacao(self) -> ContextManager:
+        return self._lock
+
+    def sem_espera(self) -> ContextManager[bool]:
+        return sem_espera(self._lock)
+
+    def inserir(self, registro: T) -> T:
+        with self._lock:
+            if registro.id in self._registros:
+                raise KeyError(f"ID {registro.id} já existe.")
+            self.sequencia.avancar(registro.id)
+            self._registros[registro.id] = registro
+            self._indexar(registro)
+            self._notificar(None, registro)
+        return registro
+
+    def inserir_varios(self, registros: Sequence[T]) -> Sequence[T]:
+        """Insere vários registros, reordenando cada lista de índice afetada uma única vez."""
+        with self._lock:
+            ids = [registro.id for registro in registros]
+            if len(set(ids)) != len(ids) or any(i in self._registros for i in ids):
+                raise KeyError("IDs repetidos ou já existentes no lote.")
+            if ids:
+                self.sequencia.avancar(max(ids))
+            # Lista de índice afetada -> tamanho antes do lote
+            afetadas: Dict[int, Tuple[list, int]] = {}
+            for registro in registros:
+                self._registros[registro.id] = registro
+                chaves = [(indice.setdefault(getattr(registro, campo), []), registro.id)
+                          for campo, indice in self._indices.items()]
+                if self._por_usuario_data is not None:
+                    chaves.append((self._por_usuario_data.setdefault(registro.usuario_id, []),
+                                   (registro.data, registro.id)))
+                for lista, chave in chaves:
+                    afetadas.setdefault(id(lista), (lista, len(lista)))
+                    lista.append(chave)
+            for lista, tamanho in afetadas.values():
+                _mesclar_cauda(lista, tamanho)
+            for registro in registros:
+                self._notificar(None, registro)
+        return registros
+
+    def atualizar(self, registro_id: int, registro: T) -> Optional[T]:
+        with self._lock:
+            antigo = self._registros.get(registro_id)
+            if antigo is None:
+                return None
+            registro.id = registro_id
+            self._desindexar(antigo)
+            self._registros[registro_id] = registro
+            self._indexar(registro)
+            self._notificar(antigo, registro)
+        return registro
+
+    def remover(self, registro_id: int) -> Optional[T]:
+        with self._lock:
+            registro = self._registros.pop(registro_id, None)
+            if registro is not None:
+                self._desindexar(registro)
+                self._notificar(registro, None)
+        return registro
+
+    def consultar(
+        self,
+        apos: Optional[int] = None,
+        limite: Optional[int] = None,
+        data_de: Optional[date] = None,
+        data_ate: Optional[date] = None,
+        **criterios: Any,
+    ) -> List[T]:
+        criterios = {campo: valor for campo, valor in criterios.items() if valor is not None}
+        self._validar_campos(list(criterios) + (["data"] if data_de or data_ate else []))
+        resultado: List[T] = []
+        if limite == 0:
+            return resultado
+        # Os candidatos vêm direto dos índices, que não podem mudar durante a varredura
+        with self._lock:
+            for registro_id in self._candidatos(criterios, apos, limite, data_de, data_ate):
+                registro = self._registros[registro_id]
+                if data_de is not None and registro.data < data_de:
+                    continue
+                if data_ate is not None and registro.data > data_ate:
+                    continue
+                if all(getattr(registro, campo) == valor for campo, valor in criterios.items()):
+                    resultado.append(registro)
+                    if len(resultado) == limite:
+                        break
+        return resultado
+
+    def _candidatos(
+        self,
+        criterios: Dict[str, Any],
+        apos: Optional[int],
+        limite: Optional[int],
+        data_de: Optional[date],
+        data_ate: Optional[date],
+    ) -> Iterable[int]:
+        """Escolhe o índice mais seletivo e retorna os IDs candidatos, em ordem, após ``apos``."""
+        inicio = 0 if apos is None else apos + 1
+
+        # Período de um usuário: busca binária na lista (data, id) do usuário. Se o período
+        # cobre boa parte dos registros do usuário, a lista de IDs do usuário é percorrida a
+        # partir do cursor (as datas são filtradas na consulta), sem reordenar a cada página
+        if self._por_usuario_data is not None and "usuario_id" in criterios and (data_de or data_ate):
+            entradas = self._por_usuario_data.get(criterios["usuario_id"], [])
+            de = bisect_left(entradas, (data_de,)) if data_de else 0
+            ate = bisect_right(entradas, (data_ate, float("inf"))) if data_ate else len(entradas)
+            ids = self._indices.get("usuario_id", {}).get(criterios["usuario_id"])
+            if ids is None or ordenar_periodo(ate - de, len(ids), len(ids) - bisect_left(ids, inicio), limite):
+                return sorted(i for _, i in entradas[de:ate] if i >= inicio)
+            return (ids[i] for i in range(bisect_left(ids, inicio), len(ids)))
+
+        # Igualdade em campo indexado: a menor lista de IDs, a partir do cursor
+        listas = [self._indices[c].get(v, []) for c, v in criterios.items() if c in self._indices]
+        if listas:
+            ids = min(listas, key=len)
+            return (ids[i] for i in range(bisect_left(ids, inicio), len(ids)))
+
+        # Sem índice aplicável: percorre os IDs a partir do cursor
+        if apos is None:
+            return iter(self._registros)
+        return (i for i in range(inicio, self.sequencia.proximo_valor) if i in self._registros)
+
+    def _indexar(self, registro: T) -> None:
+        for campo, indice in self._indices.items():
+            _inserir_ordenado(indice.setdefault(getattr(registro, campo), []), registro.id)
+        if self._por_usuario_data is not None:
+            entradas = self._por_usuario_data.setdefault(registro.usuario_id, [])
+            _inserir_ordenado(entradas, (registro.data, registro.id))
+
+    def _desindexar(self, registro: T) -> None:
+        for campo, indice in self._indices.items():
+            valor = getattr(registro, campo)
+            ids = indice.get(valor)
+            if ids is not None:
+                _remover_ordenado(ids, registro.id)
+                if not ids:
+                    del indice[valor]
+        if self._por_usuario_data is not None:
+            entradas = self._por_usuario_data.get(registro.usuario_id)
+            if entradas is not None:
+                _remover_ordenado(entradas, (registro.data, registro.id))
+                if not entradas:
+                    del self._por_usuario_data[registro.usuario_id]
@@ -0,0 +1,226 @@
+"""
+Repositório particionado por usuário.
+
+Os registros de cada usuário ficam em uma única partição, escolhida por ``particao``, e cada
+partição é um repositório completo de um dos demais backends. Em memória, cada partição tem
+o seu próprio lock; no SQLite, o seu próprio arquivo, com o seu próprio escritor. Assim, as
+escritas de usuários de partições diferentes não disputam o mesmo lock, e um usuário com
+muitos registros não deixa mais lentas as consultas dos outros.
+
+Operações com ``usuario_id`` (consultas filtradas por usuário, escritas) tocam só a partição
+do usuário; ``particao_do_usuario`` dá acesso direto a ela, para as rotas que já conhecem o
+usuário da requisição. As demais consultas percorrem as partições e intercalam os resultados
+em ordem de ID. As partições compartilham a mesma sequência, então os IDs continuam únicos.
+Um registro que muda de usuário passa para a partição do novo usuário, com as duas partições
+reservadas na mesma ordem de ``transacao``.
+"""
+
+
+import heapq
+from contextlib import ExitStack, contextmanager
+from datetime import date
+from itertools import chain, islice
+from operator import attrgetter
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Type
+
+from app.armazenamento.base import Observador, Repositorio, T
+from app.armazenamento.totais import Lancamento, TotaisMensais, TotalMensal
+
+_por_id = attrgetter("id")
+
+
+def particao(usuario_id: int, particoes: int) -> int:
+    """Partição dos dados de um usuário.
+
+    Não depende de ``hash()`` (que varia entre processos), então é a mesma em todos os
+    workers e reinicializações, e pode ser usada fora da API (por exemplo, por um balanceador
+    que encaminhe cada usuário sempre ao mesmo worker).
+    """
+    return usuario_id % particoes
+
+
+class RepositorioParticionado(Repositorio[T]):
+    """Repositório que distribui os registros entre partições pelo ``usuario_id``."""
+
+    def __init__(self, modelo: Type[T], partes: Sequence[Repositorio[T]], registros: Iterable[T] = ()):
+        super().__init__(modelo, partes[0].sequencia)
+        self.bloqueante = any(parte.bloqueante for parte in partes)
+        self._partes = list(partes)
+        registros = list(registros)
+        if registros and len(self) == 0:
+            self.inserir_varios(registros)
+
+    def particao_do_usuario(self, usuario_id: Optional[int]) -> Repositorio[T]:
+        if usuario_id is None:
+            return self
+        return self._partes[particao(usuario_id, len(self._partes))]
+
+    def observar(self, observador: Observador) -> None:
+        # As partições notificam as próprias escritas, mesmo as feitas direto nelas
+        super().observar(observador)
+        for parte in self._partes:
+            parte.observar(observador)
+
+    @contextmanager
+    def transacao(self) -> Iterator[None]:
+        # Sempre na mesma ordem, para que dois blocos não esperem um pelo outro
+        with ExitStack() as transacoes:
+            for parte in self._partes:
+                transacoes.enter_context(parte.transacao())
+            yield
+
+    @contextmanager
+    def sem_espera(self) -> Iterator[bool]:
+        # Só reserva se todas as partições estiverem livres (as consultas podem percorrer todas)
+        with ExitStack() as reservas:
+            yield all(reservas.enter_context(parte.sem_espera()) for parte in self._partes)
+
+    def __len__(self) -> int:
+        return sum(len(parte) for parte in self._partes)
+
+    def ids(self) -> Iterable[int]:
+        return chain.from_iterable(parte.ids() for parte in self._partes)
+
+    def listar(self) -> List[T]:
+        return list(heapq.merge(*(parte.listar() for parte in self._partes), key=_por_id))
+
+    def _parte_do_id(self, registro_id: int) -> Optional[Repositorio[T]]:
+        for parte in self._partes:
+            if parte.obter(registro_id) is not None:
+                return parte
+        return None
+
+    def obter(self, registro_id: int) -> Optional[T]:
+        for parte in self._partes:
+            registro = parte.obter(registro_id)
+            if registro is not None:
+                return registro
+        return None
+
+    def criar(self, registro: T) -> T:
+        # IDs da sequência compartilhada são únicos entre as partições, sem precisar conferi-las
+        registro.id = self.sequencia.proximo()
+        return self.particao_do_usuario(registro.usuario_id).inserir(registro)
+
+    def criar_varios(self, registros: Sequence[T]) -> Sequence[T]:
+        for registro, registro_id in zip(registros, self.sequencia.reservar(len(registros))):
+            registro.id = registro_id
+        self._inserir_por_particao(registros)
+        return registros
+
+    def inserir(self, registro: T) -> T:
+        if self._parte_do_id(registro.id) is not None:
+            raise KeyError(f"ID {registro.id} já existe.")
+        return self.particao_do_usuario(registro.usuario_id).inserir(registro)
+
+    def inserir_varios(self, registros: Sequence[T]) -> Sequence[T]:
+        if any(self._parte_do_id(registro.id) is not None for registro in registros):
+            raise KeyError("IDs repetidos ou já existentes no lote.")
+        self._inserir_por_particao(registros)
+        return registros
+
+    def _inserir_por_particao(self, registros: Sequence[T]) -> None:
+        grupos: Dict[int, List[T]] = {}
+        for registro in registros:
+            grupos.setdefault(particao(registro.usuario_id, len(self._partes)), []).append(registro)
+        for indice, grupo in grupos.items():
+            self._partes[indice].inserir_varios(grupo)
+
+    def atualizar(self, registro_id: int, registro: T) -> Optional[T]:
+        destino = self.particao_do_usuario(registro.usuario_id)
+        atualizado = destino.atualizar(registro_id, registro)
+        if atualizado is not None:
+            return atualizado
+        # O registro mudou de usuário (e de partição): sai da antiga e entra na nova
+        origem = self._parte_do_id(registro_id)
+        if origem is None:
+            return None
+        # As duas partições são reservadas na ordem de ``transacao`` (a das partições), então
+        # duas mudanças em sentidos opostos, ou uma mudança e um lote, não esperam uma pela
+        # outra; e ficam reservadas da conferência à inserção, então quem as lê com a
+        # transação (ou pelo lock, em memória) não vê o registro sumir no meio da mudança
+        with ExitStack() as transacoes:
+            for parte in sorted({origem, destino}, key=self._partes.index):
+                transacoes.enter_context(parte.transacao())
+            # Outra escrita pode ter alterado o registro antes da reserva
+            atualizado = destino.atualizar(registro_id, registro)
+            if atualizado is not None:
+                return atualizado
+            if origem.remover(registro_id) is None:
+                return None
+            registro.id = registro_id
+            return destino.inserir(registro)
+
+    def remover(self, registro_id: int) -> Optional[T]:
+        for parte in self._partes:
+            registro = parte.remover(registro_id)
+            if registro is not None:
+                return registro
+        return None
+
+    def consultar(
+        self,
+        apos: Optional[int] = None,
+        limite: Optional[int] = None,
+        data_de: Optional[date] = None,
+        data_ate: Optional[date] = None,
+        **criterios: Any,
+    ) -> List[T]:
+        if criterios.get("usuario_id") is not None:
+            return self.particao_do_usuario(criterios["usuario_id"]).consultar(
+                apos, limite, data_de, data_ate, **criterios
+            )
+        paginas = [parte.consultar(apos, limite, data_de, data_ate, **criterios) for parte in self._partes]
+        return list(islice(heapq.merge(*paginas, key=_por_id), limite))
+
+
+class TotaisParticionados(TotaisMensais):
+    """Totais mensais divididos nas mesmas partições dos lançamentos que os mantêm.
+
+    No SQLite, os totais de cada partição ficam no arquivo dela e são atualizados na mesma
+    transação da escrita do lançamento.
+    """
+
+    def __init__(self, partes: Sequence[TotaisMensais]):
+        self._partes = list(partes)
+
+    def _parte(self, usuario_id: int) -> TotaisMensais:
+        return self._partes[particao(usuario_id, len(self._partes))]
+
+    def _dividir(self, lancamentos: Iterable[Lancamento]) -> List[List[Lancamento]]:
+        grupos: List[List[Lancamento]] = [[] for _ in self._partes]
+        for lancamento in lancamentos:
+            grupos[particao(lancamento[0], len(self._partes))].append(lancamento)
+        return grupos
+
+    def somar(self, usuario_id: int, tipo: str, mes: str, categoria_id: int, valor: int, quantidade: int) -> None:
+        self._parte(usuario_id).somar(usuario_id, tipo, mes, categoria_id, valor, quantidade)
+
+    def consultar(
+        self,
+        usuario_id: int,
+        mes_de: Optional[str] = None,
+        mes_ate: Optional[str] = None,
+        tipo: Optional[str] = None,
+        categoria_id: Optional[int] = None,
+    ) -> List[TotalMensal]:
+        return self._parte(usuario_id).consultar(usuario_id, mes_de, mes_ate, tipo, categoria_id)
+
+    def reconstruir_se_vazio(self, lancamentos: Callable[[], Iterable[Lancamento]]) -> bool:
+        grupos: Optional[List[List[Lancamento]]] = None
+
+        def da_parte(indice: int) -> Callable[[], Iterable[Lancamento]]:
+            def ler() -> Iterable[Lancamento]:
+                # Os lançamentos só são lidos (uma vez) se alguma partição estiver vazia
+                nonlocal grupos
+                if grupos is None:
+                    grupos = self._dividir(lancamentos())
+                return grupos[indice]
+            return ler
+
+        reconstruidas = [parte.reconstruir_se_vazio(da_parte(i)) for i, parte in enumerate(self._partes)]
+        return any(reconstruidas)
+
+    def reconstruir(self, lancamentos: Iterable[Lancamento]) -> int:
+        grupos = self._dividir(lancamentos)
+        return sum(parte.reconstruir(grupo) for parte, grupo in zip(self._partes, grupos))
@@ -0,0 +1,337 @@
+"""
+Repositório persistente em SQLite (modo WAL).
+
+Cada thread de cada worker usa sua própria conexão (``ConexoesSQLite``), então vários
+processos ``uvicorn --workers N`` podem compartilhar o mesmo arquivo. Os comandos SQL de
+cada repositório são montados uma única vez e reaproveitados pelo cache de statements
+preparados do módulo ``sqlite3``. Valores monetários (campos ``Decimal``) são gravados em
+centavos, em colunas INTEGER.
+"""
+
+
+import os
+import sqlite3
+import threading
+import typing
+from contextlib import contextmanager
+from functools import partial
+from datetime import date
+from decimal import Decimal
+from typing import Any, Callable, ContextManager, Iterable, Iterator, List, Optional, Sequence, Type
+
+from app.armazenamento.base import Repositorio, Sequencia, T, adiar_efeitos
+from app.dinheiro import centavos, reais
+
+_TIPOS_SQL = {int: "INTEGER", float: "REAL", Decimal: "INTEGER", str: "TEXT", bool: "INTEGER", date: "TEXT"}
+
+
+def _tipo_sql(anotacao: Any) -> str:
+    """Converte a anotação de um campo Pydantic no tipo de coluna SQLite."""
+    if anotacao in _TIPOS_SQL:
+        return _TIPOS_SQL[anotacao]
+    # Optional[X] -> X
+    argumentos = [a for a in typing.get_args(anotacao) if a is not type(None)]
+    if len(argumentos) == 1:
+        return _tipo_sql(argumentos[0])
+    return "TEXT"
+
+
+def _para_sql(valor: Any) -> Any:
+    """Converte um valor do modelo no valor gravado (datas em ISO, dinheiro em centavos)."""
+    if isinstance(valor, date):
+        return valor.isoformat()
+    if isinstance(valor, Decimal):
+        return centavos(valor)
+    return valor
+
+
+class ConexoesSQLite:
+    """Pool de conexões SQLite com uma conexão por thread (e por processo)."""
+
+    def __init__(self, caminho: str):
+        self.caminho = caminho
+        self._local = threading.local()
+
+    def conexao(self) -> sqlite3.Connection:
+        """Retorna a conexão da thread atual, abrindo-a se necessário."""
+        conexao = getattr(self._local, "conexao", None)
+        # Após um fork, a conexão herdada do processo pai não pode ser reutilizada
+        if conexao is None or self._local.pid != os.getpid():
+            conexao = sqlite3.connect(
+                self.caminho,
+                isolation_level=None,
+                check_same_thread=False,
+                cached_statements=256,
+            )
+            conexao.execute("PRAGMA journal_mode=WAL")
+            conexao.execute("PRAGMA synchronous=NORMAL")
+            conexao.execute("PRAGMA busy_timeout=5000")
+            self._local.conexao = conexao
+            self._local.pid = os.getpid()
+        return conexao
+
+    @contextmanager
+    def transacao(self) -> Iterator[sqlite3.Connection]:
+        """Executa o bloco em uma transação de escrita; transações aninhadas reaproveitam a externa."""
+        conexao = self.conexao()
+        if conexao.in_transaction:
+            yield conexao
+            return
+        # Os efeitos das escritas (alertas, avisos) só acontecem depois do COMMIT
+        with adiar_efeitos():
+            conexao.execute("BEGIN IMMEDIATE")
+            self._local.ao_desfazer = []
+            try:
+                yield conexao
+            except BaseException:
+                conexao.execute("ROLLBACK")
+                ao_desfazer, self._local.ao_desfazer = self._local.ao_desfazer, []
+                for funcao in ao_desfazer:
+                    funcao()
+                raise
+            conexao.execute("COMMIT")
+
+    def ao_desfazer(self, funcao: Callable[[], None]) -> None:
+        """Registra uma função a ser chamada, depois do ROLLBACK, se a transação atual for desfeita."""
+        if self.conexao().in_transaction:
+            self._local.ao_desfazer.append(funcao)
+
+
+class SequenciaSQLite(Sequencia):
+    """Sequência persistida na tabela ``sequencias``.
+
+    Cada processo reserva atomicamente um bloco de ``bloco`` IDs no banco e os distribui
+    em memória, então a alocação continua O(1) e os IDs não colidem entre workers nem são
+    reutilizados após um reinício.
+    """
+
+    def __init__(self, conexoes: ConexoesSQLite, nome: str, bloco: int = 1000):
+        super().__init__(inicio=0)
+        self._conexoes = conexoes
+        self._nome = nome
+        self._bloco = bloco
+        self._limite = 0
+        conexoes.conexao().execute(
+            "CREATE TABLE IF NOT EXISTS sequencias (nome TEXT PRIMARY KEY, proximo INTEGER NOT NULL)"
+        )
+
+    def reservar(self, quantidade: int) -> range:
+        if quantidade < 0:
+            raise ValueError("A quantidade reservada não pode ser negativa.")
+        with self._lock:
+            if self._proximo + quantidade > self._limite:
+                self._proximo = self._reservar_bloco(max(self._bloco, quantidade))
+            inicio = self._proximo
+            self._proximo += quantidade
+            return range(inicio, self._proximo)
+
+    def avancar(self, valor: int) -> None:
+        with self._lock:
+            if valor < self._proximo:
+                return
+            self._gravar_minimo(valor + 1)
+            # Descarta o bloco local, que pode conter o valor informado
+            self._proximo = self._limite = 0
+
+    def _gravar_minimo(self, proximo: int) -> None:
+        with self._conexoes.transacao() as conexao:
+            conexao.execute(
+                "INSERT INTO sequencias (nome, proximo) VALUES (?, ?) "
+                "ON CONFLICT(nome) DO UPDATE SET proximo = MAX(proximo, excluded.proximo)",
+                (self._nome, proximo),
+            )
+
+    def _reservar_bloco(self, tamanho: int) -> int:
+        with self._conexoes.transacao() as conexao:
+            linha = conexao.execute(
+                "SELECT proximo FROM sequencias WHERE nome = ?", (self._nome,)
+            ).fetchone()
+            inicio = linha[0] if linha else 1
+            conexao.execute(
+                "INSERT INTO sequencias (nome, proximo) VALUES (?, ?) "
+                "ON CONFLICT(nome) DO UPDATE SET proximo = excluded.proximo",
+                (self._nome, inicio + tamanho),
+            )
+            # Dentro de uma transação maior, a reserva é desfeita se ela falhar; como os IDs do
+            # bloco já podem ter sido distribuídos, o bloco é gravado de novo após o ROLLBACK
+            self._conexoes.ao_desfazer(partial(self._gravar_minimo, inicio + tamanho))
+        self._limite = inicio + tamanho
+        return inicio
+
+
+class RepositorioSQLite(Repositorio[T]):
+    """Repositório de registros Pydantic persistido em uma tabela SQLite.
+
+    As colunas são derivadas dos campos do modelo. Além dos índices pedidos em ``indices``,
+    são criados índices compostos em ``(usuario_id, data)`` e ``(usuario_id, categoria_id)``
+    quando o modelo possui esses campos.
+    """
+
+    bloqueante = True
+
+    def __init__(
+        self,
+        modelo: Type[T],
+        conexoes: ConexoesSQLite,
+        tabela: str,
+        registros: Iterable[T] = (),
+        indices: Sequence[str] = (),
+        sequencia: Optional[Sequencia] = None,
+    ):
+        super().__init__(modelo, sequencia or SequenciaSQLite(conexoes, tabela))
+        self._conexoes = conexoes
+        self._tabela = tabela
+        self._colunas = list(modelo.model_fields)
+        self._monetarias = [campo for campo, info in modelo.model_fields.items() if info.annotation is Decimal]
+
+        colunas = ", ".join(self._colunas)
+        self._sql_listar = f"SELECT {colunas} FROM {tabela} ORDER BY id"
+        self._sql_obter = f"SELECT {colunas} FROM {tabela} WHERE id = ?"
+        self._sql_inserir = (
+            f"INSERT INTO {tabela} ({colunas}) VALUES ({', '.join('?' for _ in self._colunas)})"
+        )
+        self._sql_atualizar = (
+            f"UPDATE {tabela} SET {', '.join(f'{c} = ?' for c in self._colunas[1:])} WHERE id = ?"
+        )
+        self._sql_remover = f"DELETE FROM {tabela} WHERE id = ? RETURNING {colunas}"
+
+        self._criar_tabela(indices)
+        if registros and len(self) == 0:
+            self.inserir_varios(list(registros))
+
+    def _criar_tabela(self, indices: Sequence[str]) -> None:
+        definicoes = [
+            f"{campo} {_tipo_sql(info.annotation)}" + (" PRIMARY KEY" if campo == "id" else "")
+            for campo, info in self.modelo.model_fields.items()
+        ]
+        compostos = [
+            (c1, c2) for c1, c2 in (("usuario_id", "data"), ("usuario_id", "categoria_id"))
+            if c1 in self._colunas and c2 in self._colunas
+        ]
+        simples = [(campo,) for campo in indices if not any(campo == c[0] for c in compostos)]
+        with self._conexoes.transacao() as conexao:
+            self._migrar_centavos(conexao, definicoes)
+            conexao.execute(f"CREATE TABLE IF NOT EXISTS {self._tabela} ({', '.join(definicoes)})")
+            for campos in compostos + simples:
+                conexao.execute(
+                    f"CREATE INDEX IF NOT EXISTS idx_{self._tabela}_{'_'.join(campos)} "
+                    f"ON {self._tabela} ({', '.join(campos)})"
+                )
+
+    def _migrar_centavos(self, conexao: sqlite3.Connection, definicoes: List[str]) -> None:
+        """Converte as colunas monetárias de tabelas antigas (REAL, em reais) para centavos.
+
+        A tabela é recriada, já que o SQLite não altera o tipo de uma coluna; os índices são
+        recriados em seguida por ``_criar_tabela``.
+        """
+        tipos = {linha[1]: linha[2] for linha in conexao.execute(f"PRAGMA table_info({self._tabela})")}
+        antigas = [campo for campo in self._monetarias if tipos.get(campo) == "REAL"]
+        if not antigas:
+            return
+        nova = f"{self._tabela}__centavos"
+        colunas = ", ".join(self._colunas)
+        selecao = ", ".join(
+            f"CAST(ROUND({campo} * 100) AS INTEGER)" if campo in antigas else campo for campo in self._colunas
+        )
+        conexao.execute(f"CREATE TABLE {nova} ({', '.join(definicoes)})")
+        conexao.execute(f"INSERT INTO {nova} ({colunas}) SELECT {selecao} FROM {self._tabela}")
+        conexao.execute(f"DROP TABLE {self._tabela}")
+        conexao.execute(f"ALTER TABLE {nova} RENAME TO {self._tabela}")
+
+    def _para_linha(self, registro: T) -> tuple:
+        return tuple(_para_sql(getattr(registro, coluna)) for coluna in self._colunas)
+
+    def _de_linha(self, linha: Sequence[Any]) -> T:
+        valores = dict(zip(self._colunas, linha))
+        for campo in self._monetarias:
+            if valores[campo] is not None:
+                valores[campo] = reais(valores[campo])
+        return self.modelo.model_validate(valores)
+
+    def transacao(self) -> ContextManager:
+        return self._conexoes.transacao()
+
+    def __len__(self) -> int:
+        return self._conexoes.conexao().execute(f"SELECT COUNT(*) FROM {self._tabela}").fetchone()[0]
+
+    def ids(self) -> Iterable[int]:
+        cursor = self._conexoes.conexao().execute(f"SELECT id FROM {self._tabela} ORDER BY id")
+        return [linha[0] for linha in cursor]
+
+    def listar(self) -> List[T]:
+        return [self._de_linha(linha) for linha in self._conexoes.conexao().execute(self._sql_listar)]
+
+    def obter(self, registro_id: int) -> Optional[T]:
+        linha = self._conexoes.conexao().execute(self._sql_obter, (registro_id,)).fetchone()
+        return self._de_linha(linha) if linha else None
+
+    def inserir(self, registro: T) -> T:
+        self.sequencia.avancar(registro.id)
+        try:
+            with self._conexoes.transacao() as conexao:
+                conexao.execute(self._sql_inserir, self._para_linha(registro))
+                self._notificar(None, registro)
+        except sqlite3.IntegrityError as erro:
+            raise KeyError(f"ID {registro.id} já existe.") from erro
+        return registro
+
+    def inserir_varios(self, registros: Sequence[T]) -> Sequence[T]:
+        if registros:
+            self.sequencia.avancar(max(r.id for r in registros))
+        with self._conexoes.transacao() as conexao:
+            conexao.executemany(self._sql_inserir, (self._para_linha(r) for r in registros))
+            for registro in registros:
+                self._notificar(None, registro)
+        return registros
+
+    def atualizar(self, registro_id: int, registro: T) -> Optional[T]:
+        registro.id = registro_id
+        linha = self._para_linha(registro)
+        with self._conexoes.transacao() as conexao:
+            # O registro anterior só é lido quando há observadores interessados nele
+            antigo = self.obter(registro_id) if self._observadores else None
+            cursor = conexao.execute(self._sql_atualizar, linha[1:] + (registro_id,))
+            if not cursor.rowcount:
+                return None
+            self._notificar(antigo, registro)
+        return registro
+
+    def remover(self, registro_id: int) -> Optional[T]:
+        with self._conexoes.transacao() as conexao:
+            linhas = conexao.execute(self._sql_remover, (registro_id,)).fetchall()
+            if not linhas:
+                return None
+            registro = self._de_linha(linhas[0])
+            self._notificar(registro, None)
+        return registro
+
+    def consultar(
+        self,
+        apos: Optional[int] = None,
+        limite: Optional[int] = None,
+        data_de: Optional[date] = None,
+        data_ate: Optional[date] = None,
+        **criterios: Any,
+    ) -> List[T]:
+        criterios = {campo: valor for campo, valor in criterios.items() if valor is not None}
+        self._validar_campos(list(criterios) + (["data"] if data_de or data_ate else []))
+        condicoes = [f"{campo} = ?" for campo in criterios]
+        valores = list(criterios.values())
+        if data_de is not None:
+            condicoes.append("data >= ?")
+            valores.append(data_de)
+        if data_ate is not None:
+            condicoes.append("data <= ?")
+            valores.append(data_ate)
+        if apos is not None:
+            condicoes.append("id > ?")
+            valores.append(apos)
+        sql = f"SELECT {', '.join(self._colunas)} FROM {self._tabela}"
+        if condicoes:
+            sql += f" WHERE {' AND '.join(condicoes)}"
+        sql += " ORDER BY id"
+        if limite is not None:
+            sql += " LIMIT ?"
+            valores.append(limite)
+        valores = [_para_sql(v) for v in valores]
+        return [self._de_linha(linha) for linha in self._conexoes.conexao().execute(sql, valores)]
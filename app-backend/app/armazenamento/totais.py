@@ -0,0 +1,212 @@
+"""
+Totais mensais acumulados por usuário, tipo ('renda' ou 'despesa'), mês e categoria.
+
+Os totais são mantidos incrementalmente pelos observadores dos repositórios, então um
+resumo financeiro custa O(meses x categorias) em vez de O(transações). Os valores são
+somados em centavos inteiros, sem o acúmulo de erro de arredondamento do ``float``.
+"""
+
+
+import threading
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from app.armazenamento.sqlite import ConexoesSQLite
+
+
+class TotalMensal(NamedTuple):
+    """Soma e quantidade de lançamentos de um (tipo, mês, categoria) de um usuário."""
+    tipo: str
+    mes: str  # 'AAAA-MM'
+    categoria_id: int
+    total: int  # em centavos
+    quantidade: int
+
+
+# Lançamento a ser somado: (usuario_id, tipo, mês, categoria_id, valor em centavos)
+Lancamento = Tuple[int, str, str, int, int]
+
+
+class TotaisMensais(ABC):
+    """Tabela de totais mensais, atualizada a cada escrita de despesa ou renda."""
+
+    @abstractmethod
+    def somar(self, usuario_id: int, tipo: str, mes: str, categoria_id: int, valor: int, quantidade: int) -> None:
+        """Soma ``valor`` (em centavos) e ``quantidade`` (que podem ser negativos) ao total da chave."""
+
+    @abstractmethod
+    def consultar(
+        self,
+        usuario_id: int,
+        mes_de: Optional[str] = None,
+        mes_ate: Optional[str] = None,
+        tipo: Optional[str] = None,
+        categoria_id: Optional[int] = None,
+    ) -> List[TotalMensal]:
+        """Retorna os totais do usuário no intervalo de meses (inclusive), ordenados por mês."""
+
+    @abstractmethod
+    def reconstruir_se_vazio(self, lancamentos: Callable[[], Iterable[Lancamento]]) -> bool:
+        """Recalcula os totais a partir dos ``lancamentos`` se a tabela estiver vazia.
+
+        Usado na inicialização; retorna ``True`` se a reconstrução foi feita.
+        """
+
+    @abstractmethod
+    def reconstruir(self, lancamentos: Iterable[Lancamento]) -> int:
+        """Recalcula todos os totais a partir dos ``lancamentos``, corrigindo divergências.
+
+        Deve ser chamado com as escritas de despesas e rendas bloqueadas (dentro das
+        transações dos repositórios). Retorna a quantidade de totais que estavam errados.
+        """
+
+
+def _agregar(lancamentos: Iterable[Lancamento]) -> Dict[Tuple[int, str, str, int], List[int]]:
+    totais: Dict[Tuple[int, str, str, int], List[int]] = {}
+    for usuario_id, tipo, mes, categoria_id, valor in lancamentos:
+        total = totais.setdefault((usuario_id, tipo, mes, categoria_id), [0, 0])
+        total[0] += valor
+        total[1] += 1
+    return totais
+
+
+class TotaisMensaisMemoria(TotaisMensais):
+    """Totais mensais em memória, agrupados por usuário."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._por_usuario: Dict[int, Dict[Tuple[str, str, int], List]] = {}
+
+    def somar(self, usuario_id: int, tipo: str, mes: str, categoria_id: int, valor: int, quantidade: int) -> None:
+        with self._lock:
+            totais = self._por_usuario.setdefault(usuario_id, {})
+            total = totais.setdefault((tipo, mes, categoria_id), [0, 0])
+            total[0] += valor
+            total[1] += quantidade
+            if total[1] == 0:
+                del totais[(tipo, mes, categoria_id)]
+
+    def consultar(
+        self,
+        usuario_id: int,
+        mes_de: Optional[str] = None,
+        mes_ate: Optional[str] = None,
+        tipo: Optional[str] = None,
+        categoria_id: Optional[int] = None,
+    ) -> List[TotalMensal]:
+        with self._lock:
+            itens = list(self._por_usuario.get(usuario_id, {}).items())
+        resultado = [
+            TotalMensal(t, mes, c, total, quantidade)
+            for (t, mes, c), (total, quantidade) in itens
+            if (tipo is None or t == tipo)
+            and (categoria_id is None or c == categoria_id)
+            and (mes_de is None or mes >= mes_de)
+            and (mes_ate is None or mes <= mes_ate)
+        ]
+        resultado.sort(key=lambda t: (t.mes, t.tipo, t.categoria_id))
+        return resultado
+
+    def reconstruir_se_vazio(self, lancamentos: Callable[[], Iterable[Lancamento]]) -> bool:
+        if self._por_usuario:
+            return False
+        for usuario_id, tipo, mes, categoria_id, valor in lancamentos():
+            self.somar(usuario_id, tipo, mes, categoria_id, valor, 1)
+        return True
+
+    def reconstruir(self, lancamentos: Iterable[Lancamento]) -> int:
+        novos = _agregar(lancamentos)
+        por_usuario: Dict[int, Dict[Tuple[str, str, int], List]] = {}
+        for (usuario_id, tipo, mes, categoria_id), total in novos.items():
+            por_usuario.setdefault(usuario_id, {})[(tipo, mes, categoria_id)] = total
+        with self._lock:
+            antigos = {
+                (usuario_id, *chave): total
+                for usuario_id, totais in self._por_usuario.items()
+                for chave, total in totais.items()
+            }
+            self._por_usuario = por_usuario
+        return sum(antigos.get(chave) != total for chave, total in novos.items()) + len(antigos.keys() - novos.keys())
+
+
+class TotaisMensaisSQLite(TotaisMensais):
+    """Totais mensais na tabela ``tabela``, atualizados na transação da escrita."""
+
+    def __init__(self, conexoes: ConexoesSQLite, tabela: str = "totais_mensais"):
+        self._conexoes = conexoes
+        self._tabela = tabela
+        with conexoes.transacao() as conexao:
+            # Tabelas antigas guardavam o total em reais (REAL); como os totais são derivados
+            # dos lançamentos, a tabela é descartada e reconstruída em centavos
+            colunas = {linha[1]: linha[2] for linha in conexao.execute(f"PRAGMA table_info({tabela})")}
+            if colunas.get("total") == "REAL":
+                conexao.execute(f"DROP TABLE {tabela}")
+            conexao.execute(
+                f"CREATE TABLE IF NOT EXISTS {tabela} ("
+                "usuario_id INTEGER, tipo TEXT, mes TEXT, categoria_id INTEGER, "
+                "total INTEGER NOT NULL, quantidade INTEGER NOT NULL, "
+                "PRIMARY KEY (usuario_id, tipo, mes, categoria_id))"
+            )
+
+    def somar(self, usuario_id: int, tipo: str, mes: str, categoria_id: int, valor: int, quantidade: int) -> None:
+        with self._conexoes.transacao() as conexao:
+            conexao.execute(
+                f"INSERT INTO {self._tabela} VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (usuario_id, tipo, mes, categoria_id) DO UPDATE SET "
+                "total = total + excluded.total, quantidade = quantidade + excluded.quantidade",
+                (usuario_id, tipo, mes, categoria_id, valor, quantidade),
+            )
+            if quantidade < 0:
+                # Como em memória, o total sem lançamentos deixa de existir
+                conexao.execute(
+                    f"DELETE FROM {self._tabela} "
+                    "WHERE usuario_id = ? AND tipo = ? AND mes = ? AND categoria_id = ? AND quantidade = 0",
+                    (usuario_id, tipo, mes, categoria_id),
+                )
+
+    def consultar(
+        self,
+        usuario_id: int,
+        mes_de: Optional[str] = None,
+        mes_ate: Optional[str] = None,
+        tipo: Optional[str] = None,
+        categoria_id: Optional[int] = None,
+    ) -> List[TotalMensal]:
+        cursor = self._conexoes.conexao().execute(
+            f"SELECT tipo, mes, categoria_id, total, quantidade FROM {self._tabela} "
+            "WHERE usuario_id = ? AND quantidade > 0 "
+            "AND (? IS NULL OR mes >= ?) AND (? IS NULL OR mes <= ?) AND (? IS NULL OR tipo = ?) "
+            "AND (? IS NULL OR categoria_id = ?) "
+            "ORDER BY mes, tipo, categoria_id",
+            (usuario_id, mes_de, mes_de, mes_ate, mes_ate, tipo, tipo, categoria_id, categoria_id),
+        )
+        return [TotalMensal(*linha) for linha in cursor]
+
+    def reconstruir_se_vazio(self, lancamentos: Callable[[], Iterable[Lancamento]]) -> bool:
+        # A verificação e o preenchimento ficam na mesma transação de escrita, para que
+        # workers iniciando ao mesmo tempo não reconstruam a tabela em dobro
+        with self._conexoes.transacao() as conexao:
+            if conexao.execute(f"SELECT 1 FROM {self._tabela} LIMIT 1").fetchone():
+                return False
+            for usuario_id, tipo, mes, categoria_id, valor in lancamentos():
+                self.somar(usuario_id, tipo, mes, categoria_id, valor, 1)
+        return True
+
+    def reconstruir(self, lancamentos: Iterable[Lancamento]) -> int:
+        novos = _agregar(lancamentos)
+        with self._conexoes.transacao() as conexao:
+            antigos = {
+                tuple(linha[:4]): [linha[4], linha[5]]
+                for linha in conexao.execute(
+                    f"SELECT usuario_id, tipo, mes, categoria_id, total, quantidade FROM {self._tabela}"
+                )
+            }
+            # Só as chaves divergentes são regravadas; linhas zeradas (sem lançamentos) são apagadas
+            alterados = [(*chave, *total) for chave, total in novos.items() if antigos.get(chave) != total]
+            removidos = list(antigos.keys() - novos.keys())
+            conexao.executemany(f"INSERT OR REPLACE INTO {self._tabela} VALUES (?, ?, ?, ?, ?, ?)", alterados)
+            conexao.executemany(
+                f"DELETE FROM {self._tabela} WHERE usuario_id = ? AND tipo = ? AND mes = ? AND categoria_id = ?",
+                removidos,
+            )
+        return len(alterados) + sum(antigos[chave] != [0, 0] for chave in removidos)
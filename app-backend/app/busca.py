@@ -0,0 +1,277 @@
+"""
+Rota de busca textual nas descrições de despesas, rendas e contas recorrentes.
+
+A busca usa um índice invertido em memória (``termo normalizado -> usuário -> documentos``),
+mantido pelos observadores dos repositórios a cada criação, atualização ou exclusão, inclusive
+as feitas pela importação em lote. Cada termo da consulta casa com:
+
+- o mesmo termo, sem acentos e sem diferença de maiúsculas ("educacao" acha "Educação");
+- termos que começam com ele, para buscar enquanto o usuário digita ("netf" acha "Netflix");
+- termos a uma edição de distância (letra a mais, a menos, trocada ou transposta), se ele
+  tiver pelo menos ``MIN_LETRAS_ERRO`` letras ("alugeul" acha "aluguel").
+
+Os erros de digitação são encontrados pelo método das remoções simétricas: cada termo do
+vocabulário é guardado também sob as variantes com uma letra removida, e a consulta procura
+as suas próprias variantes nesse mapa, sem comparar com o vocabulário inteiro.
+
+Um documento precisa casar com todos os termos da consulta; a pontuação é a soma dos pesos
+dos termos (exato > prefixo > erro de digitação), e os empates vão para o mais recente. Com
+vários workers (SQLite), cada processo monta o seu índice na inicialização e só vê as
+escritas feitas nele; registros removidos por outro worker são descartados do resultado.
+"""
+
+
+import heapq
+import threading
+from bisect import bisect_left, insort
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from fastapi import APIRouter, Depends, Query
+
+# Os repositórios indexados são criados e registrados ao importar seus módulos
+import app.contas_recorrentes  # noqa: F401
+import app.despesas  # noqa: F401
+import app.rendas  # noqa: F401
+from app.contexto import ContextoUsuario
+from app.di.dependency_injection import obter_repositorio
+from app.paginacao import LIMITE_MAXIMO
+from app.schemas import ResultadoBuscaSchema
+from app.texto import termos
+
+router = APIRouter(prefix="/busca", tags=["Busca"])
+
+# Tipo de registro -> repositório; a posição do tipo compõe o ID do documento no índice
+REPOSITORIOS = {"despesa": "despesas", "renda": "rendas", "conta_recorrente": "contas_recorrentes"}
+TIPOS = tuple(REPOSITORIOS)
+
+PESO_EXATO = 1.0
+PESO_PREFIXO = 0.8
+PESO_ERRO = 0.6
+MIN_LETRAS_ERRO = 4
+# Limite de termos do vocabulário considerados por prefixo (prefixos curtos casam com muitos)
+MAX_EXPANSOES = 64
+# Termos da consulta considerados (cada um multiplica as combinações de faixas de peso)
+MAX_TERMOS_CONSULTA = 6
+
+
+def documento(tipo: str, registro_id: int) -> int:
+    """Codifica (tipo, ID do registro) no inteiro usado como documento no índice."""
+    return registro_id * len(TIPOS) + TIPOS.index(tipo)
+
+
+def _remocoes(termo: str) -> Set[str]:
+    return {termo[:i] + termo[i + 1:] for i in range(len(termo))}
+
+
+def _uma_edicao(a: str, b: str) -> bool:
+    """Indica se ``a`` e ``b`` diferem em no máximo uma edição (inclusive transposição)."""
+    if len(a) == len(b):
+        diferencas = [i for i, (x, y) in enumerate(zip(a, b)) if x != y]
+        if len(diferencas) <= 1:
+            return True
+        i, j = diferencas[0], diferencas[-1]
+        return len(diferencas) == 2 and j == i + 1 and a[i] == b[j] and a[j] == b[i]
+    if len(a) > len(b):
+        a, b = b, a
+    if len(b) - len(a) > 1:
+        return False
+    # ``b`` tem uma letra a mais: ela fica na primeira posição em que as duas diferem
+    i = 0
+    while i < len(a) and a[i] == b[i]:
+        i += 1
+    return a[i:] == b[i + 1:]
+
+
+class IndiceBusca:
+    """Índice invertido das descrições, com busca por prefixo e tolerante a erros de digitação."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # termo -> usuario_id -> documentos
+        self._postagens: Dict[str, Dict[int, Set[int]]] = {}
+        # Vocabulário ordenado, para a busca por prefixo
+        self._vocabulario: List[str] = []
+        # Termo ou termo com uma letra removida -> termos do vocabulário
+        self._variantes: Dict[str, Set[str]] = {}
+
+    def __len__(self) -> int:
+        """Quantidade de termos distintos no índice."""
+        return len(self._postagens)
+
+    def adicionar(self, documento: int, usuario_id: int, texto: Optional[str]) -> None:
+        """Indexa os termos de ``texto`` para o documento."""
+        with self._lock:
+            for termo in termos(texto):
+                por_usuario = self._postagens.get(termo)
+                if por_usuario is None:
+                    por_usuario = self._postagens[termo] = {}
+                    self._registrar_termo(termo)
+                por_usuario.setdefault(usuario_id, set()).add(documento)
+
+    def remover(self, documento: int, usuario_id: int, texto: Optional[str]) -> None:
+        """Remove o documento das entradas dos termos de ``texto``."""
+        with self._lock:
+            for termo in termos(texto):
+                por_usuario = self._postagens.get(termo)
+                documentos = por_usuario.get(usuario_id) if por_usuario else None
+                if documentos is None:
+                    continue
+                documentos.discard(documento)
+                if not documentos:
+                    del por_usuario[usuario_id]
+                if not por_usuario:
+                    del self._postagens[termo]
+                    self._descartar_termo(termo)
+
+    def _registrar_termo(self, termo: str) -> None:
+        insort(self._vocabulario, termo)
+        # Termos a uma edição de uma consulta com MIN_LETRAS_ERRO letras têm ao menos uma a menos
+        if len(termo) >= MIN_LETRAS_ERRO - 1:
+            for variante in _remocoes(termo) | {termo}:
+                self._variantes.setdefault(variante, set()).add(termo)
+
+    def _descartar_termo(self, termo: str) -> None:
+        del self._vocabulario[bisect_left(self._vocabulario, termo)]
+        if len(termo) >= MIN_LETRAS_ERRO - 1:
+            for variante in _remocoes(termo) | {termo}:
+                termos_variante = self._variantes[variante]
+                termos_variante.discard(termo)
+                if not termos_variante:
+                    del self._variantes[variante]
+
+    def _expandir(self, termo: str) -> List[Tuple[str, float]]:
+        """Retorna os termos do vocabulário que casam com o da consulta, do maior peso ao menor."""
+        pesos: Dict[str, float] = {}
+        if termo in self._postagens:
+            pesos[termo] = PESO_EXATO
+        posicao = bisect_left(self._vocabulario, termo)
+        while (
+            posicao < len(self._vocabulario)
+            and len(pesos) < MAX_EXPANSOES
+            and self._vocabulario[posicao].startswith(termo)
+        ):
+            pesos.setdefault(self._vocabulario[posicao], PESO_PREFIXO)
+            posicao += 1
+        if len(termo) >= MIN_LETRAS_ERRO:
+            for variante in _remocoes(termo) | {termo}:
+                for candidato in self._variantes.get(variante, ()):
+                    if candidato not in pesos and _uma_edicao(termo, candidato):
+                        pesos[candidato] = PESO_ERRO
+        return sorted(pesos.items(), key=lambda item: -item[1])
+
+    def _faixas(self, termo: str, usuario_id: Optional[int]) -> List[Tuple[float, Set[int]]]:
+        """Retorna, por peso decrescente, os documentos que casam com um termo da consulta.
+
+        Cada documento aparece só na faixa do maior peso com que casa.
+        """
+        por_peso: Dict[float, Set[int]] = {}
+        vistos: Set[int] = set()
+        for candidato, peso in self._expandir(termo):
+            por_usuario = self._postagens[candidato]
+            if usuario_id is None:
+                documentos = set().union(*por_usuario.values())
+            else:
+                documentos = por_usuario.get(usuario_id, set())
+            novos = documentos - vistos
+            if novos:
+                por_peso.setdefault(peso, set()).update(novos)
+                vistos |= novos
+        return sorted(por_peso.items(), key=lambda item: -item[0])
+
+    def _niveis(self, faixas: List[List[Tuple[float, Set[int]]]]) -> Dict[float, List[Set[int]]]:
+        """Combina as faixas dos termos: pontuação total -> conjuntos de documentos com ela.
+
+        As interseções são feitas com operações de conjunto, sem pontuar documento a documento;
+        combinações vazias são podadas assim que aparecem.
+        """
+        niveis: Dict[float, List[Set[int]]] = {}
+
+        def combinar(i: int, documentos: Optional[Set[int]], pontuacao: float) -> None:
+            if i == len(faixas):
+                niveis.setdefault(round(pontuacao, 6), []).append(documentos)
+                return
+            for peso, conjunto in faixas[i]:
+                intersecao = conjunto if documentos is None else documentos & conjunto
+                if intersecao:
+                    combinar(i + 1, intersecao, pontuacao + peso)
+
+        combinar(0, None, 0.0)
+        return niveis
+
+    def buscar(
+        self,
+        consulta: str,
+        usuario_id: Optional[int] = None,
+        tipo: Optional[str] = None,
+        limite: int = 50,
+    ) -> List[Tuple[int, float]]:
+        """Retorna até ``limite`` pares (documento, pontuação), do mais relevante ao menos."""
+        termos_consulta = termos(consulta)[:MAX_TERMOS_CONSULTA]
+        if not termos_consulta:
+            return []
+        with self._lock:
+            faixas = [self._faixas(termo, usuario_id) for termo in termos_consulta]
+        if not all(faixas):
+            return []
+        resultado: List[Tuple[int, float]] = []
+        for pontuacao, conjuntos in sorted(self._niveis(faixas).items(), reverse=True):
+            documentos: Iterable[int] = set().union(*conjuntos)
+            if tipo is not None:
+                posicao = TIPOS.index(tipo)
+                documentos = [d for d in documentos if d % len(TIPOS) == posicao]
+            # Empates de pontuação: o ID maior (registro mais recente) primeiro
+            resultado.extend((d, pontuacao) for d in heapq.nlargest(limite - len(resultado), documentos))
+            if len(resultado) >= limite:
+                break
+        return resultado
+
+
+indice_busca = IndiceBusca()
+
+
+def _observador(tipo: str):
+    """Cria o observador que mantém o índice de busca de um tipo de registro."""
+    def observar(antigo, novo) -> None:
+        if antigo is not None:
+            indice_busca.remover(documento(tipo, antigo.id), antigo.usuario_id, antigo.descricao)
+        if novo is not None:
+            indice_busca.adicionar(documento(tipo, novo.id), novo.usuario_id, novo.descricao)
+    return observar
+
+
+for _tipo, _nome in REPOSITORIOS.items():
+    for _registro in obter_repositorio(_nome).iterar():
+        indice_busca.adicionar(documento(_tipo, _registro.id), _registro.usuario_id, _registro.descricao)
+    obter_repositorio(_nome).observar(_observador(_tipo))
+
+
+@router.get("/", response_model=List[ResultadoBuscaSchema])
+def buscar(
+    q: str = Query(..., min_length=1, max_length=200, description="Texto buscado nas descrições."),
+    usuario_id: Optional[int] = None,
+    tipo: Optional[str] = Query(None, pattern="^(despesa|renda|conta_recorrente)$"),
+    limit: int = Query(50, ge=1, le=LIMITE_MAXIMO, description="Quantidade máxima de resultados."),
+    contexto: ContextoUsuario = Depends(),
+) -> List[ResultadoBuscaSchema]:
+    """Busca despesas, rendas e contas recorrentes pela descrição, da mais relevante à menos."""
+    usuario_id = contexto.filtro(usuario_id)
+    resultados = []
+    for doc, pontuacao in indice_busca.buscar(q, usuario_id, tipo, limit):
+        registro_id, posicao = divmod(doc, len(TIPOS))
+        tipo_registro = TIPOS[posicao]
+        registro = obter_repositorio(REPOSITORIOS[tipo_registro]).obter(registro_id)
+        if registro is None:
+            continue
+        data: Optional[date] = getattr(registro, "data", None) or getattr(registro, "data_inicio", None)
+        resultados.append(ResultadoBuscaSchema(
+            tipo=tipo_registro,
+            id=registro.id,
+            descricao=registro.descricao,
+            valor=registro.valor,
+            data=data,
+            categoria_id=registro.categoria_id,
+            usuario_id=registro.usuario_id,
+            pontuacao=round(pontuacao, 3),
+        ))
+    return resultados
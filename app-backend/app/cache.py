@@ -0,0 +1,177 @@
+"""
+Cache das respostas serializadas das listagens que mudam pouco (categorias, orçamentos e
+contas recorrentes).
+
+A chave é ``(rota, parâmetros da query, usuário da requisição)``, e cada entrada guarda os bytes do corpo já
+serializado e o seu ETag forte. Um acerto dispensa a consulta e a serialização; se o
+cliente enviar ``If-None-Match`` com o ETag atual, a resposta é ``304 Not Modified``.
+
+As entradas são invalidadas por observadores dos repositórios, então qualquer escrita
+(rotas, importação, jobs) descarta só as chaves afetadas: as do mesmo recurso filtradas pelo
+usuário do registro alterado e as sem filtro de usuário. Com vários workers (SQLite), cada
+processo tem o seu cache e não vê as escritas dos outros; por isso as entradas também
+expiram após ``DUCKBILLS_CACHE_TTL`` segundos.
+"""
+
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from hashlib import blake2b
+from typing import Any, Awaitable, Callable, Dict, NamedTuple, Optional, Tuple
+
+from fastapi import Request, Response
+
+from app.armazenamento import Repositorio
+from app.contexto import CABECALHO_USUARIO
+
+CAPACIDADE_BYTES = 16 * 1024 * 1024
+CAPACIDADE_ENTRADAS = 4096
+TTL_PADRAO = 60.0
+
+# Produz o corpo serializado e os cabeçalhos extras de uma resposta
+Gerador = Callable[[], Awaitable[Tuple[bytes, Dict[str, str]]]]
+
+
+class _Entrada(NamedTuple):
+    corpo: bytes
+    etag: str
+    cabecalhos: Dict[str, str]
+    criada_em: float
+
+
+def _etag(corpo: bytes) -> str:
+    return f'"{blake2b(corpo, digest_size=8).hexdigest()}"'
+
+
+def _corresponde(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # A comparação fraca é a indicada para If-None-Match: ignora o prefixo W/
+    return any(valor.strip().removeprefix("W/") == etag for valor in if_none_match.split(","))
+
+
+class CacheRespostas:
+    """Cache LRU de respostas serializadas, limitado em bytes e em quantidade de entradas."""
+
+    def __init__(
+        self,
+        capacidade_bytes: int = CAPACIDADE_BYTES,
+        capacidade_entradas: int = CAPACIDADE_ENTRADAS,
+        ttl: float = TTL_PADRAO,
+    ):
+        self.capacidade_bytes = capacidade_bytes
+        self.capacidade_entradas = capacidade_entradas
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        # (recurso, usuario_id, chave) -> entrada
+        self._entradas: "OrderedDict[Tuple[str, Optional[int], Any], _Entrada]" = OrderedDict()
+        self._bytes = 0
+        # Incrementada a cada invalidação, para não guardar respostas geradas antes dela
+        self._geracao = 0
+        self.acertos = 0
+        self.falhas = 0
+        self.nao_modificados = 0
+        self.invalidacoes = 0
+        self.descartes = 0
+
+    def _chave(self, recurso: str, request: Request) -> Tuple[str, Optional[int], Any]:
+        # Com o usuário da requisição, a listagem é só dele, mesmo sem o filtro na query
+        usuario_id = request.headers.get(CABECALHO_USUARIO) or request.query_params.get("usuario_id")
+        try:
+            usuario = int(usuario_id) if usuario_id is not None else None
+        except ValueError:
+            usuario = None
+        parametros = tuple(sorted(request.query_params.multi_items()))
+        return recurso, usuario, (request.url.path, parametros)
+
+    def _resposta(self, request: Request, entrada: _Entrada) -> Response:
+        cabecalhos = {**entrada.cabecalhos, "ETag": entrada.etag, "Cache-Control": "no-cache"}
+        if _corresponde(request.headers.get("if-none-match"), entrada.etag):
+            with self._lock:
+                self.nao_modificados += 1
+            return Response(status_code=304, headers=cabecalhos)
+        return Response(content=entrada.corpo, media_type="application/json", headers=cabecalhos)
+
+    async def responder(self, request: Request, recurso: str, gerar: Gerador) -> Response:
+        """Responde a listagem a partir do cache ou a gera com ``gerar`` e a guarda."""
+        chave = self._chave(recurso, request)
+        agora = time.monotonic()
+        with self._lock:
+            entrada = self._entradas.get(chave)
+            if entrada is not None and agora - entrada.criada_em > self.ttl:
+                self._descartar(chave)
+                entrada = None
+            if entrada is not None:
+                self._entradas.move_to_end(chave)
+                self.acertos += 1
+            else:
+                self.falhas += 1
+                geracao = self._geracao
+        if entrada is None:
+            corpo, cabecalhos = await gerar()
+            entrada = _Entrada(corpo, _etag(corpo), cabecalhos, agora)
+            self._guardar(chave, entrada, geracao)
+        return self._resposta(request, entrada)
+
+    def _guardar(self, chave: Tuple[str, Optional[int], Any], entrada: _Entrada, geracao: int) -> None:
+        if len(entrada.corpo) > self.capacidade_bytes:
+            return
+        with self._lock:
+            if geracao != self._geracao:
+                return
+            if chave in self._entradas:
+                self._descartar(chave)
+            self._entradas[chave] = entrada
+            self._bytes += len(entrada.corpo)
+            while self._bytes > self.capacidade_bytes or len(self._entradas) > self.capacidade_entradas:
+                self._descartar(next(iter(self._entradas)))
+                self.descartes += 1
+
+    def _descartar(self, chave: Tuple[str, Optional[int], Any]) -> None:
+        self._bytes -= len(self._entradas.pop(chave).corpo)
+
+    def invalidar(self, recurso: str, usuario_id: Optional[int] = None) -> None:
+        """Descarta as respostas do recurso afetadas por uma escrita do usuário.
+
+        Sem ``usuario_id`` (registros que não pertencem a um usuário), descarta todas as
+        respostas do recurso.
+        """
+        with self._lock:
+            self._geracao += 1
+            afetadas = [
+                chave for chave in self._entradas
+                if chave[0] == recurso and (usuario_id is None or chave[1] in (usuario_id, None))
+            ]
+            for chave in afetadas:
+                self._descartar(chave)
+            self.invalidacoes += len(afetadas)
+
+    def observar(self, recurso: str, repositorio: Repositorio) -> None:
+        """Invalida as respostas do recurso a cada escrita no repositório."""
+        def observador(antigo, novo) -> None:
+            for registro in (antigo, novo):
+                if registro is not None:
+                    self.invalidar(recurso, getattr(registro, "usuario_id", None))
+        repositorio.observar(observador)
+
+    def estatisticas(self) -> Dict[str, Any]:
+        """Contadores de uso do cache, para ajuste de capacidade e TTL."""
+        with self._lock:
+            consultas = self.acertos + self.falhas
+            return {
+                "entradas": len(self._entradas),
+                "bytes": self._bytes,
+                "acertos": self.acertos,
+                "falhas": self.falhas,
+                "taxa_acerto": self.acertos / consultas if consultas else 0.0,
+                "nao_modificados": self.nao_modificados,
+                "invalidacoes": self.invalidacoes,
+                "descartes": self.descartes,
+            }
+
+
+cache_respostas = CacheRespostas(ttl=float(os.environ.get("DUCKBILLS_CACHE_TTL", TTL_PADRAO)))
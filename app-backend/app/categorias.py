@@ -1,15 +1,23 @@
 """
-Rotas para gerenciamento de categorias (renda e despesa).
+Rotas para gerenciamento de categorias (renda e despesa) e sugestão de categorias pela
+descrição dos lançamentos.
 """
 
-from typing import List
-from fastapi import APIRouter, HTTPException
-from app.schemas import CategoriaSchema
+from typing import Dict, List, Optional, Tuple
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from app.schemas import CategoriaSchema, SugestaoCategoriaSchema, SugestoesCategoriaPedidoSchema
+from app.categorizacao import categorizador
+from app.paginacao import Paginacao
+from app.cache import cache_respostas
+from app.concorrencia import responder_com_etag
+from app.di.dependency_injection import Repositorio, RepositorioAssincrono, criar_repositorio
 
 router = APIRouter(prefix="/categorias", tags=["Categorias"])
 
-# Mock database
-categorias_db: List[CategoriaSchema] = [
+MAX_DESCRICOES_SUGESTAO = 100_000
+
+# Dados iniciais (mock), gravados no repositório na primeira execução
+categorias_db: Repositorio[CategoriaSchema] = criar_repositorio("categorias", CategoriaSchema, [
     CategoriaSchema(id=1, nome="Salário", tipo="renda"),
     CategoriaSchema(id=2, nome="Freelance", tipo="renda"),
     CategoriaSchema(id=3, nome="Aluguel", tipo="despesa"),
@@ -18,20 +26,45 @@ categorias_db: List[CategoriaSchema] = [
     CategoriaSchema(id=6, nome="Lazer", tipo="despesa"),
     CategoriaSchema(id=7, nome="Assinaturas", tipo="despesa"),
     CategoriaSchema(id=8, nome="Educação", tipo="despesa"),
-]
+])
+_categorias = RepositorioAssincrono(categorias_db)
+cache_respostas.observar("categorias", categorias_db)
 
 
 @router.get("/", response_model=List[CategoriaSchema])
-def listar_categorias() -> List[CategoriaSchema]:
-    """Lista todas as categorias cadastradas."""
-    return categorias_db
+async def listar_categorias(
+    request: Request,
+    pagina: Paginacao = Depends(),
+    tipo: Optional[str] = None,
+) -> List[CategoriaSchema]:
+    """Lista as categorias cadastradas, com filtros opcionais e paginação por cursor."""
+    async def gerar() -> Tuple[bytes, Dict[str, str]]:
+        categorias = await _categorias.consultar(
+            pagina.after,
+            pagina.limit,
+            tipo=tipo,
+        )
+        return pagina.serializar(categorias, CategoriaSchema)
+    return await cache_respostas.responder(request, "categorias", gerar)
 
 
 @router.post("/", response_model=CategoriaSchema, status_code=201)
-def criar_categoria(categoria: CategoriaSchema) -> CategoriaSchema:
+async def criar_categoria(categoria: CategoriaSchema, response: Response) -> CategoriaSchema:
     """Cria uma nova categoria."""
     # Gera um novo ID automaticamente
-    novo_id = max([cat.id for cat in categorias_db], default=0) + 1
-    categoria.id = novo_id
-    categorias_db.append(categoria)
-    return categoria
+    return responder_com_etag(response, await _categorias.criar(categoria))
+
+
+@router.post("/sugestoes", response_model=List[SugestaoCategoriaSchema])
+def sugerir_categorias(pedido: SugestoesCategoriaPedidoSchema) -> List[SugestaoCategoriaSchema]:
+    """Sugere a categoria de cada descrição, aprendida dos lançamentos já categorizados."""
+    if len(pedido.descricoes) > MAX_DESCRICOES_SUGESTAO:
+        raise HTTPException(
+            status_code=400, detail=f"Informe no máximo {MAX_DESCRICOES_SUGESTAO} descrições por pedido."
+        )
+    return [
+        SugestaoCategoriaSchema(descricao=descricao)
+        if sugestao is None
+        else SugestaoCategoriaSchema(descricao=descricao, categoria_id=sugestao[0], confianca=round(sugestao[1], 4))
+        for descricao, sugestao in zip(pedido.descricoes, categorizador.sugerir(pedido.tipo, pedido.descricoes))
+    ]
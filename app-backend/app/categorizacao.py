@@ -0,0 +1,182 @@
+"""
+Categorização automática de lançamentos pela descrição.
+
+Para cada tipo de lançamento (despesa ou renda), um classificador Naive Bayes multinomial
+aprende os pares ``descricao -> categoria_id`` já cadastrados, usando os termos
+normalizados de ``app.texto`` ("UBER *TRIP" e "Uber viagem" compartilham o termo "uber").
+
+O modelo é mantido incrementalmente pelos observadores dos repositórios: cada criação,
+atualização ou exclusão soma ou subtrai as contagens dos seus termos, sem retreinar do
+zero. As contagens ficam em uma matriz ``termo x categoria``; a matriz de log-probabilidades
+usada na predição é recalculada (de forma vetorizada) só quando as contagens mudaram desde a
+última predição.
+
+A predição em lote soma, para cada descrição, as linhas da matriz dos seus termos conhecidos
+(``numpy.add.reduceat``), e a confiança é a probabilidade a posteriori da categoria vencedora.
+Descrições sem nenhum termo conhecido ficam sem sugestão. Com vários workers (SQLite), cada
+processo treina o seu modelo na inicialização e só aprende com as escritas feitas nele.
+"""
+
+
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.armazenamento import Repositorio
+from app.texto import termos
+
+# Suavização aditiva das contagens de termos (valores baixos confiam mais em poucos exemplos)
+ALFA = 0.1
+# Confiança mínima para preencher a categoria na importação: a vencedora é mais provável
+# que todas as outras juntas
+CONFIANCA_MINIMA = 0.5
+_CAPACIDADE_INICIAL = 1024
+
+# (categoria_id, confiança) ou ``None`` quando não há sugestão
+Sugestao = Optional[Tuple[int, float]]
+
+
+class ModeloCategorias:
+    """Classificador Naive Bayes incremental de descrições em categorias."""
+
+    def __init__(self, alfa: float = ALFA):
+        self.alfa = alfa
+        self._lock = threading.Lock()
+        self._termos: Dict[str, int] = {}
+        self._categorias: List[int] = []
+        self._colunas: Dict[int, int] = {}
+        # Ocorrências de cada termo por categoria e lançamentos por categoria
+        self._contagens = np.zeros((_CAPACIDADE_INICIAL, 0), dtype=np.int64)
+        self._documentos = np.zeros(0, dtype=np.int64)
+        self._alterado = True
+        self._log_termos = np.zeros((0, 0))
+        self._log_prioris = np.zeros(0)
+
+    def __len__(self) -> int:
+        """Quantidade de lançamentos aprendidos."""
+        return int(self._documentos.sum())
+
+    def aprender(self, texto: Optional[str], categoria_id: int, peso: int = 1) -> None:
+        """Soma (ou, com ``peso`` negativo, subtrai) um lançamento às contagens."""
+        # Caminho dos observadores, um registro por vez: poucos termos, sem ``numpy.add.at``
+        with self._lock:
+            coluna = self._coluna(categoria_id)
+            for termo in termos(texto):
+                self._contagens[self._linha(termo), coluna] += peso
+            self._documentos[coluna] += peso
+            self._alterado = True
+
+    def aprender_varios(self, textos: Sequence[Optional[str]], categorias: Sequence[int], peso: int = 1) -> None:
+        """Soma vários lançamentos de uma vez (treino inicial e importações)."""
+        with self._lock:
+            linhas: List[int] = []
+            colunas: List[int] = []
+            por_categoria: Dict[int, int] = {}
+            for texto, categoria_id in zip(textos, categorias):
+                coluna = self._coluna(categoria_id)
+                por_categoria[coluna] = por_categoria.get(coluna, 0) + 1
+                for termo in termos(texto):
+                    linhas.append(self._linha(termo))
+                    colunas.append(coluna)
+            if not por_categoria:
+                return
+            np.add.at(self._contagens, (np.array(linhas, dtype=np.intp), np.array(colunas, dtype=np.intp)), peso)
+            for coluna, quantidade in por_categoria.items():
+                self._documentos[coluna] += peso * quantidade
+            self._alterado = True
+
+    def _linha(self, termo: str) -> int:
+        linha = self._termos.get(termo)
+        if linha is None:
+            linha = self._termos[termo] = len(self._termos)
+            if linha == len(self._contagens):
+                self._contagens = np.concatenate([self._contagens, np.zeros_like(self._contagens)])
+        return linha
+
+    def _coluna(self, categoria_id: int) -> int:
+        coluna = self._colunas.get(categoria_id)
+        if coluna is None:
+            coluna = self._colunas[categoria_id] = len(self._categorias)
+            self._categorias.append(categoria_id)
+            self._contagens = np.pad(self._contagens, ((0, 0), (0, 1)))
+            self._documentos = np.append(self._documentos, 0)
+        return coluna
+
+    def _pesos(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Retorna as log-probabilidades dos termos e das categorias, recalculando-as se preciso."""
+        if self._alterado:
+            contagens = self._contagens[:len(self._termos)]
+            suavizadas = contagens + self.alfa
+            self._log_termos = np.log(suavizadas) - np.log(suavizadas.sum(axis=0))
+            # Categorias sem lançamentos (todos removidos) nunca são sugeridas
+            with np.errstate(divide="ignore"):
+                self._log_prioris = np.log(self._documentos / max(self._documentos.sum(), 1))
+            self._alterado = False
+        return self._log_termos, self._log_prioris
+
+    def sugerir(self, textos: Sequence[Optional[str]]) -> List[Sugestao]:
+        """Sugere a categoria de cada descrição, com a confiança da sugestão."""
+        sugestoes: List[Sugestao] = [None] * len(textos)
+        with self._lock:
+            if not self._categorias or not self._documentos.any():
+                return sugestoes
+            log_termos, log_prioris = self._pesos()
+            categorias = np.array(self._categorias)
+            # Termos conhecidos de todas as descrições, em sequência, e onde cada descrição começa
+            indices: List[int] = []
+            inicios: List[int] = []
+            posicoes: List[int] = []
+            for posicao, texto in enumerate(textos):
+                conhecidos = [self._termos[t] for t in termos(texto) if t in self._termos]
+                if conhecidos:
+                    inicios.append(len(indices))
+                    posicoes.append(posicao)
+                    indices.extend(conhecidos)
+        if not posicoes:
+            return sugestoes
+        pontuacoes = np.add.reduceat(log_termos[indices], inicios, axis=0) + log_prioris
+        vencedoras = pontuacoes.argmax(axis=1)
+        maximos = pontuacoes[np.arange(len(posicoes)), vencedoras]
+        # Probabilidade a posteriori da vencedora: 1 / soma(exp(pontuação - máximo))
+        confiancas = 1.0 / np.exp(pontuacoes - maximos[:, None]).sum(axis=1)
+        for posicao, categoria_id, confianca in zip(posicoes, categorias[vencedoras].tolist(), confiancas.tolist()):
+            sugestoes[posicao] = (categoria_id, confianca)
+        return sugestoes
+
+
+class Categorizador:
+    """Modelos de categorização por tipo de lançamento, mantidos pelos repositórios."""
+
+    def __init__(self):
+        self._modelos: Dict[str, ModeloCategorias] = {}
+
+    def observar(self, tipo: str, repositorio: Repositorio) -> None:
+        """Treina o modelo do tipo com os registros existentes e o atualiza a cada escrita."""
+        modelo = self._modelos.setdefault(tipo, ModeloCategorias())
+        registros = list(repositorio.iterar())
+        modelo.aprender_varios([r.descricao for r in registros], [r.categoria_id for r in registros])
+
+        def observador(antigo, novo) -> None:
+            if antigo is not None:
+                modelo.aprender(antigo.descricao, antigo.categoria_id, -1)
+            if novo is not None:
+                modelo.aprender(novo.descricao, novo.categoria_id)
+        repositorio.observar(observador)
+
+    def sugerir(self, tipo: str, textos: Sequence[Optional[str]]) -> List[Sugestao]:
+        """Sugere categorias para as descrições; sem modelo para o tipo, não há sugestões."""
+        modelo = self._modelos.get(tipo)
+        return modelo.sugerir(textos) if modelo is not None else [None] * len(textos)
+
+    def categorias(
+        self, tipo: str, textos: Sequence[Optional[str]], confianca_minima: float = CONFIANCA_MINIMA
+    ) -> List[Optional[int]]:
+        """Retorna a categoria sugerida de cada descrição, ou ``None`` se a confiança for baixa."""
+        return [
+            sugestao[0] if sugestao is not None and sugestao[1] >= confianca_minima else None
+            for sugestao in self.sugerir(tipo, textos)
+        ]
+
+
+categorizador = Categorizador()
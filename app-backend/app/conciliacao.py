@@ -0,0 +1,237 @@
+"""
+Conciliação das contas recorrentes com as despesas e rendas efetivamente lançadas.
+
+Cada ocorrência prevista de uma conta recorrente (``app.recorrencias``) é casada com um
+lançamento do mesmo usuário, tipo e categoria, com valor dentro da tolerância e data dentro
+de uma janela em torno do vencimento. O resultado de cada ocorrência é:
+
+- ``paga``: conciliada com um lançamento feito até ``carencia`` dias após o vencimento;
+- ``atrasada``: conciliada com um lançamento feito depois disso;
+- ``ausente``: sem lançamento, com a janela já encerrada na data de referência;
+- ``pendente``: sem lançamento, mas com a janela ainda aberta.
+
+Lançamentos que sobram na janela de uma ocorrência já conciliada, com valor compatível, são
+apontados como pagamentos em ``duplicados``.
+
+Os lançamentos são agrupados por (usuário, tipo, categoria) e ordenados por data; cada
+ocorrência encontra os candidatos da sua janela por busca binária, em vez de comparar com
+todos os lançamentos. O custo total é O((ocorrências + lançamentos) log lançamentos), então
+a conciliação de todos os usuários de uma vez escala de forma quase linear.
+"""
+
+
+from bisect import bisect_left, bisect_right
+from collections import Counter
+from datetime import date, timedelta
+from operator import itemgetter
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+
+# Os repositórios conciliados são criados e registrados ao importar seus módulos
+import app.despesas  # noqa: F401
+import app.rendas  # noqa: F401
+from app.contas_recorrentes import MAX_DIAS_JANELA
+from app.contexto import ContextoUsuario
+from app.di.dependency_injection import obter_repositorio
+from app.dinheiro import centavos, reais
+from app.recorrencias import FREQUENCIAS, ordinais
+from app.schemas import ConciliacaoOcorrenciaSchema, ConciliacaoSchema, ContaRecorrenteSchema
+
+router = APIRouter(prefix="/conciliacao", tags=["Conciliação"])
+
+STATUS = ("paga", "atrasada", "ausente", "pendente")
+
+# (usuario_id, tipo, categoria_id)
+Chave = Tuple[int, str, int]
+
+
+class Tolerancias(NamedTuple):
+    """Critérios para casar uma ocorrência prevista com um lançamento."""
+    valor: float = 0.1  # diferença de valor aceita, como fração do valor previsto
+    dias_antes: int = 5  # pagamento adiantado aceito
+    dias_depois: int = 15  # pagamento atrasado aceito
+    carencia: int = 3  # dias após o vencimento que ainda não contam como atraso
+
+
+class Conciliacao(NamedTuple):
+    """Resultado da conciliação de uma ocorrência prevista."""
+    data: int  # ordinal do vencimento
+    conta: ContaRecorrenteSchema
+    status: str
+    lancamento: Optional[Tuple[int, int, int]]  # (ordinal, id, centavos)
+    duplicados: List[int]
+
+
+class _Grupo:
+    """Lançamentos de um (usuário, tipo, categoria), em ordem de data."""
+
+    __slots__ = ("datas", "ids", "valores", "usados")
+
+    def __init__(self, lancamentos: List[Tuple[int, int, int]]):
+        lancamentos.sort()
+        self.datas = [lancamento[0] for lancamento in lancamentos]
+        self.ids = [lancamento[1] for lancamento in lancamentos]
+        self.valores = [lancamento[2] for lancamento in lancamentos]
+        self.usados = bytearray(len(lancamentos))
+
+    def candidatos(self, data: int, antes: int, depois: int, valor: int, tolerancia: int) -> Iterable[int]:
+        """Posições dos lançamentos livres na janela da data com valor compatível."""
+        datas, valores, usados = self.datas, self.valores, self.usados
+        for i in range(bisect_left(datas, data - antes), bisect_right(datas, data + depois)):
+            if not usados[i] and abs(valores[i] - valor) <= tolerancia:
+                yield i
+
+
+PADRAO = Tolerancias()
+
+
+def janela(conta: ContaRecorrenteSchema, tolerancias: Tolerancias) -> Tuple[int, int]:
+    """Dias aceitos antes e depois do vencimento, limitados para não invadir a ocorrência vizinha."""
+    unidade, passo = FREQUENCIAS.get(conta.frequencia, ("dias", 1))
+    periodo = passo * 28 if unidade == "meses" else passo
+    metade = max(periodo // 2, 1)
+    return min(tolerancias.dias_antes, metade), min(tolerancias.dias_depois, max(periodo - metade, 0))
+
+
+def conciliar(
+    contas: Iterable[ContaRecorrenteSchema],
+    lancamentos: Iterable[Tuple[str, object]],
+    de: date,
+    ate: date,
+    referencia: date,
+    tolerancias: Tolerancias = PADRAO,
+) -> List[Conciliacao]:
+    """Concilia as ocorrências das contas entre ``de`` e ``ate`` com os lançamentos (tipo, registro).
+
+    Os lançamentos devem cobrir a janela ampliada pelos dias de tolerância. O resultado vem
+    em ordem de vencimento e de ID da conta.
+    """
+    por_chave: Dict[Chave, List[Tuple[int, int, int]]] = {}
+    for tipo, registro in lancamentos:
+        por_chave.setdefault((registro.usuario_id, tipo, registro.categoria_id), []).append(
+            (registro.data.toordinal(), registro.id, centavos(registro.valor))
+        )
+    grupos = {chave: _Grupo(itens) for chave, itens in por_chave.items()}
+
+    previstas: Dict[Chave, List[Tuple[int, int, ContaRecorrenteSchema]]] = {}
+    for conta in contas:
+        datas = ordinais(conta, de, ate)
+        if datas:
+            previstas.setdefault((conta.usuario_id, conta.tipo, conta.categoria_id), []).extend(
+                (data, conta.id, conta) for data in datas
+            )
+
+    hoje = referencia.toordinal()
+    resultado: List[Conciliacao] = []
+    for chave, ocorrencias in previstas.items():
+        grupo = grupos.get(chave)
+        ocorrencias.sort(key=itemgetter(0, 1))
+        conciliadas = []
+        # Primeira passagem: cada ocorrência, em ordem de data, fica com o lançamento livre
+        # de valor mais próximo (e, no empate, de data mais próxima)
+        for data, _, conta in ocorrencias:
+            antes, depois = janela(conta, tolerancias)
+            valor = centavos(conta.valor)
+            tolerancia = round(abs(valor) * tolerancias.valor)
+            escolhido = None
+            if grupo is not None:
+                escolhido = min(
+                    grupo.candidatos(data, antes, depois, valor, tolerancia),
+                    key=lambda i: (abs(grupo.valores[i] - valor), abs(grupo.datas[i] - data)),
+                    default=None,
+                )
+            if escolhido is not None:
+                grupo.usados[escolhido] = 1
+            conciliadas.append((data, conta, antes, depois, valor, tolerancia, escolhido))
+
+        # Segunda passagem: o que sobrou na janela de uma ocorrência paga é pagamento duplicado
+        for data, conta, antes, depois, valor, tolerancia, escolhido in conciliadas:
+            duplicados: List[int] = []
+            if escolhido is None:
+                status = "pendente" if data + depois >= hoje else "ausente"
+                lancamento = None
+            else:
+                atraso = grupo.datas[escolhido] - data
+                status = "atrasada" if atraso > tolerancias.carencia else "paga"
+                lancamento = (grupo.datas[escolhido], grupo.ids[escolhido], grupo.valores[escolhido])
+                for i in grupo.candidatos(data, antes, depois, valor, tolerancia):
+                    grupo.usados[i] = 1
+                    duplicados.append(grupo.ids[i])
+            resultado.append(Conciliacao(data, conta, status, lancamento, duplicados))
+
+    resultado.sort(key=lambda conciliacao: (conciliacao.data, conciliacao.conta.id))
+    return resultado
+
+
+def lancamentos_registrados(
+    de: date, ate: date, tolerancias: Tolerancias = PADRAO, usuario_id: Optional[int] = None
+) -> Iterator[Tuple[str, object]]:
+    """Despesas e rendas (tipo, registro) que podem pagar vencimentos entre ``de`` e ``ate``."""
+    inicio, fim = de - timedelta(days=tolerancias.dias_antes), ate + timedelta(days=tolerancias.dias_depois)
+    for tipo, nome in (("despesa", "despesas"), ("renda", "rendas")):
+        for registro in obter_repositorio(nome).iterar(data_de=inicio, data_ate=fim, usuario_id=usuario_id):
+            yield tipo, registro
+
+
+def _ocorrencia(conciliacao: Conciliacao) -> ConciliacaoOcorrenciaSchema:
+    conta, lancamento = conciliacao.conta, conciliacao.lancamento
+    data_prevista = date.fromordinal(conciliacao.data)
+    return ConciliacaoOcorrenciaSchema(
+        conta_recorrente_id=conta.id,
+        usuario_id=conta.usuario_id,
+        tipo=conta.tipo,
+        categoria_id=conta.categoria_id,
+        descricao=conta.descricao,
+        data_prevista=data_prevista,
+        valor_previsto=conta.valor,
+        status=conciliacao.status,
+        lancamento_id=lancamento[1] if lancamento else None,
+        data_lancamento=date.fromordinal(lancamento[0]) if lancamento else None,
+        valor_lancamento=reais(lancamento[2]) if lancamento else None,
+        dias_atraso=max(lancamento[0] - conciliacao.data, 0) if lancamento else 0,
+        duplicados=conciliacao.duplicados,
+    )
+
+
+@router.get("/", response_model=ConciliacaoSchema)
+def conciliar_contas(
+    de: date = Query(..., description="Primeiro vencimento conciliado."),
+    ate: date = Query(..., description="Último vencimento conciliado (inclusive)."),
+    usuario_id: Optional[int] = Query(None, description="Usuário conciliado; se omitido, o da requisição."),
+    status: Optional[str] = Query(None, pattern=f"^({'|'.join(STATUS)})$", description="Lista só as ocorrências com este status."),
+    somente_duplicadas: bool = Query(False, description="Lista só as ocorrências com pagamentos duplicados."),
+    referencia: Optional[date] = Query(None, description="Data em que a conciliação é feita (padrão: hoje)."),
+    tolerancia_valor: float = Query(PADRAO.valor, ge=0, le=1, description="Diferença de valor aceita (fração)."),
+    dias_antes: int = Query(PADRAO.dias_antes, ge=0, le=60),
+    dias_depois: int = Query(PADRAO.dias_depois, ge=0, le=60),
+    carencia: int = Query(PADRAO.carencia, ge=0, le=60, description="Dias após o vencimento sem contar atraso."),
+    contexto: ContextoUsuario = Depends(),
+) -> ConciliacaoSchema:
+    """Concilia as ocorrências previstas das contas recorrentes com as despesas e rendas lançadas."""
+    usuario_id = contexto.filtro(usuario_id)
+    if ate < de:
+        raise HTTPException(status_code=400, detail="A data final deve ser igual ou posterior à inicial.")
+    if ate - de > timedelta(days=MAX_DIAS_JANELA):
+        raise HTTPException(status_code=400, detail=f"A janela deve ter no máximo {MAX_DIAS_JANELA} dias.")
+    tolerancias = Tolerancias(tolerancia_valor, dias_antes, dias_depois, carencia)
+    contas = obter_repositorio("contas_recorrentes").iterar(usuario_id=usuario_id)
+    lancamentos = lancamentos_registrados(de, ate, tolerancias, usuario_id)
+    conciliacoes = conciliar(contas, lancamentos, de, ate, referencia or date.today(), tolerancias)
+    contagem = Counter(conciliacao.status for conciliacao in conciliacoes)
+    return ConciliacaoSchema(
+        de=de,
+        ate=ate,
+        usuario_id=usuario_id,
+        pagas=contagem["paga"],
+        atrasadas=contagem["atrasada"],
+        ausentes=contagem["ausente"],
+        pendentes=contagem["pendente"],
+        duplicadas=sum(1 for conciliacao in conciliacoes if conciliacao.duplicados),
+        ocorrencias=[
+            _ocorrencia(conciliacao)
+            for conciliacao in conciliacoes
+            if (status is None or conciliacao.status == status)
+            and (not somente_duplicadas or conciliacao.duplicados)
+        ],
+    )
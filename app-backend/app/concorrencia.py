@@ -0,0 +1,114 @@
+"""
+Controle de concorrência otimista das rotas de escrita (ETag / ``If-Match``).
+
+A versão de um registro é o seu ETag: um hash do JSON do registro. As rotas de leitura por
+ID e de escrita devolvem o ETag no cabeçalho ``ETag``; um ``PUT`` ou ``DELETE`` com
+``If-Match`` só é aplicado se o registro ainda estiver naquela versão, senão a resposta é
+``412 Precondition Failed``. Sem ``If-Match``, a última escrita vence, como antes.
+
+A comparação e a escrita rodam juntas em ``RepositorioAssincrono.em_transacao``, então
+nenhuma outra escrita pode intercalar entre elas.
+
+As funções recebem o usuário da requisição (ver ``app.contexto``): elas usam só a partição
+dele, e registros de outros usuários são tratados como inexistentes (404).
+"""
+
+
+from hashlib import blake2b
+from typing import Optional
+
+from fastapi import Header, HTTPException, Response
+from pydantic import BaseModel
+
+from app.armazenamento import Repositorio, RepositorioAssincrono
+from app.armazenamento.base import T
+
+
+def etag(registro: BaseModel) -> str:
+    """Retorna o ETag (forte) do registro."""
+    resumo = blake2b(registro.__pydantic_serializer__.to_json(registro), digest_size=8).hexdigest()
+    return f'"{resumo}"'
+
+
+def cabecalho_if_match(if_match: Optional[str] = Header(None, alias="If-Match")) -> Optional[str]:
+    """Dependência FastAPI que lê o cabeçalho ``If-Match``."""
+    return if_match
+
+
+def exigir_versao(registro: BaseModel, if_match: Optional[str]) -> None:
+    """Levanta 412 se ``if_match`` não corresponder à versão atual do registro."""
+    if if_match is None or if_match.strip() == "*":
+        return
+    if etag(registro) not in (valor.strip() for valor in if_match.split(",")):
+        raise HTTPException(status_code=412, detail="O registro foi alterado por outra requisição.")
+
+
+def responder_com_etag(response: Response, registro: T) -> T:
+    """Inclui o ETag do registro na resposta e o retorna."""
+    response.headers["ETag"] = etag(registro)
+    return registro
+
+
+def do_usuario(registro: Optional[T], usuario_id: int) -> Optional[T]:
+    """Retorna o registro, ou ``None`` se ele não existir ou for de outro usuário."""
+    if registro is None or registro.usuario_id != usuario_id:
+        return None
+    return registro
+
+
+async def obter_ou_404(
+    repositorio: RepositorioAssincrono[T],
+    registro_id: int,
+    response: Response,
+    detalhe: str,
+    usuario_id: int,
+) -> T:
+    """Retorna o registro com o seu ETag, ou 404."""
+    registro = do_usuario(await repositorio.particao_do_usuario(usuario_id).obter(registro_id), usuario_id)
+    if registro is None:
+        raise HTTPException(status_code=404, detail=detalhe)
+    return responder_com_etag(response, registro)
+
+
+async def atualizar_condicional(
+    repositorio: RepositorioAssincrono[T],
+    registro_id: int,
+    registro: T,
+    if_match: Optional[str],
+    response: Response,
+    detalhe: str,
+    usuario_id: int,
+) -> T:
+    """Atualiza o registro (respeitando ``If-Match``) e responde com o novo ETag, ou 404."""
+    def executar(sincrono: Repositorio[T]) -> Optional[T]:
+        atual = do_usuario(sincrono.obter(registro_id), usuario_id)
+        if atual is None:
+            return None
+        exigir_versao(atual, if_match)
+        return sincrono.atualizar(registro_id, registro)
+
+    atualizado = await repositorio.particao_do_usuario(usuario_id).em_transacao(executar)
+    if atualizado is None:
+        raise HTTPException(status_code=404, detail=detalhe)
+    return responder_com_etag(response, atualizado)
+
+
+async def remover_condicional(
+    repositorio: RepositorioAssincrono[T],
+    registro_id: int,
+    if_match: Optional[str],
+    detalhe: str,
+    usuario_id: int,
+) -> T:
+    """Remove o registro (respeitando ``If-Match``) e o retorna, ou 404."""
+    def executar(sincrono: Repositorio[T]) -> Optional[T]:
+        atual = do_usuario(sincrono.obter(registro_id), usuario_id)
+        if atual is None:
+            return None
+        exigir_versao(atual, if_match)
+        return sincrono.remover(registro_id)
+
+    removido = await repositorio.particao_do_usuario(usuario_id).em_transacao(executar)
+    if removido is None:
+        raise HTTPException(status_code=404, detail=detalhe)
+    return removido
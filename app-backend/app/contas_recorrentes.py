@@ -1,16 +1,23 @@
 """
-Rotas para gerenciamento de contas recorrentes.
+Rotas para gerenciamento de contas recorrentes e de suas ocorrências previstas.
 """
 
-from typing import List
-from datetime import date
-from fastapi import APIRouter, HTTPException
-from app.schemas import ContaRecorrenteSchema
+from itertools import islice
+from typing import Dict, List, Optional, Tuple
+from datetime import date, timedelta
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from app.schemas import ContaRecorrenteSchema, OcorrenciaSchema
+from app.paginacao import Paginacao
+from app.contexto import ContextoUsuario
+from app.cache import cache_respostas
+from app.concorrencia import responder_com_etag
+from app.recorrencias import CacheOcorrencias, Ocorrencia, expandir, ocorrencias
+from app.di.dependency_injection import Repositorio, RepositorioAssincrono, criar_repositorio
 
 router = APIRouter(prefix="/contas-recorrentes", tags=["Contas Recorrentes"])
 
-# Mock database
-_contas_recorrentes_db: List[ContaRecorrenteSchema] = [
+# Dados iniciais (mock), gravados no repositório na primeira execução
+_contas_recorrentes_db: Repositorio[ContaRecorrenteSchema] = criar_repositorio("contas_recorrentes", ContaRecorrenteSchema, [
     ContaRecorrenteSchema(
         id=1,
         valor=500.0,
@@ -161,19 +168,106 @@ _contas_recorrentes_db: List[ContaRecorrenteSchema] = [
         data_inicio=date(2025, 9, 13),
         frequencia="mensal"
     ),
-]
+], indices=("usuario_id", "categoria_id"), particionado=True)
+_contas_recorrentes = RepositorioAssincrono(_contas_recorrentes_db)
+cache_respostas.observar("contas_recorrentes", _contas_recorrentes_db)
+
+# Maior janela aceita em /ocorrencias
+MAX_DIAS_JANELA = 10 * 366
+
+_cache_ocorrencias = CacheOcorrencias()
+
+
+def _invalidar_ocorrencias(antiga: Optional[ContaRecorrenteSchema], nova: Optional[ContaRecorrenteSchema]) -> None:
+    for conta in (antiga, nova):
+        if conta is not None:
+            _cache_ocorrencias.invalidar(conta.usuario_id)
+
+
+_contas_recorrentes_db.observar(_invalidar_ocorrencias)
+
+
+def _para_schema(ocorrencia: Ocorrencia) -> OcorrenciaSchema:
+    data, conta_id, conta = ocorrencia
+    return OcorrenciaSchema(
+        conta_recorrente_id=conta_id,
+        data=data,
+        valor=conta.valor,
+        descricao=conta.descricao,
+        categoria_id=conta.categoria_id,
+        usuario_id=conta.usuario_id,
+        tipo=conta.tipo,
+    )
+
+
+def expandir_ocorrencias(usuario_id: Optional[int], de: date, ate: date) -> List[OcorrenciaSchema]:
+    """Retorna as ocorrências das contas do usuário (ou de todos) na janela, em ordem de data."""
+    def calcular() -> List[OcorrenciaSchema]:
+        contas = _contas_recorrentes_db.iterar(usuario_id=usuario_id)
+        return list(map(_para_schema, expandir(contas, de, ate)))
+    return _cache_ocorrencias.obter(usuario_id, de, ate, calcular)
+
+
+def primeiras_ocorrencias(usuario_id: Optional[int], de: date, ate: date, limite: int) -> List[OcorrenciaSchema]:
+    """Retorna só as ``limite`` primeiras ocorrências da janela, sem materializar o restante."""
+    contas = list(_contas_recorrentes_db.iterar(usuario_id=usuario_id))
+    return list(map(_para_schema, islice(ocorrencias(contas, de, ate), limite)))
 
 
 @router.get("/", response_model=List[ContaRecorrenteSchema])
-def listar_contas_recorrentes() -> List[ContaRecorrenteSchema]:
-    """Lista todas as contas recorrentes cadastradas."""
-    return _contas_recorrentes_db
+async def listar_contas_recorrentes(
+    request: Request,
+    pagina: Paginacao = Depends(),
+    contexto: ContextoUsuario = Depends(),
+    usuario_id: Optional[int] = None,
+    categoria_id: Optional[int] = None,
+    tipo: Optional[str] = None,
+    frequencia: Optional[str] = None,
+) -> List[ContaRecorrenteSchema]:
+    """Lista as contas recorrentes cadastradas, com filtros opcionais e paginação por cursor."""
+    usuario_id = contexto.filtro(usuario_id)
+
+    async def gerar() -> Tuple[bytes, Dict[str, str]]:
+        contas = await _contas_recorrentes.consultar(
+            pagina.after,
+            pagina.limit,
+            usuario_id=usuario_id,
+            categoria_id=categoria_id,
+            tipo=tipo,
+            frequencia=frequencia,
+        )
+        return pagina.serializar(contas, ContaRecorrenteSchema)
+    return await cache_respostas.responder(request, "contas_recorrentes", gerar)
+
+
+@router.get("/ocorrencias", response_model=List[OcorrenciaSchema])
+def listar_ocorrencias(
+    de: date = Query(..., description="Primeiro dia da janela."),
+    ate: date = Query(..., description="Último dia da janela (inclusive)."),
+    usuario_id: Optional[int] = None,
+    limit: Optional[int] = Query(None, ge=1, description="Devolve só as primeiras ocorrências da janela."),
+    contexto: ContextoUsuario = Depends(),
+) -> List[OcorrenciaSchema]:
+    """Lista as ocorrências previstas das contas recorrentes entre ``de`` e ``ate``, em ordem de data.
+
+    Com ``limit``, as ocorrências são intercaladas sob demanda e só as primeiras são geradas;
+    sem ele, a janela inteira é materializada (e guardada no cache de janelas).
+    """
+    usuario_id = contexto.filtro(usuario_id)
+    if ate < de:
+        raise HTTPException(status_code=400, detail="A data final deve ser igual ou posterior à inicial.")
+    if ate - de > timedelta(days=MAX_DIAS_JANELA):
+        raise HTTPException(status_code=400, detail=f"A janela deve ter no máximo {MAX_DIAS_JANELA} dias.")
+    if limit is not None:
+        return primeiras_ocorrencias(usuario_id, de, ate, limit)
+    return expandir_ocorrencias(usuario_id, de, ate)
 
 
 @router.post("/", response_model=ContaRecorrenteSchema, status_code=201)
-def criar_conta_recorrente(conta: ContaRecorrenteSchema) -> ContaRecorrenteSchema:
+async def criar_conta_recorrente(
+    conta: ContaRecorrenteSchema, response: Response, contexto: ContextoUsuario = Depends()
+) -> ContaRecorrenteSchema:
     """Cria uma nova conta recorrente."""
-    if any(c.id == conta.id for c in _contas_recorrentes_db):
-        raise HTTPException(status_code=400, detail="ID de conta recorrente já existe.")
-    _contas_recorrentes_db.append(conta)
-    return conta
+    contexto.exigir_dono(conta)
+    # Gera um novo ID automaticamente
+    return responder_com_etag(response, await _contas_recorrentes.criar(conta))
@@ -0,0 +1,65 @@
+"""
+Usuário da requisição.
+
+O usuário vem do cabeçalho ``X-Usuario-Id`` e é lido uma única vez por requisição pela
+dependência ``ContextoUsuario`` (o FastAPI reaproveita a mesma instância em todas as
+dependências da requisição). Com ele, as rotas de despesas, rendas, metas, orçamentos e contas
+recorrentes só leem e escrevem a partição desse usuário (ver ``app.armazenamento.particionado``):
+
+- as listagens são filtradas pelo usuário; pedir outro ``usuario_id`` responde 403;
+- registros de outros usuários respondem 404, como se não existissem;
+- criar ou mover um registro para outro usuário responde 403.
+
+As consultas derivadas (resumo, projeção, conciliação, busca e alterações) também só aceitam o
+usuário da requisição, e, sem ``usuario_id``, ficam restritas a ele.
+
+O cabeçalho é obrigatório nessas rotas: sem ele, a resposta é 401. Só as categorias, que são
+compartilhadas, e as rotas de operação (saúde, métricas, cache e agendador) não o exigem. O
+stream de alterações também aceita o usuário no parâmetro ``usuario_id``, porque o
+``EventSource`` dos navegadores não envia cabeçalhos.
+"""
+
+
+from typing import Optional
+
+from fastapi import Header, HTTPException, Query
+from pydantic import BaseModel
+
+CABECALHO_USUARIO = "X-Usuario-Id"
+
+
+class ContextoUsuario:
+    """Dependência FastAPI com o usuário da requisição; sem ele, responde 401."""
+
+    def __init__(
+        self,
+        usuario: Optional[int] = Header(None, alias=CABECALHO_USUARIO, description="Usuário da requisição."),
+    ):
+        if usuario is None:
+            raise HTTPException(
+                status_code=401, detail=f"Informe o usuário da requisição no cabeçalho {CABECALHO_USUARIO}."
+            )
+        self.usuario_id = usuario
+
+    def filtro(self, usuario_id: Optional[int]) -> int:
+        """Retorna o ``usuario_id`` efetivo de uma consulta, que não pode ser de outro usuário."""
+        if usuario_id is not None and usuario_id != self.usuario_id:
+            raise HTTPException(status_code=403, detail="Acesso restrito aos dados do usuário da requisição.")
+        return self.usuario_id
+
+    def exigir_dono(self, registro: BaseModel) -> None:
+        """Levanta 403 se o registro enviado pertencer a outro usuário."""
+        if registro.usuario_id != self.usuario_id:
+            raise HTTPException(status_code=403, detail="O registro deve pertencer ao usuário da requisição.")
+
+
+def contexto_do_stream(
+    usuario: Optional[int] = Header(None, alias=CABECALHO_USUARIO, description="Usuário da requisição."),
+    usuario_id: Optional[int] = Query(
+        None, description="Usuário da requisição, para clientes que não enviam cabeçalhos (EventSource)."
+    ),
+) -> ContextoUsuario:
+    """Dependência FastAPI como ``ContextoUsuario``, que também aceita o usuário na query string."""
+    contexto = ContextoUsuario(usuario if usuario is not None else usuario_id)
+    contexto.filtro(usuario_id)
+    return contexto
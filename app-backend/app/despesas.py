@@ -3,15 +3,30 @@ Rotas para gerenciamento de despesas.
 """
 
 
-from typing import List
+from functools import partial
+from typing import List, Optional
 from datetime import date
-from fastapi import APIRouter, HTTPException
-from app.schemas import DespesaSchema
+from fastapi import APIRouter, Depends, File, Query, Response, UploadFile
+from fastapi.responses import StreamingResponse
+from app.schemas import DespesaSchema, ResultadoImportacaoSchema
+from app.importacao import TAMANHO_LOTE, importar, ler_arquivo
+from app.categorizacao import categorizador
+from app.exportacao import responder_exportacao
+from app.paginacao import Paginacao
+from app.contexto import ContextoUsuario
+from app.concorrencia import (
+    atualizar_condicional,
+    cabecalho_if_match,
+    obter_ou_404,
+    remover_condicional,
+    responder_com_etag,
+)
+from app.di.dependency_injection import Repositorio, RepositorioAssincrono, criar_repositorio
 
 router = APIRouter(prefix="/despesas", tags=["Despesas"])
 
-# Mock database
-_despesas_db: List[DespesaSchema] = [
+# Dados iniciais (mock), gravados no repositório na primeira execução
+_despesas_db: Repositorio[DespesaSchema] = criar_repositorio("despesas", DespesaSchema, [
     DespesaSchema(id=1, valor=120.0, data=date(2025, 10, 1), descricao="Supermercado mês", categoria_id=4, usuario_id=1, recorrente=False),
     DespesaSchema(id=2, valor=50.0, data=date(2025, 9, 5), descricao="Uber ida trabalho", categoria_id=5, usuario_id=1, recorrente=False),
     DespesaSchema(id=3, valor=500.0, data=date(2025, 9, 1), descricao="Aluguel apartamento", categoria_id=3, usuario_id=1, recorrente=True),
@@ -32,41 +47,113 @@ _despesas_db: List[DespesaSchema] = [
     DespesaSchema(id=10, valor=90.0, data=date(2025, 9, 25), descricao="Plano odontológico", categoria_id=3, usuario_id=1, recorrente=True),
     DespesaSchema(id=11, valor=75.0, data=date(2025, 9, 27), descricao="Clube de leitura", categoria_id=6, usuario_id=1, recorrente=True),
     DespesaSchema(id=12, valor=180.0, data=date(2025, 9, 29), descricao="Aula de música", categoria_id=8, usuario_id=1, recorrente=True),
-]
+], indices=("usuario_id", "categoria_id", "data"), colunar=True, particionado=True)
+_despesas = RepositorioAssincrono(_despesas_db)
+categorizador.observar("despesa", _despesas_db)
 
 
 @router.get("/", response_model=List[DespesaSchema])
-def listar_despesas() -> List[DespesaSchema]:
-    """Lista todas as despesas cadastradas."""
-    return _despesas_db
+async def listar_despesas(
+    response: Response,
+    pagina: Paginacao = Depends(),
+    contexto: ContextoUsuario = Depends(),
+    usuario_id: Optional[int] = None,
+    categoria_id: Optional[int] = None,
+    data_de: Optional[date] = None,
+    data_ate: Optional[date] = None,
+    recorrente: Optional[bool] = None,
+) -> List[DespesaSchema]:
+    """Lista as despesas cadastradas, com filtros opcionais e paginação por cursor."""
+    despesas = await _despesas.consultar(
+        pagina.after,
+        pagina.limit,
+        data_de=data_de,
+        data_ate=data_ate,
+        usuario_id=contexto.filtro(usuario_id),
+        categoria_id=categoria_id,
+        recorrente=recorrente,
+    )
+    return pagina.responder(response, despesas, DespesaSchema)
+
+
+@router.get("/export")
+def exportar_despesas(
+    formato: str = Query("ndjson", description="ndjson ou csv."),
+    gzip: bool = Query(False, description="Comprime o arquivo com gzip."),
+    contexto: ContextoUsuario = Depends(),
+    usuario_id: Optional[int] = None,
+    categoria_id: Optional[int] = None,
+    data_de: Optional[date] = None,
+    data_ate: Optional[date] = None,
+    recorrente: Optional[bool] = None,
+) -> StreamingResponse:
+    """Exporta o histórico de despesas em streaming, com memória constante no servidor."""
+    despesas = _despesas_db.iterar(
+        data_de=data_de,
+        data_ate=data_ate,
+        usuario_id=contexto.filtro(usuario_id),
+        categoria_id=categoria_id,
+        recorrente=recorrente,
+    )
+    return responder_exportacao(despesas, DespesaSchema, formato, gzip, "despesas")
 
 
 @router.post("/", response_model=DespesaSchema, status_code=201)
-def criar_despesa(despesa: DespesaSchema) -> DespesaSchema:
+async def criar_despesa(
+    despesa: DespesaSchema, response: Response, contexto: ContextoUsuario = Depends()
+) -> DespesaSchema:
     """Cria uma nova despesa."""
+    contexto.exigir_dono(despesa)
     # Gera um novo ID automaticamente
-    novo_id = max([d.id for d in _despesas_db], default=0) + 1
-    despesa.id = novo_id
-    _despesas_db.append(despesa)
-    return despesa
+    return responder_com_etag(response, await _despesas.criar(despesa))
+
+
+@router.post("/bulk", response_model=ResultadoImportacaoSchema)
+def importar_despesas(
+    arquivo: UploadFile = File(..., description="Extrato em CSV, OFX ou NDJSON."),
+    formato: Optional[str] = Query(None, description="csv, ofx ou ndjson; se omitido, usa a extensão do arquivo."),
+    usuario_id: Optional[int] = Query(None, description="Usuário das linhas que não informam usuario_id."),
+    categoria_id: Optional[int] = Query(None, description="Categoria das linhas que não informam categoria_id."),
+    encoding: Optional[str] = None,
+    delimitador: str = ",",
+    lote: int = Query(TAMANHO_LOTE, ge=1, le=50_000),
+    categorizar: bool = Query(True, description="Sugere pela descrição a categoria das linhas que continuam sem uma."),
+    contexto: ContextoUsuario = Depends(),
+) -> ResultadoImportacaoSchema:
+    """Importa despesas em lote a partir de um extrato, retornando o relatório de erros por linha."""
+    linhas = ler_arquivo(arquivo, formato, "despesa", encoding, delimitador)
+    padroes = {"usuario_id": contexto.filtro(usuario_id), "categoria_id": categoria_id}
+    sugerir = partial(categorizador.categorias, "despesa") if categorizar else None
+    return importar(_despesas_db, DespesaSchema, linhas, padroes, lote, sugerir, contexto.usuario_id)
+
+
+@router.get("/{despesa_id}", response_model=DespesaSchema)
+async def obter_despesa(despesa_id: int, response: Response, contexto: ContextoUsuario = Depends()) -> DespesaSchema:
+    """Retorna uma despesa pelo ID, com o ETag da versão atual."""
+    return await obter_ou_404(_despesas, despesa_id, response, "Despesa não encontrada.", contexto.usuario_id)
 
 
 @router.put("/{despesa_id}", response_model=DespesaSchema)
-def atualizar_despesa(despesa_id: int, despesa_atualizada: DespesaSchema) -> DespesaSchema:
-    """Atualiza uma despesa existente."""
-    for i, despesa in enumerate(_despesas_db):
-        if despesa.id == despesa_id:
-            despesa_atualizada.id = despesa_id
-            _despesas_db[i] = despesa_atualizada
-            return despesa_atualizada
-    raise HTTPException(status_code=404, detail="Despesa não encontrada.")
+async def atualizar_despesa(
+    despesa_id: int,
+    despesa_atualizada: DespesaSchema,
+    response: Response,
+    if_match: Optional[str] = Depends(cabecalho_if_match),
+    contexto: ContextoUsuario = Depends(),
+) -> DespesaSchema:
+    """Atualiza uma despesa existente (condicional ao ``If-Match``, se informado)."""
+    contexto.exigir_dono(despesa_atualizada)
+    return await atualizar_condicional(
+        _despesas, despesa_id, despesa_atualizada, if_match, response, "Despesa não encontrada.", contexto.usuario_id
+    )
 
 
 @router.delete("/{despesa_id}")
-def excluir_despesa(despesa_id: int) -> dict:
-    """Exclui uma despesa."""
-    for i, despesa in enumerate(_despesas_db):
-        if despesa.id == despesa_id:
-            del _despesas_db[i]
-            return {"message": "Despesa excluída com sucesso."}
-    raise HTTPException(status_code=404, detail="Despesa não encontrada.")
+async def excluir_despesa(
+    despesa_id: int,
+    if_match: Optional[str] = Depends(cabecalho_if_match),
+    contexto: ContextoUsuario = Depends(),
+) -> dict:
+    """Exclui uma despesa (condicional ao ``If-Match``, se informado)."""
+    await remover_condicional(_despesas, despesa_id, if_match, "Despesa não encontrada.", contexto.usuario_id)
+    return {"message": "Despesa excluída com sucesso."}
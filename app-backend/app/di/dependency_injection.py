@@ -0,0 +1,186 @@
+"""
+Injeção de dependências da API DuckBills: escolha do backend de armazenamento e
+registro dos repositórios de cada entidade.
+
+O backend é definido pela variável de ambiente ``DUCKBILLS_ARMAZENAMENTO``:
+
+- ``memoria`` (padrão): repositórios em memória, sem persistência (desenvolvimento e testes);
+- ``sqlite``: repositórios persistidos no arquivo ``DUCKBILLS_SQLITE_PATH``
+  (padrão ``duckbills.db``), em modo WAL, permitindo ``uvicorn --workers N``;
+- ``colunar``: como ``memoria``, mas as tabelas grandes de lançamentos (despesas e rendas)
+  usam o ``RepositorioColunar``, com uma fração da memória por registro.
+
+Com ``DUCKBILLS_PARTICOES=N`` (padrão 1), os dados por usuário (lançamentos, metas, orçamentos,
+contas recorrentes e seus totais) são divididos em N partições por ``usuario_id``
+(``RepositorioParticionado``). No SQLite, cada partição fica em um arquivo próprio ao lado de
+``DUCKBILLS_SQLITE_PATH`` (``duckbills.p0.db``, ``duckbills.p1.db``...), com escritor próprio;
+o arquivo principal guarda as sequências de IDs e as tabelas sem usuário. Mudar o número de
+partições de um banco existente exige exportar e reimportar os dados.
+
+Os repositórios e tabelas de totais criados aqui têm as suas operações medidas pelas
+métricas da API (``app.metricas``).
+"""
+
+
+import os
+from typing import Dict, Iterable, List, Sequence, Type
+
+from app.armazenamento import (
+    ConexoesSQLite,
+    RegistroAlteracoes,
+    RegistroAlteracoesMemoria,
+    RegistroAlteracoesSQLite,
+    Repositorio,
+    RepositorioAssincrono,
+    RepositorioColunar,
+    RepositorioMemoria,
+    RepositorioParticionado,
+    RepositorioSQLite,
+    Sequencia,
+    SequenciaSQLite,
+    TotaisMensais,
+    TotaisMensaisMemoria,
+    TotaisMensaisSQLite,
+    TotaisParticionados,
+)
+from app.armazenamento.base import T
+from app.metricas import OPERACOES_ALTERACOES, OPERACOES_TOTAIS, instrumentar
+
+__all__ = [
+    "Repositorio",
+    "RepositorioAssincrono",
+    "Sequencia",
+    "TotaisMensais",
+    "RegistroAlteracoes",
+    "criar_registro_alteracoes",
+    "criar_repositorio",
+    "criar_totais_mensais",
+    "particoes",
+    "registrar_repositorio",
+    "obter_repositorio",
+]
+
+BACKEND_PADRAO = "memoria"
+
+# Registro global de repositórios, para que outros módulos acessem os dados de uma entidade
+_repositorios: Dict[str, Repositorio] = {}
+
+# Pools de conexões SQLite, um por arquivo
+_conexoes: Dict[str, ConexoesSQLite] = {}
+
+
+def _conexoes_sqlite(caminho: str) -> ConexoesSQLite:
+    if caminho not in _conexoes:
+        _conexoes[caminho] = ConexoesSQLite(caminho)
+    return _conexoes[caminho]
+
+
+def _backend() -> str:
+    backend = os.environ.get("DUCKBILLS_ARMAZENAMENTO", BACKEND_PADRAO)
+    if backend not in ("memoria", "sqlite", "colunar"):
+        raise ValueError(f"Backend de armazenamento desconhecido: {backend}")
+    return backend
+
+
+def _caminho_sqlite() -> str:
+    return os.environ.get("DUCKBILLS_SQLITE_PATH", "duckbills.db")
+
+
+def particoes() -> int:
+    """Quantidade de partições por usuário (``DUCKBILLS_PARTICOES``)."""
+    quantidade = int(os.environ.get("DUCKBILLS_PARTICOES", "1"))
+    if quantidade < 1:
+        raise ValueError("DUCKBILLS_PARTICOES deve ser pelo menos 1.")
+    return quantidade
+
+
+def _caminhos_particoes() -> List[str]:
+    raiz, extensao = os.path.splitext(_caminho_sqlite())
+    return [f"{raiz}.p{indice}{extensao}" for indice in range(particoes())]
+
+
+def criar_repositorio(
+    nome: str,
+    modelo: Type[T],
+    registros: Iterable[T] = (),
+    indices: Sequence[str] = (),
+    colunar: bool = False,
+    particionado: bool = False,
+) -> Repositorio[T]:
+    """Cria o repositório de uma entidade no backend configurado e o registra sob ``nome``.
+
+    Os ``registros`` iniciais só são gravados no SQLite se a tabela ainda estiver vazia.
+    Com ``colunar=True``, a entidade usa o ``RepositorioColunar`` no backend ``colunar``.
+    Com ``particionado=True`` (o modelo deve ter ``usuario_id``), a entidade é dividida nas
+    partições de ``DUCKBILLS_PARTICOES``, se houver mais de uma.
+    """
+    backend = _backend()
+    if particionado and particoes() > 1:
+        if backend == "sqlite":
+            sequencia: Sequencia = SequenciaSQLite(_conexoes_sqlite(_caminho_sqlite()), nome)
+            partes: List[Repositorio[T]] = [
+                RepositorioSQLite(modelo, _conexoes_sqlite(caminho), nome, indices=indices, sequencia=sequencia)
+                for caminho in _caminhos_particoes()
+            ]
+        else:
+            sequencia = Sequencia()
+            classe = RepositorioColunar if backend == "colunar" and colunar else RepositorioMemoria
+            partes = [classe(modelo, indices=indices, sequencia=sequencia) for _ in range(particoes())]
+        # As rotas com o usuário da requisição usam as partições diretamente
+        for parte in partes:
+            instrumentar(parte, nome)
+        return registrar_repositorio(nome, RepositorioParticionado(modelo, partes, registros))
+    if backend == "sqlite":
+        repositorio: Repositorio[T] = RepositorioSQLite(
+            modelo, _conexoes_sqlite(_caminho_sqlite()), nome, registros, indices=indices
+        )
+    elif backend == "colunar" and colunar:
+        repositorio = RepositorioColunar(modelo, registros, indices=indices)
+    else:
+        repositorio = RepositorioMemoria(modelo, registros, indices=indices)
+    return registrar_repositorio(nome, repositorio)
+
+
+def criar_totais_mensais(tabela: str = "totais_mensais", particionado: bool = False) -> TotaisMensais:
+    """Cria uma tabela de totais mensais no backend configurado.
+
+    No SQLite, ela compartilha as conexões dos repositórios, para ser atualizada na mesma
+    transação das escritas que a mantêm. Com ``particionado=True``, os totais seguem as
+    partições dos lançamentos (e, no SQLite, ficam nos mesmos arquivos).
+    """
+    sqlite = _backend() == "sqlite"
+    if particionado and particoes() > 1 and sqlite:
+        totais: TotaisMensais = TotaisParticionados([
+            TotaisMensaisSQLite(_conexoes_sqlite(caminho), tabela) for caminho in _caminhos_particoes()
+        ])
+    elif sqlite:
+        totais = TotaisMensaisSQLite(_conexoes_sqlite(_caminho_sqlite()), tabela)
+    else:
+        # Em memória, a tabela de totais já é por usuário e seu lock é curto, então não é particionada
+        totais = TotaisMensaisMemoria()
+    return instrumentar(totais, tabela, OPERACOES_TOTAIS)
+
+
+def criar_registro_alteracoes(retencao: int) -> RegistroAlteracoes:
+    """Cria o registro de alterações (feed de ``/changes``) no backend configurado.
+
+    No SQLite, ele fica no arquivo principal e compartilha as suas conexões: as escritas das
+    tabelas desse arquivo gravam a alteração na mesma transação. Com partições, as escritas nos
+    arquivos das partições a gravam em uma transação curta no arquivo principal.
+    """
+    if _backend() == "sqlite":
+        registro: RegistroAlteracoes = RegistroAlteracoesSQLite(_conexoes_sqlite(_caminho_sqlite()), retencao)
+    else:
+        registro = RegistroAlteracoesMemoria(retencao)
+    return instrumentar(registro, "alteracoes", OPERACOES_ALTERACOES)
+
+
+def registrar_repositorio(nome: str, repositorio: Repositorio[T]) -> Repositorio[T]:
+    """Registra um repositório sob o nome informado e o retorna."""
+    _repositorios[nome] = instrumentar(repositorio, nome)
+    return repositorio
+
+
+def obter_repositorio(nome: str) -> Repositorio:
+    """Retorna o repositório registrado sob o nome informado."""
+    return _repositorios[nome]
@@ -0,0 +1,50 @@
+"""
+Valores monetários exatos.
+
+Nos schemas, os valores em reais são ``Dinheiro``: um ``Decimal`` com duas casas, sem o erro
+de representação do ``float``. Na API nada muda: a entrada aceita números (ou textos)
+decimais e a saída JSON continua sendo um número decimal. Valores com frações de centavo são
+recusados (422 nas rotas), em vez de arredondados em silêncio.
+
+Somas em massa (totais mensais, consumo de orçamentos, projeção) são feitas em centavos
+inteiros (``centavos`` e ``reais`` convertem nos dois sentidos), que o Python e o NumPy
+somam de forma exata e tão rápida quanto ``float``.
+"""
+
+
+from decimal import ROUND_HALF_EVEN, Decimal
+from typing import Annotated, Union
+
+from pydantic import AfterValidator, PlainSerializer, WithJsonSchema
+
+CENTAVO = Decimal("0.01")
+ZERO = Decimal("0.00")
+
+
+def _quantizar(valor: Decimal) -> Decimal:
+    quantizado = valor.quantize(CENTAVO)
+    if quantizado != valor:
+        raise ValueError("O valor deve ter no máximo duas casas decimais.")
+    return quantizado
+
+
+# Decimal com duas casas; no JSON, um número (o ``float`` de um valor com duas casas é
+# impresso exatamente com essas casas), documentado no OpenAPI como antes
+Dinheiro = Annotated[
+    Decimal,
+    AfterValidator(_quantizar),
+    PlainSerializer(float, return_type=float, when_used="json"),
+    WithJsonSchema({"type": "number"}),
+]
+
+
+def centavos(valor: Union[Decimal, int, float]) -> int:
+    """Converte um valor em reais em centavos inteiros."""
+    if isinstance(valor, Decimal):
+        return int(valor.scaleb(2).to_integral_value(ROUND_HALF_EVEN))
+    return round(valor * 100)
+
+
+def reais(quantidade: int) -> Decimal:
+    """Converte centavos inteiros no valor em reais, com duas casas."""
+    return Decimal(int(quantidade)).scaleb(-2)
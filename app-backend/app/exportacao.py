@@ -0,0 +1,88 @@
+"""
+Exportação do histórico completo em streaming (NDJSON ou CSV, opcionalmente com gzip).
+
+Os registros são lidos do repositório página a página e serializados sob demanda, então a
+memória do servidor não cresce com o tamanho do histórico. Cada registro é serializado
+direto para bytes pelo serializador compilado do pydantic-core, sem passar por
+``model_dump`` + ``json.dumps``.
+"""
+
+
+import csv
+import io
+import zlib
+from typing import Iterable, Iterator, Type
+
+from fastapi import HTTPException
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+
+FORMATOS = {"ndjson": "application/x-ndjson", "csv": "text/csv; charset=utf-8"}
+# Tamanho aproximado de cada pedaço enviado ao cliente
+TAMANHO_PEDACO = 64 * 1024
+
+
+def gerar_ndjson(registros: Iterable[BaseModel]) -> Iterator[bytes]:
+    """Serializa os registros como NDJSON, em pedaços de aproximadamente ``TAMANHO_PEDACO`` bytes."""
+    pedaco = bytearray()
+    for registro in registros:
+        pedaco += registro.__pydantic_serializer__.to_json(registro)
+        pedaco += b"\n"
+        if len(pedaco) >= TAMANHO_PEDACO:
+            yield bytes(pedaco)
+            pedaco.clear()
+    if pedaco:
+        yield bytes(pedaco)
+
+
+def gerar_csv(registros: Iterable[BaseModel], modelo: Type[BaseModel]) -> Iterator[bytes]:
+    """Serializa os registros como CSV (com cabeçalho), em pedaços."""
+    campos = list(modelo.model_fields)
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer)
+    escritor.writerow(campos)
+    for registro in registros:
+        escritor.writerow([getattr(registro, campo) for campo in campos])
+        if buffer.tell() >= TAMANHO_PEDACO:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+def comprimir(pedacos: Iterable[bytes]) -> Iterator[bytes]:
+    """Comprime os pedaços em formato gzip, de forma incremental."""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for pedaco in pedacos:
+        comprimido = compressor.compress(pedaco)
+        if comprimido:
+            yield comprimido
+    yield compressor.flush()
+
+
+def responder_exportacao(
+    registros: Iterable[BaseModel],
+    modelo: Type[BaseModel],
+    formato: str,
+    gzip: bool,
+    nome_arquivo: str,
+) -> StreamingResponse:
+    """Monta a ``StreamingResponse`` da exportação no formato pedido."""
+    if formato not in FORMATOS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Formato de exportação não suportado. Use um destes: {', '.join(FORMATOS)}.",
+        )
+    pedacos = gerar_ndjson(registros) if formato == "ndjson" else gerar_csv(registros, modelo)
+    nome_arquivo = f"{nome_arquivo}.{formato}"
+    tipo = FORMATOS[formato]
+    if gzip:
+        pedacos = comprimir(pedacos)
+        nome_arquivo += ".gz"
+        tipo = "application/gzip"
+    return StreamingResponse(
+        pedacos,
+        media_type=tipo,
+        headers={"Content-Disposition": f'attachment; filename="{nome_arquivo}"'},
+    )
@@ -0,0 +1,255 @@
+"""
+Importação em lote de extratos bancários (CSV, OFX ou NDJSON).
+
+O arquivo é lido de forma incremental, linha a linha (ou transação a transação, no OFX),
+sem ser carregado inteiro na memória. As linhas válidas são acumuladas em lotes; cada lote
+reserva um bloco de IDs e é gravado em uma única transação. Linhas inválidas não
+interrompem a importação: entram no relatório de erros. Linhas sem ``categoria_id`` podem ter
+a categoria sugerida pela descrição (``app.categorizacao``), em lote, antes da validação.
+"""
+
+
+import csv
+import io
+import json
+import re
+from contextlib import contextmanager
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from typing import Any, BinaryIO, Callable, Dict, Iterator, List, Optional, Sequence, Tuple, Type, Union
+
+from fastapi import HTTPException, UploadFile
+from pydantic import ValidationError
+
+from app.armazenamento.base import Repositorio, T
+from app.schemas import ErroImportacaoSchema, ResultadoImportacaoSchema
+
+FORMATOS = ("csv", "ndjson", "ofx")
+TAMANHO_LOTE = 5000
+# Limite de erros detalhados na resposta; os demais são apenas contados
+MAX_ERROS = 1000
+
+# Cada leitor produz (número da linha, dados). ``None`` indica linha ignorada e uma
+# exceção indica linha que não pôde ser interpretada.
+Linha = Tuple[int, Union[Dict[str, Any], Exception, None]]
+# Recebe as descrições de um lote e retorna a categoria de cada uma (``None`` se não houver)
+Categorizar = Callable[[Sequence[Optional[str]]], List[Optional[int]]]
+
+# Tamanho máximo (em caracteres) de uma transação OFX; uma maior vira erro da linha
+MAX_TRANSACAO_OFX = 64 * 1024
+
+_ABERTURA_OFX = re.compile(r"<STMTTRN>", re.I)
+_FECHAMENTO_OFX = re.compile(r"</STMTTRN>", re.I)
+_CAMPO_OFX = re.compile(r"<(\w+)>([^<\r\n]*)")
+_BLOCO_LEITURA = 64 * 1024
+
+
+@contextmanager
+def _texto(arquivo: BinaryIO, encoding: str) -> Iterator[io.TextIOWrapper]:
+    """Decodifica o arquivo de forma incremental, sem fechá-lo ao final."""
+    texto = io.TextIOWrapper(arquivo, encoding=encoding, newline="")
+    try:
+        yield texto
+    finally:
+        texto.detach()
+
+
+def ler_csv(arquivo: BinaryIO, encoding: str = "utf-8", delimitador: str = ",") -> Iterator[Linha]:
+    """Lê um CSV com cabeçalho contendo os nomes dos campos do schema."""
+    with _texto(arquivo, encoding) as texto:
+        leitor = csv.DictReader(texto, delimiter=delimitador)
+        for dados in leitor:
+            yield leitor.line_num, {campo.strip(): valor for campo, valor in dados.items()
+                                    if campo and valor not in ("", None)}
+
+
+def ler_ndjson(arquivo: BinaryIO, encoding: str = "utf-8") -> Iterator[Linha]:
+    """Lê um arquivo NDJSON, com um objeto JSON por linha."""
+    with _texto(arquivo, encoding) as texto:
+        for numero, conteudo in enumerate(texto, start=1):
+            if not conteudo.strip():
+                continue
+            try:
+                yield numero, json.loads(conteudo)
+            except ValueError as erro:
+                yield numero, erro
+
+
+def ler_ofx(arquivo: BinaryIO, tipo: str, encoding: str = "latin-1") -> Iterator[Linha]:
+    """Lê as transações (``<STMTTRN>``) de um extrato OFX.
+
+    Débitos viram despesas e créditos viram rendas: transações do sinal oposto ao ``tipo``
+    pedido são ignoradas. O número da "linha" é a posição da transação no arquivo.
+
+    O buffer guarda só a transação em andamento: o texto antes de cada ``<STMTTRN>`` é descartado
+    a cada bloco lido. Uma transação maior que ``MAX_TRANSACAO_OFX`` (ou sem fechamento) vira um
+    erro da linha e é pulada até o seu ``</STMTTRN>``.
+    """
+    buffer = ""
+    numero = 0
+    pulando = False
+    with _texto(arquivo, encoding) as texto:
+        while True:
+            bloco = texto.read(_BLOCO_LEITURA)
+            buffer += bloco
+            while True:
+                if pulando:
+                    fechamento = _FECHAMENTO_OFX.search(buffer)
+                    if fechamento is None:
+                        # Só o que pode ser o começo de um fechamento dividido entre blocos
+                        buffer = buffer[-len("</STMTTRN>") + 1:]
+                        break
+                    buffer = buffer[fechamento.end():]
+                    pulando = False
+                abertura = _ABERTURA_OFX.search(buffer)
+                if abertura is None:
+                    buffer = buffer[-len("<STMTTRN>") + 1:]
+                    break
+                fechamento = _FECHAMENTO_OFX.search(buffer, abertura.end())
+                if fechamento is None:
+                    buffer = buffer[abertura.start():]
+                    if len(buffer) > MAX_TRANSACAO_OFX:
+                        numero += 1
+                        yield numero, ValueError(f"Transação OFX maior que {MAX_TRANSACAO_OFX} caracteres.")
+                        pulando = True
+                        continue
+                    break
+                numero += 1
+                if fechamento.end() - abertura.start() > MAX_TRANSACAO_OFX:
+                    # O mesmo limite vale para a transação que coube inteira num só bloco
+                    yield numero, ValueError(f"Transação OFX maior que {MAX_TRANSACAO_OFX} caracteres.")
+                else:
+                    yield numero, _transacao_ofx(buffer[abertura.end():fechamento.start()], tipo)
+                buffer = buffer[fechamento.end():]
+            if not bloco:
+                if not pulando and _ABERTURA_OFX.search(buffer):
+                    yield numero + 1, ValueError("Transação OFX sem </STMTTRN>.")
+                return
+
+
+def _transacao_ofx(conteudo: str, tipo: str) -> Union[Dict[str, Any], Exception, None]:
+    campos = {nome.upper(): valor.strip() for nome, valor in _CAMPO_OFX.findall(conteudo)}
+    try:
+        valor = Decimal(campos["TRNAMT"].replace(",", "."))
+        data = datetime.strptime(campos["DTPOSTED"][:8], "%Y%m%d").date()
+    except (KeyError, ValueError, InvalidOperation) as erro:
+        return ValueError(f"Transação OFX inválida: {erro!r}")
+    if (valor < 0) != (tipo == "despesa"):
+        return None
+    return {"valor": abs(valor), "data": data, "descricao": campos.get("MEMO") or campos.get("NAME")}
+
+
+def ler_arquivo(
+    arquivo: UploadFile,
+    formato: Optional[str],
+    tipo: str,
+    encoding: Optional[str] = None,
+    delimitador: str = ",",
+) -> Iterator[Linha]:
+    """Escolhe o leitor pelo ``formato`` informado ou, na falta dele, pela extensão do arquivo."""
+    if formato is None and arquivo.filename and "." in arquivo.filename:
+        formato = arquivo.filename.rsplit(".", 1)[1].lower()
+    if formato == "json":
+        formato = "ndjson"
+    if formato not in FORMATOS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Formato de arquivo não suportado. Use um destes: {', '.join(FORMATOS)}.",
+        )
+    if formato == "csv":
+        return ler_csv(arquivo.file, encoding or "utf-8", delimitador)
+    if formato == "ndjson":
+        return ler_ndjson(arquivo.file, encoding or "utf-8")
+    return ler_ofx(arquivo.file, tipo, encoding or "latin-1")
+
+
+def importar(
+    repositorio: Repositorio[T],
+    modelo: Type[T],
+    linhas: Iterator[Linha],
+    padroes: Optional[Dict[str, Any]] = None,
+    tamanho_lote: int = TAMANHO_LOTE,
+    categorizar: Optional[Categorizar] = None,
+    usuario_id: Optional[int] = None,
+) -> ResultadoImportacaoSchema:
+    """Valida e grava as linhas em lotes, retornando o relatório da importação.
+
+    Os ``padroes`` preenchem campos ausentes nas linhas (por exemplo, ``usuario_id``). Com
+    ``categorizar``, as linhas que continuam sem ``categoria_id`` recebem a categoria sugerida
+    pela descrição, quando houver uma. Com ``usuario_id`` (o usuário da requisição), as linhas
+    de outros usuários são rejeitadas e os lotes são gravados só na partição dele.
+    """
+    if usuario_id is not None:
+        padroes = {**(padroes or {}), "usuario_id": usuario_id}
+        repositorio = repositorio.particao_do_usuario(usuario_id)
+    padroes = {campo: valor for campo, valor in (padroes or {}).items() if valor is not None}
+    resultado = ResultadoImportacaoSchema()
+    pendentes: List[Tuple[int, Dict[str, Any]]] = []
+    for numero, dados in linhas:
+        if dados is None:
+            resultado.ignoradas += 1
+            continue
+        if isinstance(dados, Exception):
+            _registrar_erro(resultado, numero, str(dados))
+            continue
+        pendentes.append((numero, {**padroes, **dados, "id": 0}))
+        if len(pendentes) >= tamanho_lote:
+            _gravar(repositorio, _validar(modelo, pendentes, categorizar, usuario_id, resultado), resultado)
+            pendentes = []
+    if pendentes:
+        _gravar(repositorio, _validar(modelo, pendentes, categorizar, usuario_id, resultado), resultado)
+    return resultado
+
+
+def _validar(
+    modelo: Type[T],
+    pendentes: List[Tuple[int, Dict[str, Any]]],
+    categorizar: Optional[Categorizar],
+    usuario_id: Optional[int],
+    resultado: ResultadoImportacaoSchema,
+) -> List[T]:
+    if categorizar is not None:
+        sem_categoria = [dados for _, dados in pendentes if dados.get("categoria_id") is None]
+        if sem_categoria:
+            categorias = categorizar([_descricao(dados) for dados in sem_categoria])
+            for dados, categoria_id in zip(sem_categoria, categorias):
+                if categoria_id is not None:
+                    dados["categoria_id"] = categoria_id
+                    resultado.categorizadas += 1
+    lote: List[T] = []
+    for numero, dados in pendentes:
+        try:
+            registro = modelo.model_validate(dados)
+        except ValidationError as erro:
+            _registrar_erro(resultado, numero, _mensagem(erro))
+            continue
+        if usuario_id is not None and registro.usuario_id != usuario_id:
+            _registrar_erro(resultado, numero, "usuario_id: a linha deve ser do usuário da requisição")
+            continue
+        lote.append(registro)
+    return lote
+
+
+def _descricao(dados: Dict[str, Any]) -> Optional[str]:
+    descricao = dados.get("descricao")
+    return descricao if isinstance(descricao, str) else None
+
+
+def _gravar(repositorio: Repositorio[T], lote: List[T], resultado: ResultadoImportacaoSchema) -> None:
+    if not lote:
+        return
+    with repositorio.transacao():
+        repositorio.criar_varios(lote)
+    resultado.importadas += len(lote)
+
+
+def _registrar_erro(resultado: ResultadoImportacaoSchema, numero: int, mensagem: str) -> None:
+    resultado.total_erros += 1
+    if len(resultado.erros) < MAX_ERROS:
+        resultado.erros.append(ErroImportacaoSchema(linha=numero, erro=mensagem))
+
+
+def _mensagem(erro: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(parte) for parte in detalhe['loc'])}: {detalhe['msg']}" for detalhe in erro.errors()
+    )
@@ -0,0 +1,118 @@
+"""
+Lançamento automático das ocorrências vencidas das contas recorrentes como despesas e rendas.
+
+O job ``lancamentos_recorrentes`` do agendador roda de hora em hora. A cada execução, as
+ocorrências vencidas até hoje são conciliadas com os lançamentos existentes
+(``app.conciliacao``). As que não têm um lançamento correspondente viram despesas ou rendas.
+Assim, um pagamento já registrado à mão não é lançado de novo. Cada execução confere as
+ocorrências desde ``RETROATIVO`` antes da anterior; a primeira, desde ``RETROATIVO`` antes de
+hoje. O histórico inteiro das contas só é lançado com ``DUCKBILLS_LANCAMENTOS_HISTORICO=1`` ou
+chamando ``lancar_ocorrencias`` sem ``desde``.
+
+Cada ocorrência lançada grava uma chave no repositório ``lancamentos_recorrentes``. O ID da
+chave é derivado da conta e da data da ocorrência, então a mesma ocorrência nunca é lançada
+duas vezes, mesmo que o job seja repetido, recupere execuções perdidas ou rode em vários
+workers ao mesmo tempo. No SQLite, a chave e o lançamento são gravados na mesma transação (as
+chaves ficam na mesma partição dos lançamentos do usuário).
+"""
+
+
+import logging
+import os
+from datetime import date, datetime, timedelta
+from typing import Optional
+
+# Os repositórios de contas, despesas e rendas são criados e registrados ao importar seus módulos
+import app.contas_recorrentes  # noqa: F401
+from app.agendador import a_cada, agendador
+from app.conciliacao import conciliar, lancamentos_registrados
+from app.di.dependency_injection import criar_repositorio, obter_repositorio
+from app.schemas import ContaRecorrenteSchema, DespesaSchema, LancamentoRecorrenteSchema, RendaSchema
+
+logger = logging.getLogger(__name__)
+
+# Quantos dias antes da última execução cada execução volta a conferir (contas criadas ou
+# corrigidas com data retroativa)
+RETROATIVO = timedelta(days=31)
+
+_lancadas = criar_repositorio(
+    "lancamentos_recorrentes", LancamentoRecorrenteSchema, indices=("conta_recorrente_id",), particionado=True
+)
+
+
+def chave(conta_id: int, data: date) -> int:
+    """ID da chave de idempotência de uma ocorrência (conta, data)."""
+    return conta_id * 1_000_000 + data.toordinal()
+
+
+def _lancar(conta: ContaRecorrenteSchema, data: date) -> bool:
+    """Lança uma ocorrência; retorna ``False`` se ela já tinha sido lançada."""
+    if conta.tipo == "despesa":
+        repositorio = obter_repositorio("despesas")
+        lancamento = DespesaSchema(
+            id=0, valor=conta.valor, data=data, descricao=conta.descricao,
+            categoria_id=conta.categoria_id, usuario_id=conta.usuario_id, recorrente=True,
+        )
+    elif conta.tipo == "renda":
+        repositorio = obter_repositorio("rendas")
+        lancamento = RendaSchema(
+            id=0, valor=conta.valor, data=data, descricao=conta.descricao,
+            categoria_id=conta.categoria_id, usuario_id=conta.usuario_id,
+        )
+    else:
+        return False
+    registro = LancamentoRecorrenteSchema(
+        id=chave(conta.id, data), conta_recorrente_id=conta.id, usuario_id=conta.usuario_id, data=data, tipo=conta.tipo
+    )
+    repositorio = repositorio.particao_do_usuario(conta.usuario_id)
+    lancadas = _lancadas.particao_do_usuario(conta.usuario_id)
+    try:
+        # A chave vem antes do lançamento: se ela já existir, nada é gravado
+        with repositorio.transacao(), lancadas.transacao():
+            lancadas.inserir(registro)
+            try:
+                lancamento = repositorio.criar(lancamento)
+            except BaseException:
+                # Nos repositórios em memória a transação não desfaz a chave: sem ela, a
+                # ocorrência volta a ser lançada na próxima execução
+                lancadas.remover(registro.id)
+                raise
+            lancadas.atualizar(registro.id, registro.model_copy(update={"lancamento_id": lancamento.id}))
+    except KeyError:
+        return False
+    return True
+
+
+def lancar_ocorrencias(ate: date, desde: Optional[date] = None) -> int:
+    """Lança as ocorrências vencidas entre ``desde`` (padrão: início das contas) e ``ate``.
+
+    Retorna a quantidade de lançamentos criados.
+    """
+    contas = list(obter_repositorio("contas_recorrentes").iterar())
+    if not contas:
+        return 0
+    de = desde or min(conta.data_inicio for conta in contas)
+    if de > ate:
+        return 0
+    lancadas = 0
+    for conciliacao in conciliar(contas, lancamentos_registrados(de, ate), de, ate, ate):
+        if conciliacao.lancamento is None:
+            lancadas += _lancar(conciliacao.conta, date.fromordinal(conciliacao.data))
+    return lancadas
+
+
+def _job(agendada: datetime, anterior: Optional[datetime]) -> None:
+    # Na primeira execução, só o último período retroativo é conferido: lançar todo o
+    # histórico das contas é uma escolha explícita (DUCKBILLS_LANCAMENTOS_HISTORICO=1)
+    if anterior is not None:
+        desde = anterior.date() - RETROATIVO
+    elif os.environ.get("DUCKBILLS_LANCAMENTOS_HISTORICO", "0") == "1":
+        desde = None
+    else:
+        desde = agendada.date() - RETROATIVO
+    lancadas = lancar_ocorrencias(date.today(), desde)
+    if lancadas:
+        logger.info("%s ocorrências de contas recorrentes lançadas.", lancadas)
+
+
+agendador.registrar("lancamentos_recorrentes", a_cada(hours=1), _job)
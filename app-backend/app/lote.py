@@ -0,0 +1,211 @@
+"""
+Lote de escritas em várias entidades, aplicado em uma única transação (``POST /batch``).
+
+Uma ação do usuário costuma exigir várias escritas (pagar uma conta e aportar em uma meta,
+por exemplo). Com o lote, o cliente as envia em uma só requisição e elas são aplicadas em
+ordem, com tudo ou nada: se uma operação falhar, as anteriores são desfeitas e a resposta
+traz o erro dela, com o status que a rota individual retornaria. As operações só alcançam os
+registros do usuário da requisição (cabeçalho ``X-Usuario-Id``), como nas rotas.
+
+As operações rodam com as transações de todos os repositórios envolvidos abertas, sempre na
+ordem de ``ORDEM_TRANSACOES``, então nenhuma outra escrita intercala no lote. No SQLite, os
+repositórios compartilham a conexão e o lote é uma única transação, desfeita com ROLLBACK.
+Os índices e agregados em memória mantidos pelos observadores (busca, categorização, cache)
+não voltam com o ROLLBACK; por isso, em todos os backends, as escritas do lote são anotadas e,
+se uma operação falhar, desfeitas com as escritas inversas antes de a transação terminar. Os
+efeitos das escritas fora dos dados (``apos_confirmar``), como os alertas de orçamento, só
+acontecem quando o lote é aplicado.
+"""
+
+
+import threading
+from contextlib import ExitStack
+from typing import Any, List, Optional, Tuple
+
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, ValidationError
+
+# Os repositórios das entidades são criados e registrados ao importar seus módulos
+import app.categorias  # noqa: F401
+import app.despesas  # noqa: F401
+import app.orcamentos  # noqa: F401
+import app.rendas  # noqa: F401
+from app.alteracoes import registro_alteracoes
+from app.armazenamento import adiar_efeitos
+from app.concorrencia import do_usuario, etag, exigir_versao
+from app.contexto import ContextoUsuario
+from app.di.dependency_injection import Repositorio, obter_repositorio
+from app.metas import aportar, atualizar as atualizar_meta, remover as remover_meta
+from app.schemas import LoteSchema, OperacaoLoteSchema, ResultadoLoteSchema, ResultadoOperacaoLoteSchema
+
+router = APIRouter(prefix="/batch", tags=["Lote"])
+
+MAX_OPERACOES = 1000
+# Repositórios escritos pelo lote, na ordem em que suas transações são abertas (despesas antes
+# de orçamentos, como no observador de limiares dos orçamentos)
+ORDEM_TRANSACOES = ("despesas", "rendas", "metas", "aportes_metas", "orcamentos", "categorias")
+# 'adicionar_valor' e 'atualizar' (de valor_atual) também gravam aportes no histórico da meta, e
+# 'remover' exclui o histórico com a meta
+_ESCRITOS = {"metas": ("metas", "aportes_metas")}
+
+# Escritas (repositório, antigo, novo) do lote em andamento na thread
+_escritas = threading.local()
+
+
+class _FalhaOperacao(Exception):
+    def __init__(self, indice: int, status: int, detalhe: str):
+        super().__init__(detalhe)
+        self.indice = indice
+        self.status = status
+        self.detalhe = detalhe
+
+
+def _anotar(repositorio: Repositorio) -> None:
+    def observador(antigo, novo) -> None:
+        diario = getattr(_escritas, "diario", None)
+        if diario is not None:
+            diario.append((repositorio, antigo, novo))
+    repositorio.observar(observador)
+
+
+for _nome in ORDEM_TRANSACOES:
+    _anotar(obter_repositorio(_nome))
+
+
+def _desfazer(diario: List[Tuple[Repositorio, Any, Any]]) -> None:
+    """Aplica, da última para a primeira, as escritas inversas das anotadas."""
+    for repositorio, antigo, novo in reversed(diario):
+        if novo is None:
+            repositorio.inserir(antigo)
+        elif antigo is None:
+            repositorio.remover(novo.id)
+        else:
+            repositorio.atualizar(novo.id, antigo)
+
+
+def _validar(indice: int, operacao: OperacaoLoteSchema, usuario_id: int) -> Optional[BaseModel]:
+    """Confere os campos da operação e retorna o registro a gravar (criar e atualizar)."""
+    def falha(detalhe: str) -> _FalhaOperacao:
+        return _FalhaOperacao(indice, 422, detalhe)
+
+    if operacao.operacao != "criar" and operacao.id is None:
+        raise falha("Informe o id do registro.")
+    if operacao.operacao == "adicionar_valor":
+        if operacao.entidade != "metas":
+            raise falha("'adicionar_valor' só se aplica a metas.")
+        if operacao.valor is None or operacao.valor <= 0:
+            raise _FalhaOperacao(indice, 400, "O valor deve ser positivo.")
+        return None
+    if operacao.operacao == "remover":
+        return None
+    if operacao.dados is None:
+        raise falha("Informe os dados do registro.")
+    modelo = obter_repositorio(operacao.entidade).modelo
+    try:
+        registro = modelo.model_validate({**operacao.dados, "id": operacao.id or 0})
+    except ValidationError as erro:
+        primeiro = erro.errors()[0]
+        raise falha(f"{'.'.join(map(str, primeiro['loc']))}: {primeiro['msg']}")
+    if getattr(registro, "usuario_id", usuario_id) != usuario_id:
+        raise _FalhaOperacao(indice, 403, "O registro deve pertencer ao usuário da requisição.")
+    return registro
+
+
+def _aplicar(
+    operacao: OperacaoLoteSchema, registro: Optional[BaseModel], usuario_id: int
+) -> Tuple[int, Optional[BaseModel]]:
+    """Aplica uma operação e retorna (status, registro resultante)."""
+    repositorio = obter_repositorio(operacao.entidade)
+    if operacao.operacao == "criar":
+        return 201, repositorio.criar(registro)
+    if operacao.operacao == "adicionar_valor":
+        meta = aportar(repositorio, operacao.id, operacao.valor, usuario_id, operacao.if_match)
+        if meta is None:
+            raise HTTPException(status_code=404, detail="Registro não encontrado.")
+        return 200, meta
+    atual = repositorio.obter(operacao.id)
+    if "usuario_id" in repositorio.modelo.model_fields:
+        atual = do_usuario(atual, usuario_id)
+    if atual is None:
+        raise HTTPException(status_code=404, detail="Registro não encontrado.")
+    exigir_versao(atual, operacao.if_match)
+    if operacao.operacao == "atualizar" and operacao.entidade == "metas":
+        # Como na rota: a mudança de valor_atual fica no histórico de aportes
+        return 200, atualizar_meta(repositorio, operacao.id, registro, usuario_id)
+    if operacao.entidade == "metas":
+        remover_meta(repositorio, operacao.id, usuario_id)
+        return 200, None
+    if operacao.operacao == "atualizar":
+        return 200, repositorio.atualizar(operacao.id, registro)
+    repositorio.remover(operacao.id)
+    return 200, None
+
+
+def executar_lote(
+    operacoes: List[OperacaoLoteSchema], usuario_id: int
+) -> List[ResultadoOperacaoLoteSchema]:
+    """Aplica as operações em uma transação; se uma falhar, levanta ``_FalhaOperacao`` sem gravar nada.
+
+    Registros de outros usuários são tratados como inexistentes.
+    """
+    registros = [_validar(indice, operacao, usuario_id) for indice, operacao in enumerate(operacoes)]
+    envolvidos = {nome for operacao in operacoes for nome in _ESCRITOS.get(operacao.entidade, (operacao.entidade,))}
+    resultados = []
+    with ExitStack() as transacoes:
+        for nome in ORDEM_TRANSACOES:
+            if nome in envolvidos:
+                transacoes.enter_context(obter_repositorio(nome).transacao())
+        # Com partições no SQLite, o registro de alterações fica em outro arquivo: sem a sua
+        # transação, as alterações das escritas desfeitas seriam confirmadas. Aberta depois das
+        # dos repositórios, na mesma ordem das escritas avulsas
+        transacoes.enter_context(registro_alteracoes.transacao())
+        # Os efeitos das escritas (alertas de orçamento, feed em memória) só acontecem se o
+        # lote for aplicado: os das escritas desfeitas, e os das inversas, são descartados
+        transacoes.enter_context(adiar_efeitos())
+        _escritas.diario = []
+        try:
+            for indice, (operacao, registro) in enumerate(zip(operacoes, registros)):
+                try:
+                    status, gravado = _aplicar(operacao, registro, usuario_id)
+                except HTTPException as erro:
+                    raise _FalhaOperacao(indice, erro.status_code, str(erro.detail))
+                except KeyError as erro:
+                    raise _FalhaOperacao(indice, 409, str(erro))
+                resultados.append(ResultadoOperacaoLoteSchema(
+                    indice=indice,
+                    status=status,
+                    id=operacao.id if gravado is None else gravado.id,
+                    etag=None if gravado is None else etag(gravado),
+                    registro=None if gravado is None else gravado.model_dump(mode="json"),
+                ))
+        except BaseException:
+            diario, _escritas.diario = _escritas.diario, None
+            _desfazer(diario)
+            raise
+        _escritas.diario = None
+    return resultados
+
+
+@router.post("", response_model=ResultadoLoteSchema)
+def aplicar_lote(lote: LoteSchema, contexto: ContextoUsuario = Depends()):
+    """Aplica criações, atualizações e exclusões em várias entidades com tudo ou nada.
+
+    Se uma operação falhar, nenhuma é aplicada: a resposta usa o status da operação que falhou,
+    e as demais aparecem com status 424.
+    """
+    if len(lote.operacoes) > MAX_OPERACOES:
+        raise HTTPException(status_code=400, detail=f"Informe no máximo {MAX_OPERACOES} operações por lote.")
+    try:
+        return ResultadoLoteSchema(aplicado=True, resultados=executar_lote(lote.operacoes, contexto.usuario_id))
+    except _FalhaOperacao as falha:
+        resultados = [
+            ResultadoOperacaoLoteSchema(indice=indice, status=falha.status, id=operacao.id, erro=falha.detalhe)
+            if indice == falha.indice
+            else ResultadoOperacaoLoteSchema(
+                indice=indice, status=424, id=operacao.id, erro=f"Não aplicada: a operação {falha.indice} falhou."
+            )
+            for indice, operacao in enumerate(lote.operacoes)
+        ]
+        conteudo = ResultadoLoteSchema(aplicado=False, resultados=resultados)
+        return JSONResponse(conteudo.model_dump(mode="json"), status_code=falha.status)
@@ -2,11 +2,28 @@
 Módulo principal da API DuckBills.
 
 Inicializa a aplicação FastAPI, configura CORS e inclui as rotas principais do sistema de controle financeiro.
+O agendador de jobs em segundo plano é iniciado e parado junto com a aplicação (``lifespan``), se
+ligado com ``DUCKBILLS_AGENDADOR=1`` (o padrão ao rodar este módulo como servidor).
+As métricas de desempenho ficam em ``/metrics`` (ver ``app.metricas``) e o profiler por
+amostragem, opcional, em ``/profiler`` (ver ``app.perfilador``). O feed de alterações, para a
+sincronização incremental do frontend, fica em ``/changes`` (ver ``app.alteracoes``).
 """
 
 
-from fastapi import FastAPI
+import os
+from contextlib import asynccontextmanager
+from typing import List, Optional
+
+from fastapi import FastAPI, Query
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
+
+from app.paginacao import CABECALHO_CURSOR
+from app.cache import cache_respostas
+from app.agendador import agendador
+from app.metricas import MiddlewareMetricas, metricas
+from app.perfilador import perfilador
+from app.schemas import JobAgendadoSchema
 
 from app.categorias import router as categorias_router
 from app.despesas import router as despesas_router
@@ -14,11 +31,32 @@ from app.rendas import router as rendas_router
 from app.contas_recorrentes import router as contas_recorrentes_router
 from app.orcamentos import router as orcamentos_router
 from app.metas import router as metas_router
+from app.resumo import router as resumo_router
+from app.projecao import router as projecao_router
+from app.busca import router as busca_router
+from app.conciliacao import router as conciliacao_router
+from app.lote import router as lote_router
+from app.alteracoes import router as alteracoes_router
+
+# Registra o job de lançamento das contas recorrentes (não tem rotas)
+from app import lancamentos_recorrentes  # noqa: F401
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    agendador.iniciar()
+    if os.environ.get("DUCKBILLS_PROFILER", "0") == "1":
+        perfilador.iniciar()
+    yield
+    perfilador.parar()
+    await agendador.parar()
+
 
 app = FastAPI(
     title="DuckBills API",
     description="API para gerenciamento financeiro pessoal (MVP)",
-    version="0.1.0"
+    version="0.1.0",
+    lifespan=lifespan,
 )
 
 # CORS para facilitar integração com frontend local
@@ -28,8 +66,12 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[CABECALHO_CURSOR, "ETag"],
 )
 
+# Latência, status e tamanhos de cada requisição (por fora do CORS, para medir a requisição inteira)
+app.add_middleware(MiddlewareMetricas)
+
 # Inclui as rotas de categorias
 app.include_router(categorias_router)
 
@@ -48,6 +90,24 @@ app.include_router(orcamentos_router)
 # Inclui as rotas de metas
 app.include_router(metas_router)
 
+# Inclui as rotas do resumo financeiro
+app.include_router(resumo_router)
+
+# Inclui as rotas da projeção de fluxo de caixa
+app.include_router(projecao_router)
+
+# Inclui a rota de busca textual
+app.include_router(busca_router)
+
+# Inclui a rota de conciliação das contas recorrentes
+app.include_router(conciliacao_router)
+
+# Inclui a rota de lotes de escritas
+app.include_router(lote_router)
+
+# Inclui as rotas do feed de alterações
+app.include_router(alteracoes_router)
+
 
 @app.get("/health", tags=["Health"])
 def health_check():
@@ -55,6 +115,49 @@ def health_check():
     return {"status": "ok"}
 
 
+@app.get("/cache", tags=["Health"])
+def estatisticas_cache():
+    """Contadores do cache de respostas (acertos, falhas, 304, invalidações e descartes)."""
+    return cache_respostas.estatisticas()
+
+
+@app.get("/agendador", tags=["Health"], response_model=List[JobAgendadoSchema])
+def estado_agendador() -> List[JobAgendadoSchema]:
+    """Jobs em segundo plano: agenda, próxima e última execução, duração, atraso e último erro."""
+    return agendador.estado()
+
+
+@app.get("/metrics", tags=["Health"], response_class=PlainTextResponse)
+def exportar_metricas() -> PlainTextResponse:
+    """Métricas de desempenho (requisições, armazenamento e cache) no formato texto do Prometheus."""
+    cache = cache_respostas.estatisticas()
+    texto = metricas.exportar({f"cache_{nome}": valor for nome, valor in cache.items()})
+    return PlainTextResponse(texto, media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+@app.get("/profiler", tags=["Health"], response_class=PlainTextResponse)
+def relatorio_profiler(limite: Optional[int] = Query(None, ge=1, description="Quantidade de pilhas.")) -> str:
+    """Pilhas amostradas pelo profiler, no formato dobrado (flamegraph), das mais frequentes às menos."""
+    return perfilador.relatorio(limite)
+
+
+@app.post("/profiler", tags=["Health"])
+def alternar_profiler(
+    ativo: bool,
+    intervalo: Optional[float] = Query(None, gt=0, le=1, description="Segundos entre as amostras."),
+    limpar: bool = Query(False, description="Descarta as amostras já coletadas."),
+) -> dict:
+    """Liga ou desliga o profiler por amostragem."""
+    if limpar:
+        perfilador.limpar()
+    if ativo:
+        perfilador.iniciar(intervalo)
+    else:
+        perfilador.parar()
+    return {"ativo": perfilador.ativo, "intervalo": perfilador.intervalo, "amostras": perfilador.amostras}
+
+
 if __name__ == "__main__":
     import uvicorn
+    os.environ.setdefault("DUCKBILLS_AGENDADOR", "1")
     uvicorn.run(app, host="0.0.0.0", port=5000)
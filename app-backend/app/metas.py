@@ -1,16 +1,41 @@
 """
-Rotas para gerenciamento de metas financeiras.
+Rotas para gerenciamento de metas financeiras e do seu progresso.
+
+Cada valor adicionado a uma meta é gravado como um aporte em um histórico só de inclusão,
+e os aportes são somados por meta e por mês a cada gravação. Uma atualização que muda o
+``valor_atual`` direto grava a diferença como um aporte de ajuste (que pode ser negativo),
+então toda mudança do valor atual fica no histórico. A meta e o seu histórico são gravados
+com as transações dos dois repositórios abertas, e excluir a meta exclui os seus aportes. O
+progresso (taxa mensal necessária, taxa atual e data estimada) é calculado a partir desses
+totais, sem reler o histórico.
 """
 
-from typing import List
-from datetime import date
-from fastapi import APIRouter, HTTPException
-from app.schemas import MetaSchema
+import math
+from contextlib import contextmanager
+from functools import partial
+from typing import Callable, Dict, Iterator, List, Optional, TypeVar
+from datetime import date, timedelta
+import anyio.to_thread
+from fastapi import APIRouter, Depends, HTTPException, Response
+from app.armazenamento import TotalMensal
+from app.dinheiro import Dinheiro, centavos, reais
+from app.schemas import AporteMetaSchema, MetaSchema, ProgressoMetaSchema
+from app.paginacao import Paginacao
+from app.contexto import ContextoUsuario
+from app.concorrencia import (
+    do_usuario,
+    cabecalho_if_match,
+    exigir_versao,
+    obter_ou_404,
+    responder_com_etag,
+)
+from app.resumo import mes_referencia
+from app.di.dependency_injection import Repositorio, RepositorioAssincrono, criar_repositorio, criar_totais_mensais
 
 router = APIRouter(prefix="/metas", tags=["Metas"])
 
-# Mock database
-_metas_db: List[MetaSchema] = [
+# Dados iniciais (mock), gravados no repositório na primeira execução
+_metas_db: Repositorio[MetaSchema] = criar_repositorio("metas", MetaSchema, [
     MetaSchema(
         id=1,
         titulo="Viagem para a Europa",
@@ -47,54 +72,300 @@ _metas_db: List[MetaSchema] = [
         descricao="MBA em Gestão de Projetos",
         usuario_id=1
     ),
-]
+], indices=("usuario_id",), particionado=True)
+_metas = RepositorioAssincrono(_metas_db)
+
+TIPO_APORTE = "aporte"
+DIAS_POR_MES = 365.25 / 12
+# Meses considerados na taxa atual de aportes: o mês de referência e os anteriores
+MESES_TAXA = 3
+
+# Histórico de aportes e seus totais mensais por meta (o campo ``categoria_id`` dos
+# totais guarda o ID da meta)
+_aportes_db: Repositorio[AporteMetaSchema] = criar_repositorio(
+    "aportes_metas", AporteMetaSchema, indices=("meta_id",), particionado=True
+)
+_totais_aportes = criar_totais_mensais("totais_aportes", particionado=True)
+
+
+def _somar_aporte(antigo: Optional[AporteMetaSchema], novo: Optional[AporteMetaSchema]) -> None:
+    for aporte, sinal in ((antigo, -1), (novo, 1)):
+        if aporte is not None:
+            _totais_aportes.somar(
+                aporte.usuario_id, TIPO_APORTE, mes_referencia(aporte.data), aporte.meta_id, sinal * centavos(aporte.valor), sinal
+            )
+
+
+_totais_aportes.reconstruir_se_vazio(lambda: (
+    (aporte.usuario_id, TIPO_APORTE, mes_referencia(aporte.data), aporte.meta_id, centavos(aporte.valor))
+    for aporte in _aportes_db.iterar()
+))
+_aportes_db.observar(_somar_aporte)
+
+R = TypeVar("R")
+
+
+@contextmanager
+def _transacao_com_aportes(usuario_id: int) -> Iterator[Repositorio[MetaSchema]]:
+    """Abre as transações das metas e dos aportes do usuário e entrega a partição das metas.
+
+    A ordem é a de ``app.lote.ORDEM_TRANSACOES`` (metas antes de aportes), a mesma do lote,
+    então os dois nunca esperam um pelo outro.
+    """
+    metas = _metas_db.particao_do_usuario(usuario_id)
+    with metas.transacao(), _aportes_db.particao_do_usuario(usuario_id).transacao():
+        yield metas
+
+
+async def _em_transacao(usuario_id: int, funcao: Callable[[Repositorio[MetaSchema]], R]) -> R:
+    """Executa ``funcao(metas)`` em uma thread de trabalho, com ``_transacao_com_aportes`` aberta."""
+    def executar() -> R:
+        with _transacao_com_aportes(usuario_id) as metas:
+            return funcao(metas)
+    return await anyio.to_thread.run_sync(executar)
+
+
+def _indice_mes(mes: str) -> int:
+    ano, numero = mes.split("-")
+    return int(ano) * 12 + int(numero) - 1
+
+
+def calcular_progresso(meta: MetaSchema, totais: List[TotalMensal], referencia: date) -> ProgressoMetaSchema:
+    """Calcula o progresso da meta a partir dos totais mensais dos seus aportes, em ordem de mês."""
+    # Valores em centavos; as taxas (por mês) são arredondadas para o centavo na resposta
+    valor_atual, valor_meta = centavos(meta.valor_atual), centavos(meta.valor_meta)
+    restante = max(valor_meta - valor_atual, 0)
+    meses_restantes = max((meta.prazo - referencia).days, 0) / DIAS_POR_MES
+    taxa_necessaria = restante / meses_restantes if meses_restantes > 0 else restante
+
+    mes_atual = referencia.year * 12 + referencia.month - 1
+    recentes = 0
+    for total in totais:
+        if mes_atual - MESES_TAXA < _indice_mes(total.mes) <= mes_atual:
+            recentes += total.total
+    # Aportes iniciados há menos de MESES_TAXA meses não são diluídos nos meses sem histórico
+    meses_com_historico = mes_atual - _indice_mes(totais[0].mes) + 1 if totais else MESES_TAXA
+    taxa_atual = recentes / min(MESES_TAXA, max(meses_com_historico, 1))
+
+    if restante <= 0:
+        data_estimada: Optional[date] = referencia
+    elif taxa_atual > 0:
+        data_estimada = referencia + timedelta(days=math.ceil(restante / taxa_atual * DIAS_POR_MES))
+    else:
+        data_estimada = None
+    return ProgressoMetaSchema(
+        meta_id=meta.id,
+        usuario_id=meta.usuario_id,
+        titulo=meta.titulo,
+        valor_atual=meta.valor_atual,
+        valor_meta=meta.valor_meta,
+        valor_restante=reais(restante),
+        percentual=valor_atual * 100 / valor_meta if valor_meta else 100.0,
+        prazo=meta.prazo,
+        meses_restantes=meses_restantes,
+        taxa_necessaria=reais(round(taxa_necessaria)),
+        taxa_atual=reais(round(taxa_atual)),
+        data_estimada=data_estimada,
+        no_ritmo=data_estimada is not None and data_estimada <= meta.prazo,
+        quantidade_aportes=sum(total.quantidade for total in totais),
+    )
+
+
+def aportar(
+    metas: Repositorio[MetaSchema],
+    meta_id: int,
+    valor: Dinheiro,
+    usuario_id: int,
+    if_match: Optional[str] = None,
+) -> Optional[MetaSchema]:
+    """Soma ``valor`` à meta e registra o aporte no histórico; retorna ``None`` se a meta não existir.
+
+    Deve rodar dentro das transações de ``metas`` e ``aportes_metas``. Metas de outros usuários
+    são tratadas como inexistentes.
+    """
+    meta = do_usuario(metas.obter(meta_id), usuario_id)
+    if meta is None:
+        return None
+    exigir_versao(meta, if_match)
+    meta = metas.atualizar(meta_id, meta.model_copy(update={"valor_atual": meta.valor_atual + valor}))
+    _aportes_db.criar(
+        AporteMetaSchema(id=0, meta_id=meta_id, usuario_id=meta.usuario_id, valor=valor, data=date.today())
+    )
+    return meta
+
+
+def atualizar(
+    metas: Repositorio[MetaSchema],
+    meta_id: int,
+    nova: MetaSchema,
+    usuario_id: int,
+    if_match: Optional[str] = None,
+) -> Optional[MetaSchema]:
+    """Atualiza a meta e registra a mudança de ``valor_atual`` como aporte de ajuste.
+
+    Retorna ``None`` se a meta não existir. Deve rodar dentro das transações de ``metas`` e
+    ``aportes_metas``, como ``aportar``.
+    """
+    atual = do_usuario(metas.obter(meta_id), usuario_id)
+    if atual is None:
+        return None
+    exigir_versao(atual, if_match)
+    meta = metas.atualizar(meta_id, nova)
+    ajuste = meta.valor_atual - atual.valor_atual
+    if ajuste:
+        _aportes_db.criar(
+            AporteMetaSchema(id=0, meta_id=meta_id, usuario_id=meta.usuario_id, valor=ajuste, data=date.today())
+        )
+    return meta
+
+
+def remover(
+    metas: Repositorio[MetaSchema],
+    meta_id: int,
+    usuario_id: int,
+    if_match: Optional[str] = None,
+) -> Optional[MetaSchema]:
+    """Remove a meta e o seu histórico de aportes; retorna ``None`` se a meta não existir.
+
+    Deve rodar dentro das transações de ``metas`` e ``aportes_metas``, como ``aportar``.
+    """
+    meta = do_usuario(metas.obter(meta_id), usuario_id)
+    if meta is None:
+        return None
+    exigir_versao(meta, if_match)
+    removida = metas.remover(meta_id)
+    aportes = _aportes_db.particao_do_usuario(meta.usuario_id)
+    for aporte in aportes.buscar(meta_id=meta_id):
+        aportes.remover(aporte.id)
+    return removida
 
 
 @router.get("/", response_model=List[MetaSchema])
-def listar_metas() -> List[MetaSchema]:
-    """Lista todas as metas cadastradas."""
-    return _metas_db
+async def listar_metas(
+    response: Response,
+    pagina: Paginacao = Depends(),
+    contexto: ContextoUsuario = Depends(),
+    usuario_id: Optional[int] = None,
+) -> List[MetaSchema]:
+    """Lista as metas cadastradas, com filtros opcionais e paginação por cursor."""
+    metas = await _metas.consultar(
+        pagina.after,
+        pagina.limit,
+        usuario_id=contexto.filtro(usuario_id),
+    )
+    return pagina.responder(response, metas, MetaSchema)
+
+
+@router.get("/progresso", response_model=List[ProgressoMetaSchema])
+def progresso_metas(
+    usuario_id: Optional[int] = None, data: Optional[date] = None, contexto: ContextoUsuario = Depends()
+) -> List[ProgressoMetaSchema]:
+    """Retorna o progresso de todas as metas de um usuário na data de referência (padrão: hoje)."""
+    usuario_id = contexto.filtro(usuario_id)
+    referencia = data or date.today()
+    por_meta: Dict[int, List[TotalMensal]] = {}
+    for total in _totais_aportes.consultar(usuario_id, mes_ate=mes_referencia(referencia), tipo=TIPO_APORTE):
+        por_meta.setdefault(total.categoria_id, []).append(total)
+    return [
+        calcular_progresso(meta, por_meta.get(meta.id, []), referencia)
+        for meta in _metas_db.particao_do_usuario(usuario_id).buscar(usuario_id=usuario_id)
+    ]
+
+
+@router.get("/{meta_id}/progresso", response_model=ProgressoMetaSchema)
+def progresso_meta(
+    meta_id: int, data: Optional[date] = None, contexto: ContextoUsuario = Depends()
+) -> ProgressoMetaSchema:
+    """Retorna a taxa mensal necessária, a taxa atual de aportes e a data estimada de uma meta."""
+    meta = do_usuario(_metas_db.particao_do_usuario(contexto.usuario_id).obter(meta_id), contexto.usuario_id)
+    if meta is None:
+        raise HTTPException(status_code=404, detail="Meta não encontrada.")
+    referencia = data or date.today()
+    totais = _totais_aportes.consultar(
+        meta.usuario_id, mes_ate=mes_referencia(referencia), tipo=TIPO_APORTE, categoria_id=meta_id
+    )
+    return calcular_progresso(meta, totais, referencia)
+
+
+@router.get("/{meta_id}/aportes", response_model=List[AporteMetaSchema])
+def listar_aportes(
+    meta_id: int, response: Response, pagina: Paginacao = Depends(), contexto: ContextoUsuario = Depends()
+) -> List[AporteMetaSchema]:
+    """Lista o histórico de aportes de uma meta, com paginação por cursor."""
+    # Os aportes são do dono da meta: os de metas de outros usuários não aparecem
+    aportes = _aportes_db.consultar(pagina.after, pagina.limit, meta_id=meta_id, usuario_id=contexto.usuario_id)
+    return pagina.responder(response, aportes, AporteMetaSchema)
 
 
 @router.post("/", response_model=MetaSchema, status_code=201)
-def criar_meta(meta: MetaSchema) -> MetaSchema:
+async def criar_meta(meta: MetaSchema, response: Response, contexto: ContextoUsuario = Depends()) -> MetaSchema:
     """Cria uma nova meta."""
+    contexto.exigir_dono(meta)
     # Gera um novo ID automaticamente
-    novo_id = max([m.id for m in _metas_db], default=0) + 1
-    meta.id = novo_id
-    _metas_db.append(meta)
-    return meta
+    return responder_com_etag(response, await _metas.criar(meta))
+
+
+@router.get("/{meta_id}", response_model=MetaSchema)
+async def obter_meta(meta_id: int, response: Response, contexto: ContextoUsuario = Depends()) -> MetaSchema:
+    """Retorna uma meta pelo ID, com o ETag da versão atual."""
+    return await obter_ou_404(_metas, meta_id, response, "Meta não encontrada.", contexto.usuario_id)
 
 
 @router.put("/{meta_id}", response_model=MetaSchema)
-def atualizar_meta(meta_id: int, meta_atualizada: MetaSchema) -> MetaSchema:
-    """Atualiza uma meta existente."""
-    for i, meta in enumerate(_metas_db):
-        if meta.id == meta_id:
-            meta_atualizada.id = meta_id
-            _metas_db[i] = meta_atualizada
-            return meta_atualizada
-    raise HTTPException(status_code=404, detail="Meta não encontrada.")
-
-
-@router.patch("/{meta_id}/adicionar-valor")
-def adicionar_valor_meta(meta_id: int, valor: float) -> MetaSchema:
+async def atualizar_meta(
+    meta_id: int,
+    meta_atualizada: MetaSchema,
+    response: Response,
+    if_match: Optional[str] = Depends(cabecalho_if_match),
+    contexto: ContextoUsuario = Depends(),
+) -> MetaSchema:
+    """Atualiza uma meta existente (condicional ao ``If-Match``, se informado).
+
+    Uma mudança em ``valor_atual`` fica no histórico como aporte de ajuste.
+    """
+    contexto.exigir_dono(meta_atualizada)
+    meta = await _em_transacao(
+        contexto.usuario_id,
+        partial(atualizar, meta_id=meta_id, nova=meta_atualizada, if_match=if_match, usuario_id=contexto.usuario_id),
+    )
+    if meta is None:
+        raise HTTPException(status_code=404, detail="Meta não encontrada.")
+    return responder_com_etag(response, meta)
+
+
+@router.patch("/{meta_id}/adicionar-valor", response_model=MetaSchema)
+async def adicionar_valor_meta(
+    meta_id: int,
+    valor: Dinheiro,
+    response: Response,
+    if_match: Optional[str] = Depends(cabecalho_if_match),
+    contexto: ContextoUsuario = Depends(),
+) -> MetaSchema:
     """Adiciona valor ao valor atual de uma meta."""
     if valor <= 0:
         raise HTTPException(status_code=400, detail="O valor deve ser positivo.")
-    
-    for i, meta in enumerate(_metas_db):
-        if meta.id == meta_id:
-            _metas_db[i].valor_atual += valor
-            return _metas_db[i]
-    raise HTTPException(status_code=404, detail="Meta não encontrada.")
+
+    # Leitura, soma e registro do aporte em uma única transação, para que PATCHes
+    # simultâneos não percam valores
+    meta = await _em_transacao(
+        contexto.usuario_id,
+        partial(aportar, meta_id=meta_id, valor=valor, if_match=if_match, usuario_id=contexto.usuario_id),
+    )
+    if meta is None:
+        raise HTTPException(status_code=404, detail="Meta não encontrada.")
+    return responder_com_etag(response, meta)
 
 
 @router.delete("/{meta_id}")
-def excluir_meta(meta_id: int) -> dict:
-    """Exclui uma meta."""
-    for i, meta in enumerate(_metas_db):
-        if meta.id == meta_id:
-            del _metas_db[i]
-            return {"message": "Meta excluída com sucesso."}
-    raise HTTPException(status_code=404, detail="Meta não encontrada.")
\ No newline at end of file
+async def excluir_meta(
+    meta_id: int,
+    if_match: Optional[str] = Depends(cabecalho_if_match),
+    contexto: ContextoUsuario = Depends(),
+) -> dict:
+    """Exclui uma meta e o seu histórico de aportes (condicional ao ``If-Match``, se informado)."""
+    removida = await _em_transacao(
+        contexto.usuario_id, partial(remover, meta_id=meta_id, if_match=if_match, usuario_id=contexto.usuario_id)
+    )
+    if removida is None:
+        raise HTTPException(status_code=404, detail="Meta não encontrada.")
+    return {"message": "Meta excluída com sucesso."}
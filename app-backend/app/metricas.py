@@ -0,0 +1,280 @@
+"""
+Métricas de desempenho da API, expostas em ``GET /metrics`` no formato texto do Prometheus.
+
+- ``MiddlewareMetricas`` mede cada requisição HTTP: quantidade por rota, método e status,
+  latência e tamanho do corpo da requisição e da resposta. A rota é o modelo do caminho
+  (``/despesas/{despesa_id}``), não a URL, para que a quantidade de séries não cresça com os IDs.
+- ``instrumentar`` mede as operações de um repositório ou tabela de totais (leitura por ID,
+  varredura, inserção, atualização, remoção e agregação). Os repositórios criados pela injeção
+  de dependências já são instrumentados. Só a operação mais externa de cada thread é medida:
+  um ``criar`` que chama ``inserir``, ou uma escrita que atualiza os totais, conta uma vez.
+
+As latências são histogramas com limites fixos, como os do Prometheus (``histogram_quantile``
+calcula os percentis a partir deles); para consulta direta, ``/metrics`` também traz os
+percentis 50, 95 e 99 estimados de cada rota. Registrar uma observação custa poucos
+microssegundos (``python -m benchmarks.bench_metricas``); ``DUCKBILLS_METRICAS=0`` desliga
+a coleta.
+"""
+
+
+import os
+import threading
+import time
+from bisect import bisect_left
+from functools import wraps
+from typing import Any, Callable, Dict, List, Mapping, Optional, Sequence, Tuple
+
+PREFIXO = "duckbills_"
+QUANTIS = (0.5, 0.95, 0.99)
+ROTA_NAO_MAPEADA = "nao_mapeada"
+
+# Limites dos histogramas: segundos das requisições e das operações de armazenamento, e bytes
+LIMITES_REQUISICAO = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+LIMITES_ARMAZENAMENTO = (
+    0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.1, 0.5, 2.5
+)
+LIMITES_BYTES = (128, 512, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+# Métodos medidos em cada tipo de objeto e o nome da operação nas métricas
+OPERACOES_REPOSITORIO = {
+    "obter": "obter",
+    "consultar": "varredura",
+    "criar": "inserir",
+    "criar_varios": "inserir",
+    "inserir": "inserir",
+    "inserir_varios": "inserir",
+    "atualizar": "atualizar",
+    "remover": "remover",
+}
+OPERACOES_TOTAIS = {
+    "consultar": "agregacao",
+    "reconstruir": "agregacao",
+    "reconstruir_se_vazio": "agregacao",
+}
+OPERACOES_ALTERACOES = {
+    "registrar": "inserir",
+    "listar": "varredura",
+    "limitar": "remover",
+}
+
+
+def _formatar(valor: float) -> str:
+    return "+Inf" if valor == float("inf") else repr(float(valor))
+
+
+def _escapar(valor: str) -> str:
+    return valor.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _rotulos(nomes: Sequence[str], valores: Sequence[str]) -> str:
+    pares = ",".join(f'{nome}="{_escapar(valor)}"' for nome, valor in zip(nomes, valores))
+    return "{" + pares + "}" if pares else ""
+
+
+class Contador:
+    """Contador com uma série por combinação de rótulos."""
+
+    tipo = "counter"
+
+    def __init__(self, nome: str, ajuda: str, rotulos: Sequence[str]):
+        self.nome = PREFIXO + nome
+        self.ajuda = ajuda
+        self.rotulos = tuple(rotulos)
+        self._lock = threading.Lock()
+        self._series: Dict[Tuple[str, ...], float] = {}
+
+    def somar(self, rotulos: Tuple[str, ...], valor: float = 1) -> None:
+        with self._lock:
+            self._series[rotulos] = self._series.get(rotulos, 0) + valor
+
+    def exportar(self) -> List[str]:
+        with self._lock:
+            series = sorted(self._series.items())
+        return [f"{self.nome}{_rotulos(self.rotulos, chave)} {_formatar(valor)}" for chave, valor in series]
+
+
+class Histograma:
+    """Histograma com limites fixos (``le``), com uma série por combinação de rótulos."""
+
+    tipo = "histogram"
+
+    def __init__(self, nome: str, ajuda: str, rotulos: Sequence[str], limites: Sequence[float]):
+        self.nome = PREFIXO + nome
+        self.ajuda = ajuda
+        self.rotulos = tuple(rotulos)
+        self.limites = tuple(limites)
+        self._lock = threading.Lock()
+        # rótulos -> [contagens por faixa (a última é acima do maior limite), soma, total]
+        self._series: Dict[Tuple[str, ...], List] = {}
+
+    def observar(self, rotulos: Tuple[str, ...], valor: float) -> None:
+        faixa = bisect_left(self.limites, valor)
+        with self._lock:
+            serie = self._series.get(rotulos)
+            if serie is None:
+                serie = self._series[rotulos] = [[0] * (len(self.limites) + 1), 0.0, 0]
+            serie[0][faixa] += 1
+            serie[1] += valor
+            serie[2] += 1
+
+    def _copiar(self) -> List[Tuple[Tuple[str, ...], List[int], float, int]]:
+        with self._lock:
+            return sorted((chave, list(faixas), soma, total) for chave, (faixas, soma, total) in self._series.items())
+
+    def quantil(self, rotulos: Tuple[str, ...], quantil: float) -> Optional[float]:
+        """Estima o quantil por interpolação linear dentro da faixa, como o ``histogram_quantile``."""
+        with self._lock:
+            serie = self._series.get(rotulos)
+            if serie is None or serie[2] == 0:
+                return None
+            faixas, total = list(serie[0]), serie[2]
+        return self._estimar(faixas, total, quantil)
+
+    def _estimar(self, faixas: List[int], total: int, quantil: float) -> float:
+        alvo = quantil * total
+        acumulado = 0
+        for indice, quantidade in enumerate(faixas):
+            if acumulado + quantidade >= alvo and quantidade:
+                if indice == len(self.limites):
+                    return self.limites[-1]
+                inferior = self.limites[indice - 1] if indice else 0.0
+                return inferior + (self.limites[indice] - inferior) * (alvo - acumulado) / quantidade
+            acumulado += quantidade
+        return self.limites[-1]
+
+    def exportar(self) -> List[str]:
+        linhas = []
+        for chave, faixas, soma, total in self._copiar():
+            acumulado = 0
+            for limite, quantidade in zip((*self.limites, float("inf")), faixas):
+                acumulado += quantidade
+                rotulos = _rotulos((*self.rotulos, "le"), (*chave, _formatar(limite)))
+                linhas.append(f"{self.nome}_bucket{rotulos} {acumulado}")
+            linhas.append(f"{self.nome}_sum{_rotulos(self.rotulos, chave)} {_formatar(soma)}")
+            linhas.append(f"{self.nome}_count{_rotulos(self.rotulos, chave)} {total}")
+        return linhas
+
+    def exportar_quantis(self, nome: str, ajuda: str) -> List[str]:
+        """Linhas de um gauge com os quantis ``QUANTIS`` estimados de cada série."""
+        linhas = [f"# HELP {PREFIXO}{nome} {ajuda}", f"# TYPE {PREFIXO}{nome} gauge"]
+        for chave, faixas, _, total in self._copiar():
+            for quantil in QUANTIS:
+                rotulos = _rotulos((*self.rotulos, "quantil"), (*chave, str(quantil)))
+                linhas.append(f"{PREFIXO}{nome}{rotulos} {_formatar(self._estimar(faixas, total, quantil))}")
+        return linhas
+
+
+class Metricas:
+    """Métricas da API: requisições HTTP e operações de armazenamento."""
+
+    def __init__(self, ativas: bool = True):
+        self.ativas = ativas
+        self.requisicoes = Contador(
+            "http_requisicoes_total", "Requisições HTTP atendidas.", ("metodo", "rota", "status")
+        )
+        self.duracao = Histograma(
+            "http_duracao_segundos", "Latência das requisições HTTP.", ("metodo", "rota"), LIMITES_REQUISICAO
+        )
+        self.bytes_requisicao = Histograma(
+            "http_requisicao_bytes", "Tamanho do corpo das requisições HTTP.", ("metodo", "rota"), LIMITES_BYTES
+        )
+        self.bytes_resposta = Histograma(
+            "http_resposta_bytes", "Tamanho do corpo das respostas HTTP.", ("metodo", "rota"), LIMITES_BYTES
+        )
+        self.armazenamento = Histograma(
+            "armazenamento_duracao_segundos",
+            "Duração das operações dos repositórios e tabelas de totais.",
+            ("repositorio", "operacao"),
+            LIMITES_ARMAZENAMENTO,
+        )
+        self._familias = (self.requisicoes, self.duracao, self.bytes_requisicao, self.bytes_resposta, self.armazenamento)
+        self._local = threading.local()
+
+    def registrar_requisicao(
+        self, metodo: str, rota: str, status: int, duracao: float, recebidos: int, enviados: int
+    ) -> None:
+        rotulos = (metodo, rota)
+        self.requisicoes.somar((metodo, rota, str(status)))
+        self.duracao.observar(rotulos, duracao)
+        self.bytes_requisicao.observar(rotulos, recebidos)
+        self.bytes_resposta.observar(rotulos, enviados)
+
+    def medir(self, funcao: Callable[..., Any], repositorio: str, operacao: str) -> Callable[..., Any]:
+        """Envolve ``funcao`` para registrar a sua duração como ``operacao`` de ``repositorio``."""
+        local = self._local
+        rotulos = (repositorio, operacao)
+
+        @wraps(funcao)
+        def medida(*argumentos: Any, **nomeados: Any) -> Any:
+            if not self.ativas or getattr(local, "medindo", False):
+                return funcao(*argumentos, **nomeados)
+            local.medindo = True
+            inicio = time.perf_counter()
+            try:
+                return funcao(*argumentos, **nomeados)
+            finally:
+                local.medindo = False
+                self.armazenamento.observar(rotulos, time.perf_counter() - inicio)
+        return medida
+
+    def exportar(self, extras: Optional[Mapping[str, float]] = None) -> str:
+        """Texto no formato de exposição do Prometheus, com os ``extras`` como gauges."""
+        linhas: List[str] = []
+        for familia in self._familias:
+            linhas.append(f"# HELP {familia.nome} {familia.ajuda}")
+            linhas.append(f"# TYPE {familia.nome} {familia.tipo}")
+            linhas.extend(familia.exportar())
+        linhas.extend(self.duracao.exportar_quantis(
+            "http_duracao_quantil_segundos", "Percentis estimados da latência das requisições HTTP."
+        ))
+        for nome, valor in (extras or {}).items():
+            linhas.append(f"# TYPE {PREFIXO}{nome} gauge")
+            linhas.append(f"{PREFIXO}{nome} {_formatar(valor)}")
+        return "\n".join(linhas) + "\n"
+
+
+metricas = Metricas(ativas=os.environ.get("DUCKBILLS_METRICAS", "1") != "0")
+
+
+def instrumentar(objeto: Any, nome: str, operacoes: Mapping[str, str] = OPERACOES_REPOSITORIO) -> Any:
+    """Mede os métodos ``operacoes`` de ``objeto`` (substituídos na própria instância) e o retorna."""
+    for metodo, operacao in operacoes.items():
+        setattr(objeto, metodo, metricas.medir(getattr(objeto, metodo), nome, operacao))
+    return objeto
+
+
+class MiddlewareMetricas:
+    """Middleware ASGI que registra a latência, o status e os tamanhos de cada requisição HTTP."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http" or not metricas.ativas:
+            await self.app(scope, receive, send)
+            return
+        inicio = time.perf_counter()
+        status = 500
+        enviados = 0
+
+        async def enviar(mensagem) -> None:
+            nonlocal status, enviados
+            if mensagem["type"] == "http.response.start":
+                status = mensagem["status"]
+            elif mensagem["type"] == "http.response.body":
+                enviados += len(mensagem.get("body", b""))
+            await send(mensagem)
+
+        try:
+            await self.app(scope, receive, enviar)
+        finally:
+            # O roteador grava a rota encontrada no próprio scope
+            rota = getattr(scope.get("route"), "path", None) or ROTA_NAO_MAPEADA
+            recebidos = 0
+            for nome, valor in scope["headers"]:
+                if nome == b"content-length":
+                    recebidos = int(valor) if valor.isdigit() else 0
+                    break
+            metricas.registrar_requisicao(
+                scope["method"], rota, status, time.perf_counter() - inicio, recebidos, enviados
+            )
@@ -1,54 +1,317 @@
 """
 Rotas para gerenciamento de orçamentos.
+
+O consumo de cada orçamento é calculado a partir dos totais mensais de despesas por
+categoria (ver ``app.resumo``), sem percorrer as despesas. A cada escrita de despesa, os
+orçamentos afetados são verificados e um alerta é emitido quando o consumo cruza 80% ou
+100% do limite. Um job noturno do agendador confere todos os orçamentos do período atual e
+emite os alertas que faltarem (orçamentos criados ou reduzidos depois das despesas, ou
+alertas perdidos em uma reinicialização).
+
+Os alertas ficam no repositório ``alertas_orcamento``, no mesmo backend dos dados, e cada
+limiar gera no máximo um alerta por orçamento e período: o alerta só é gravado se não houver
+outro com a mesma chave (orçamento, início do período, limiar), conferida na transação da
+partição do usuário. Os alertas das escritas só são emitidos depois que elas são confirmadas
+(``apos_confirmar``), então um lote desfeito ou uma transação do SQLite revertida não geram
+alertas.
 """
 
-from typing import List
-from fastapi import APIRouter, HTTPException
-from app.schemas import OrcamentoSchema
+import calendar
+import logging
+from datetime import date, datetime
+from functools import partial
+from typing import Dict, List, Optional, Tuple
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from app.schemas import AlertaOrcamentoSchema, ConsumoOrcamentoSchema, OrcamentoSchema
+from app.paginacao import Paginacao
+from app.contexto import ContextoUsuario
+from app.agendador import agendador, diariamente
+from app.armazenamento import apos_confirmar
+from app.cache import cache_respostas
+from app.concorrencia import (
+    atualizar_condicional,
+    cabecalho_if_match,
+    do_usuario,
+    obter_ou_404,
+    remover_condicional,
+    responder_com_etag,
+)
+from app.di.dependency_injection import Repositorio, RepositorioAssincrono, criar_repositorio, obter_repositorio
+from app.dinheiro import centavos, reais
+from app.resumo import mes_referencia, totais_mensais
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/orcamentos", tags=["Orçamentos"])
 
-# Mock database
-_orcamentos_db: List[OrcamentoSchema] = [
+# Dados iniciais (mock), gravados no repositório na primeira execução
+_orcamentos_db: Repositorio[OrcamentoSchema] = criar_repositorio("orcamentos", OrcamentoSchema, [
     OrcamentoSchema(id=1, categoria_id=4, usuario_id=1, valor_limite=800.0, periodo="mensal"),
     OrcamentoSchema(id=2, categoria_id=5, usuario_id=1, valor_limite=300.0, periodo="mensal"),
     OrcamentoSchema(id=3, categoria_id=6, usuario_id=1, valor_limite=200.0, periodo="mensal"),
     OrcamentoSchema(id=4, categoria_id=7, usuario_id=1, valor_limite=100.0, periodo="mensal"),
     OrcamentoSchema(id=5, categoria_id=1, usuario_id=1, valor_limite=5000.0, periodo="anual"),
-]
+], indices=("usuario_id", "categoria_id"), particionado=True)
+_orcamentos = RepositorioAssincrono(_orcamentos_db)
+cache_respostas.observar("orcamentos", _orcamentos_db)
+
+# Limiares de consumo (em % do limite) que geram alertas
+LIMIARES = (80, 100)
+# Alertas devolvidos por GET /orcamentos/alertas (os mais recentes do usuário)
+MAX_ALERTAS = 1000
+_alertas_db: Repositorio[AlertaOrcamentoSchema] = criar_repositorio(
+    "alertas_orcamento", AlertaOrcamentoSchema, indices=("usuario_id", "orcamento_id"), particionado=True
+)
+
+
+def periodo_orcamento(periodo: str, referencia: date) -> Tuple[date, date]:
+    """Retorna o início e o fim do período ('mensal' ou 'anual') que contém a data de referência."""
+    if periodo == "mensal":
+        ultimo_dia = calendar.monthrange(referencia.year, referencia.month)[1]
+        return referencia.replace(day=1), referencia.replace(day=ultimo_dia)
+    if periodo == "anual":
+        return date(referencia.year, 1, 1), date(referencia.year, 12, 31)
+    raise ValueError(f"Período de orçamento desconhecido: {periodo}")
+
+
+def _meses(inicio: date, fim: date) -> List[str]:
+    return [f"{inicio.year:04d}-{mes:02d}" for mes in range(inicio.month, fim.month + 1)]
+
+
+def _utilizado(orcamento: OrcamentoSchema, inicio: date, fim: date) -> int:
+    """Retorna o total, em centavos, das despesas da categoria do orçamento no período."""
+    totais = totais_mensais.consultar(
+        orcamento.usuario_id,
+        mes_referencia(inicio),
+        mes_referencia(fim),
+        tipo="despesa",
+        categoria_id=orcamento.categoria_id,
+    )
+    return sum(total.total for total in totais)
+
+
+def _consumo(orcamento: OrcamentoSchema, inicio: date, fim: date, utilizado: int) -> ConsumoOrcamentoSchema:
+    limite = centavos(orcamento.valor_limite)
+    return ConsumoOrcamentoSchema(
+        orcamento_id=orcamento.id,
+        categoria_id=orcamento.categoria_id,
+        usuario_id=orcamento.usuario_id,
+        periodo=orcamento.periodo,
+        inicio=inicio,
+        fim=fim,
+        valor_limite=orcamento.valor_limite,
+        utilizado=reais(utilizado),
+        restante=reais(limite - utilizado),
+        percentual=utilizado * 100 / limite if limite else 0.0,
+    )
+
+
+def _alerta(
+    orcamento: OrcamentoSchema, inicio: date, fim: date, utilizado: int, limiar: int, despesa_id: Optional[int]
+) -> AlertaOrcamentoSchema:
+    limite = centavos(orcamento.valor_limite)
+    return AlertaOrcamentoSchema(
+        id=0,
+        orcamento_id=orcamento.id,
+        categoria_id=orcamento.categoria_id,
+        usuario_id=orcamento.usuario_id,
+        despesa_id=despesa_id,
+        limiar=limiar,
+        percentual=utilizado * 100 / limite if limite else 0.0,
+        utilizado=reais(utilizado),
+        valor_limite=orcamento.valor_limite,
+        inicio=inicio,
+        fim=fim,
+        criado_em=datetime.now(),
+    )
+
+
+def _emitir(alerta: AlertaOrcamentoSchema) -> bool:
+    """Grava e emite o alerta; retorna ``False`` se o limiar já tinha sido alertado no período."""
+    alertas = _alertas_db.particao_do_usuario(alerta.usuario_id)
+    # A conferência e a gravação na mesma transação: duas escritas (ou dois workers) que cruzam
+    # o mesmo limiar não gravam dois alertas
+    with alertas.transacao():
+        if alertas.buscar(orcamento_id=alerta.orcamento_id, inicio=alerta.inicio, limiar=alerta.limiar):
+            return False
+        alertas.criar(alerta)
+    logger.info("Orçamento %s do usuário %s atingiu %s%% do limite.", alerta.orcamento_id, alerta.usuario_id, alerta.limiar)
+    return True
+
+
+def _verificar_limiares(antiga, nova) -> None:
+    """Observador das despesas: emite alertas quando a escrita faz um orçamento cruzar um limiar."""
+    if nova is None:
+        return
+    for orcamento in _orcamentos_db.buscar(usuario_id=nova.usuario_id, categoria_id=nova.categoria_id):
+        try:
+            inicio, fim = periodo_orcamento(orcamento.periodo, nova.data)
+        except ValueError:
+            continue
+        # Em centavos, para que o cruzamento de um limiar não dependa de arredondamento
+        utilizado = _utilizado(orcamento, inicio, fim)
+        anterior = utilizado - centavos(nova.valor)
+        if (
+            antiga is not None
+            and antiga.usuario_id == nova.usuario_id
+            and antiga.categoria_id == nova.categoria_id
+            and inicio <= antiga.data <= fim
+        ):
+            anterior += centavos(antiga.valor)
+        limite = centavos(orcamento.valor_limite)
+        for limiar in LIMIARES:
+            if anterior * 100 < limite * limiar <= utilizado * 100:
+                apos_confirmar(partial(_emitir, _alerta(orcamento, inicio, fim, utilizado, limiar, nova.id)))
+
+
+# Registrado depois do observador dos totais mensais, então os totais já incluem a escrita
+obter_repositorio("despesas").observar(_verificar_limiares)
+
+
+def verificar_orcamentos(referencia: date) -> int:
+    """Emite os alertas que faltam para os limiares já atingidos no período de ``referencia``.
+
+    Retorna a quantidade de alertas emitidos.
+    """
+    quantidade = 0
+    for orcamento in _orcamentos_db.iterar():
+        try:
+            inicio, fim = periodo_orcamento(orcamento.periodo, referencia)
+        except ValueError:
+            continue
+        utilizado = _utilizado(orcamento, inicio, fim)
+        limite = centavos(orcamento.valor_limite)
+        for limiar in LIMIARES:
+            if limite * limiar <= utilizado * 100 and _emitir(_alerta(orcamento, inicio, fim, utilizado, limiar, None)):
+                quantidade += 1
+    return quantidade
+
+
+def _job(agendada: datetime, anterior: Optional[datetime]) -> None:
+    emitidos = verificar_orcamentos(date.today())
+    if emitidos:
+        logger.info("%s alertas de orçamento emitidos pela verificação noturna.", emitidos)
+
+
+agendador.registrar("orcamentos", diariamente(3, 30), _job)
 
 
 @router.get("/", response_model=List[OrcamentoSchema])
-def listar_orcamentos() -> List[OrcamentoSchema]:
-    """Lista todos os orçamentos cadastrados."""
-    return _orcamentos_db
+async def listar_orcamentos(
+    request: Request,
+    pagina: Paginacao = Depends(),
+    contexto: ContextoUsuario = Depends(),
+    usuario_id: Optional[int] = None,
+    categoria_id: Optional[int] = None,
+    periodo: Optional[str] = None,
+) -> List[OrcamentoSchema]:
+    """Lista os orçamentos cadastrados, com filtros opcionais e paginação por cursor."""
+    usuario_id = contexto.filtro(usuario_id)
+
+    async def gerar() -> Tuple[bytes, Dict[str, str]]:
+        orcamentos = await _orcamentos.consultar(
+            pagina.after,
+            pagina.limit,
+            usuario_id=usuario_id,
+            categoria_id=categoria_id,
+            periodo=periodo,
+        )
+        return pagina.serializar(orcamentos, OrcamentoSchema)
+    return await cache_respostas.responder(request, "orcamentos", gerar)
+
+
+@router.get("/status", response_model=List[ConsumoOrcamentoSchema])
+def status_orcamentos(
+    usuario_id: Optional[int] = None, data: Optional[date] = None, contexto: ContextoUsuario = Depends()
+) -> List[ConsumoOrcamentoSchema]:
+    """Retorna o consumo de todos os orçamentos de um usuário no período que contém ``data`` (padrão: hoje)."""
+    usuario_id = contexto.filtro(usuario_id)
+    referencia = data or date.today()
+    # Uma única leitura dos totais do ano cobre os orçamentos mensais e anuais
+    utilizado_por_mes: Dict[Tuple[str, int], int] = {
+        (total.mes, total.categoria_id): total.total
+        for total in totais_mensais.consultar(
+            usuario_id, f"{referencia.year:04d}-01", f"{referencia.year:04d}-12", tipo="despesa"
+        )
+    }
+    resultado = []
+    for orcamento in _orcamentos_db.particao_do_usuario(usuario_id).buscar(usuario_id=usuario_id):
+        try:
+            inicio, fim = periodo_orcamento(orcamento.periodo, referencia)
+        except ValueError:
+            continue
+        utilizado = sum(utilizado_por_mes.get((mes, orcamento.categoria_id), 0) for mes in _meses(inicio, fim))
+        resultado.append(_consumo(orcamento, inicio, fim, utilizado))
+    return resultado
+
+
+@router.get("/alertas", response_model=List[AlertaOrcamentoSchema])
+def listar_alertas(
+    usuario_id: Optional[int] = None, contexto: ContextoUsuario = Depends()
+) -> List[AlertaOrcamentoSchema]:
+    """Lista os alertas de consumo de orçamento mais recentes, do mais novo para o mais antigo."""
+    usuario_id = contexto.filtro(usuario_id)
+    alertas = _alertas_db.particao_do_usuario(usuario_id).buscar(usuario_id=usuario_id)
+    return alertas[::-1][:MAX_ALERTAS]
+
+
+@router.get("/{orcamento_id}/consumo", response_model=ConsumoOrcamentoSchema)
+def consumo_orcamento(
+    orcamento_id: int, data: Optional[date] = None, contexto: ContextoUsuario = Depends()
+) -> ConsumoOrcamentoSchema:
+    """Retorna o consumo de um orçamento no período que contém ``data`` (padrão: hoje)."""
+    orcamento = do_usuario(
+        _orcamentos_db.particao_do_usuario(contexto.usuario_id).obter(orcamento_id), contexto.usuario_id
+    )
+    if orcamento is None:
+        raise HTTPException(status_code=404, detail="Orçamento não encontrado.")
+    try:
+        inicio, fim = periodo_orcamento(orcamento.periodo, data or date.today())
+    except ValueError as erro:
+        raise HTTPException(status_code=400, detail=str(erro))
+    return _consumo(orcamento, inicio, fim, _utilizado(orcamento, inicio, fim))
 
 
 @router.post("/", response_model=OrcamentoSchema, status_code=201)
-def criar_orcamento(orcamento: OrcamentoSchema) -> OrcamentoSchema:
+async def criar_orcamento(
+    orcamento: OrcamentoSchema, response: Response, contexto: ContextoUsuario = Depends()
+) -> OrcamentoSchema:
     """Cria um novo orçamento."""
-    if any(o.id == orcamento.id for o in _orcamentos_db):
-        raise HTTPException(status_code=400, detail="ID de orçamento já existe.")
-    _orcamentos_db.append(orcamento)
-    return orcamento
+    contexto.exigir_dono(orcamento)
+    # Gera um novo ID automaticamente
+    return responder_com_etag(response, await _orcamentos.criar(orcamento))
+
+
+@router.get("/{orcamento_id}", response_model=OrcamentoSchema)
+async def obter_orcamento(
+    orcamento_id: int, response: Response, contexto: ContextoUsuario = Depends()
+) -> OrcamentoSchema:
+    """Retorna um orçamento pelo ID, com o ETag da versão atual."""
+    return await obter_ou_404(_orcamentos, orcamento_id, response, "Orçamento não encontrado.", contexto.usuario_id)
 
 
 @router.put("/{orcamento_id}", response_model=OrcamentoSchema)
-def atualizar_orcamento(orcamento_id: int, orcamento_atualizado: OrcamentoSchema) -> OrcamentoSchema:
-    """Atualiza um orçamento existente."""
-    for i, orcamento in enumerate(_orcamentos_db):
-        if orcamento.id == orcamento_id:
-            orcamento_atualizado.id = orcamento_id
-            _orcamentos_db[i] = orcamento_atualizado
-            return orcamento_atualizado
-    raise HTTPException(status_code=404, detail="Orçamento não encontrado.")
+async def atualizar_orcamento(
+    orcamento_id: int,
+    orcamento_atualizado: OrcamentoSchema,
+    response: Response,
+    if_match: Optional[str] = Depends(cabecalho_if_match),
+    contexto: ContextoUsuario = Depends(),
+) -> OrcamentoSchema:
+    """Atualiza um orçamento existente (condicional ao ``If-Match``, se informado)."""
+    contexto.exigir_dono(orcamento_atualizado)
+    return await atualizar_condicional(
+        _orcamentos, orcamento_id, orcamento_atualizado, if_match, response, "Orçamento não encontrado.", contexto.usuario_id
+    )
 
 
 @router.delete("/{orcamento_id}")
-def excluir_orcamento(orcamento_id: int) -> dict:
-    """Exclui um orçamento."""
-    for i, orcamento in enumerate(_orcamentos_db):
-        if orcamento.id == orcamento_id:
-            del _orcamentos_db[i]
-            return {"message": "Orçamento excluído com sucesso."}
-    raise HTTPException(status_code=404, detail="Orçamento não encontrado.")
+async def excluir_orcamento(
+    orcamento_id: int,
+    if_match: Optional[str] = Depends(cabecalho_if_match),
+    contexto: ContextoUsuario = Depends(),
+) -> dict:
+    """Exclui um orçamento (condicional ao ``If-Match``, se informado)."""
+    await remover_condicional(_orcamentos, orcamento_id, if_match, "Orçamento não encontrado.", contexto.usuario_id)
+    return {"message": "Orçamento excluído com sucesso."}
+
@@ -0,0 +1,87 @@
+"""
+Parâmetros comuns das rotas de listagem: paginação por cursor e projeção de campos.
+
+O cursor é o ID do último registro recebido. Quando a página vem cheia, o cursor da
+próxima página é enviado no cabeçalho ``X-Next-Cursor``; basta repeti-lo em ``after``.
+
+Por padrão, a página passa pela validação do ``response_model`` da rota. Com ``rapido=true``
+(``responder_json``), ela é serializada direto para bytes pelo serializador compilado do
+pydantic-core, sem a revalidação de cada registro; os registros do repositório já foram
+validados na escrita.
+"""
+
+
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence, Set, Tuple, Type
+
+from fastapi import HTTPException, Query, Response
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, TypeAdapter
+
+CABECALHO_CURSOR = "X-Next-Cursor"
+LIMITE_MAXIMO = 1000
+
+
+@lru_cache(maxsize=None)
+def _adaptador_lista(modelo: Type[BaseModel]) -> TypeAdapter:
+    return TypeAdapter(List[modelo])
+
+
+class Paginacao:
+    """Dependência FastAPI com os parâmetros ``limit``, ``after``, ``fields`` e ``rapido``."""
+
+    def __init__(
+        self,
+        limit: Optional[int] = Query(None, ge=1, le=LIMITE_MAXIMO, description="Tamanho máximo da página."),
+        after: Optional[int] = Query(None, description="Cursor: ID do último registro da página anterior."),
+        fields: Optional[str] = Query(None, description="Campos a retornar, separados por vírgula."),
+        rapido: bool = Query(False, description="Serializa a página sem revalidar cada registro."),
+    ):
+        self.limit = limit
+        self.after = after
+        self.fields = fields
+        self.rapido = rapido
+
+    def campos(self, modelo: Type[BaseModel]) -> Optional[Set[str]]:
+        """Retorna o conjunto de campos pedidos em ``fields``, validado contra o modelo."""
+        if not self.fields:
+            return None
+        campos = {campo.strip() for campo in self.fields.split(",") if campo.strip()}
+        desconhecidos = campos - set(modelo.model_fields)
+        if desconhecidos:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Campos inválidos em fields: {', '.join(sorted(desconhecidos))}.",
+            )
+        return campos
+
+    def _cabecalhos(self, registros: Sequence[BaseModel]) -> Dict[str, str]:
+        if self.limit is not None and len(registros) == self.limit:
+            return {CABECALHO_CURSOR: str(registros[-1].id)}
+        return {}
+
+    def responder(self, response: Response, registros: Sequence[BaseModel], modelo: Type[BaseModel]):
+        """Monta a resposta da página, com o cursor seguinte e a projeção pedida."""
+        if self.rapido:
+            return self.responder_json(registros, modelo)
+        cabecalhos = self._cabecalhos(registros)
+        campos = self.campos(modelo)
+        if campos is None:
+            response.headers.update(cabecalhos)
+            return registros
+        # Com projeção, a resposta não segue mais o response_model completo
+        conteudo: List[dict] = [r.model_dump(mode="json", include=campos) for r in registros]
+        return JSONResponse(conteudo, headers=cabecalhos)
+
+    def serializar(self, registros: Sequence[BaseModel], modelo: Type[BaseModel]) -> Tuple[bytes, Dict[str, str]]:
+        """Serializa a página direto para JSON (bytes), com a projeção pedida e o cursor seguinte."""
+        campos = self.campos(modelo)
+        corpo = _adaptador_lista(modelo).dump_json(
+            list(registros), include=None if campos is None else {"__all__": campos}
+        )
+        return corpo, self._cabecalhos(registros)
+
+    def responder_json(self, registros: Sequence[BaseModel], modelo: Type[BaseModel]) -> Response:
+        """Como ``responder``, mas sem revalidar os registros: use só com registros do repositório."""
+        corpo, cabecalhos = self.serializar(registros, modelo)
+        return Response(content=corpo, media_type="application/json", headers=cabecalhos)
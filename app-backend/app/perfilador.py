@@ -0,0 +1,94 @@
+"""
+Profiler por amostragem, para encontrar os trechos quentes com a API em uso real.
+
+Enquanto ativo, uma thread lê a pilha de todas as outras threads a cada ``intervalo`` segundos
+(``sys._current_frames``) e conta quantas vezes cada pilha apareceu. Threads paradas à espera
+de trabalho (o event loop no ``select``, workers ociosos do pool) não são contadas. Como a
+coleta não instrumenta as funções, o custo é o de cada amostra, e não cresce com a carga.
+
+O relatório usa o formato de pilhas "dobradas" (``modulo:funcao;modulo:funcao contagem``),
+aceito pelo ``flamegraph.pl`` e pelo speedscope. Desligado por padrão: é ativado por
+``POST /profiler`` ou, desde a inicialização, por ``DUCKBILLS_PROFILER=1``.
+"""
+
+
+import sys
+import threading
+from collections import Counter
+from typing import Optional
+
+INTERVALO_PADRAO = 0.005
+PROFUNDIDADE_MAXIMA = 64
+# Funções em que uma thread está apenas esperando trabalho (arquivo, função)
+_OCIOSAS = {
+    ("selectors.py", "select"),
+    ("threading.py", "wait"),
+    ("thread.py", "_worker"),
+    ("queue.py", "get"),
+}
+
+
+class Perfilador:
+    """Coleta amostras das pilhas das threads em uma thread própria."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pilhas: Counter = Counter()
+        self._thread: Optional[threading.Thread] = None
+        self._parar = threading.Event()
+        self.intervalo = INTERVALO_PADRAO
+        self.amostras = 0
+
+    @property
+    def ativo(self) -> bool:
+        return self._thread is not None
+
+    def iniciar(self, intervalo: Optional[float] = None) -> None:
+        """Começa a coletar amostras (mantendo as já coletadas)."""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self.intervalo = intervalo or INTERVALO_PADRAO
+            self._parar.clear()
+            self._thread = threading.Thread(target=self._amostrar, name="perfilador", daemon=True)
+            self._thread.start()
+
+    def parar(self) -> None:
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._parar.set()
+            thread.join()
+
+    def limpar(self) -> None:
+        with self._lock:
+            self._pilhas.clear()
+            self.amostras = 0
+
+    def _amostrar(self) -> None:
+        propria = threading.get_ident()
+        while not self._parar.wait(self.intervalo):
+            pilhas = []
+            for ident, quadro in sys._current_frames().items():
+                if ident == propria:
+                    continue
+                codigo = quadro.f_code
+                if (codigo.co_filename.rsplit("/", 1)[-1], codigo.co_name) in _OCIOSAS:
+                    continue
+                funcoes = []
+                while quadro is not None and len(funcoes) < PROFUNDIDADE_MAXIMA:
+                    funcoes.append(f"{quadro.f_globals.get('__name__', '?')}:{quadro.f_code.co_name}")
+                    quadro = quadro.f_back
+                pilhas.append(";".join(reversed(funcoes)))
+            with self._lock:
+                self._pilhas.update(pilhas)
+                self.amostras += 1
+
+    def relatorio(self, limite: Optional[int] = None) -> str:
+        """Pilhas dobradas, das mais frequentes para as menos frequentes."""
+        with self._lock:
+            pilhas = self._pilhas.most_common(limite)
+        return "".join(f"{pilha} {contagem}\n" for pilha, contagem in pilhas)
+
+
+perfilador = Perfilador()
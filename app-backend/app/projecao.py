@@ -0,0 +1,222 @@
+"""
+Rotas da projeção de fluxo de caixa (saldo diário previsto para os próximos meses).
+
+A projeção parte do saldo atual (totais mensais de rendas e despesas mais os lançamentos do mês
+corrente anteriores ao início) e soma, dia a dia, as ocorrências das contas recorrentes e os
+lançamentos já registrados com data futura. As ocorrências que já têm um lançamento
+correspondente (conciliadas como em ``app.conciliacao``) não são somadas de novo. Os fluxos de
+todos os usuários pedidos são acumulados em matrizes densas (usuários x dias) com
+``numpy.bincount`` e o saldo é obtido com uma única soma cumulativa, sem laço em Python por dia.
+Os valores são centavos inteiros (int64), então a soma é exata.
+"""
+
+
+from datetime import date, timedelta
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+from fastapi import APIRouter, Depends, HTTPException, Query
+
+# Os repositórios usados na projeção são criados e registrados ao importar seus módulos
+import app.contas_recorrentes  # noqa: F401
+import app.metas  # noqa: F401
+from app.conciliacao import conciliar, lancamentos_registrados
+from app.contexto import ContextoUsuario
+from app.di.dependency_injection import obter_repositorio
+from app.dinheiro import centavos, reais
+from app.recorrencias import ultimo_dia
+from app.resumo import mes_referencia, totais_mensais
+from app.schemas import (
+    ProjecaoDiaSchema,
+    ProjecaoLoteSchema,
+    ProjecaoMetaSchema,
+    ProjecaoSchema,
+)
+
+router = APIRouter(prefix="/projecao", tags=["Projeção"])
+
+MAX_USUARIOS_LOTE = 10_000
+
+
+class Fluxos(NamedTuple):
+    """Fluxos de uma janela: posição plana (usuário * dias + dia) e valor (centavos) de cada lançamento."""
+    entradas_posicao: np.ndarray
+    entradas_valor: np.ndarray
+    saidas_posicao: np.ndarray
+    saidas_valor: np.ndarray
+
+
+def fim_da_janela(inicio: date, meses: int) -> date:
+    """Retorna o último dia da janela de ``meses`` meses que começa em ``inicio``."""
+    ano, mes = divmod(inicio.year * 12 + inicio.month - 1 + meses, 12)
+    return date(ano, mes + 1, min(inicio.day, ultimo_dia(ano, mes + 1))) - timedelta(days=1)
+
+
+def _saldo_inicial(usuario_id: int, inicio: date) -> int:
+    mes_anterior = mes_referencia(inicio.replace(day=1) - timedelta(days=1))
+    saldo = 0
+    for total in totais_mensais.consultar(usuario_id, mes_ate=mes_anterior):
+        saldo += total.total if total.tipo == "renda" else -total.total
+    # Lançamentos do mês corrente anteriores ao início
+    if inicio.day > 1:
+        ontem = inicio - timedelta(days=1)
+        for nome, sinal in (("rendas", 1), ("despesas", -1)):
+            for registro in obter_repositorio(nome).iterar(
+                data_de=inicio.replace(day=1), data_ate=ontem, usuario_id=usuario_id
+            ):
+                saldo += sinal * centavos(registro.valor)
+    return saldo
+
+
+def coletar_fluxos(usuario_ids: Sequence[int], inicio: date, fim: date) -> Fluxos:
+    """Reúne as ocorrências recorrentes e os lançamentos registrados dos usuários na janela."""
+    dias = (fim - inicio).days + 1
+    origem = inicio.toordinal()
+    linha = {usuario_id: i for i, usuario_id in enumerate(usuario_ids)}
+    posicoes: Dict[str, List[np.ndarray]] = {"renda": [], "despesa": []}
+    valores: Dict[str, List[np.ndarray]] = {"renda": [], "despesa": []}
+
+    # Com um só usuário, o índice por usuário evita percorrer todas as contas e lançamentos
+    unico = usuario_ids[0] if len(usuario_ids) == 1 else None
+    contas = [
+        conta for conta in obter_repositorio("contas_recorrentes").iterar(usuario_id=unico)
+        if conta.usuario_id in linha and conta.tipo in posicoes
+    ]
+    lancamentos = (
+        (tipo, registro) for tipo, registro in lancamentos_registrados(inicio, fim, usuario_id=unico)
+        if registro.usuario_id in linha
+    )
+    # Ocorrências já lançadas (pelo job de lançamentos recorrentes ou pagas antes do vencimento)
+    # estão entre os lançamentos registrados ou no saldo inicial: só as sem lançamento entram
+    previstas: Dict[str, List[Tuple[int, int]]] = {"renda": [], "despesa": []}
+    for conciliacao in conciliar(contas, lancamentos, inicio, fim, inicio):
+        if conciliacao.lancamento is None:
+            conta = conciliacao.conta
+            previstas[conta.tipo].append((conciliacao.data + linha[conta.usuario_id] * dias - origem, centavos(conta.valor)))
+    for tipo, ocorrencias in previstas.items():
+        if ocorrencias:
+            posicao, valor = zip(*ocorrencias)
+            posicoes[tipo].append(np.array(posicao, dtype=np.int64))
+            valores[tipo].append(np.array(valor, dtype=np.int64))
+
+    for tipo, nome in (("renda", "rendas"), ("despesa", "despesas")):
+        repositorio = obter_repositorio(nome)
+        for usuario_id, i in linha.items():
+            registros = repositorio.consultar(data_de=inicio, data_ate=fim, usuario_id=usuario_id)
+            if registros:
+                posicoes[tipo].append(np.fromiter(
+                    (r.data.toordinal() for r in registros), dtype=np.int64, count=len(registros)
+                ) + (i * dias - origem))
+                valores[tipo].append(np.fromiter(
+                    (centavos(r.valor) for r in registros), dtype=np.int64, count=len(registros)
+                ))
+
+    def juntar(partes: List[np.ndarray], dtype) -> np.ndarray:
+        return np.concatenate(partes) if partes else np.empty(0, dtype=dtype)
+
+    return Fluxos(
+        juntar(posicoes["renda"], np.int64),
+        juntar(valores["renda"], np.int64),
+        juntar(posicoes["despesa"], np.int64),
+        juntar(valores["despesa"], np.int64),
+    )
+
+
+def calcular_saldos(saldo_inicial: np.ndarray, fluxos: Fluxos, dias: int):
+    """Retorna as matrizes (usuários x dias) de entradas, saídas e saldo ao fim de cada dia, em centavos."""
+    tamanho = len(saldo_inicial) * dias
+
+    def somar_por_dia(posicoes: np.ndarray, valores: np.ndarray) -> np.ndarray:
+        # O bincount soma em float64, exato para inteiros de até 2**53 centavos
+        return np.rint(np.bincount(posicoes, valores, tamanho)).astype(np.int64).reshape(-1, dias)
+
+    entradas = somar_por_dia(fluxos.entradas_posicao, fluxos.entradas_valor)
+    saidas = somar_por_dia(fluxos.saidas_posicao, fluxos.saidas_valor)
+    saldos = np.cumsum(entradas - saidas, axis=1)
+    saldos += saldo_inicial[:, None]
+    return entradas, saidas, saldos
+
+
+def _metas(usuario_id: int, inicio: date, saldo_inicial: int, saldos: np.ndarray) -> List[ProjecaoMetaSchema]:
+    metas = sorted(obter_repositorio("metas").buscar(usuario_id=usuario_id), key=lambda m: (m.prazo, m.id))
+    if not metas:
+        return []
+    restantes = np.maximum([centavos(m.valor_meta) - centavos(m.valor_atual) for m in metas], 0)
+    # As metas disputam o mesmo saldo: cada uma precisa do que falta nela e nas anteriores
+    necessarios = np.cumsum(restantes)
+    posicoes = np.array([(m.prazo - inicio).days for m in metas])
+    saldos_no_prazo = np.where(
+        posicoes < 0, saldo_inicial, saldos[np.clip(posicoes, 0, len(saldos) - 1)]
+    )
+    alcancaveis = (restantes <= 0) | (saldos_no_prazo >= necessarios)
+    return [
+        ProjecaoMetaSchema(
+            meta_id=meta.id,
+            titulo=meta.titulo,
+            prazo=meta.prazo,
+            valor_restante=reais(restante),
+            necessario_acumulado=reais(necessario),
+            saldo_no_prazo=reais(saldo),
+            alcancavel=alcancavel,
+        )
+        for meta, restante, necessario, saldo, alcancavel in zip(
+            metas, restantes.tolist(), necessarios.tolist(), saldos_no_prazo.tolist(), alcancaveis.tolist()
+        )
+    ]
+
+
+def projetar(usuario_ids: Sequence[int], inicio: date, meses: int, incluir_dias: bool = True) -> List[ProjecaoSchema]:
+    """Projeta o saldo diário de cada usuário nos ``meses`` a partir de ``inicio``."""
+    fim = fim_da_janela(inicio, meses)
+    dias = (fim - inicio).days + 1
+    datas = [inicio + timedelta(days=d) for d in range(dias)]
+    saldo_inicial = np.array([_saldo_inicial(usuario_id, inicio) for usuario_id in usuario_ids], dtype=np.int64)
+    entradas, saidas, saldos = calcular_saldos(saldo_inicial, coletar_fluxos(usuario_ids, inicio, fim), dias)
+    minimos = saldos.argmin(axis=1)
+
+    projecoes = []
+    for i, usuario_id in enumerate(usuario_ids):
+        detalhes = []
+        if incluir_dias:
+            detalhes = [
+                ProjecaoDiaSchema(data=data, entradas=reais(entrada), saidas=reais(saida), saldo=reais(saldo))
+                for data, entrada, saida, saldo in zip(
+                    datas, entradas[i].tolist(), saidas[i].tolist(), saldos[i].tolist()
+                )
+            ]
+        projecoes.append(ProjecaoSchema(
+            usuario_id=usuario_id,
+            inicio=inicio,
+            fim=fim,
+            saldo_inicial=reais(saldo_inicial[i]),
+            saldo_final=reais(saldos[i, -1]),
+            saldo_minimo=reais(saldos[i, minimos[i]]),
+            data_saldo_minimo=datas[minimos[i]],
+            dias_negativos=[datas[d] for d in np.flatnonzero(saldos[i] < 0).tolist()],
+            metas=_metas(usuario_id, inicio, int(saldo_inicial[i]), saldos[i]),
+            dias=detalhes,
+        ))
+    return projecoes
+
+
+@router.get("/", response_model=ProjecaoSchema)
+def obter_projecao(
+    usuario_id: Optional[int] = None,
+    meses: int = Query(12, ge=1, le=60, description="Quantidade de meses projetados."),
+    inicio: Optional[date] = Query(None, description="Primeiro dia da projeção (padrão: hoje)."),
+    contexto: ContextoUsuario = Depends(),
+) -> ProjecaoSchema:
+    """Retorna o saldo projetado dia a dia, os dias com saldo negativo e as metas inalcançáveis."""
+    usuario_id = contexto.filtro(usuario_id)
+    return projetar([usuario_id], inicio or date.today(), meses)[0]
+
+
+@router.post("/lote", response_model=List[ProjecaoSchema])
+def projetar_lote(pedido: ProjecaoLoteSchema, contexto: ContextoUsuario = Depends()) -> List[ProjecaoSchema]:
+    """Projeta vários usuários em uma única chamada (por padrão, sem o detalhe diário)."""
+    usuario_ids = list(dict.fromkeys(contexto.filtro(usuario_id) for usuario_id in pedido.usuario_ids))
+    if not usuario_ids:
+        return []
+    if len(usuario_ids) > MAX_USUARIOS_LOTE:
+        raise HTTPException(status_code=400, detail=f"Informe no máximo {MAX_USUARIOS_LOTE} usuários por lote.")
+    return projetar(usuario_ids, pedido.inicio or date.today(), pedido.meses, pedido.incluir_dias)
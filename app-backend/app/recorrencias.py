@@ -0,0 +1,170 @@
+"""
+Expansão das contas recorrentes em ocorrências (datas de lançamento) dentro de uma janela.
+
+As ocorrências de cada conta são calculadas saltando direto para a primeira data da
+janela, sem percorrer o histórico desde ``data_inicio``. As de várias contas são
+intercaladas em ordem de data sob demanda, com ``heapq.merge``, ou materializadas de uma
+vez (para o cache de janelas) com um balde por dia.
+
+Frequências mensais ou maiores preservam o dia de ``data_inicio`` e o limitam ao último dia
+de meses mais curtos: uma conta do dia 31 vence em 28/02 (ou 29/02), 31/03, 30/04, ...
+"""
+
+
+import heapq
+import threading
+from collections import OrderedDict
+from datetime import date
+from functools import lru_cache
+from typing import Callable, Hashable, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from app.schemas import ContaRecorrenteSchema
+
+# Frequência -> (unidade, passo)
+FREQUENCIAS = {
+    "diaria": ("dias", 1),
+    "semanal": ("dias", 7),
+    "quinzenal": ("dias", 14),
+    "mensal": ("meses", 1),
+    "bimestral": ("meses", 2),
+    "trimestral": ("meses", 3),
+    "semestral": ("meses", 6),
+    "anual": ("meses", 12),
+}
+
+_DIAS_NO_MES = (31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31)
+
+# Ocorrência: (data, id da conta, conta)
+Ocorrencia = Tuple[date, int, ContaRecorrenteSchema]
+
+
+def ultimo_dia(ano: int, mes: int) -> int:
+    """Retorna o último dia do mês."""
+    if mes == 2 and ano % 4 == 0 and (ano % 100 != 0 or ano % 400 == 0):
+        return 29
+    return _DIAS_NO_MES[mes - 1]
+
+
+@lru_cache(maxsize=64)
+def _tabela_meses(primeiro: int, ultimo: int) -> Tuple[List[int], List[int]]:
+    """Ordinal do dia 1 e quantidade de dias de cada mês (contado como ano * 12 + mês - 1)."""
+    inicios, dias = [], []
+    for mes in range(primeiro, ultimo + 1):
+        ano, indice = divmod(mes, 12)
+        inicios.append(date(ano, indice + 1, 1).toordinal())
+        dias.append(ultimo_dia(ano, indice + 1))
+    return inicios, dias
+
+
+def ordinais(conta: ContaRecorrenteSchema, de: date, ate: date) -> Sequence[int]:
+    """Retorna os ordinais (``date.toordinal``) das ocorrências da conta entre ``de`` e ``ate``.
+
+    O cálculo salta direto para a primeira ocorrência da janela. Contas com frequência
+    desconhecida não geram ocorrências.
+    """
+    regra = FREQUENCIAS.get(conta.frequencia)
+    inicio = conta.data_inicio
+    if regra is None or ate < inicio:
+        return ()
+    de = max(de, inicio)
+    unidade, passo = regra
+    primeiro, fim = de.toordinal(), ate.toordinal()
+    if unidade == "dias":
+        atual = inicio.toordinal()
+        atual += -(-(primeiro - atual) // passo) * passo
+        return range(atual, fim + 1, passo)
+
+    base = inicio.year * 12 + inicio.month - 1
+    mes_de = de.year * 12 + de.month - 1
+    mes_ate = ate.year * 12 + ate.month - 1
+    mes = base + -(-(mes_de - base) // passo) * passo
+    inicios, dias = _tabela_meses(mes_de, mes_ate)
+    dia = inicio.day
+    resultado = [
+        inicios[i] + (dia if dia <= dias[i] else dias[i]) - 1
+        for i in range(mes - mes_de, mes_ate - mes_de + 1, passo)
+    ]
+    # Só o primeiro e o último mês da janela podem ter ocorrências fora dela
+    if resultado and resultado[0] < primeiro:
+        del resultado[0]
+    if resultado and resultado[-1] > fim:
+        del resultado[-1]
+    return resultado
+
+
+def datas(conta: ContaRecorrenteSchema, de: date, ate: date) -> Iterator[date]:
+    """Gera as datas de ocorrência da conta entre ``de`` e ``ate`` (inclusive), em ordem."""
+    return map(date.fromordinal, ordinais(conta, de, ate))
+
+
+def ocorrencias(contas: Iterable[ContaRecorrenteSchema], de: date, ate: date) -> Iterator[Ocorrencia]:
+    """Intercala sob demanda as ocorrências das contas em ordem de data (e de ID da conta).
+
+    Só as ocorrências consumidas são convertidas em datas, então ler o começo de uma janela
+    longa é barato.
+    """
+    def gerar(conta: ContaRecorrenteSchema) -> Iterator[Tuple[int, int, ContaRecorrenteSchema]]:
+        conta_id = conta.id
+        for ordinal in ordinais(conta, de, ate):
+            yield ordinal, conta_id, conta
+    for ordinal, conta_id, conta in heapq.merge(*(gerar(conta) for conta in contas)):
+        yield date.fromordinal(ordinal), conta_id, conta
+
+
+def expandir(contas: Iterable[ContaRecorrenteSchema], de: date, ate: date) -> List[Ocorrencia]:
+    """Retorna todas as ocorrências da janela, na mesma ordem de ``ocorrencias``.
+
+    Para materializar a janela inteira, as ocorrências são distribuídas em um balde por dia
+    em vez de passar pelo heap: o custo é linear e cada data é criada uma única vez. As
+    contas devem vir em ordem de ID (como nos repositórios), para desempatar o mesmo dia.
+    """
+    inicio = de.toordinal()
+    baldes: List[List[ContaRecorrenteSchema]] = [[] for _ in range((ate - de).days + 1)]
+    for conta in contas:
+        for ordinal in ordinais(conta, de, ate):
+            baldes[ordinal - inicio].append(conta)
+    resultado: List[Ocorrencia] = []
+    for deslocamento, balde in enumerate(baldes):
+        if balde:
+            data = date.fromordinal(inicio + deslocamento)
+            resultado += [(data, conta.id, conta) for conta in balde]
+    return resultado
+
+
+class CacheOcorrencias:
+    """Cache LRU de janelas já expandidas, com chave ``(usuario_id, de, ate)``."""
+
+    def __init__(self, capacidade: int = 128):
+        self.capacidade = capacidade
+        self._lock = threading.Lock()
+        self._entradas: "OrderedDict[Hashable, list]" = OrderedDict()
+        # Incrementada a cada invalidação, para não guardar janelas calculadas antes dela
+        self._geracao = 0
+
+    def obter(self, usuario_id: Optional[int], de: date, ate: date, calcular: Callable[[], List]) -> List:
+        """Retorna a janela do cache ou a calcula com ``calcular`` e a guarda."""
+        chave = (usuario_id, de, ate)
+        with self._lock:
+            if chave in self._entradas:
+                self._entradas.move_to_end(chave)
+                return self._entradas[chave]
+            geracao = self._geracao
+        valor = calcular()
+        with self._lock:
+            if geracao != self._geracao:
+                return valor
+            self._entradas[chave] = valor
+            self._entradas.move_to_end(chave)
+            while len(self._entradas) > self.capacidade:
+                self._entradas.popitem(last=False)
+        return valor
+
+    def invalidar(self, usuario_id: Optional[int] = None) -> None:
+        """Descarta as janelas do usuário (e as de todos os usuários); sem usuário, limpa tudo."""
+        with self._lock:
+            self._geracao += 1
+            if usuario_id is None:
+                self._entradas.clear()
+                return
+            for chave in [c for c in self._entradas if c[0] in (usuario_id, None)]:
+                del self._entradas[chave]
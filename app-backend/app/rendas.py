@@ -2,15 +2,30 @@
 Rotas para gerenciamento de rendas.
 """
 
-from typing import List
+from functools import partial
+from typing import List, Optional
 from datetime import date
-from fastapi import APIRouter, HTTPException
-from app.schemas import RendaSchema
+from fastapi import APIRouter, Depends, File, Query, Response, UploadFile
+from fastapi.responses import StreamingResponse
+from app.schemas import RendaSchema, ResultadoImportacaoSchema
+from app.importacao import TAMANHO_LOTE, importar, ler_arquivo
+from app.categorizacao import categorizador
+from app.exportacao import responder_exportacao
+from app.paginacao import Paginacao
+from app.contexto import ContextoUsuario
+from app.concorrencia import (
+    atualizar_condicional,
+    cabecalho_if_match,
+    obter_ou_404,
+    remover_condicional,
+    responder_com_etag,
+)
+from app.di.dependency_injection import Repositorio, RepositorioAssincrono, criar_repositorio
 
 router = APIRouter(prefix="/rendas", tags=["Rendas"])
 
-# Mock database
-_rendas_db: List[RendaSchema] = [
+# Dados iniciais (mock), gravados no repositório na primeira execução
+_rendas_db: Repositorio[RendaSchema] = criar_repositorio("rendas", RendaSchema, [
     RendaSchema(id=1, valor=3000.0, data=date(2025, 9, 1), descricao="Salário empresa X", categoria_id=1, usuario_id=1),
     RendaSchema(id=2, valor=800.0, data=date(2025, 9, 10), descricao="Projeto site", categoria_id=2, usuario_id=1),
     RendaSchema(id=3, valor=150.0, data=date(2025, 9, 15), descricao="Aula particular", categoria_id=2, usuario_id=1),
@@ -19,41 +34,109 @@ _rendas_db: List[RendaSchema] = [
     RendaSchema(id=6, valor=200.0, data=date(2025, 9, 28), descricao="Restituição imposto", categoria_id=2, usuario_id=1),
     RendaSchema(id=7, valor=250.0, data=date(2025, 9, 30), descricao="Prêmio concurso", categoria_id=2, usuario_id=1),
     RendaSchema(id=8, valor=120.0, data=date(2025, 10, 2), descricao="Venda de livro", categoria_id=2, usuario_id=1),
-]
+], indices=("usuario_id", "categoria_id", "data"), colunar=True, particionado=True)
+_rendas = RepositorioAssincrono(_rendas_db)
+categorizador.observar("renda", _rendas_db)
 
 
 @router.get("/", response_model=List[RendaSchema])
-def listar_rendas() -> List[RendaSchema]:
-    """Lista todas as rendas cadastradas."""
-    return _rendas_db
+async def listar_rendas(
+    response: Response,
+    pagina: Paginacao = Depends(),
+    contexto: ContextoUsuario = Depends(),
+    usuario_id: Optional[int] = None,
+    categoria_id: Optional[int] = None,
+    data_de: Optional[date] = None,
+    data_ate: Optional[date] = None,
+) -> List[RendaSchema]:
+    """Lista as rendas cadastradas, com filtros opcionais e paginação por cursor."""
+    rendas = await _rendas.consultar(
+        pagina.after,
+        pagina.limit,
+        data_de=data_de,
+        data_ate=data_ate,
+        usuario_id=contexto.filtro(usuario_id),
+        categoria_id=categoria_id,
+    )
+    return pagina.responder(response, rendas, RendaSchema)
+
+
+@router.get("/export")
+def exportar_rendas(
+    formato: str = Query("ndjson", description="ndjson ou csv."),
+    gzip: bool = Query(False, description="Comprime o arquivo com gzip."),
+    contexto: ContextoUsuario = Depends(),
+    usuario_id: Optional[int] = None,
+    categoria_id: Optional[int] = None,
+    data_de: Optional[date] = None,
+    data_ate: Optional[date] = None,
+) -> StreamingResponse:
+    """Exporta o histórico de rendas em streaming, com memória constante no servidor."""
+    rendas = _rendas_db.iterar(
+        data_de=data_de,
+        data_ate=data_ate,
+        usuario_id=contexto.filtro(usuario_id),
+        categoria_id=categoria_id,
+    )
+    return responder_exportacao(rendas, RendaSchema, formato, gzip, "rendas")
 
 
 @router.post("/", response_model=RendaSchema, status_code=201)
-def criar_renda(renda: RendaSchema) -> RendaSchema:
+async def criar_renda(
+    renda: RendaSchema, response: Response, contexto: ContextoUsuario = Depends()
+) -> RendaSchema:
     """Cria uma nova renda."""
+    contexto.exigir_dono(renda)
     # Gera um novo ID automaticamente
-    novo_id = max([r.id for r in _rendas_db], default=0) + 1
-    renda.id = novo_id
-    _rendas_db.append(renda)
-    return renda
+    return responder_com_etag(response, await _rendas.criar(renda))
+
+
+@router.post("/bulk", response_model=ResultadoImportacaoSchema)
+def importar_rendas(
+    arquivo: UploadFile = File(..., description="Extrato em CSV, OFX ou NDJSON."),
+    formato: Optional[str] = Query(None, description="csv, ofx ou ndjson; se omitido, usa a extensão do arquivo."),
+    usuario_id: Optional[int] = Query(None, description="Usuário das linhas que não informam usuario_id."),
+    categoria_id: Optional[int] = Query(None, description="Categoria das linhas que não informam categoria_id."),
+    encoding: Optional[str] = None,
+    delimitador: str = ",",
+    lote: int = Query(TAMANHO_LOTE, ge=1, le=50_000),
+    categorizar: bool = Query(True, description="Sugere pela descrição a categoria das linhas que continuam sem uma."),
+    contexto: ContextoUsuario = Depends(),
+) -> ResultadoImportacaoSchema:
+    """Importa rendas em lote a partir de um extrato, retornando o relatório de erros por linha."""
+    linhas = ler_arquivo(arquivo, formato, "renda", encoding, delimitador)
+    padroes = {"usuario_id": contexto.filtro(usuario_id), "categoria_id": categoria_id}
+    sugerir = partial(categorizador.categorias, "renda") if categorizar else None
+    return importar(_rendas_db, RendaSchema, linhas, padroes, lote, sugerir, contexto.usuario_id)
+
+
+@router.get("/{renda_id}", response_model=RendaSchema)
+async def obter_renda(renda_id: int, response: Response, contexto: ContextoUsuario = Depends()) -> RendaSchema:
+    """Retorna uma renda pelo ID, com o ETag da versão atual."""
+    return await obter_ou_404(_rendas, renda_id, response, "Renda não encontrada.", contexto.usuario_id)
 
 
 @router.put("/{renda_id}", response_model=RendaSchema)
-def atualizar_renda(renda_id: int, renda_atualizada: RendaSchema) -> RendaSchema:
-    """Atualiza uma renda existente."""
-    for i, renda in enumerate(_rendas_db):
-        if renda.id == renda_id:
-            renda_atualizada.id = renda_id
-            _rendas_db[i] = renda_atualizada
-            return renda_atualizada
-    raise HTTPException(status_code=404, detail="Renda não encontrada.")
+async def atualizar_renda(
+    renda_id: int,
+    renda_atualizada: RendaSchema,
+    response: Response,
+    if_match: Optional[str] = Depends(cabecalho_if_match),
+    contexto: ContextoUsuario = Depends(),
+) -> RendaSchema:
+    """Atualiza uma renda existente (condicional ao ``If-Match``, se informado)."""
+    contexto.exigir_dono(renda_atualizada)
+    return await atualizar_condicional(
+        _rendas, renda_id, renda_atualizada, if_match, response, "Renda não encontrada.", contexto.usuario_id
+    )
 
 
 @router.delete("/{renda_id}")
-def excluir_renda(renda_id: int) -> dict:
-    """Exclui uma renda."""
-    for i, renda in enumerate(_rendas_db):
-        if renda.id == renda_id:
-            del _rendas_db[i]
-            return {"message": "Renda excluída com sucesso."}
-    raise HTTPException(status_code=404, detail="Renda não encontrada.")
+async def excluir_renda(
+    renda_id: int,
+    if_match: Optional[str] = Depends(cabecalho_if_match),
+    contexto: ContextoUsuario = Depends(),
+) -> dict:
+    """Exclui uma renda (condicional ao ``If-Match``, se informado)."""
+    await remover_condicional(_rendas, renda_id, if_match, "Renda não encontrada.", contexto.usuario_id)
+    return {"message": "Renda excluída com sucesso."}
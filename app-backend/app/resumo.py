@@ -0,0 +1,123 @@
+"""
+Rotas do resumo financeiro (saldo, totais por mês e por categoria).
+
+O resumo é servido a partir dos totais mensais por (usuário, tipo, mês, categoria), que
+são atualizados incrementalmente a cada criação, atualização ou exclusão de despesa ou
+renda. Assim, o custo do resumo é O(meses x categorias), e não O(transações). Um job noturno
+do agendador recalcula os totais a partir dos lançamentos e corrige divergências.
+"""
+
+
+import logging
+from collections import defaultdict
+from datetime import date
+from typing import Dict, Iterator, Optional
+
+from fastapi import APIRouter, Depends, Query
+
+# Os repositórios de despesas e rendas são criados e registrados ao importar seus módulos
+import app.despesas  # noqa: F401
+import app.rendas  # noqa: F401
+from app.agendador import agendador, diariamente
+from app.armazenamento import Lancamento
+from app.contexto import ContextoUsuario
+from app.di.dependency_injection import criar_totais_mensais, obter_repositorio
+from app.dinheiro import centavos, reais
+from app.schemas import ResumoSchema, TotalCategoriaSchema, TotalMesSchema
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/resumo", tags=["Resumo"])
+
+PADRAO_MES = r"^\d{4}-\d{2}$"
+
+totais_mensais = criar_totais_mensais(particionado=True)
+
+
+def mes_referencia(data: date) -> str:
+    """Retorna o mês ('AAAA-MM') de uma data."""
+    return f"{data.year:04d}-{data.month:02d}"
+
+
+def _observador(tipo: str):
+    """Cria o observador que mantém os totais mensais de um tipo de lançamento."""
+    def observar(antigo, novo) -> None:
+        if antigo is not None:
+            totais_mensais.somar(
+                antigo.usuario_id, tipo, mes_referencia(antigo.data), antigo.categoria_id, -centavos(antigo.valor), -1
+            )
+        if novo is not None:
+            totais_mensais.somar(
+                novo.usuario_id, tipo, mes_referencia(novo.data), novo.categoria_id, centavos(novo.valor), 1
+            )
+    return observar
+
+
+def _lancamentos() -> Iterator[Lancamento]:
+    for tipo, nome in (("despesa", "despesas"), ("renda", "rendas")):
+        for registro in obter_repositorio(nome).iterar():
+            yield (
+                registro.usuario_id, tipo, mes_referencia(registro.data), registro.categoria_id, centavos(registro.valor)
+            )
+
+
+totais_mensais.reconstruir_se_vazio(_lancamentos)
+obter_repositorio("despesas").observar(_observador("despesa"))
+obter_repositorio("rendas").observar(_observador("renda"))
+
+
+def _reconstruir_totais(agendada, anterior) -> None:
+    """Job noturno: recalcula os totais mensais a partir das despesas e rendas."""
+    despesas, rendas = obter_repositorio("despesas"), obter_repositorio("rendas")
+    # As escritas de lançamentos esperam a reconstrução, para que nenhuma fique de fora
+    with despesas.transacao(), rendas.transacao():
+        divergentes = totais_mensais.reconstruir(_lancamentos())
+    if divergentes:
+        logger.warning("%s totais mensais divergentes foram corrigidos.", divergentes)
+
+
+agendador.registrar("totais_mensais", diariamente(3), _reconstruir_totais)
+
+
+@router.get("/", response_model=ResumoSchema)
+def obter_resumo(
+    usuario_id: Optional[int] = None,
+    mes_de: Optional[str] = Query(None, pattern=PADRAO_MES, description="Primeiro mês (AAAA-MM)."),
+    mes_ate: Optional[str] = Query(None, pattern=PADRAO_MES, description="Último mês (AAAA-MM)."),
+    contexto: ContextoUsuario = Depends(),
+) -> ResumoSchema:
+    """Retorna saldo, totais por mês e totais por categoria de um usuário no período."""
+    usuario_id = contexto.filtro(usuario_id)
+    # Somas em centavos; a conversão para reais só acontece na montagem da resposta
+    por_mes: Dict[str, Dict[str, int]] = defaultdict(lambda: {"renda": 0, "despesa": 0})
+    por_categoria: Dict[tuple, list] = {}
+    for total in totais_mensais.consultar(usuario_id, mes_de, mes_ate):
+        por_mes[total.mes][total.tipo] += total.total
+        acumulado = por_categoria.setdefault((total.categoria_id, total.tipo), [0, 0])
+        acumulado[0] += total.total
+        acumulado[1] += total.quantidade
+
+    meses = [
+        TotalMesSchema(
+            mes=mes,
+            total_rendas=reais(valores["renda"]),
+            total_despesas=reais(valores["despesa"]),
+            saldo=reais(valores["renda"] - valores["despesa"]),
+        )
+        for mes, valores in sorted(por_mes.items())
+    ]
+    total_rendas = sum(valores["renda"] for valores in por_mes.values())
+    total_despesas = sum(valores["despesa"] for valores in por_mes.values())
+    return ResumoSchema(
+        usuario_id=usuario_id,
+        mes_de=mes_de,
+        mes_ate=mes_ate,
+        total_rendas=reais(total_rendas),
+        total_despesas=reais(total_despesas),
+        saldo=reais(total_rendas - total_despesas),
+        meses=meses,
+        categorias=[
+            TotalCategoriaSchema(categoria_id=categoria_id, tipo=tipo, total=reais(total), quantidade=quantidade)
+            for (categoria_id, tipo), (total, quantidade) in sorted(por_categoria.items())
+        ],
+    )
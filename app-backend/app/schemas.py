@@ -3,13 +3,19 @@
 Módulo schemas.py
 
 Define os modelos de dados (schemas) utilizados para validação e documentação da API DuckBills.
-Inclui representações para Usuário, Categoria, Renda, Despesa, Conta Recorrente e Orçamento.
+Inclui representações para Usuário, Categoria, Renda, Despesa, Conta Recorrente e Orçamento,
+além dos schemas de resposta das rotas auxiliares (importação em lote, resumo financeiro,
+consumo de orçamentos, progresso de metas, ocorrências, projeção, busca, sugestões de
+categoria, conciliação, agendador, lotes de escrita e feed de alterações).
+Valores monetários são ``Dinheiro`` (decimais exatos com duas casas; ver ``app.dinheiro``).
 """
 
 
-from datetime import date
-from typing import Optional
-from pydantic import BaseModel
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional
+from pydantic import BaseModel, Field
+
+from app.dinheiro import Dinheiro
 
 
 class UsuarioSchema(BaseModel):
@@ -29,7 +35,7 @@ class CategoriaSchema(BaseModel):
 class RendaSchema(BaseModel):
     """Schema para representação de uma renda (entrada de dinheiro)."""
     id: int
-    valor: float
+    valor: Dinheiro
     data: date
     descricao: Optional[str] = None
     categoria_id: int
@@ -39,7 +45,7 @@ class RendaSchema(BaseModel):
 class DespesaSchema(BaseModel):
     """Schema para representação de uma despesa (saída de dinheiro)."""
     id: int
-    valor: float
+    valor: Dinheiro
     data: date
     descricao: Optional[str] = None
     categoria_id: int
@@ -50,7 +56,7 @@ class DespesaSchema(BaseModel):
 class ContaRecorrenteSchema(BaseModel):
     """Schema para contas recorrentes (renda ou despesa automática)."""
     id: int
-    valor: float
+    valor: Dinheiro
     descricao: Optional[str] = None
     categoria_id: int
     usuario_id: int
@@ -59,12 +65,23 @@ class ContaRecorrenteSchema(BaseModel):
     frequencia: str  # 'mensal', 'semanal', etc.
 
 
+class OcorrenciaSchema(BaseModel):
+    """Ocorrência (lançamento previsto) de uma conta recorrente em uma data."""
+    conta_recorrente_id: int
+    data: date
+    valor: Dinheiro
+    descricao: Optional[str] = None
+    categoria_id: int
+    usuario_id: int
+    tipo: str  # 'renda' ou 'despesa'
+
+
 class OrcamentoSchema(BaseModel):
     """Schema para definição de orçamento por categoria e período."""
     id: int
     categoria_id: int
     usuario_id: int
-    valor_limite: float
+    valor_limite: Dinheiro
     periodo: str  # 'mensal', 'anual'
 
 
@@ -72,8 +89,291 @@ class MetaSchema(BaseModel):
     """Schema para definição de meta financeira."""
     id: int
     titulo: str
-    valor_atual: float
-    valor_meta: float
+    valor_atual: Dinheiro
+    valor_meta: Dinheiro
+    prazo: date
+    descricao: Optional[str] = None
+    usuario_id: int
+
+
+class AporteMetaSchema(BaseModel):
+    """Aporte (contribuição) registrado em uma meta; o histórico é só de inclusão."""
+    id: int
+    meta_id: int
+    usuario_id: int
+    valor: Dinheiro
+    data: date
+
+
+class ProgressoMetaSchema(BaseModel):
+    """Ritmo de uma meta: quanto falta, quanto é preciso aportar por mês e a data estimada."""
+    meta_id: int
+    usuario_id: int
+    titulo: str
+    valor_atual: Dinheiro
+    valor_meta: Dinheiro
+    valor_restante: Dinheiro
+    percentual: float
+    prazo: date
+    meses_restantes: float
+    taxa_necessaria: Dinheiro  # aporte mensal necessário para chegar no prazo
+    taxa_atual: Dinheiro  # média mensal dos aportes recentes
+    data_estimada: Optional[date] = None  # com a taxa atual; None se não houver aportes
+    no_ritmo: bool
+    quantidade_aportes: int
+
+
+class ErroImportacaoSchema(BaseModel):
+    """Erro de validação de uma linha do arquivo importado."""
+    linha: int
+    erro: str
+
+
+class ResultadoImportacaoSchema(BaseModel):
+    """Resumo de uma importação em lote."""
+    importadas: int = 0
+    ignoradas: int = 0
+    categorizadas: int = 0  # linhas cuja categoria foi preenchida pela descrição
+    total_erros: int = 0
+    erros: List[ErroImportacaoSchema] = []
+
+
+class TotalMesSchema(BaseModel):
+    """Totais de rendas e despesas de um mês ('AAAA-MM')."""
+    mes: str
+    total_rendas: Dinheiro
+    total_despesas: Dinheiro
+    saldo: Dinheiro
+
+
+class TotalCategoriaSchema(BaseModel):
+    """Total de uma categoria no período do resumo."""
+    categoria_id: int
+    tipo: str  # 'renda' ou 'despesa'
+    total: Dinheiro
+    quantidade: int
+
+
+class ResumoSchema(BaseModel):
+    """Resumo financeiro de um usuário em um período."""
+    usuario_id: int
+    mes_de: Optional[str] = None
+    mes_ate: Optional[str] = None
+    total_rendas: Dinheiro
+    total_despesas: Dinheiro
+    saldo: Dinheiro
+    meses: List[TotalMesSchema]
+    categorias: List[TotalCategoriaSchema]
+
+
+class ConsumoOrcamentoSchema(BaseModel):
+    """Consumo de um orçamento no período de referência."""
+    orcamento_id: int
+    categoria_id: int
+    usuario_id: int
+    periodo: str  # 'mensal', 'anual'
+    inicio: date
+    fim: date
+    valor_limite: Dinheiro
+    utilizado: Dinheiro
+    restante: Dinheiro
+    percentual: float
+
+
+class AlertaOrcamentoSchema(BaseModel):
+    """Evento emitido quando uma despesa faz um orçamento cruzar um limiar de consumo."""
+    id: int
+    orcamento_id: int
+    categoria_id: int
+    usuario_id: int
+    despesa_id: Optional[int] = None  # None nos alertas da verificação noturna
+    limiar: int  # percentual: 80 ou 100
+    percentual: float
+    utilizado: Dinheiro
+    valor_limite: Dinheiro
+    inicio: date
+    fim: date
+    criado_em: datetime
+
+
+class ProjecaoDiaSchema(BaseModel):
+    """Entradas, saídas e saldo projetado de um dia."""
+    data: date
+    entradas: Dinheiro
+    saidas: Dinheiro
+    saldo: Dinheiro
+
+
+class ProjecaoMetaSchema(BaseModel):
+    """Situação projetada de uma meta no seu prazo."""
+    meta_id: int
+    titulo: str
     prazo: date
+    valor_restante: Dinheiro
+    # Soma do que falta nesta meta e nas de prazo anterior, que disputam o mesmo saldo
+    necessario_acumulado: Dinheiro
+    # Saldo projetado no prazo (no fim da janela, se o prazo for posterior a ela)
+    saldo_no_prazo: Dinheiro
+    alcancavel: bool
+
+
+class ProjecaoSchema(BaseModel):
+    """Projeção do saldo diário de um usuário."""
+    usuario_id: int
+    inicio: date
+    fim: date
+    saldo_inicial: Dinheiro
+    saldo_final: Dinheiro
+    saldo_minimo: Dinheiro
+    data_saldo_minimo: date
+    dias_negativos: List[date]
+    metas: List[ProjecaoMetaSchema]
+    dias: List[ProjecaoDiaSchema] = []
+
+
+class ProjecaoLoteSchema(BaseModel):
+    """Pedido de projeção de vários usuários de uma vez (jobs noturnos)."""
+    usuario_ids: List[int]
+    meses: int = Field(12, ge=1, le=60)
+    inicio: Optional[date] = None
+    incluir_dias: bool = False
+
+
+class ResultadoBuscaSchema(BaseModel):
+    """Despesa, renda ou conta recorrente encontrada pela busca textual."""
+    tipo: str  # 'despesa', 'renda' ou 'conta_recorrente'
+    id: int
     descricao: Optional[str] = None
+    valor: Dinheiro
+    data: Optional[date] = None  # data do lançamento ou de início da conta recorrente
+    categoria_id: int
     usuario_id: int
+    pontuacao: float
+
+
+class SugestoesCategoriaPedidoSchema(BaseModel):
+    """Descrições para as quais sugerir categorias."""
+    tipo: str = Field(..., pattern="^(despesa|renda)$")
+    descricoes: List[Optional[str]]
+
+
+class SugestaoCategoriaSchema(BaseModel):
+    """Categoria sugerida para uma descrição (``None`` se nenhum termo dela for conhecido)."""
+    descricao: Optional[str] = None
+    categoria_id: Optional[int] = None
+    confianca: float = 0.0  # probabilidade estimada da categoria sugerida, de 0 a 1
+
+
+class ConciliacaoOcorrenciaSchema(BaseModel):
+    """Ocorrência prevista de uma conta recorrente e o lançamento conciliado com ela."""
+    conta_recorrente_id: int
+    usuario_id: int
+    tipo: str  # 'renda' ou 'despesa'
+    categoria_id: int
+    descricao: Optional[str] = None
+    data_prevista: date
+    valor_previsto: Dinheiro
+    status: str  # 'paga', 'atrasada', 'ausente' ou 'pendente'
+    lancamento_id: Optional[int] = None
+    data_lancamento: Optional[date] = None
+    valor_lancamento: Optional[Dinheiro] = None
+    dias_atraso: int = 0
+    duplicados: List[int] = []  # outros lançamentos que parecem pagar a mesma ocorrência
+
+
+class ConciliacaoSchema(BaseModel):
+    """Conciliação das contas recorrentes com os lançamentos em uma janela de vencimentos."""
+    de: date
+    ate: date
+    usuario_id: int
+    pagas: int
+    atrasadas: int
+    ausentes: int
+    pendentes: int
+    duplicadas: int  # ocorrências com pagamentos duplicados
+    ocorrencias: List[ConciliacaoOcorrenciaSchema]
+
+
+class ExecucaoJobSchema(BaseModel):
+    """Estado persistido de um job do agendador."""
+    id: int
+    nome: str
+    proxima_execucao: datetime
+    ultima_execucao: Optional[datetime] = None  # horário agendado da última execução bem-sucedida
+    inicio: Optional[datetime] = None  # início real da última execução
+    duracao: float = 0.0  # segundos
+    atraso: float = 0.0  # segundos entre o horário agendado e o início real
+    execucoes: int = 0
+    erro: Optional[str] = None
+
+
+class JobAgendadoSchema(BaseModel):
+    """Situação de um job do agendador."""
+    nome: str
+    agenda: str
+    em_execucao: bool = False
+    proxima_execucao: Optional[datetime] = None
+    ultima_execucao: Optional[datetime] = None
+    inicio: Optional[datetime] = None
+    duracao: float = 0.0
+    atraso: float = 0.0
+    execucoes: int = 0
+    erro: Optional[str] = None
+
+
+class LancamentoRecorrenteSchema(BaseModel):
+    """Ocorrência de conta recorrente já lançada pelo agendador (chave de idempotência)."""
+    id: int  # derivado da conta e da data da ocorrência
+    conta_recorrente_id: int
+    usuario_id: int
+    data: date
+    tipo: str  # 'renda' ou 'despesa'
+    lancamento_id: Optional[int] = None  # despesa ou renda criada
+
+
+class OperacaoLoteSchema(BaseModel):
+    """Escrita de um lote (``POST /batch``)."""
+    operacao: str = Field(..., pattern="^(criar|atualizar|remover|adicionar_valor)$")
+    entidade: str = Field(..., pattern="^(despesas|rendas|metas|orcamentos|categorias)$")
+    id: Optional[int] = None  # registro atualizado, removido ou que recebe o valor
+    dados: Optional[Dict[str, Any]] = None  # registro criado ou atualizado
+    valor: Optional[Dinheiro] = None  # valor adicionado à meta ('adicionar_valor')
+    if_match: Optional[str] = None  # ETag esperado do registro, como no cabeçalho If-Match
+
+
+class LoteSchema(BaseModel):
+    """Escritas aplicadas em ordem, em uma única transação."""
+    operacoes: List[OperacaoLoteSchema]
+
+
+class ResultadoOperacaoLoteSchema(BaseModel):
+    """Resultado de uma escrita do lote."""
+    indice: int
+    status: int  # status HTTP que a rota individual retornaria (424: não aplicada)
+    id: Optional[int] = None
+    etag: Optional[str] = None
+    registro: Optional[Dict[str, Any]] = None
+    erro: Optional[str] = None
+
+
+class ResultadoLoteSchema(BaseModel):
+    """Resultado de um lote: todas as escritas aplicadas, ou nenhuma."""
+    aplicado: bool
+    resultados: List[ResultadoOperacaoLoteSchema]
+
+
+class AlteracaoSchema(BaseModel):
+    """Última alteração de um registro no feed de alterações (``GET /changes``)."""
+    seq: int
+    entidade: str  # despesas, rendas, metas, orcamentos, contas_recorrentes ou categorias
+    id: int
+    usuario_id: Optional[int] = None  # None: registro sem usuário (categorias)
+    removido: bool
+    registro: Optional[Dict[str, Any]] = None  # estado atual do registro (None se removido)
+
+
+class AlteracoesSchema(BaseModel):
+    """Alterações desde um cursor e o cursor da próxima sincronização."""
+    ultimo: int  # envie como ``since`` na próxima consulta
+    mais: bool  # há mais alterações além desta página
+    alteracoes: List[AlteracaoSchema]
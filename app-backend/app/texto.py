@@ -0,0 +1,32 @@
+"""
+Normalização de textos livres (descrições de lançamentos) para busca e categorização.
+
+Os textos são comparados sem acentos e sem diferença entre maiúsculas e minúsculas
+("Educação" e "educacao" geram o mesmo termo) e quebrados em termos alfanuméricos.
+"""
+
+
+import re
+import unicodedata
+from functools import lru_cache
+from typing import Optional, Tuple
+
+_TERMO = re.compile(r"[a-z0-9]+")
+
+
+def normalizar(texto: str) -> str:
+    """Remove acentos e converte para minúsculas."""
+    decomposto = unicodedata.normalize("NFKD", texto.casefold())
+    return "".join(c for c in decomposto if not unicodedata.combining(c))
+
+
+@lru_cache(maxsize=65536)
+def termos(texto: Optional[str]) -> Tuple[str, ...]:
+    """Retorna os termos normalizados do texto, sem repetição, na ordem em que aparecem.
+
+    Descrições se repetem muito em extratos ("Uber", "Mercado"), por isso o resultado fica
+    em cache.
+    """
+    if not texto:
+        return ()
+    return tuple(dict.fromkeys(_TERMO.findall(normalizar(texto))))
@@ -0,0 +1 @@
+# Benchmarks da API DuckBills. Execute a partir de app-backend: python -m benchmarks.<modulo>
@@ -0,0 +1,65 @@
+"""
+Benchmark de vazão dos backends de armazenamento (memória x SQLite/WAL).
+
+Para cada backend, mede operações por segundo de inserção em lote, inserção unitária,
+consulta por ID, busca por usuário/categoria, atualização e exclusão.
+
+Uso (a partir de app-backend):
+    python -m benchmarks.bench_armazenamento [linhas]
+"""
+
+
+import os
+import random
+import sys
+import tempfile
+import time
+
+from app.armazenamento import ConexoesSQLite, RepositorioMemoria, RepositorioSQLite
+from app.schemas import DespesaSchema
+from benchmarks.bench_repositorio import gerar_despesas
+
+INDICES = ("usuario_id", "categoria_id", "data")
+
+
+def vazao(funcao, argumentos) -> float:
+    """Retorna as operações por segundo de ``funcao`` aplicada a cada argumento."""
+    inicio = time.perf_counter()
+    for argumento in argumentos:
+        funcao(argumento)
+    return len(argumentos) / (time.perf_counter() - inicio)
+
+
+def executar(nome: str, repo, linhas: int) -> None:
+    despesas = gerar_despesas(linhas)
+    inicio = time.perf_counter()
+    repo.inserir_varios(despesas)
+    lote = linhas / (time.perf_counter() - inicio)
+
+    operacoes = min(2_000, linhas)
+    ids = random.sample(range(1, linhas + 1), operacoes)
+    novas = gerar_despesas(operacoes)
+    resultados = {
+        "inserir em lote": lote,
+        "criar": vazao(repo.criar, novas),
+        "obter": vazao(repo.obter, ids),
+        "buscar usuário+categoria": vazao(
+            lambda i: repo.buscar(usuario_id=i % 100 + 1, categoria_id=i % 8 + 1), ids[:200]
+        ),
+        "atualizar": vazao(lambda i: repo.atualizar(i, despesas[i - 1]), ids),
+        "remover": vazao(repo.remover, ids),
+    }
+    for operacao, ops in resultados.items():
+        print(f"{nome:>8} {operacao:>26} {ops:>14,.0f} ops/s")
+
+
+def main() -> None:
+    linhas = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    executar("memoria", RepositorioMemoria(DespesaSchema, indices=INDICES), linhas)
+    with tempfile.TemporaryDirectory() as diretorio:
+        conexoes = ConexoesSQLite(os.path.join(diretorio, "bench.db"))
+        executar("sqlite", RepositorioSQLite(DespesaSchema, conexoes, "despesas", indices=INDICES), linhas)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Benchmark da busca textual (app.busca.IndiceBusca) x varredura das descrições.
+
+Indexa 1M de despesas de 100 usuários, com descrições no estilo de extratos (estabelecimento,
+complemento e, às vezes, um número de pedido), e mede a latência de consultas exatas, por
+prefixo, com erro de digitação e sem acento, de um usuário e de todos, comparando com a
+varredura ingênua (normalizar cada descrição do usuário e procurar a substring).
+
+Uso (a partir de app-backend):
+    python -m benchmarks.bench_busca [linhas]
+"""
+
+
+import random
+import sys
+import time
+from datetime import date, timedelta
+
+from app.armazenamento import RepositorioMemoria
+from app.busca import IndiceBusca, documento
+from app.schemas import DespesaSchema
+from app.texto import normalizar
+
+LINHAS = 1_000_000
+REPETICOES = 20
+ESTABELECIMENTOS = (
+    "Uber", "Netflix", "Aluguel", "Supermercado Pão de Açúcar", "Farmácia São João", "Spotify",
+    "iFood", "Posto Shell", "Educação Infantil Escola", "Padaria Estrela", "Amazon", "Mercado Livre",
+    "Academia Smart Fit", "Cinema Cinemark", "Condomínio", "Energia Elétrica", "Plano de Saúde",
+)
+COMPLEMENTOS = ("", "viagem", "assinatura", "mensal", "compra", "pedido", "parcela", "São Paulo", "online")
+CONSULTAS = {
+    "exata": "uber",
+    "prefixo": "netf",
+    "erro": "alugeul",
+    "sem acento": "educacao",
+    "dois termos": "farmacia joao",
+}
+
+
+def gerar_despesas(n: int, semente: int = 42):
+    aleatorio = random.Random(semente)
+    inicio = date(2020, 1, 1)
+    despesas = []
+    for i in range(1, n + 1):
+        partes = [aleatorio.choice(ESTABELECIMENTOS), aleatorio.choice(COMPLEMENTOS)]
+        if aleatorio.random() < 0.1:
+            partes.append(str(aleatorio.randrange(1_000_000)))
+        despesas.append(DespesaSchema(
+            id=i,
+            valor=aleatorio.randint(100, 50_000) / 100,
+            data=inicio + timedelta(days=i % 1800),
+            descricao=" ".join(p for p in partes if p),
+            categoria_id=i % 8 + 1,
+            usuario_id=i % 100 + 1,
+        ))
+    return despesas
+
+
+def varredura(repo: RepositorioMemoria, consulta: str, usuario_id):
+    termos_consulta = normalizar(consulta).split()
+    registros = repo.buscar(usuario_id=usuario_id) if usuario_id is not None else repo.listar()
+    return [r.id for r in registros if all(t in normalizar(r.descricao or "") for t in termos_consulta)]
+
+
+def medir(funcao, *argumentos) -> float:
+    inicio = time.perf_counter()
+    for _ in range(REPETICOES):
+        funcao(*argumentos)
+    return (time.perf_counter() - inicio) / REPETICOES * 1e3
+
+
+def main() -> None:
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else LINHAS
+    despesas = gerar_despesas(n)
+    repo = RepositorioMemoria(DespesaSchema, despesas, indices=("usuario_id",))
+
+    indice = IndiceBusca()
+    inicio = time.perf_counter()
+    for despesa in despesas:
+        indice.adicionar(documento("despesa", despesa.id), despesa.usuario_id, despesa.descricao)
+    print(f"{n} despesas indexadas em {time.perf_counter() - inicio:.1f} s ({len(indice)} termos)")
+
+    print(f"{'consulta':>12} {'usuário':>8} {'resultados':>11} {'índice (ms)':>12} {'varredura (ms)':>15}")
+    for nome, consulta in CONSULTAS.items():
+        for usuario_id in (7, None):
+            resultados = indice.buscar(consulta, usuario_id, limite=50)
+            t_indice = medir(indice.buscar, consulta, usuario_id, None, 50)
+            t_varredura = medir(varredura, repo, consulta, usuario_id) if usuario_id is not None else float("nan")
+            print(f"{nome:>12} {str(usuario_id or 'todos'):>8} {len(resultados):>11} "
+                  f"{t_indice:>12.2f} {t_varredura:>15.2f}")
+
+
+if __name__ == "__main__":
+    main()
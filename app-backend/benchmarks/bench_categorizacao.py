@@ -0,0 +1,104 @@
+"""
+Benchmark da categorização automática (app.categorizacao.ModeloCategorias).
+
+Treina o modelo com 1M de despesas categorizadas (descrições no estilo de extratos, cada
+estabelecimento com uma categoria predominante e 10% de rótulos trocados), mede o custo do
+aprendizado incremental de um lançamento e a predição em lote de 100k descrições novas,
+comparando a pontuação vetorizada com a mesma conta feita descrição a descrição em Python.
+
+Uso (a partir de app-backend):
+    python -m benchmarks.bench_categorizacao [linhas] [descricoes]
+"""
+
+
+import math
+import random
+import sys
+import time
+
+from app.categorizacao import ModeloCategorias
+from app.texto import termos
+
+LINHAS = 1_000_000
+DESCRICOES = 100_000
+ESTABELECIMENTOS = {
+    "Uber": 5, "99 Táxi": 5, "Posto Shell": 5, "Netflix": 7, "Spotify": 7, "Amazon Prime": 7,
+    "Aluguel": 3, "Condomínio": 3, "Energia Elétrica": 3, "Supermercado Pão de Açúcar": 4,
+    "Mercado Livre": 4, "Padaria Estrela": 4, "Cinema Cinemark": 6, "Academia Smart Fit": 6,
+    "Educação Infantil Escola": 8, "Curso de Inglês": 8, "Livraria Cultura": 8, "iFood": 4,
+}
+COMPLEMENTOS = ("", "viagem", "assinatura", "mensal", "compra", "pedido", "parcela", "São Paulo", "online")
+
+
+def gerar(n: int, semente: int):
+    aleatorio = random.Random(semente)
+    nomes = list(ESTABELECIMENTOS)
+    descricoes, categorias = [], []
+    for _ in range(n):
+        nome = aleatorio.choice(nomes)
+        partes = [nome, aleatorio.choice(COMPLEMENTOS)]
+        if aleatorio.random() < 0.1:
+            partes.append(str(aleatorio.randrange(1_000_000)))
+        descricoes.append(" ".join(p for p in partes if p))
+        rotulo = ESTABELECIMENTOS[nome] if aleatorio.random() >= 0.1 else aleatorio.randint(3, 8)
+        categorias.append(rotulo)
+    return descricoes, categorias
+
+
+def sugerir_um_a_um(modelo: ModeloCategorias, descricoes):
+    """A mesma pontuação do modelo, calculada descrição a descrição, sem numpy."""
+    log_termos, log_prioris = (m.tolist() for m in modelo._pesos())
+    categorias = modelo._categorias
+    sugestoes = []
+    for descricao in descricoes:
+        linhas = [modelo._termos[t] for t in termos(descricao) if t in modelo._termos]
+        if not linhas:
+            sugestoes.append(None)
+            continue
+        pontuacoes = list(log_prioris)
+        for linha in linhas:
+            for coluna, peso in enumerate(log_termos[linha]):
+                pontuacoes[coluna] += peso
+        maximo = max(pontuacoes)
+        vencedora = pontuacoes.index(maximo)
+        sugestoes.append((categorias[vencedora], 1.0 / sum(math.exp(p - maximo) for p in pontuacoes)))
+    return sugestoes
+
+
+def main() -> None:
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else LINHAS
+    m = int(sys.argv[2]) if len(sys.argv) > 2 else DESCRICOES
+    descricoes, categorias = gerar(n, 42)
+    novas, esperadas = gerar(m, 7)
+    termos.cache_clear()
+
+    modelo = ModeloCategorias()
+    inicio = time.perf_counter()
+    modelo.aprender_varios(descricoes, categorias)
+    print(f"treino com {n} lançamentos: {time.perf_counter() - inicio:.2f} s")
+
+    inicio = time.perf_counter()
+    for descricao, categoria_id in zip(descricoes[:10_000], categorias[:10_000]):
+        modelo.aprender(descricao, categoria_id)
+    print(f"aprendizado incremental: {(time.perf_counter() - inicio) / 10_000 * 1e6:.1f} µs por lançamento")
+
+    modelo.sugerir(["aquecimento"])
+    termos.cache_clear()
+    inicio = time.perf_counter()
+    sugestoes = modelo.sugerir(novas)
+    t_vetorizado = time.perf_counter() - inicio
+    inicio = time.perf_counter()
+    referencia = sugerir_um_a_um(modelo, novas)
+    t_um_a_um = time.perf_counter() - inicio
+
+    iguais = all(
+        (a is None and b is None) or (a[0] == b[0] and abs(a[1] - b[1]) < 1e-9) for a, b in zip(sugestoes, referencia)
+    )
+    acertos = sum(s is not None and s[0] == e for s, e in zip(sugestoes, esperadas))
+    print(f"predição de {m} descrições: vetorizada {t_vetorizado:.2f} s, uma a uma {t_um_a_um:.2f} s "
+          f"(resultados iguais: {iguais})")
+    print(f"acerto: {acertos / m:.1%} (limite pelos rótulos trocados: ~{0.9 + 0.1 / 6:.1%})")
+
+
+if __name__ == "__main__":
+    main()
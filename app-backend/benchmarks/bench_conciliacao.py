@@ -0,0 +1,126 @@
+"""
+Benchmark da conciliação das contas recorrentes (app.conciliacao.conciliar).
+
+Gera, para cada usuário, 8 contas mensais e um ano de lançamentos: o pagamento de cada
+ocorrência (5% faltando, 10% atrasados e 3% pagos em dobro, com pequenas variações de valor)
+mais 20 lançamentos avulsos por mês, de outras categorias. Mede a conciliação de todos os
+usuários de uma vez com quantidades crescentes de usuários, para mostrar o crescimento quase
+linear, e compara com o laço aninhado (cada ocorrência contra todos os lançamentos) nos
+tamanhos pequenos. Confere também se as ausências e duplicidades encontradas são as geradas.
+
+Uso (a partir de app-backend):
+    python -m benchmarks.bench_conciliacao [usuarios ...]
+"""
+
+
+import random
+import sys
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import NamedTuple
+
+from app.conciliacao import PADRAO, conciliar
+from app.dinheiro import centavos
+from app.recorrencias import ordinais
+from app.schemas import ContaRecorrenteSchema
+
+USUARIOS = (1000, 2000, 4000, 8000)
+USUARIOS_LACO = (100, 200)
+DE, ATE = date(2025, 1, 1), date(2025, 12, 31)
+REFERENCIA = date(2026, 2, 1)
+# (categoria, valor) das contas de cada usuário; algumas dividem a mesma categoria
+CONTAS = ((3, 1500), (3, 120), (3, 250), (7, 35), (7, 45), (6, 80), (8, 200), (1, 5000))
+
+
+class Registro(NamedTuple):
+    id: int
+    usuario_id: int
+    categoria_id: int
+    data: date
+    valor: Decimal
+
+
+def gerar(usuarios: int, semente: int = 42):
+    aleatorio = random.Random(semente)
+    contas, lancamentos = [], []
+    esperado = {"ausente": 0, "duplicadas": 0}
+    for usuario_id in range(1, usuarios + 1):
+        for categoria_id, valor in CONTAS:
+            conta = ContaRecorrenteSchema(
+                id=len(contas) + 1, valor=valor, descricao=None, categoria_id=categoria_id, usuario_id=usuario_id,
+                tipo="renda" if categoria_id == 1 else "despesa", data_inicio=date(2024, 1, aleatorio.randint(1, 28)),
+                frequencia="mensal",
+            )
+            contas.append(conta)
+            for ordinal in ordinais(conta, DE, ATE):
+                sorteio = aleatorio.random()
+                if sorteio < 0.05:
+                    esperado["ausente"] += 1
+                    continue
+                atraso = aleatorio.randint(5, 12) if sorteio < 0.15 else aleatorio.randint(-2, 2)
+                pago = Decimal(round(valor * aleatorio.uniform(0.98, 1.02), 2)).quantize(Decimal("0.01"))
+                for _ in range(2 if sorteio > 0.97 else 1):
+                    lancamentos.append((conta.tipo, Registro(
+                        len(lancamentos) + 1, usuario_id, categoria_id, date.fromordinal(ordinal + atraso), pago
+                    )))
+                esperado["duplicadas"] += sorteio > 0.97
+        for _ in range(240):
+            lancamentos.append(("despesa", Registro(
+                len(lancamentos) + 1, usuario_id, aleatorio.choice((4, 5)),
+                DE + timedelta(days=aleatorio.randrange(365)), Decimal(aleatorio.randint(500, 30_000)) / 100,
+            )))
+    return contas, lancamentos, esperado
+
+
+def laco_aninhado(contas, lancamentos):
+    """Conciliação ingênua: cada ocorrência percorre todos os lançamentos."""
+    usados = set()
+    conciliadas = 0
+    for conta in contas:
+        valor = centavos(conta.valor)
+        for ordinal in ordinais(conta, DE, ATE):
+            for tipo, registro in lancamentos:
+                if (
+                    registro.id not in usados
+                    and registro.usuario_id == conta.usuario_id
+                    and tipo == conta.tipo
+                    and registro.categoria_id == conta.categoria_id
+                    and -PADRAO.dias_antes <= registro.data.toordinal() - ordinal <= PADRAO.dias_depois
+                    and abs(centavos(registro.valor) - valor) <= valor * PADRAO.valor
+                ):
+                    usados.add(registro.id)
+                    conciliadas += 1
+                    break
+    return conciliadas
+
+
+def main() -> None:
+    tamanhos = [int(argumento) for argumento in sys.argv[1:]] or USUARIOS
+    print(f"{'usuários':>9} {'ocorrências':>12} {'lançamentos':>12} {'tempo (s)':>10} {'µs/ocorrência':>14} "
+          f"{'ausentes':>14} {'duplicadas':>14}")
+    for usuarios in tamanhos:
+        contas, lancamentos, esperado = gerar(usuarios)
+        inicio = time.perf_counter()
+        resultado = conciliar(contas, lancamentos, DE, ATE, REFERENCIA)
+        tempo = time.perf_counter() - inicio
+        ausentes = sum(conciliacao.status == "ausente" for conciliacao in resultado)
+        duplicadas = sum(bool(conciliacao.duplicados) for conciliacao in resultado)
+        encontradas = f"{ausentes}/{esperado['ausente']}", f"{duplicadas}/{esperado['duplicadas']}"
+        print(f"{usuarios:>9} {len(resultado):>12} {len(lancamentos):>12} {tempo:>10.2f} "
+              f"{tempo / len(resultado) * 1e6:>14.1f} {encontradas[0]:>14} {encontradas[1]:>14}")
+
+    print("\nlaço aninhado (cada ocorrência contra todos os lançamentos):")
+    for usuarios in USUARIOS_LACO:
+        contas, lancamentos, _ = gerar(usuarios)
+        inicio = time.perf_counter()
+        laco_aninhado(contas, lancamentos)
+        tempo = time.perf_counter() - inicio
+        inicio = time.perf_counter()
+        conciliar(contas, lancamentos, DE, ATE, REFERENCIA)
+        indexado = time.perf_counter() - inicio
+        print(f"{usuarios:>9} usuários: laço {tempo:.2f} s, indexado {indexado:.3f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Teste de carga concorrente: rotas ``async`` da API x rotas síncronas no estilo anterior.
+
+Duas aplicações com os mesmos dados recebem as mesmas requisições simultâneas (listagem
+de despesas e ``PATCH /metas/{id}/adicionar-valor``) por um cliente ASGI em processo. A
+síncrona reproduz as rotas antigas (``def``, no threadpool, com ``valor_atual += valor``
+sem transação); a async usa ``RepositorioAssincrono`` e ``em_transacao``, como as rotas da
+API. Ao final, confere se algum aporte se perdeu.
+
+Uso (a partir de app-backend, com o requirements-dev.txt instalado):
+    python -m benchmarks.bench_concorrencia
+"""
+
+
+import asyncio
+import time
+from datetime import date
+from typing import List, Optional, Tuple
+
+import httpx
+from fastapi import FastAPI, HTTPException, Response
+
+from app.armazenamento import RepositorioAssincrono, RepositorioMemoria
+from app.concorrencia import obter_ou_404
+from app.dinheiro import Dinheiro
+from app.schemas import DespesaSchema, MetaSchema
+from benchmarks.bench_repositorio import gerar_despesas
+
+REQUISICOES = 4_000
+CONCORRENCIA = 100
+VALOR = 1.0
+
+
+def _repositorios():
+    despesas = RepositorioMemoria(DespesaSchema, gerar_despesas(1_000), indices=("usuario_id",))
+    metas = RepositorioMemoria(MetaSchema, [
+        MetaSchema(id=1, titulo="Meta", valor_atual=0.0, valor_meta=1e9, prazo=date(2030, 1, 1), usuario_id=1)
+    ])
+    return despesas, metas
+
+
+def criar_app_sincrono() -> FastAPI:
+    app = FastAPI()
+    despesas, metas = _repositorios()
+
+    @app.get("/despesas/", response_model=List[DespesaSchema])
+    def listar(usuario_id: Optional[int] = None, limit: Optional[int] = None):
+        return despesas.consultar(None, limit, usuario_id=usuario_id)
+
+    @app.get("/metas/{meta_id}", response_model=MetaSchema)
+    def obter(meta_id: int):
+        return metas.obter(meta_id)
+
+    @app.patch("/metas/{meta_id}/adicionar-valor", response_model=MetaSchema)
+    def adicionar(meta_id: int, valor: Dinheiro):
+        meta = metas.obter(meta_id)
+        if meta is None:
+            raise HTTPException(status_code=404)
+        meta.valor_atual += valor
+        return metas.atualizar(meta_id, meta)
+
+    return app
+
+
+def criar_app_async() -> FastAPI:
+    app = FastAPI()
+    repositorios = _repositorios()
+    despesas, metas = (RepositorioAssincrono(repositorio) for repositorio in repositorios)
+
+    @app.get("/despesas/", response_model=List[DespesaSchema])
+    async def listar(usuario_id: Optional[int] = None, limit: Optional[int] = None):
+        return await despesas.consultar(None, limit, usuario_id=usuario_id)
+
+    @app.get("/metas/{meta_id}", response_model=MetaSchema)
+    async def obter(meta_id: int, response: Response):
+        return await obter_ou_404(metas, meta_id, response, "Meta não encontrada.", usuario_id=1)
+
+    @app.patch("/metas/{meta_id}/adicionar-valor", response_model=MetaSchema)
+    async def adicionar(meta_id: int, valor: Dinheiro):
+        def somar(repositorio):
+            meta = repositorio.obter(meta_id)
+            if meta is None:
+                return None
+            return repositorio.atualizar(meta_id, meta.model_copy(update={"valor_atual": meta.valor_atual + valor}))
+        meta = await metas.em_transacao(somar)
+        if meta is None:
+            raise HTTPException(status_code=404)
+        return meta
+
+    return app
+
+
+async def carga(app: FastAPI, meta_id: int) -> Tuple[float, int]:
+    transporte = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transporte, base_url="http://teste") as cliente:
+        inicial = (await cliente.get(f"/metas/{meta_id}")).json()["valor_atual"]
+        semaforo = asyncio.Semaphore(CONCORRENCIA)
+
+        async def requisicao(i: int) -> None:
+            async with semaforo:
+                if i % 2:
+                    resposta = await cliente.patch(f"/metas/{meta_id}/adicionar-valor", params={"valor": VALOR})
+                else:
+                    resposta = await cliente.get("/despesas/", params={"usuario_id": 1, "limit": 50})
+                resposta.raise_for_status()
+
+        inicio = time.perf_counter()
+        await asyncio.gather(*(requisicao(i) for i in range(REQUISICOES)))
+        duracao = time.perf_counter() - inicio
+        final = (await cliente.get(f"/metas/{meta_id}")).json()["valor_atual"]
+    esperado = inicial + VALOR * (REQUISICOES // 2)
+    return REQUISICOES / duracao, round((esperado - final) / VALOR)
+
+
+def main() -> None:
+    print(f"{REQUISICOES} requisições, {CONCORRENCIA} simultâneas")
+    print(f"{'rotas':>10} {'req/s':>9} {'aportes perdidos':>17}")
+    for nome, app in (("síncronas", criar_app_sincrono()), ("async", criar_app_async())):
+        por_segundo, perdidos = asyncio.run(carga(app, 1))
+        print(f"{nome:>10} {por_segundo:>9.0f} {perdidos:>17}")
+
+
+if __name__ == "__main__":
+    main()
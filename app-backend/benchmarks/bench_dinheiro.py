@@ -0,0 +1,70 @@
+"""
+Benchmark da agregação de valores monetários: ``float`` x centavos inteiros x ``Decimal``.
+
+Para 1M de lançamentos, mede a soma simples (``sum``) e a reconstrução dos totais mensais
+(``TotaisMensaisMemoria``, o caminho do resumo financeiro) com cada representação, e o erro
+acumulado da soma em ``float`` em relação ao total exato.
+
+Uso (a partir de app-backend):
+    python -m benchmarks.bench_dinheiro [linhas]
+"""
+
+
+import random
+import sys
+import time
+from decimal import Decimal
+
+from app.armazenamento import TotaisMensaisMemoria
+from app.dinheiro import reais
+
+LINHAS = 1_000_000
+REPETICOES = 5
+
+
+def gerar_lancamentos(n: int, semente: int = 42):
+    """Retorna as chaves (usuario_id, mês, categoria_id) e os valores em centavos."""
+    aleatorio = random.Random(semente)
+    chaves = [
+        (aleatorio.randint(1, 100), f"2025-{aleatorio.randint(1, 12):02d}", aleatorio.randint(1, 8))
+        for _ in range(n)
+    ]
+    return chaves, [aleatorio.randint(1, 500_000) for _ in range(n)]
+
+
+def medir(funcao, *argumentos) -> float:
+    inicio = time.perf_counter()
+    for _ in range(REPETICOES):
+        funcao(*argumentos)
+    return (time.perf_counter() - inicio) / REPETICOES * 1e3
+
+
+def reconstruir(chaves, valores) -> TotaisMensaisMemoria:
+    totais = TotaisMensaisMemoria()
+    totais.reconstruir_se_vazio(lambda: (
+        (usuario_id, "despesa", mes, categoria_id, valor)
+        for (usuario_id, mes, categoria_id), valor in zip(chaves, valores)
+    ))
+    return totais
+
+
+def main() -> None:
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else LINHAS
+    chaves, quantias = gerar_lancamentos(n)
+    representacoes = {
+        "float": [c / 100 for c in quantias],
+        "centavos": quantias,
+        "Decimal": [reais(c) for c in quantias],
+    }
+    exato = reais(sum(quantias))
+
+    print(f"{n} lançamentos; total exato {exato}")
+    print(f"{'representação':>14} {'sum (ms)':>10} {'totais (ms)':>12} {'erro do total':>14}")
+    for nome, valores in representacoes.items():
+        total = sum(valores)
+        erro = abs((reais(total) if nome == "centavos" else Decimal(total)) - exato)
+        print(f"{nome:>14} {medir(sum, valores):>10.1f} {medir(reconstruir, chaves, valores):>12.1f} {erro:>14.6f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Benchmark da importação em lote (app.importacao) a partir de um CSV gerado em disco.
+
+Mede linhas/s e o pico de memória alocada durante a importação, que deve ficar estável
+independentemente do tamanho do arquivo.
+
+Uso (a partir de app-backend):
+    python -m benchmarks.bench_importacao [linhas]
+"""
+
+
+import os
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+import tracemalloc
+
+from app.armazenamento import ConexoesSQLite, RepositorioMemoria, RepositorioSQLite
+from app.importacao import importar, ler_csv
+from app.schemas import DespesaSchema
+
+
+def gerar_csv(arquivo, linhas: int) -> None:
+    # Extratos bancários vêm em ordem cronológica; aqui, dez anos de movimentação
+    inicio = date(2015, 1, 1)
+    arquivo.write(b"valor,data,descricao,categoria_id\n")
+    for i in range(linhas):
+        data = inicio + timedelta(days=i * 3650 // linhas)
+        arquivo.write(f"{i % 500}.90,{data},Compra {i},{i % 8 + 1}\n".encode())
+    arquivo.seek(0)
+
+
+def main() -> None:
+    linhas = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    with tempfile.TemporaryDirectory() as diretorio, tempfile.TemporaryFile() as arquivo:
+        gerar_csv(arquivo, linhas)
+
+        repo = RepositorioMemoria(DespesaSchema, indices=("usuario_id", "categoria_id", "data"))
+        inicio = time.perf_counter()
+        resultado = importar(repo, DespesaSchema, ler_csv(arquivo), {"usuario_id": 1})
+        duracao = time.perf_counter() - inicio
+        print(f"memoria: {resultado.importadas:,} linhas, {resultado.importadas / duracao:,.0f} linhas/s")
+
+        # No SQLite as linhas gravadas não ficam em memória, então o pico medido é o da importação
+        arquivo.seek(0)
+        repo_sqlite = RepositorioSQLite(DespesaSchema, ConexoesSQLite(os.path.join(diretorio, "bench.db")), "despesas")
+        tracemalloc.start()
+        inicio = time.perf_counter()
+        resultado = importar(repo_sqlite, DespesaSchema, ler_csv(arquivo), {"usuario_id": 1})
+        duracao = time.perf_counter() - inicio
+        _, pico = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"sqlite:  {resultado.importadas:,} linhas, {resultado.importadas / duracao:,.0f} linhas/s "
+              f"(com tracemalloc), pico de memória {pico / 2**20:.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Benchmark de memória dos repositórios de lançamentos (app.armazenamento.RepositorioColunar).
+
+Mede, com ``tracemalloc``, os bytes por linha de despesas guardadas como lista de objetos
+Pydantic, no ``RepositorioMemoria`` (objetos + índices) e no ``RepositorioColunar``, além da
+latência de ``obter`` e de uma consulta por período de um usuário em cada repositório.
+
+As descrições se repetem (como em extratos reais: "Uber", "Mercado", ...), mas cada linha
+tem o seu próprio objeto ``str``, como depois de ler um JSON ou CSV.
+
+Uso (a partir de app-backend):
+    python -m benchmarks.bench_memoria [linhas]
+"""
+
+
+import gc
+import random
+import sys
+import time
+import tracemalloc
+from datetime import date, timedelta
+
+from app.armazenamento import RepositorioColunar, RepositorioMemoria
+from app.schemas import DespesaSchema
+
+TAMANHOS = (100_000, 1_000_000)
+LOTE = 50_000
+OPERACOES = 1_000
+INDICES = ("usuario_id", "categoria_id", "data")
+DESCRICOES = ("Mercado", "Uber", "Farmácia", "Padaria", "Restaurante", "Aluguel", "Internet", "Academia")
+
+
+def gerar_despesas(de: int, ate: int):
+    inicio = date(2020, 1, 1)
+    return [
+        DespesaSchema(
+            id=i,
+            valor=(i % 50_000) / 100,
+            data=inicio + timedelta(days=i % 1800),
+            descricao=f"{DESCRICOES[i % len(DESCRICOES)]} {i % 40}",
+            categoria_id=i % 8 + 1,
+            usuario_id=i % 100 + 1,
+            recorrente=i % 10 == 0,
+        )
+        for i in range(de, ate)
+    ]
+
+
+def medir_memoria(construir) -> tuple:
+    """Retorna (objeto construído, bytes alocados e ainda vivos, pico de bytes)."""
+    gc.collect()
+    tracemalloc.start()
+    objeto = construir()
+    gc.collect()
+    atual, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return objeto, atual, pico
+
+
+def preencher_colunar(n: int) -> RepositorioColunar:
+    # Em lotes, como numa importação: os objetos de cada lote são descartados em seguida
+    repo = RepositorioColunar(DespesaSchema, indices=INDICES)
+    for de in range(1, n + 1, LOTE):
+        repo.inserir_varios(gerar_despesas(de, min(de + LOTE, n + 1)))
+    return repo
+
+
+def medir_latencia(repo, n: int) -> tuple:
+    """Retorna as latências médias (us) de obter e de consultar um mês de um usuário."""
+    ids = random.sample(range(1, n + 1), OPERACOES)
+    inicio = time.perf_counter()
+    for registro_id in ids:
+        repo.obter(registro_id)
+    t_obter = (time.perf_counter() - inicio) / len(ids) * 1e6
+
+    inicio = time.perf_counter()
+    for usuario_id in range(1, 101):
+        repo.consultar(usuario_id=usuario_id, data_de=date(2022, 3, 1), data_ate=date(2022, 3, 31))
+    t_periodo = (time.perf_counter() - inicio) / 100 * 1e6
+    return t_obter, t_periodo
+
+
+def main() -> None:
+    tamanhos = [int(sys.argv[1])] if len(sys.argv) > 1 else TAMANHOS
+    print(f"{'linhas':>10} {'estrutura':>12} {'bytes/linha':>12} {'pico (MB)':>10} {'obter (us)':>11} {'período (us)':>13}")
+    for n in tamanhos:
+        lista, atual, pico = medir_memoria(lambda: gerar_despesas(1, n + 1))
+        print(f"{n:>10} {'lista':>12} {atual / n:>12.1f} {pico / 2**20:>10.1f} {'-':>11} {'-':>13}")
+        del lista
+
+        memoria, atual, pico = medir_memoria(
+            lambda: RepositorioMemoria(DespesaSchema, gerar_despesas(1, n + 1), indices=INDICES)
+        )
+        t_obter, t_periodo = medir_latencia(memoria, n)
+        print(f"{n:>10} {'memoria':>12} {atual / n:>12.1f} {pico / 2**20:>10.1f} {t_obter:>11.2f} {t_periodo:>13.1f}")
+        del memoria
+
+        colunar, atual, pico = medir_memoria(lambda: preencher_colunar(n))
+        t_obter, t_periodo = medir_latencia(colunar, n)
+        print(f"{n:>10} {'colunar':>12} {atual / n:>12.1f} {pico / 2**20:>10.1f} {t_obter:>11.2f} {t_periodo:>13.1f}")
+        del colunar
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Benchmark do custo das métricas (app.metricas) sobre o tempo das requisições.
+
+As mesmas requisições (listagem, leitura por ID e criação de despesas, e o resumo) são
+enviadas à aplicação da API por um cliente ASGI em processo, alternando rodadas com a coleta
+de métricas ligada e desligada (``metricas.ativas``), para que variações da máquina afetem as
+duas igualmente. Também mede o custo isolado de registrar uma requisição e de uma operação
+de repositório medida.
+
+Uso (a partir de app-backend, com o requirements-dev.txt instalado):
+    python -m benchmarks.bench_metricas
+"""
+
+
+import asyncio
+import time
+
+import httpx
+
+from app.main import app
+from app.metricas import metricas
+
+RODADAS = 10
+REQUISICOES = 300
+OBSERVACOES = 200_000
+
+DESPESA = {"id": 0, "valor": 10.0, "data": "2025-10-01", "descricao": "Mercado", "categoria_id": 4, "usuario_id": 1}
+
+
+async def rodada(cliente: httpx.AsyncClient) -> float:
+    inicio = time.perf_counter()
+    for i in range(REQUISICOES):
+        if i % 4 == 0:
+            resposta = await cliente.get("/despesas/", params={"usuario_id": 1, "limit": 50})
+        elif i % 4 == 1:
+            resposta = await cliente.get("/despesas/1")
+        elif i % 4 == 2:
+            resposta = await cliente.post("/despesas/", json=DESPESA)
+        else:
+            resposta = await cliente.get("/resumo/", params={"usuario_id": 1})
+        resposta.raise_for_status()
+    return (time.perf_counter() - inicio) / REQUISICOES
+
+
+async def carga() -> dict:
+    tempos = {True: [], False: []}
+    transporte = httpx.ASGITransport(app=app)
+    cabecalhos = {"X-Usuario-Id": "1"}
+    async with httpx.AsyncClient(transport=transporte, base_url="http://teste", headers=cabecalhos) as cliente:
+        await rodada(cliente)  # aquecimento
+        for i in range(RODADAS * 2):
+            metricas.ativas = i % 2 == 0
+            tempos[metricas.ativas].append(await rodada(cliente))
+    metricas.ativas = True
+    return {ativas: min(valores) for ativas, valores in tempos.items()}
+
+
+def custo_isolado() -> None:
+    inicio = time.perf_counter()
+    for _ in range(OBSERVACOES):
+        metricas.registrar_requisicao("GET", "/bench", 200, 0.001, 0, 1024)
+    por_requisicao = (time.perf_counter() - inicio) / OBSERVACOES
+
+    def operacao() -> None:
+        pass
+    medida = metricas.medir(operacao, "bench", "obter")
+    inicio = time.perf_counter()
+    for _ in range(OBSERVACOES):
+        medida()
+    por_operacao = (time.perf_counter() - inicio) / OBSERVACOES
+    print(f"registrar uma requisição: {por_requisicao * 1e6:.2f} µs; medir uma operação: {por_operacao * 1e6:.2f} µs")
+
+
+def main() -> None:
+    custo_isolado()
+    tempos = asyncio.run(carga())
+    desligadas, ligadas = tempos[False], tempos[True]
+    print(f"{REQUISICOES} requisições por rodada, melhor de {RODADAS} rodadas")
+    print(f"  sem métricas: {desligadas * 1e3:.3f} ms/requisição")
+    print(f"  com métricas: {ligadas * 1e3:.3f} ms/requisição ({(ligadas / desligadas - 1) * 100:+.1f}%)")
+
+
+if __name__ == "__main__":
+    main()
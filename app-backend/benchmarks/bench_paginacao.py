@@ -0,0 +1,36 @@
+"""
+Benchmark da consulta paginada: uma página do mês de um usuário.
+
+O custo deve ser praticamente constante com 100 ou 1M linhas, pois a consulta é resolvida
+pelo índice ``(usuario_id, data)`` e não por varredura da tabela.
+
+Uso (a partir de app-backend):
+    python -m benchmarks.bench_paginacao
+"""
+
+
+import time
+from datetime import date
+
+from app.armazenamento import RepositorioMemoria
+from app.schemas import DespesaSchema
+from benchmarks.bench_repositorio import gerar_despesas
+
+TAMANHOS = (100, 10_000, 100_000, 1_000_000)
+REPETICOES = 1_000
+
+
+def main() -> None:
+    print(f"{'linhas':>10} {'página (us)':>12}")
+    for n in TAMANHOS:
+        repo = RepositorioMemoria(DespesaSchema, gerar_despesas(n), indices=("usuario_id", "categoria_id", "data"))
+        inicio = time.perf_counter()
+        for _ in range(REPETICOES):
+            repo.consultar(
+                limite=50, usuario_id=7, data_de=date(2021, 3, 1), data_ate=date(2021, 3, 31)
+            )
+        print(f"{n:>10} {(time.perf_counter() - inicio) / REPETICOES * 1e6:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Benchmark de escritas concorrentes no SQLite, com os dados em um arquivo x divididos em partições.
+
+Vários processos (como os workers do ``uvicorn --workers N``) criam despesas de usuários
+aleatórios, uma por transação, como o ``POST /despesas``. Com um único arquivo, todas as
+escritas disputam o mesmo escritor do SQLite; com ``RepositorioParticionado``, cada partição
+tem o seu arquivo e o seu escritor, e só escritas de usuários da mesma partição se esperam.
+
+Uso (a partir de app-backend):
+    python -m benchmarks.bench_particoes [processos]
+"""
+
+
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date
+
+from app.armazenamento import ConexoesSQLite, RepositorioParticionado, RepositorioSQLite, SequenciaSQLite
+from app.schemas import DespesaSchema
+
+ESCRITAS_POR_PROCESSO = 2_000
+USUARIOS = 1_000
+PARTICOES = (1, 2, 4, 8)
+
+
+def _repositorio(diretorio: str, particoes: int):
+    principal = ConexoesSQLite(os.path.join(diretorio, "bench.db"))
+    if particoes == 1:
+        return RepositorioSQLite(DespesaSchema, principal, "despesas", indices=("usuario_id",))
+    sequencia = SequenciaSQLite(principal, "despesas")
+    partes = [
+        RepositorioSQLite(
+            DespesaSchema,
+            ConexoesSQLite(os.path.join(diretorio, f"bench.p{indice}.db")),
+            "despesas",
+            indices=("usuario_id",),
+            sequencia=sequencia,
+        )
+        for indice in range(particoes)
+    ]
+    return RepositorioParticionado(DespesaSchema, partes)
+
+
+def _escrever(diretorio: str, particoes: int, semente: int, inicio) -> None:
+    repositorio = _repositorio(diretorio, particoes)
+    aleatorio = random.Random(semente)
+    inicio.wait()
+    for i in range(ESCRITAS_POR_PROCESSO):
+        repositorio.criar(DespesaSchema(
+            id=0,
+            valor=float(i % 500),
+            data=date(2025, 1, 1 + i % 28),
+            descricao=f"Despesa {i}",
+            categoria_id=i % 8 + 1,
+            usuario_id=aleatorio.randrange(1, USUARIOS + 1),
+        ))
+
+
+def medir(processos: int, particoes: int) -> float:
+    """Retorna as escritas por segundo de ``processos`` processos simultâneos."""
+    with tempfile.TemporaryDirectory() as diretorio:
+        # Cria as tabelas antes, para que os processos não disputem o esquema
+        _repositorio(diretorio, particoes)
+        inicio = multiprocessing.Barrier(processos + 1)
+        trabalhadores = [
+            multiprocessing.Process(target=_escrever, args=(diretorio, particoes, semente, inicio))
+            for semente in range(processos)
+        ]
+        for trabalhador in trabalhadores:
+            trabalhador.start()
+        inicio.wait()
+        comeco = time.perf_counter()
+        for trabalhador in trabalhadores:
+            trabalhador.join()
+        duracao = time.perf_counter() - comeco
+        total = len(_repositorio(diretorio, particoes))
+    assert total == processos * ESCRITAS_POR_PROCESSO, total
+    return total / duracao
+
+
+def main() -> None:
+    processos = int(sys.argv[1]) if len(sys.argv) > 1 else os.cpu_count() or 4
+    print(f"{processos} processos x {ESCRITAS_POR_PROCESSO} escritas, {USUARIOS} usuários")
+    base = None
+    for particoes in PARTICOES:
+        vazao = medir(processos, particoes)
+        base = base or vazao
+        print(f"  {particoes} partição(ões): {vazao:9.0f} escritas/s ({vazao / base:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Benchmark do cálculo da projeção de saldo: matrizes NumPy x laço em Python por dia.
+
+Gera fluxos sintéticos (lançamentos espalhados em 365 dias) para lotes de usuários e compara
+``calcular_saldos`` com o cálculo linha a linha, usuário a usuário.
+
+Uso (a partir de app-backend):
+    python -m benchmarks.bench_projecao
+"""
+
+
+import time
+
+import numpy as np
+
+from app.projecao import Fluxos, calcular_saldos
+
+DIAS = 365
+LANCAMENTOS_POR_USUARIO = 200
+USUARIOS = (1, 100, 1_000, 10_000)
+
+
+def gerar_fluxos(usuarios: int, semente: int = 42):
+    gerador = np.random.default_rng(semente)
+    n = usuarios * LANCAMENTOS_POR_USUARIO // 2
+    linhas = np.repeat(np.arange(usuarios), LANCAMENTOS_POR_USUARIO // 2) * DIAS
+    # Valores em centavos, como na API
+    return gerador.integers(-100_000, 500_000, usuarios), Fluxos(
+        linhas + gerador.integers(0, DIAS, n), gerador.integers(1_000, 300_000, n),
+        linhas + gerador.integers(0, DIAS, n), gerador.integers(1_000, 300_000, n),
+    )
+
+
+def saldos_em_python(saldo_inicial, fluxos: Fluxos):
+    usuarios = len(saldo_inicial)
+    movimentos = [[0] * DIAS for _ in range(usuarios)]
+    for posicoes, valores, sinal in (
+        (fluxos.entradas_posicao, fluxos.entradas_valor, 1),
+        (fluxos.saidas_posicao, fluxos.saidas_valor, -1),
+    ):
+        for posicao, valor in zip(posicoes.tolist(), valores.tolist()):
+            usuario, dia = divmod(posicao, DIAS)
+            movimentos[usuario][dia] += sinal * valor
+    saldos = []
+    for usuario in range(usuarios):
+        saldo = saldo_inicial[usuario]
+        linha = []
+        for movimento in movimentos[usuario]:
+            saldo += movimento
+            linha.append(saldo)
+        saldos.append(linha)
+    return saldos
+
+
+def medir(funcao, *argumentos) -> float:
+    repeticoes = 3
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        funcao(*argumentos)
+    return (time.perf_counter() - inicio) / repeticoes * 1e3
+
+
+def main() -> None:
+    print(f"{'usuários':>9} {'python (ms)':>12} {'numpy (ms)':>11}")
+    for usuarios in USUARIOS:
+        saldo_inicial, fluxos = gerar_fluxos(usuarios)
+        esperado = np.array(saldos_em_python(saldo_inicial.tolist(), fluxos))
+        assert np.array_equal(calcular_saldos(saldo_inicial, fluxos, DIAS)[2], esperado)
+        print(f"{usuarios:>9} {medir(saldos_em_python, saldo_inicial.tolist(), fluxos):>12.2f} "
+              f"{medir(calcular_saldos, saldo_inicial, fluxos, DIAS):>11.2f}")
+
+
+if __name__ == "__main__":
+    main()
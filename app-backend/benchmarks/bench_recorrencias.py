@@ -0,0 +1,74 @@
+"""
+Benchmark da expansão de contas recorrentes em ocorrências.
+
+Gera 10 mil contas (frequências mistas) e mede o tempo de materializar todas as
+ocorrências de uma janela de 5 anos (baldes por dia, comparados com o heap e com uma
+ordenação), o de ler só as primeiras 100 pelo heap e o de uma janela já em cache.
+
+Uso (a partir de app-backend):
+    python -m benchmarks.bench_recorrencias
+"""
+
+
+import random
+import time
+from datetime import date, timedelta
+from itertools import islice
+
+from app.recorrencias import CacheOcorrencias, expandir, ocorrencias, ordinais
+from app.schemas import ContaRecorrenteSchema
+
+CONTAS = 10_000
+DE = date(2025, 1, 1)
+ATE = date(2029, 12, 31)
+FREQUENCIAS = ("mensal",) * 6 + ("anual", "semanal", "trimestral", "quinzenal")
+
+
+def gerar_contas(n: int, semente: int = 42):
+    aleatorio = random.Random(semente)
+    return [
+        ContaRecorrenteSchema(
+            id=i,
+            valor=round(aleatorio.uniform(10, 3000), 2),
+            categoria_id=aleatorio.randint(1, 8),
+            usuario_id=aleatorio.randint(1, 100),
+            tipo=aleatorio.choice(("renda", "despesa")),
+            data_inicio=date(2020, 1, 1) + timedelta(days=aleatorio.randrange(3650)),
+            frequencia=aleatorio.choice(FREQUENCIAS),
+        )
+        for i in range(1, n + 1)
+    ]
+
+
+def ordenar(contas):
+    """Referência: todas as ocorrências, ordenadas por (data, ID da conta)."""
+    return sorted(
+        (date.fromordinal(ordinal), conta.id, conta) for conta in contas for ordinal in ordinais(conta, DE, ATE)
+    )
+
+
+def medir(funcao, repeticoes: int = 5) -> float:
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        funcao()
+    return (time.perf_counter() - inicio) / repeticoes * 1e3
+
+
+def main() -> None:
+    contas = gerar_contas(CONTAS)
+    total = len(expandir(contas, DE, ATE))
+    referencia = [o[:2] for o in ordenar(contas)]
+    assert [o[:2] for o in expandir(contas, DE, ATE)] == referencia
+    assert [o[:2] for o in ocorrencias(contas, DE, ATE)] == referencia
+    cache = CacheOcorrencias()
+    cache.obter(None, DE, ATE, lambda: expandir(contas, DE, ATE))
+    print(f"{CONTAS} contas, {total} ocorrências entre {DE} e {ATE}")
+    print(f"  expansão (baldes):       {medir(lambda: expandir(contas, DE, ATE)):8.1f} ms")
+    print(f"  intercalação (heap):     {medir(lambda: list(ocorrencias(contas, DE, ATE)), 1):8.1f} ms")
+    print(f"  ordenação (sorted):      {medir(lambda: ordenar(contas), 1):8.1f} ms")
+    print(f"  primeiras 100 (heap):    {medir(lambda: list(islice(ocorrencias(contas, DE, ATE), 100))):8.1f} ms")
+    print(f"  janela em cache:         {medir(lambda: cache.obter(None, DE, ATE, list), 1000):8.4f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Benchmark do repositório indexado em memória (app.armazenamento.RepositorioMemoria).
+
+Mede a latência média de obter/atualizar/remover por ID para tabelas de 10 a 1M linhas,
+comparando com a varredura linear das antigas listas ``_xxx_db``.
+
+Uso (a partir de app-backend):
+    python -m benchmarks.bench_repositorio
+"""
+
+
+import random
+import time
+from datetime import date, timedelta
+
+from app.armazenamento import RepositorioMemoria
+from app.schemas import DespesaSchema
+
+TAMANHOS = (10, 1_000, 100_000, 1_000_000)
+OPERACOES = 1_000
+
+
+def gerar_despesas(n: int):
+    inicio = date(2020, 1, 1)
+    return [
+        DespesaSchema(
+            id=i,
+            valor=float(i % 500),
+            data=inicio + timedelta(days=i % 1800),
+            descricao=f"Despesa {i}",
+            categoria_id=i % 8 + 1,
+            usuario_id=i % 100 + 1,
+        )
+        for i in range(1, n + 1)
+    ]
+
+
+def medir(funcao, ids) -> float:
+    """Retorna a latência média, em microssegundos, de ``funcao`` sobre os IDs."""
+    inicio = time.perf_counter()
+    for registro_id in ids:
+        funcao(registro_id)
+    return (time.perf_counter() - inicio) / len(ids) * 1e6
+
+
+def main() -> None:
+    print(f"{'linhas':>10} {'obter (us)':>12} {'atualizar (us)':>15} {'remover (us)':>13} {'lista (us)':>12}")
+    for n in TAMANHOS:
+        despesas = gerar_despesas(n)
+        repo = RepositorioMemoria(DespesaSchema, despesas, indices=("usuario_id", "categoria_id", "data"))
+        ids = random.sample(range(1, n + 1), min(OPERACOES, n))
+
+        t_obter = medir(repo.obter, ids)
+        t_atualizar = medir(lambda i: repo.atualizar(i, repo.obter(i).model_copy()), ids)
+        t_remover = medir(repo.remover, ids)
+
+        # Varredura linear equivalente às rotas antigas (amostra menor para não demorar)
+        amostra = ids[:20]
+        t_lista = medir(lambda i: next(d for d in despesas if d.id == i), amostra)
+
+        print(f"{n:>10} {t_obter:>12.2f} {t_atualizar:>15.2f} {t_remover:>13.2f} {t_lista:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Benchmark do resumo financeiro: totais mensais incrementais x recálculo ingênuo.
+
+Gera despesas para 100 usuários, mantém os totais mensais com o mesmo observador usado pela
+API e compara o tempo de montar o resumo de um usuário a partir dos totais com o de
+percorrer todas as despesas dele.
+
+Uso (a partir de app-backend):
+    python -m benchmarks.bench_resumo
+"""
+
+
+import time
+from collections import defaultdict
+
+from app.armazenamento import RepositorioMemoria, TotaisMensaisMemoria
+from app.dinheiro import centavos
+from app.schemas import DespesaSchema
+from benchmarks.bench_repositorio import gerar_despesas
+
+TAMANHOS = (10_000, 100_000, 1_000_000)
+REPETICOES = 20
+
+
+def mes(data) -> str:
+    return f"{data.year:04d}-{data.month:02d}"
+
+
+def resumo_ingenuo(repo: RepositorioMemoria, usuario_id: int) -> dict:
+    totais = defaultdict(int)
+    for despesa in repo.buscar(usuario_id=usuario_id):
+        totais[(mes(despesa.data), despesa.categoria_id)] += centavos(despesa.valor)
+    return totais
+
+
+def resumo_incremental(totais_mensais: TotaisMensaisMemoria, usuario_id: int) -> dict:
+    totais = defaultdict(int)
+    for total in totais_mensais.consultar(usuario_id):
+        totais[(total.mes, total.categoria_id)] += total.total
+    return totais
+
+
+def medir(funcao, *argumentos) -> float:
+    inicio = time.perf_counter()
+    for _ in range(REPETICOES):
+        funcao(*argumentos)
+    return (time.perf_counter() - inicio) / REPETICOES * 1e3
+
+
+def main() -> None:
+    print(f"{'linhas':>10} {'ingênuo (ms)':>14} {'incremental (ms)':>17}")
+    for n in TAMANHOS:
+        repo = RepositorioMemoria(DespesaSchema, indices=("usuario_id",))
+        totais = TotaisMensaisMemoria()
+        repo.observar(lambda antigo, novo: totais.somar(
+            novo.usuario_id, "despesa", mes(novo.data), novo.categoria_id, centavos(novo.valor), 1
+        ))
+        repo.inserir_varios(gerar_despesas(n))
+        assert resumo_ingenuo(repo, 7) == resumo_incremental(totais, 7)
+        print(f"{n:>10} {medir(resumo_ingenuo, repo, 7):>14.3f} {medir(resumo_incremental, totais, 7):>17.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Microbenchmark da serialização das listagens: ``response_model`` x resposta rápida.
+
+Monta uma aplicação com a mesma listagem de despesas servida de três formas e mede o custo
+por linha de uma requisição completa (via cliente ASGI em processo):
+
+- ``response_model``: a rota devolve os modelos e o FastAPI os revalida e serializa;
+- ``orjson``: ``model_dump`` de cada registro seguido de ``orjson.dumps``;
+- ``rápida``: ``Paginacao.responder_json`` (pydantic-core, sem revalidação), usada com ``rapido=true``.
+
+Uso (a partir de app-backend, com o requirements-dev.txt instalado):
+    python -m benchmarks.bench_serializacao
+"""
+
+
+import asyncio
+import time
+from typing import List
+
+import httpx
+import orjson
+from fastapi import Depends, FastAPI, Response
+
+from app.paginacao import Paginacao
+from app.schemas import DespesaSchema
+from benchmarks.bench_repositorio import gerar_despesas
+
+TAMANHOS = (1_000, 100_000)
+
+
+def criar_app(despesas: List[DespesaSchema]) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/response_model", response_model=List[DespesaSchema])
+    async def com_response_model():
+        return despesas
+
+    @app.get("/orjson", response_model=List[DespesaSchema])
+    async def com_orjson():
+        return Response(orjson.dumps([d.model_dump() for d in despesas], default=float), media_type="application/json")
+
+    @app.get("/rapida", response_model=List[DespesaSchema])
+    async def rapida(pagina: Paginacao = Depends()):
+        return pagina.responder_json(despesas, DespesaSchema)
+
+    return app
+
+
+async def medir(cliente: httpx.AsyncClient, rota: str, linhas: int) -> float:
+    repeticoes = max(1, 20_000 // linhas)
+    corpo = (await cliente.get(rota)).content
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        assert (await cliente.get(rota)).content == corpo
+    return (time.perf_counter() - inicio) / repeticoes / linhas * 1e6
+
+
+async def executar() -> None:
+    print(f"{'linhas':>8} {'response_model (µs/linha)':>26} {'orjson':>8} {'rápida':>8}")
+    for linhas in TAMANHOS:
+        app = criar_app(gerar_despesas(linhas))
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://teste") as cliente:
+            tempos = [await medir(cliente, rota, linhas) for rota in ("/response_model", "/orjson", "/rapida")]
+        print(f"{linhas:>8} {tempos[0]:>26.2f} {tempos[1]:>8.2f} {tempos[2]:>8.2f}")
+
+
+def main() -> None:
+    asyncio.run(executar())
+
+
+if __name__ == "__main__":
+    main()
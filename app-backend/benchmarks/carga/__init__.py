@@ -0,0 +1,19 @@
+"""
+Teste de carga reproduzível da API DuckBills.
+
+Gera uma base sintética (usuários, categorias, despesas, rendas, metas, orçamentos e contas
+recorrentes) na escala pedida, de mil a dez milhões de linhas, e percorre as rotas da
+aplicação de ``app.main`` por um cliente ASGI em processo, cenário por cenário (listagens,
+criações, atualizações, exclusões e resumos). Para cada cenário, mede a vazão, os percentis de
+latência e o pico de memória alocada; o resultado pode ser salvo em JSON e comparado com o de
+uma execução anterior, apontando regressões.
+
+Uso (a partir de app-backend, com o requirements-dev.txt instalado):
+    python -m benchmarks.carga --linhas 100000 --saida atual.json --comparar base.json
+    python -m benchmarks.carga.resultados base.json atual.json
+
+Módulos:
+- ``dados``: geração determinística da base sintética;
+- ``cenarios``: cenários e execução das requisições;
+- ``resultados``: gravação, leitura e comparação dos resultados.
+"""
@@ -0,0 +1,124 @@
+"""
+Executa o teste de carga: ``python -m benchmarks.carga --help`` (a partir de app-backend).
+"""
+
+
+import argparse
+import asyncio
+import os
+import resource
+import sys
+import tempfile
+import time
+from typing import List
+
+from benchmarks.carga.cenarios import CENARIOS, GRUPOS, Cenario, Estado, executar
+from benchmarks.carga.dados import Escala, popular
+from benchmarks.carga.resultados import (
+    TOLERANCIA_PADRAO,
+    carregar,
+    imprimir_cabecalho,
+    imprimir_cenario,
+    imprimir_comparacao,
+    montar,
+    salvar,
+)
+
+
+def _argumentos() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.carga", description=__doc__)
+    parser.add_argument("--linhas", type=int, default=10_000, help="linhas da base sintética (1k a 10M)")
+    parser.add_argument("--usuarios", type=int, default=0, help="usuários (padrão: um a cada 200 linhas)")
+    parser.add_argument("--backend", choices=("memoria", "colunar", "sqlite"), default="memoria")
+    parser.add_argument("--particoes", type=int, default=1, help="DUCKBILLS_PARTICOES")
+    parser.add_argument("--requisicoes", type=int, default=200, help="requisições por cenário")
+    parser.add_argument("--concorrencia", type=int, default=8, help="requisições simultâneas")
+    parser.add_argument(
+        "--amostras-memoria", type=int, default=50, help="requisições da rodada que mede o pico de memória (0: não mede)"
+    )
+    parser.add_argument("--cenarios", default="", help=f"nomes ou grupos ({', '.join(GRUPOS)}), separados por vírgula")
+    parser.add_argument("--semente", type=int, default=42)
+    parser.add_argument("--saida", help="arquivo JSON com os resultados")
+    parser.add_argument("--comparar", help="resultado anterior (JSON) a comparar; termina com status 1 se houver regressões")
+    parser.add_argument("--tolerancia", type=float, default=TOLERANCIA_PADRAO, help="piora tolerada (fração)")
+    return parser.parse_args()
+
+
+def _selecionar(filtro: str) -> List[Cenario]:
+    if not filtro:
+        return list(CENARIOS)
+    pedidos = {nome.strip() for nome in filtro.split(",") if nome.strip()}
+    nomes = {cenario.nome for cenario in CENARIOS if cenario.nome in pedidos or cenario.grupo in pedidos}
+    # Atualizações e exclusões usam os registros criados pelo cenário de criação da entidade
+    for cenario in CENARIOS:
+        if cenario.nome in nomes and cenario.grupo in ("atualizar", "excluir"):
+            nomes.add(f"{cenario.nome.split('_')[0]}_criar")
+    desconhecidos = pedidos - {cenario.nome for cenario in CENARIOS} - set(GRUPOS)
+    if desconhecidos:
+        sys.exit(f"cenários desconhecidos: {', '.join(sorted(desconhecidos))}")
+    return [cenario for cenario in CENARIOS if cenario.nome in nomes]
+
+
+async def _executar_todos(cenarios: List[Cenario], estado: Estado, argumentos: argparse.Namespace):
+    import httpx
+
+    from app.main import app
+
+    resultados = []
+    transporte = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transporte, base_url="http://carga") as cliente:
+        imprimir_cabecalho()
+        for cenario in cenarios:
+            resultado = await executar(
+                cliente, cenario, estado, argumentos.requisicoes, argumentos.concorrencia, argumentos.amostras_memoria
+            )
+            resultados.append(resultado)
+            imprimir_cenario(resultado)
+    return resultados
+
+
+def main() -> None:
+    argumentos = _argumentos()
+    cenarios = _selecionar(argumentos.cenarios)
+    escala = Escala.para(argumentos.linhas, argumentos.usuarios)
+    with tempfile.TemporaryDirectory() as diretorio:
+        # A configuração é lida quando a aplicação é importada, então vem antes do import
+        os.environ["DUCKBILLS_ARMAZENAMENTO"] = argumentos.backend
+        os.environ["DUCKBILLS_PARTICOES"] = str(argumentos.particoes)
+        os.environ["DUCKBILLS_SQLITE_PATH"] = os.path.join(diretorio, "carga.db")
+        os.environ["DUCKBILLS_AGENDADOR"] = "0"
+        import app.main  # noqa: F401
+
+        linhas = ", ".join(f"{quantidade} {nome}" for nome, quantidade in escala.linhas.items())
+        print(f"base ({argumentos.backend}): {escala.usuarios} usuários, {linhas}")
+        inicio = time.perf_counter()
+        base = popular(escala, argumentos.semente)
+        carga_segundos = time.perf_counter() - inicio
+        print(f"base gravada em {carga_segundos:.1f} s")
+
+        estado = Estado(base, argumentos.semente)
+        print(f"{argumentos.requisicoes} requisições por cenário, {argumentos.concorrencia} simultâneas")
+        resultados = asyncio.run(_executar_todos(cenarios, estado, argumentos))
+
+    parametros = {
+        "linhas": argumentos.linhas,
+        "usuarios": escala.usuarios,
+        "backend": argumentos.backend,
+        "particoes": argumentos.particoes,
+        "requisicoes": argumentos.requisicoes,
+        "concorrencia": argumentos.concorrencia,
+        "amostras_memoria": argumentos.amostras_memoria,
+        "semente": argumentos.semente,
+    }
+    resultado = montar(parametros, carga_segundos, resultados)
+    # ru_maxrss vem em KiB no Linux
+    resultado["pico_rss_bytes"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    if argumentos.saida:
+        salvar(resultado, argumentos.saida)
+        print(f"resultados salvos em {argumentos.saida}")
+    if argumentos.comparar and imprimir_comparacao(carregar(argumentos.comparar), resultado, argumentos.tolerancia):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,330 @@
+"""
+Cenários do teste de carga e a sua execução contra a aplicação, por um cliente ASGI em processo.
+
+Cada cenário monta a ``i``-ésima requisição (método, caminho e opções do ``httpx``) a partir do
+estado da execução. Os cenários rodam na ordem de ``CENARIOS``: as criações guardam os
+registros criados, que as atualizações alteram e as exclusões removem, então a base volta ao
+tamanho inicial ao fim de cada entidade. Os usuários e IDs das requisições vêm de um
+``random.Random`` com semente fixa, e cada requisição é feita como o usuário dos dados que
+ela lê ou escreve (cabeçalho ``X-Usuario-Id``).
+"""
+
+
+import asyncio
+import math
+import random
+import time
+import tracemalloc
+from datetime import timedelta
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+import httpx
+
+from benchmarks.carga.dados import DESCRICOES_DESPESA, REFERENCIA, Base
+
+GRUPOS = ("listar", "criar", "atualizar", "excluir", "resumir")
+# Linhas do extrato enviado em cada requisição do cenário de importação
+LINHAS_IMPORTACAO = 100
+OPERACOES_LOTE = 10
+
+Requisicao = Tuple[str, str, Dict[str, Any]]
+
+
+class Estado:
+    """Estado compartilhado pelos cenários de uma execução."""
+
+    def __init__(self, base: Base, semente: int):
+        self.base = base
+        self.aleatorio = random.Random(semente)
+        # Registros criados pelos cenários de criação, por entidade (JSON da resposta)
+        self.criados: Dict[str, List[dict]] = {}
+
+    def usuario(self) -> int:
+        return self.aleatorio.randrange(1, self.base.escala.usuarios + 1)
+
+    def existente(self, entidade: str) -> Tuple[int, int]:
+        """Retorna (ID, usuario_id) de um registro da base."""
+        return self.aleatorio.choice(self.base.amostras[entidade])
+
+    def criado(self, entidade: str, i: int) -> dict:
+        registros = self.criados[entidade]
+        return registros[i % len(registros)]
+
+
+class Cenario(NamedTuple):
+    nome: str
+    grupo: str
+    requisicao: Callable[[Estado, int], Requisicao]
+    # Chamado com cada resposta de sucesso (por exemplo, para guardar o registro criado)
+    ao_responder: Optional[Callable[[Estado, httpx.Response], None]] = None
+
+
+class ResultadoCenario(NamedTuple):
+    nome: str
+    grupo: str
+    requisicoes: int
+    erros: int
+    duracao: float  # segundos
+    vazao: float  # requisições por segundo
+    latencia_ms: Dict[str, float]  # media, p50, p95, p99 e max
+    pico_memoria_bytes: Optional[int]
+
+
+def percentil(ordenadas: List[float], fracao: float) -> float:
+    """Percentil pelo método do posto mais próximo (sem interpolação)."""
+    return ordenadas[max(0, math.ceil(fracao * len(ordenadas)) - 1)]
+
+
+def _guardar(entidade: str) -> Callable[[Estado, httpx.Response], None]:
+    def guardar(estado: Estado, resposta: httpx.Response) -> None:
+        estado.criados.setdefault(entidade, []).append(resposta.json())
+    return guardar
+
+
+def _como(usuario_id: int) -> Dict[str, str]:
+    return {"X-Usuario-Id": str(usuario_id)}
+
+
+def _periodo(estado: Estado) -> Tuple[str, str]:
+    inicio = REFERENCIA - timedelta(days=estado.aleatorio.randrange(30, 700))
+    return str(inicio), str(inicio + timedelta(days=30))
+
+
+def _despesa(estado: Estado, i: int, usuario_id: Optional[int] = None) -> dict:
+    return {
+        "id": 0,
+        "valor": round(estado.aleatorio.uniform(5, 800), 2),
+        "data": str(REFERENCIA - timedelta(days=i % 365)),
+        "descricao": f"{estado.aleatorio.choice(DESCRICOES_DESPESA)} carga",
+        "categoria_id": estado.aleatorio.choice(estado.base.categorias_despesa),
+        "usuario_id": usuario_id or estado.usuario(),
+    }
+
+
+def _renda(estado: Estado, i: int) -> dict:
+    return {
+        "id": 0,
+        "valor": round(estado.aleatorio.uniform(100, 12_000), 2),
+        "data": str(REFERENCIA - timedelta(days=i % 365)),
+        "descricao": "Salário carga",
+        "categoria_id": estado.aleatorio.choice(estado.base.categorias_renda),
+        "usuario_id": estado.usuario(),
+    }
+
+
+def _meta(estado: Estado, i: int) -> dict:
+    return {
+        "id": 0,
+        "titulo": f"Meta carga {i}",
+        "valor_atual": 0,
+        "valor_meta": 10_000,
+        "prazo": str(REFERENCIA + timedelta(days=365)),
+        "usuario_id": estado.usuario(),
+    }
+
+
+def _orcamento(estado: Estado, i: int) -> dict:
+    return {
+        "id": 0,
+        "categoria_id": estado.aleatorio.choice(estado.base.categorias_despesa),
+        "usuario_id": estado.usuario(),
+        "valor_limite": 1000,
+        "periodo": "mensal",
+    }
+
+
+def _conta(estado: Estado, i: int) -> dict:
+    return {
+        "id": 0,
+        "valor": 99.9,
+        "descricao": "Assinatura carga",
+        "categoria_id": estado.aleatorio.choice(estado.base.categorias_despesa),
+        "usuario_id": estado.usuario(),
+        "tipo": "despesa",
+        "data_inicio": str(REFERENCIA - timedelta(days=i % 365)),
+        "frequencia": "mensal",
+    }
+
+
+def _extrato(estado: Estado, i: int) -> Dict[str, Any]:
+    linhas = ["valor,data,descricao"]
+    for j in range(LINHAS_IMPORTACAO):
+        linhas.append(f"{j % 500}.90,{REFERENCIA - timedelta(days=j % 365)},Compra {i}-{j}")
+    return {
+        "params": {"categoria_id": estado.base.categorias_despesa[0]},
+        "headers": _como(estado.usuario()),
+        "files": {"arquivo": ("extrato.csv", "\n".join(linhas).encode(), "text/csv")},
+    }
+
+
+def _lote(estado: Estado, i: int) -> Dict[str, Any]:
+    usuario_id = estado.usuario()
+    operacoes = [
+        {"operacao": "criar", "entidade": "despesas", "dados": _despesa(estado, i, usuario_id)}
+        for _ in range(OPERACOES_LOTE)
+    ]
+    return {"json": {"operacoes": operacoes}, "headers": _como(usuario_id)}
+
+
+def _criacao(rota: str, entidade: str, corpo: Callable[[Estado, int], dict]) -> Tuple[Callable, Callable]:
+    def requisicao(estado: Estado, i: int) -> Requisicao:
+        registro = corpo(estado, i)
+        return "POST", rota, {"json": registro, "headers": _como(registro["usuario_id"])}
+    return requisicao, _guardar(entidade)
+
+
+def _atualizacao(rota: str, entidade: str, campo: str, valor: Callable[[Estado], Any]) -> Callable:
+    def requisicao(estado: Estado, i: int) -> Requisicao:
+        registro = estado.criado(entidade, i)
+        opcoes = {"json": {**registro, campo: valor(estado)}, "headers": _como(registro["usuario_id"])}
+        return "PUT", f"{rota}{registro['id']}", opcoes
+    return requisicao
+
+
+def _exclusao(rota: str, entidade: str) -> Callable:
+    def requisicao(estado: Estado, i: int) -> Requisicao:
+        registro = estado.criados[entidade].pop()
+        return "DELETE", f"{rota}{registro['id']}", {"headers": _como(registro["usuario_id"])}
+    return requisicao
+
+
+def _listagem(rota: str, **filtros: Any) -> Callable:
+    return lambda estado, i: ("GET", rota, {"params": {"limit": 50, **filtros}, "headers": _como(estado.usuario())})
+
+
+def _leitura(rota: str, entidade: str) -> Callable:
+    def requisicao(estado: Estado, i: int) -> Requisicao:
+        registro_id, usuario_id = estado.existente(entidade)
+        return "GET", f"{rota}{registro_id}", {"headers": _como(usuario_id)}
+    return requisicao
+
+
+def _por_usuario(rota: str, parametros: Callable[[Estado], Dict[str, Any]] = lambda estado: {}) -> Callable:
+    return lambda estado, i: ("GET", rota, {"params": parametros(estado), "headers": _como(estado.usuario())})
+
+
+CENARIOS: List[Cenario] = [
+    Cenario("categorias_listar", "listar", lambda estado, i: ("GET", "/categorias/", {})),
+    Cenario("despesas_listar", "listar", _listagem("/despesas/")),
+    Cenario("despesas_listar_periodo", "listar", lambda estado, i: ("GET", "/despesas/", {
+        "params": dict(zip(("data_de", "data_ate"), _periodo(estado))), "headers": _como(estado.usuario()),
+    })),
+    Cenario("despesas_obter", "listar", _leitura("/despesas/", "despesas")),
+    Cenario("despesas_exportar", "listar", _por_usuario("/despesas/export")),
+    Cenario("rendas_listar", "listar", _listagem("/rendas/")),
+    Cenario("rendas_obter", "listar", _leitura("/rendas/", "rendas")),
+    Cenario("metas_listar", "listar", _listagem("/metas/")),
+    Cenario("metas_obter", "listar", _leitura("/metas/", "metas")),
+    Cenario("orcamentos_listar", "listar", _listagem("/orcamentos/")),
+    Cenario("orcamentos_obter", "listar", _leitura("/orcamentos/", "orcamentos")),
+    Cenario("contas_recorrentes_listar", "listar", _listagem("/contas-recorrentes/")),
+    Cenario("despesas_criar", "criar", *_criacao("/despesas/", "despesas", _despesa)),
+    Cenario("rendas_criar", "criar", *_criacao("/rendas/", "rendas", _renda)),
+    Cenario("metas_criar", "criar", *_criacao("/metas/", "metas", _meta)),
+    Cenario("orcamentos_criar", "criar", *_criacao("/orcamentos/", "orcamentos", _orcamento)),
+    Cenario("contas_recorrentes_criar", "criar", *_criacao("/contas-recorrentes/", "contas_recorrentes", _conta)),
+    Cenario("despesas_importar", "criar", lambda estado, i: ("POST", "/despesas/bulk", _extrato(estado, i))),
+    Cenario("lote_criar", "criar", lambda estado, i: ("POST", "/batch", _lote(estado, i))),
+    Cenario("despesas_atualizar", "atualizar", _atualizacao(
+        "/despesas/", "despesas", "valor", lambda estado: round(estado.aleatorio.uniform(5, 800), 2)
+    )),
+    Cenario("rendas_atualizar", "atualizar", _atualizacao(
+        "/rendas/", "rendas", "valor", lambda estado: round(estado.aleatorio.uniform(100, 12_000), 2)
+    )),
+    Cenario("metas_atualizar", "atualizar", _atualizacao(
+        "/metas/", "metas", "valor_meta", lambda estado: estado.aleatorio.randrange(5_000, 20_000)
+    )),
+    Cenario("metas_adicionar_valor", "atualizar", lambda estado, i: (
+        "PATCH",
+        f"/metas/{estado.criado('metas', i)['id']}/adicionar-valor",
+        {"params": {"valor": 10}, "headers": _como(estado.criado("metas", i)["usuario_id"])},
+    )),
+    Cenario("orcamentos_atualizar", "atualizar", _atualizacao(
+        "/orcamentos/", "orcamentos", "valor_limite", lambda estado: estado.aleatorio.randrange(500, 5_000)
+    )),
+    Cenario("despesas_excluir", "excluir", _exclusao("/despesas/", "despesas")),
+    Cenario("rendas_excluir", "excluir", _exclusao("/rendas/", "rendas")),
+    Cenario("metas_excluir", "excluir", _exclusao("/metas/", "metas")),
+    Cenario("orcamentos_excluir", "excluir", _exclusao("/orcamentos/", "orcamentos")),
+    Cenario("resumo", "resumir", _por_usuario("/resumo/")),
+    Cenario("projecao", "resumir", _por_usuario("/projecao/", lambda estado: {"inicio": str(REFERENCIA)})),
+    Cenario("orcamentos_status", "resumir", _por_usuario("/orcamentos/status", lambda estado: {"data": str(REFERENCIA)})),
+    Cenario("metas_progresso", "resumir", _por_usuario("/metas/progresso", lambda estado: {"data": str(REFERENCIA)})),
+    Cenario("contas_ocorrencias", "resumir", _por_usuario(
+        "/contas-recorrentes/ocorrencias", lambda estado: dict(zip(("de", "ate"), _periodo(estado)))
+    )),
+    Cenario("conciliacao", "resumir", _por_usuario(
+        "/conciliacao/", lambda estado: {**dict(zip(("de", "ate"), _periodo(estado))), "referencia": str(REFERENCIA)}
+    )),
+    Cenario("busca", "resumir", _por_usuario(
+        "/busca/", lambda estado: {"q": estado.aleatorio.choice(DESCRICOES_DESPESA)[:5].lower()}
+    )),
+    Cenario("categorias_sugestoes", "resumir", lambda estado, i: ("POST", "/categorias/sugestoes", {"json": {
+        "tipo": "despesa", "descricoes": [f"{estado.aleatorio.choice(DESCRICOES_DESPESA)} {j}" for j in range(20)],
+    }})),
+]
+
+
+async def _disparar(
+    cliente: httpx.AsyncClient, cenario: Cenario, estado: Estado, requisicoes: int, concorrencia: int
+) -> Tuple[List[float], int]:
+    latencias: List[float] = []
+    erros = 0
+    semaforo = asyncio.Semaphore(concorrencia)
+
+    async def uma(i: int) -> None:
+        nonlocal erros
+        metodo, caminho, opcoes = cenario.requisicao(estado, i)
+        async with semaforo:
+            inicio = time.perf_counter()
+            resposta = await cliente.request(metodo, caminho, **opcoes)
+            latencias.append(time.perf_counter() - inicio)
+        if resposta.status_code >= 400:
+            erros += 1
+        elif cenario.ao_responder is not None:
+            cenario.ao_responder(estado, resposta)
+
+    await asyncio.gather(*(uma(i) for i in range(requisicoes)))
+    return latencias, erros
+
+
+async def executar(
+    cliente: httpx.AsyncClient,
+    cenario: Cenario,
+    estado: Estado,
+    requisicoes: int,
+    concorrencia: int,
+    amostras_memoria: int = 0,
+) -> ResultadoCenario:
+    """Executa o cenário e mede a vazão, a latência e (com ``amostras_memoria``) o pico de memória.
+
+    O pico é medido antes, em uma rodada curta com ``tracemalloc`` (que deixaria a rodada
+    cronometrada várias vezes mais lenta): é o maior volume alocado além do que já estava em uso.
+    """
+    pico = None
+    if amostras_memoria:
+        tracemalloc.start()
+        em_uso = tracemalloc.get_traced_memory()[0]
+        await _disparar(cliente, cenario, estado, amostras_memoria, concorrencia)
+        pico = tracemalloc.get_traced_memory()[1] - em_uso
+        tracemalloc.stop()
+    inicio = time.perf_counter()
+    latencias, erros = await _disparar(cliente, cenario, estado, requisicoes, concorrencia)
+    duracao = time.perf_counter() - inicio
+    latencias.sort()
+    return ResultadoCenario(
+        nome=cenario.nome,
+        grupo=cenario.grupo,
+        requisicoes=requisicoes,
+        erros=erros,
+        duracao=duracao,
+        vazao=requisicoes / duracao,
+        latencia_ms={
+            "media": sum(latencias) / len(latencias) * 1e3,
+            "p50": percentil(latencias, 0.50) * 1e3,
+            "p95": percentil(latencias, 0.95) * 1e3,
+            "p99": percentil(latencias, 0.99) * 1e3,
+            "max": latencias[-1] * 1e3,
+        },
+        pico_memoria_bytes=pico,
+    )
@@ -0,0 +1,184 @@
+"""
+Base sintética do teste de carga.
+
+Os registros são gerados por um ``random.Random`` com semente fixa e datas relativas a
+``REFERENCIA`` (não à data de hoje), então a mesma escala e a mesma semente produzem sempre a
+mesma base. As linhas são geradas e gravadas em lotes, sem montar a base inteira em memória,
+e passam pelos repositórios registrados da aplicação (com os seus observadores: totais
+mensais, índice de busca, categorização), como numa importação.
+"""
+
+
+import random
+from datetime import date, timedelta
+from typing import Callable, Dict, Iterator, List, NamedTuple, Tuple
+
+from app.schemas import (
+    CategoriaSchema,
+    ContaRecorrenteSchema,
+    DespesaSchema,
+    MetaSchema,
+    OrcamentoSchema,
+    RendaSchema,
+)
+
+# Data de referência da base: os lançamentos cobrem os dois anos anteriores a ela
+REFERENCIA = date(2025, 6, 30)
+DIAS_HISTORICO = 730
+TAMANHO_LOTE = 10_000
+# Registros de cada entidade guardados (com o seu dono) para os cenários de leitura por ID
+TAMANHO_AMOSTRA = 10_000
+
+# Fração das linhas de cada entidade (as categorias são poucas e não entram na conta)
+PROPORCOES = {
+    "despesas": 0.70,
+    "rendas": 0.20,
+    "contas_recorrentes": 0.04,
+    "metas": 0.03,
+    "orcamentos": 0.03,
+}
+CATEGORIAS_RENDA = ("Salário", "Freelance", "Investimentos", "Reembolsos")
+CATEGORIAS_DESPESA = (
+    "Aluguel", "Supermercado", "Transporte", "Lazer", "Assinaturas", "Educação",
+    "Saúde", "Restaurantes", "Farmácia", "Viagens", "Vestuário", "Pets",
+)
+DESCRICOES_DESPESA = (
+    "Mercado", "Uber", "Farmácia", "Padaria", "Restaurante", "Aluguel", "Internet", "Academia",
+    "Cinema", "Posto de gasolina", "Streaming", "Livraria", "Pet shop", "Consulta médica",
+)
+DESCRICOES_RENDA = ("Salário", "Projeto freelance", "Dividendos", "Reembolso", "Venda")
+FREQUENCIAS = ("mensal", "mensal", "mensal", "semanal", "quinzenal", "anual")
+
+
+class Escala(NamedTuple):
+    """Quantidade de usuários e de linhas de cada entidade."""
+    usuarios: int
+    linhas: Dict[str, int]
+
+    @classmethod
+    def para(cls, linhas: int, usuarios: int = 0) -> "Escala":
+        """Divide ``linhas`` entre as entidades; sem ``usuarios``, um usuário a cada 200 linhas."""
+        usuarios = usuarios or max(10, min(linhas // 200, 100_000))
+        return cls(usuarios, {nome: max(1, round(linhas * fracao)) for nome, fracao in PROPORCOES.items()})
+
+
+class Base(NamedTuple):
+    """O que os cenários precisam saber da base gerada."""
+    escala: Escala
+    categorias_renda: List[int]
+    categorias_despesa: List[int]
+    amostras: Dict[str, List[Tuple[int, int]]]  # (ID, usuario_id) de parte dos registros gerados
+
+
+def _data(aleatorio: random.Random) -> date:
+    return REFERENCIA - timedelta(days=aleatorio.randrange(DIAS_HISTORICO))
+
+
+def _valor(aleatorio: random.Random, minimo: float, maximo: float) -> float:
+    return round(aleatorio.uniform(minimo, maximo), 2)
+
+
+def _gerador(nome: str, base: Base, aleatorio: random.Random) -> Callable[[], object]:
+    usuarios = base.escala.usuarios
+
+    def despesa() -> DespesaSchema:
+        return DespesaSchema(
+            id=0,
+            valor=_valor(aleatorio, 5, 800),
+            data=_data(aleatorio),
+            descricao=f"{aleatorio.choice(DESCRICOES_DESPESA)} {aleatorio.randrange(1000)}",
+            categoria_id=aleatorio.choice(base.categorias_despesa),
+            usuario_id=aleatorio.randrange(1, usuarios + 1),
+        )
+
+    def renda() -> RendaSchema:
+        return RendaSchema(
+            id=0,
+            valor=_valor(aleatorio, 100, 12_000),
+            data=_data(aleatorio),
+            descricao=aleatorio.choice(DESCRICOES_RENDA),
+            categoria_id=aleatorio.choice(base.categorias_renda),
+            usuario_id=aleatorio.randrange(1, usuarios + 1),
+        )
+
+    def conta() -> ContaRecorrenteSchema:
+        tipo = "renda" if aleatorio.random() < 0.2 else "despesa"
+        categorias = base.categorias_renda if tipo == "renda" else base.categorias_despesa
+        return ContaRecorrenteSchema(
+            id=0,
+            valor=_valor(aleatorio, 20, 3000),
+            descricao=aleatorio.choice(DESCRICOES_RENDA if tipo == "renda" else DESCRICOES_DESPESA),
+            categoria_id=aleatorio.choice(categorias),
+            usuario_id=aleatorio.randrange(1, usuarios + 1),
+            tipo=tipo,
+            data_inicio=_data(aleatorio),
+            frequencia=aleatorio.choice(FREQUENCIAS),
+        )
+
+    def meta() -> MetaSchema:
+        valor_meta = _valor(aleatorio, 1000, 50_000)
+        return MetaSchema(
+            id=0,
+            titulo=f"Meta {aleatorio.randrange(10_000)}",
+            valor_atual=round(valor_meta * aleatorio.random(), 2),
+            valor_meta=valor_meta,
+            prazo=REFERENCIA + timedelta(days=aleatorio.randrange(30, 1500)),
+            usuario_id=aleatorio.randrange(1, usuarios + 1),
+        )
+
+    def orcamento() -> OrcamentoSchema:
+        return OrcamentoSchema(
+            id=0,
+            categoria_id=aleatorio.choice(base.categorias_despesa),
+            usuario_id=aleatorio.randrange(1, usuarios + 1),
+            valor_limite=_valor(aleatorio, 100, 5000),
+            periodo="anual" if aleatorio.random() < 0.2 else "mensal",
+        )
+
+    return {
+        "despesas": despesa,
+        "rendas": renda,
+        "contas_recorrentes": conta,
+        "metas": meta,
+        "orcamentos": orcamento,
+    }[nome]
+
+
+def _lotes(gerar: Callable[[], object], quantidade: int) -> Iterator[list]:
+    while quantidade > 0:
+        tamanho = min(TAMANHO_LOTE, quantidade)
+        yield [gerar() for _ in range(tamanho)]
+        quantidade -= tamanho
+
+
+def popular(escala: Escala, semente: int = 42, progresso: Callable[[str, int], None] = lambda nome, n: None) -> Base:
+    """Grava a base sintética nos repositórios registrados da aplicação e a descreve."""
+    # Importado aqui: os repositórios só existem depois que a aplicação é importada
+    from app.di.dependency_injection import obter_repositorio
+
+    categorias = obter_repositorio("categorias")
+    existentes = {(categoria.nome, categoria.tipo): categoria.id for categoria in categorias.listar()}
+    for tipo, nomes in (("renda", CATEGORIAS_RENDA), ("despesa", CATEGORIAS_DESPESA)):
+        for nome in nomes:
+            if (nome, tipo) not in existentes:
+                existentes[(nome, tipo)] = categorias.criar(CategoriaSchema(id=0, nome=nome, tipo=tipo)).id
+    base = Base(
+        escala,
+        sorted(id_ for (_, tipo), id_ in existentes.items() if tipo == "renda"),
+        sorted(id_ for (_, tipo), id_ in existentes.items() if tipo == "despesa"),
+        {},
+    )
+
+    aleatorio = random.Random(semente)
+    for nome, quantidade in escala.linhas.items():
+        repositorio = obter_repositorio(nome)
+        passo = max(1, quantidade // TAMANHO_AMOSTRA)
+        amostra = base.amostras[nome] = []
+        gravadas = 0
+        for lote in _lotes(_gerador(nome, base, aleatorio), quantidade):
+            repositorio.criar_varios(lote)
+            # As rotas só leem registros do usuário da requisição: a leitura precisa do dono
+            amostra.extend((registro.id, registro.usuario_id) for registro in lote[::passo])
+            gravadas += len(lote)
+            progresso(nome, gravadas)
+    return base
@@ -0,0 +1,154 @@
+"""
+Gravação e comparação dos resultados do teste de carga.
+
+O arquivo JSON guarda os parâmetros da execução (escala, backend, concorrência), o ambiente
+(Python, sistema, CPUs, commit) e, por cenário, a vazão, os percentis de latência e o pico de
+memória. Duas execuções são comparadas cenário a cenário; é regressão a queda de vazão, ou o
+aumento do p95 da latência ou do pico de memória, acima da tolerância.
+
+Uso (a partir de app-backend):
+    python -m benchmarks.carga.resultados base.json atual.json [tolerancia]
+
+Termina com status 1 se houver regressões, para uso em CI.
+"""
+
+
+import json
+import os
+import platform
+import subprocess
+import sys
+from datetime import datetime
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence
+
+from benchmarks.carga.cenarios import ResultadoCenario
+
+VERSAO = 1
+TOLERANCIA_PADRAO = 0.10
+# Métricas comparadas: (caminho no resultado do cenário, se maior é melhor)
+METRICAS = (
+    (("vazao",), True),
+    (("latencia_ms", "p95"), False),
+    (("pico_memoria_bytes",), False),
+)
+
+
+class Diferenca(NamedTuple):
+    cenario: str
+    metrica: str
+    antes: float
+    depois: float
+    variacao: float  # fração: 0.1 = 10% maior
+    regressao: bool
+
+
+def _commit() -> Optional[str]:
+    try:
+        saida = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return saida.stdout.strip() or None
+
+
+def montar(parametros: Dict[str, Any], carga_segundos: float, cenarios: Sequence[ResultadoCenario]) -> Dict[str, Any]:
+    """Monta o documento JSON de uma execução."""
+    return {
+        "versao": VERSAO,
+        "criado_em": datetime.now().isoformat(timespec="seconds"),
+        "commit": _commit(),
+        "ambiente": {
+            "python": platform.python_version(),
+            "sistema": platform.platform(),
+            "cpus": os.cpu_count(),
+        },
+        "parametros": parametros,
+        "carga_segundos": carga_segundos,
+        "cenarios": [cenario._asdict() for cenario in cenarios],
+    }
+
+
+def salvar(resultado: Dict[str, Any], caminho: str) -> None:
+    with open(caminho, "w", encoding="utf-8") as arquivo:
+        json.dump(resultado, arquivo, ensure_ascii=False, indent=2)
+
+
+def carregar(caminho: str) -> Dict[str, Any]:
+    with open(caminho, encoding="utf-8") as arquivo:
+        return json.load(arquivo)
+
+
+def _valor(cenario: Dict[str, Any], caminho: Sequence[str]) -> Optional[float]:
+    valor: Any = cenario
+    for chave in caminho:
+        valor = valor.get(chave) if isinstance(valor, dict) else None
+    return valor
+
+
+def comparar(base: Dict[str, Any], atual: Dict[str, Any], tolerancia: float = TOLERANCIA_PADRAO) -> List[Diferenca]:
+    """Compara os cenários presentes nas duas execuções."""
+    anteriores = {cenario["nome"]: cenario for cenario in base["cenarios"]}
+    diferencas = []
+    for cenario in atual["cenarios"]:
+        anterior = anteriores.get(cenario["nome"])
+        if anterior is None:
+            continue
+        for caminho, maior_melhor in METRICAS:
+            antes, depois = _valor(anterior, caminho), _valor(cenario, caminho)
+            if not antes or depois is None:
+                continue
+            variacao = depois / antes - 1
+            piora = -variacao if maior_melhor else variacao
+            diferencas.append(Diferenca(cenario["nome"], ".".join(caminho), antes, depois, variacao, piora > tolerancia))
+    return diferencas
+
+
+def parametros_diferentes(base: Dict[str, Any], atual: Dict[str, Any]) -> List[str]:
+    """Parâmetros que mudaram entre as execuções (e tornam a comparação menos confiável)."""
+    return sorted(
+        chave for chave in base["parametros"].keys() | atual["parametros"].keys()
+        if base["parametros"].get(chave) != atual["parametros"].get(chave)
+    )
+
+
+def imprimir_cabecalho() -> None:
+    print(f"{'cenário':<28} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'pico MB':>8} {'erros':>6}")
+
+
+def imprimir_cenario(cenario: ResultadoCenario) -> None:
+    pico = "-" if cenario.pico_memoria_bytes is None else f"{cenario.pico_memoria_bytes / 2**20:.2f}"
+    latencia = cenario.latencia_ms
+    print(
+        f"{cenario.nome:<28} {cenario.vazao:>9.0f} {latencia['p50']:>8.2f} {latencia['p95']:>8.2f} "
+        f"{latencia['p99']:>8.2f} {pico:>8} {cenario.erros:>6}"
+    )
+
+
+def imprimir_comparacao(base: Dict[str, Any], atual: Dict[str, Any], tolerancia: float) -> bool:
+    """Imprime as diferenças e retorna ``True`` se houver regressões."""
+    diferentes = parametros_diferentes(base, atual)
+    if diferentes:
+        print(f"atenção: parâmetros diferentes entre as execuções: {', '.join(diferentes)}")
+    diferencas = comparar(base, atual, tolerancia)
+    regressoes = [diferenca for diferenca in diferencas if diferenca.regressao]
+    print(f"comparação com {base.get('commit') or 'a base'} (tolerância {tolerancia:.0%}):")
+    for diferenca in diferencas:
+        if diferenca.regressao or abs(diferenca.variacao) > tolerancia:
+            marca = "REGRESSÃO" if diferenca.regressao else "melhora"
+            print(
+                f"  {marca:<9} {diferenca.cenario:<28} {diferenca.metrica:<18} "
+                f"{diferenca.antes:>12.2f} -> {diferenca.depois:>12.2f} ({diferenca.variacao:+.1%})"
+            )
+    print(f"  {len(regressoes)} regressão(ões) em {len(diferencas)} métricas comparadas")
+    return bool(regressoes)
+
+
+def main() -> None:
+    if len(sys.argv) < 3:
+        sys.exit("uso: python -m benchmarks.carga.resultados base.json atual.json [tolerancia]")
+    tolerancia = float(sys.argv[3]) if len(sys.argv) > 3 else TOLERANCIA_PADRAO
+    if imprimir_comparacao(carregar(sys.argv[1]), carregar(sys.argv[2]), tolerancia):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Configuração dos testes da API.
+
+Os repositórios são criados ao importar os módulos da aplicação, com o backend de
+``DUCKBILLS_ARMAZENAMENTO`` (padrão: memória). O agendador fica desligado, e o SQLite, se
+escolhido, usa um arquivo temporário. Cada teste usa usuários próprios (fixture ``usuario``),
+então os dados de um teste não interferem nos outros. As fixtures ``cliente`` e
+``cliente_outro`` fazem as requisições como ``usuario`` e ``outro_usuario``.
+
+Uso (a partir de app-backend):
+    python -m pytest
+"""
+
+
+import itertools
+import os
+import tempfile
+from datetime import date
+
+import pytest
+
+os.environ["DUCKBILLS_AGENDADOR"] = "0"
+os.environ.setdefault("DUCKBILLS_SQLITE_PATH", os.path.join(tempfile.mkdtemp(prefix="duckbills-testes-"), "duckbills.db"))
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+from app.main import app  # noqa: E402
+
+_usuarios = itertools.count(900_001)
+
+
+def como(usuario_id: int) -> dict:
+    """Cabeçalhos de uma requisição feita pelo usuário."""
+    return {"X-Usuario-Id": str(usuario_id)}
+
+
+@pytest.fixture
+def usuario() -> int:
+    """ID de um usuário sem nenhum dado."""
+    return next(_usuarios)
+
+
+@pytest.fixture
+def outro_usuario() -> int:
+    return next(_usuarios)
+
+
+@pytest.fixture
+def cliente(usuario) -> TestClient:
+    """Cliente da API que faz as requisições como ``usuario``."""
+    return TestClient(app, headers=como(usuario))
+
+
+@pytest.fixture
+def cliente_outro(outro_usuario) -> TestClient:
+    """Cliente da API que faz as requisições como ``outro_usuario``."""
+    return TestClient(app, headers=como(outro_usuario))
+
+
+def despesa(usuario_id: int, valor: float = 10.0, categoria_id: int = 3, data: date = None) -> dict:
+    """Corpo de criação de uma despesa."""
+    return {
+        "id": 0,
+        "valor": valor,
+        "data": (data or date.today()).isoformat(),
+        "descricao": "Despesa de teste",
+        "categoria_id": categoria_id,
+        "usuario_id": usuario_id,
+    }
+
+
+def meta(usuario_id: int, valor_atual: float = 0.0) -> dict:
+    """Corpo de criação de uma meta."""
+    return {
+        "id": 0,
+        "titulo": "Meta de teste",
+        "valor_atual": valor_atual,
+        "valor_meta": 1000.0,
+        "prazo": date(date.today().year + 1, 1, 1).isoformat(),
+        "descricao": "",
+        "usuario_id": usuario_id,
+    }
+
+
+def orcamento(usuario_id: int, categoria_id: int = 3, valor_limite: float = 100.0) -> dict:
+    """Corpo de criação de um orçamento mensal."""
+    return {"id": 0, "categoria_id": categoria_id, "usuario_id": usuario_id, "valor_limite": valor_limite, "periodo": "mensal"}
@@ -0,0 +1,106 @@
+"""Agendador de jobs e o lançamento automático das contas recorrentes."""
+
+
+import asyncio
+from datetime import date, datetime, timedelta
+
+import pytest
+
+import app.lancamentos_recorrentes
+from app.agendador import REPETICAO_APOS_ERRO, Agendador, a_cada
+from app.armazenamento import RepositorioMemoria
+from app.di.dependency_injection import obter_repositorio
+from app.lancamentos_recorrentes import RETROATIVO, _job, _lancadas, _lancar, chave
+from app.schemas import ContaRecorrenteSchema, ExecucaoJobSchema
+
+_AGORA = datetime(2025, 3, 10, 12, 0)
+
+
+def _agendador() -> Agendador:
+    return Agendador(RepositorioMemoria(ExecucaoJobSchema, indices=("nome",)))
+
+
+def test_job_roda_uma_vez_por_horario_agendado():
+    agendador, chamadas = _agendador(), []
+    agendador.registrar("teste", a_cada(hours=1), lambda agendada, anterior: chamadas.append((agendada, anterior)))
+
+    assert agendador.executar_pendentes(_AGORA) == ["teste"]
+    assert agendador.executar_pendentes(_AGORA + timedelta(minutes=59)) == []
+    assert agendador.executar_pendentes(_AGORA + timedelta(hours=3)) == ["teste"]
+    # Execuções perdidas viram uma só, que recebe o horário da anterior
+    assert chamadas == [(_AGORA, None), (_AGORA + timedelta(hours=1), _AGORA)]
+    estado, = agendador.estado()
+    assert estado.execucoes == 2 and estado.erro is None
+    assert estado.proxima_execucao == _AGORA + timedelta(hours=4)
+
+
+def test_job_que_falha_e_repetido_antes_da_proxima_execucao():
+    agendador = _agendador()
+
+    def falhar(agendada, anterior):
+        raise RuntimeError("falha")
+
+    agendador.registrar("teste", a_cada(days=1), falhar)
+    assert agendador.executar_pendentes(_AGORA) == ["teste"]
+    estado, = agendador.estado()
+    assert "falha" in estado.erro and estado.ultima_execucao is None
+    assert estado.proxima_execucao == _AGORA + REPETICAO_APOS_ERRO
+
+
+def test_agendador_desligado_por_padrao(monkeypatch):
+    monkeypatch.delenv("DUCKBILLS_AGENDADOR", raising=False)
+    agendador = _agendador()
+
+    async def iniciar() -> bool:
+        agendador.iniciar()
+        iniciado = agendador._tarefa is not None
+        await agendador.parar()
+        return iniciado
+
+    assert asyncio.run(iniciar()) is False
+    monkeypatch.setenv("DUCKBILLS_AGENDADOR", "1")
+    assert asyncio.run(iniciar()) is True
+
+
+@pytest.mark.parametrize("anterior, historico, desde", [
+    (None, "0", _AGORA.date() - RETROATIVO),
+    (None, "1", None),
+    (_AGORA - timedelta(hours=1), "1", _AGORA.date() - RETROATIVO),
+])
+def test_primeira_execucao_confere_so_o_periodo_retroativo(monkeypatch, anterior, historico, desde):
+    chamadas = []
+    monkeypatch.setenv("DUCKBILLS_LANCAMENTOS_HISTORICO", historico)
+    monkeypatch.setattr(app.lancamentos_recorrentes, "lancar_ocorrencias", lambda ate, desde=None: chamadas.append(desde) or 0)
+    _job(_AGORA, anterior)
+    assert chamadas == [desde]
+
+
+def _conta(usuario_id: int) -> ContaRecorrenteSchema:
+    return ContaRecorrenteSchema(
+        id=10**6 + usuario_id, valor=50.0, descricao="Aluguel", categoria_id=3, usuario_id=usuario_id,
+        tipo="despesa", data_inicio=date(2025, 1, 5), frequencia="mensal",
+    )
+
+
+def test_ocorrencia_e_lancada_uma_vez(usuario):
+    conta = _conta(usuario)
+    assert _lancar(conta, date(2025, 2, 5)) is True
+    assert _lancar(conta, date(2025, 2, 5)) is False
+    despesas = obter_repositorio("despesas").buscar(usuario_id=usuario)
+    assert [(d.data, d.recorrente) for d in despesas] == [(date(2025, 2, 5), True)]
+
+
+def test_falha_ao_lancar_nao_deixa_a_chave(monkeypatch, usuario):
+    conta = _conta(usuario)
+    despesas = obter_repositorio("despesas").particao_do_usuario(usuario)
+
+    def falhar(registro):
+        raise RuntimeError("falha")
+
+    monkeypatch.setattr(despesas, "criar", falhar)
+    with pytest.raises(RuntimeError):
+        _lancar(conta, date(2025, 2, 5))
+    assert _lancadas.obter(chave(conta.id, date(2025, 2, 5))) is None
+
+    monkeypatch.undo()
+    assert _lancar(conta, date(2025, 2, 5)) is True
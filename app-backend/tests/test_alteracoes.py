@@ -0,0 +1,65 @@
+"""Feed de alterações (``/changes``): cursores, ``since=0`` e retenção."""
+
+
+import pytest
+
+import app.alteracoes
+from app.armazenamento import RegistroAlteracoesMemoria
+from conftest import despesa
+
+
+@pytest.fixture
+def registro(monkeypatch) -> RegistroAlteracoesMemoria:
+    """Registro novo, com retenção de 5 alterações, no lugar do registro da aplicação."""
+    novo = RegistroAlteracoesMemoria(retencao=5)
+    monkeypatch.setattr(app.alteracoes, "registro_alteracoes", novo)
+    return novo
+
+
+def test_since_zero_em_registro_novo_nao_expira(cliente, registro):
+    assert cliente.get("/changes", params={"since": 0}).json() == {
+        "ultimo": registro.ultima(), "mais": False, "alteracoes": []
+    }
+
+
+def test_since_zero_parte_da_alteracao_retida_mais_antiga(cliente, usuario, registro):
+    inicial = cliente.get("/changes").json()["ultimo"]
+    ids = [cliente.post("/despesas/", json=despesa(usuario, valor=v)).json()["id"] for v in range(1, 9)]
+    assert registro.descartadas_ate() > inicial
+
+    resposta = cliente.get("/changes", params={"since": 0, "limit": 3})
+    assert resposta.status_code == 200
+    paginas, corpo = [], resposta.json()
+    paginas += corpo["alteracoes"]
+    while corpo["mais"]:
+        corpo = cliente.get("/changes", params={"since": corpo["ultimo"], "limit": 3}).json()
+        paginas += corpo["alteracoes"]
+    # Só as 5 retidas, em ordem, a partir da mais antiga
+    assert [a["id"] for a in paginas] == ids[-5:]
+    assert corpo["ultimo"] == registro.ultima()
+
+
+def test_cursor_descartado_responde_410(cliente, usuario, registro):
+    inicial = cliente.get("/changes").json()["ultimo"]
+    for valor in range(1, 9):
+        cliente.post("/despesas/", json=despesa(usuario, valor=valor))
+    assert cliente.get("/changes", params={"since": inicial}).status_code == 410
+    assert cliente.get("/changes", params={"since": registro.descartadas_ate()}).status_code == 200
+    assert cliente.get("/changes", params={"since": -1}).status_code == 422
+
+
+def test_registro_de_alteracoes_pagina_a_partir_do_cursor():
+    registro = RegistroAlteracoesMemoria(retencao=50)
+    inicio = registro.ultima()
+    for i in range(200):
+        registro.registrar("despesas", i % 60, 1 if i % 2 else 2, "{}")
+
+    # Cada registro aparece uma vez, na sua última alteração; as mais antigas foram descartadas
+    todas = registro.listar(registro.descartadas_ate(), 1000)
+    assert len(todas) == 50 and registro.descartadas_ate() > inicio
+    assert [a.seq for a in todas] == sorted(a.seq for a in todas)
+    paginas, cursor = [], registro.descartadas_ate()
+    while pagina := registro.listar(cursor, 7, usuario_id=1):
+        paginas += pagina
+        cursor = pagina[-1].seq
+    assert paginas == [a for a in todas if a.usuario_id == 1]
@@ -0,0 +1,58 @@
+"""Busca textual (``/busca``): índice invertido, prefixos, erros de digitação e escopo do usuário."""
+
+
+from app.busca import PESO_ERRO, PESO_EXATO, PESO_PREFIXO, IndiceBusca
+from conftest import despesa
+
+
+def _criar(cliente, usuario_id: int, descricao: str, rota: str = "/despesas/") -> int:
+    resposta = cliente.post(rota, json={**despesa(usuario_id), "descricao": descricao})
+    assert resposta.status_code == 201
+    return resposta.json()["id"]
+
+
+def _buscar(cliente, q: str, **parametros) -> list:
+    return [(r["tipo"], r["id"]) for r in cliente.get("/busca/", params={"q": q, **parametros}).json()]
+
+
+def test_busca_sem_acentos_por_prefixo_e_com_erro_de_digitacao(cliente, usuario):
+    escola = _criar(cliente, usuario, "Mensalidade Educação Infantil")
+    aluguel = _criar(cliente, usuario, "Aluguel do apartamento")
+    netflix = _criar(cliente, usuario, "Assinatura Netflix")
+    assert _buscar(cliente, "educacao") == [("despesa", escola)]
+    assert _buscar(cliente, "NETF") == [("despesa", netflix)]
+    assert _buscar(cliente, "alugeul") == [("despesa", aluguel)]
+    # Todos os termos precisam casar
+    assert _buscar(cliente, "aluguel netflix") == []
+
+
+def test_busca_filtra_por_tipo_e_por_usuario(cliente, cliente_outro, usuario, outro_usuario):
+    despesa_id = _criar(cliente, usuario, "Mercado do bairro")
+    renda_id = _criar(cliente, usuario, "Venda no mercado", rota="/rendas/")
+    _criar(cliente_outro, outro_usuario, "Mercado central")
+    assert sorted(_buscar(cliente, "mercado")) == [("despesa", despesa_id), ("renda", renda_id)]
+    assert _buscar(cliente, "mercado", tipo="renda") == [("renda", renda_id)]
+    assert len(_buscar(cliente_outro, "mercado")) == 1
+
+
+def test_indice_acompanha_atualizacoes_e_exclusoes(cliente, usuario):
+    despesa_id = _criar(cliente, usuario, "Farmácia")
+    cliente.put(f"/despesas/{despesa_id}", json={**despesa(usuario), "descricao": "Padaria"})
+    assert _buscar(cliente, "farmacia") == []
+    assert _buscar(cliente, "padaria") == [("despesa", despesa_id)]
+    cliente.delete(f"/despesas/{despesa_id}")
+    assert _buscar(cliente, "padaria") == []
+
+
+def test_pontuacao_exato_prefixo_erro():
+    indice = IndiceBusca()
+    indice.adicionar(3, 1, "Cartão")
+    indice.adicionar(6, 1, "Cartãozinho")
+    indice.adicionar(9, 1, "Cortao")
+    assert indice.buscar("cartao", 1) == [(3, PESO_EXATO), (6, PESO_PREFIXO), (9, PESO_ERRO)]
+    # Empates vão para o documento mais recente
+    indice.adicionar(12, 1, "Cartão")
+    assert indice.buscar("cartao", 1, limite=2) == [(12, PESO_EXATO), (3, PESO_EXATO)]
+    indice.remover(12, 1, "Cartão")
+    assert [doc for doc, _ in indice.buscar("cartao", 1)] == [3, 6, 9]
+    assert indice.buscar("cartao", 2) == []
@@ -0,0 +1,71 @@
+"""Cache das listagens: ETag e ``If-None-Match`` (304), invalidação por escrita, capacidade e TTL."""
+
+
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from app.cache import CacheRespostas
+from conftest import orcamento
+
+
+def test_listagem_em_cache_responde_304(cliente):
+    primeira = cliente.get("/categorias/")
+    etag = primeira.headers["ETag"]
+    assert cliente.get("/categorias/", headers={"If-None-Match": etag}).status_code == 304
+    assert cliente.get("/categorias/", headers={"If-None-Match": f"W/{etag}"}).status_code == 304
+
+    nova = cliente.post("/categorias/", json={"id": 0, "nome": "Teste de cache", "tipo": "despesa"})
+    assert nova.status_code == 201
+    # A escrita invalida a listagem
+    resposta = cliente.get("/categorias/", headers={"If-None-Match": etag})
+    assert resposta.status_code == 200 and resposta.headers["ETag"] != etag
+    assert "Teste de cache" in [categoria["nome"] for categoria in resposta.json()]
+
+
+def test_escrita_invalida_so_as_listagens_do_usuario(cliente, cliente_outro, usuario):
+    etag = cliente.get("/orcamentos/").headers["ETag"]
+    etag_outro = cliente_outro.get("/orcamentos/").headers["ETag"]
+
+    cliente.post("/orcamentos/", json=orcamento(usuario))
+    assert cliente_outro.get("/orcamentos/", headers={"If-None-Match": etag_outro}).status_code == 304
+    resposta = cliente.get("/orcamentos/", headers={"If-None-Match": etag})
+    assert resposta.status_code == 200 and [o["usuario_id"] for o in resposta.json()] == [usuario]
+
+
+def _app(cache: CacheRespostas) -> tuple:
+    """Aplicação com uma listagem em cache que conta quantas vezes foi gerada."""
+    aplicacao, geradas = FastAPI(), []
+
+    @aplicacao.get("/itens")
+    async def itens(request: Request, n: int = 0):
+        async def gerar():
+            geradas.append(n)
+            return b"[" + b"0," * n + b"0]", {}
+        return await cache.responder(request, "itens", gerar)
+
+    return TestClient(aplicacao), geradas
+
+
+def test_entradas_menos_usadas_sao_descartadas():
+    cache = CacheRespostas(capacidade_entradas=2)
+    cliente, geradas = _app(cache)
+    for n in (1, 2, 1, 3, 1, 2):
+        cliente.get("/itens", params={"n": n})
+    # A consulta 2 foi a menos usada quando a 3 entrou
+    assert geradas == [1, 2, 3, 2]
+    assert cache.estatisticas()["descartes"] == 2
+
+
+def test_entradas_acima_da_capacidade_em_bytes_nao_sao_guardadas():
+    cache = CacheRespostas(capacidade_bytes=100)
+    cliente, geradas = _app(cache)
+    for _ in range(2):
+        cliente.get("/itens", params={"n": 100})
+    assert geradas == [100, 100] and cache.estatisticas()["entradas"] == 0
+
+
+def test_entradas_expiram_apos_o_ttl():
+    cliente, geradas = _app(CacheRespostas(ttl=0))
+    for _ in range(2):
+        cliente.get("/itens")
+    assert geradas == [0, 0]
@@ -0,0 +1,52 @@
+"""Categorização automática pela descrição: o modelo incremental e o preenchimento na importação."""
+
+
+from app.armazenamento import RepositorioMemoria
+from app.categorizacao import Categorizador, ModeloCategorias
+from app.schemas import DespesaSchema
+from conftest import despesa
+
+
+def test_modelo_sugere_a_categoria_com_a_confianca():
+    modelo = ModeloCategorias()
+    modelo.aprender_varios(["Uber viagem", "UBER *TRIP", "Padaria", "Padaria do centro"], [1, 1, 2, 2])
+    (categoria, confianca), sem_sugestao, vazia = modelo.sugerir(["uber centro", "Cinema", None])
+    assert categoria == 1 and 0.5 < confianca < 1
+    assert sem_sugestao is None and vazia is None
+    assert len(modelo) == 4
+
+
+def test_modelo_desaprende_lancamentos_removidos():
+    modelo = ModeloCategorias()
+    modelo.aprender("Farmácia", 3)
+    modelo.aprender("Farmácia", 4)
+    modelo.aprender("Farmácia", 3, -1)
+    assert modelo.sugerir(["farmacia"])[0][0] == 4
+
+
+def test_categorizador_acompanha_as_escritas():
+    repositorio = RepositorioMemoria(DespesaSchema, [DespesaSchema(**{**despesa(1), "id": 1, "descricao": "Posto"})])
+    categorizador = Categorizador()
+    categorizador.observar("despesa", repositorio)
+    assert categorizador.categorias("despesa", ["posto"]) == [3]
+
+    repositorio.atualizar(1, DespesaSchema(**{**despesa(1, categoria_id=8), "id": 1, "descricao": "Posto"}))
+    assert categorizador.categorias("despesa", ["posto"]) == [8]
+    # Sem modelo para o tipo, ou confiança abaixo do mínimo, não há sugestão
+    assert categorizador.categorias("renda", ["posto"]) == [None]
+    assert categorizador.categorias("despesa", ["posto"], confianca_minima=1.01) == [None]
+
+
+def test_importacao_preenche_a_categoria_sugerida(cliente, usuario):
+    for _ in range(3):
+        cliente.post("/despesas/", json={**despesa(usuario, categoria_id=7), "descricao": "Zyxwquimica laboratorio"})
+    conteudo = b"valor,data,descricao\n10,2025-01-05,ZYXWQUIMICA exame\n"
+
+    arquivo = {"arquivo": ("extrato.csv", conteudo)}
+    sem_sugestao = cliente.post("/despesas/bulk", files=arquivo, params={"categorizar": False}).json()
+    assert sem_sugestao["importadas"] == 0 and sem_sugestao["total_erros"] == 1
+
+    resultado = cliente.post("/despesas/bulk", files=arquivo).json()
+    assert resultado["importadas"] == 1 and resultado["categorizadas"] == 1
+    importada = [d for d in cliente.get("/despesas/").json() if d["descricao"] == "ZYXWQUIMICA exame"]
+    assert [d["categoria_id"] for d in importada] == [7]
@@ -0,0 +1,56 @@
+"""Conciliação das contas recorrentes com os lançamentos (``/conciliacao``)."""
+
+
+from datetime import date
+
+from conftest import despesa
+
+_JANELA = {"de": "2025-01-01", "ate": "2025-04-30", "referencia": "2025-04-15"}
+
+
+def _conta(usuario_id: int) -> dict:
+    return {
+        "id": 0, "valor": 100.0, "descricao": "Internet", "categoria_id": 3, "usuario_id": usuario_id,
+        "tipo": "despesa", "data_inicio": "2025-01-10", "frequencia": "mensal",
+    }
+
+
+def test_status_de_cada_ocorrencia(cliente, usuario):
+    conta_id = cliente.post("/contas-recorrentes/", json=_conta(usuario)).json()["id"]
+    ids = {}
+    for nome, valor, data, categoria_id in (
+        ("janeiro", 100.0, date(2025, 1, 11), 3),
+        ("duplicada", 100.0, date(2025, 1, 12), 3),
+        ("fevereiro", 98.0, date(2025, 2, 20), 3),
+        # Valor fora da tolerância e categoria diferente não pagam a conta de março
+        ("marco_valor", 150.0, date(2025, 3, 10), 3),
+        ("marco_categoria", 100.0, date(2025, 3, 10), 4),
+    ):
+        ids[nome] = cliente.post("/despesas/", json=despesa(usuario, valor, categoria_id, data)).json()["id"]
+
+    resposta = cliente.get("/conciliacao/", params=_JANELA).json()
+    assert (resposta["pagas"], resposta["atrasadas"], resposta["ausentes"], resposta["pendentes"]) == (1, 1, 1, 1)
+    assert resposta["duplicadas"] == 1
+    ocorrencias = {o["data_prevista"]: o for o in resposta["ocorrencias"]}
+    assert all(o["conta_recorrente_id"] == conta_id for o in ocorrencias.values())
+    assert [ocorrencias[d]["status"] for d in sorted(ocorrencias)] == ["paga", "atrasada", "ausente", "pendente"]
+    janeiro, fevereiro = ocorrencias["2025-01-10"], ocorrencias["2025-02-10"]
+    assert janeiro["lancamento_id"] == ids["janeiro"] and janeiro["duplicados"] == [ids["duplicada"]]
+    assert fevereiro["lancamento_id"] == ids["fevereiro"] and fevereiro["dias_atraso"] == 10
+    assert ocorrencias["2025-03-10"]["lancamento_id"] is None
+
+
+def test_filtros_e_janela_invalida(cliente, cliente_outro, usuario):
+    cliente.post("/contas-recorrentes/", json=_conta(usuario))
+    cliente.post("/despesas/", json=despesa(usuario, 100.0, 3, date(2025, 1, 10)))
+
+    ausentes = cliente.get("/conciliacao/", params={**_JANELA, "status": "ausente"}).json()["ocorrencias"]
+    assert [o["data_prevista"] for o in ausentes] == ["2025-02-10", "2025-03-10"]
+    # Sem tolerância para atraso, a janela de abril já fechou; a tolerância maior que meio
+    # período é limitada para não invadir a ocorrência seguinte
+    for dias_depois, contagem in ((0, (3, 0)), (40, (2, 1))):
+        resposta = cliente.get("/conciliacao/", params={**_JANELA, "dias_depois": dias_depois}).json()
+        assert (resposta["ausentes"], resposta["pendentes"]) == contagem
+    # As contas de um usuário não aparecem na conciliação de outro
+    assert cliente_outro.get("/conciliacao/", params=_JANELA).json()["ocorrencias"] == []
+    assert cliente.get("/conciliacao/", params={"de": "2025-02-01", "ate": "2025-01-01"}).status_code == 400
@@ -0,0 +1,62 @@
+"""Controle de concorrência otimista: ETag e ``If-Match`` (412)."""
+
+
+import threading
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from conftest import como, despesa, meta
+
+
+def test_put_com_if_match(cliente, usuario):
+    criada = cliente.post("/despesas/", json=despesa(usuario))
+    etag = criada.headers["ETag"]
+    assert cliente.get(f"/despesas/{criada.json()['id']}").headers["ETag"] == etag
+
+    url = f"/despesas/{criada.json()['id']}"
+    atualizada = cliente.put(url, headers={"If-Match": etag}, json=despesa(usuario, 20.0))
+    assert atualizada.status_code == 200
+    assert atualizada.headers["ETag"] != etag
+
+    # A versão lida antes da atualização já não vale
+    recusada = cliente.put(url, headers={"If-Match": etag}, json=despesa(usuario, 30.0))
+    assert recusada.status_code == 412
+    assert cliente.get(url).json()["valor"] == 20.0
+    assert cliente.delete(url, headers={"If-Match": etag}).status_code == 412
+    assert cliente.delete(url, headers={"If-Match": atualizada.headers["ETag"]}).status_code == 200
+
+
+def test_sem_if_match_a_ultima_escrita_vence(cliente, usuario):
+    url = f"/despesas/{cliente.post('/despesas/', json=despesa(usuario)).json()['id']}"
+    assert cliente.put(url, json=despesa(usuario, 20.0)).status_code == 200
+    assert cliente.put(url, headers={"If-Match": "*"}, json=despesa(usuario, 30.0)).status_code == 200
+    assert cliente.get(url).json()["valor"] == 30.0
+
+
+def test_aporte_com_if_match_desatualizado(cliente, usuario):
+    criada = cliente.post("/metas/", json=meta(usuario))
+    url = f"/metas/{criada.json()['id']}/adicionar-valor"
+    assert cliente.patch(url, params={"valor": 10}, headers={"If-Match": criada.headers["ETag"]}).status_code == 200
+    assert cliente.patch(url, params={"valor": 10}, headers={"If-Match": criada.headers["ETag"]}).status_code == 412
+    assert cliente.get(f"/metas/{criada.json()['id']}").json()["valor_atual"] == 10.0
+
+
+def test_escritas_simultaneas_com_a_mesma_versao(cliente, usuario):
+    criada = cliente.post("/despesas/", json=despesa(usuario))
+    url, etag = f"/despesas/{criada.json()['id']}", criada.headers["ETag"]
+    respostas = []
+
+    def atualizar(valor: float) -> None:
+        resposta = TestClient(app, headers=como(usuario)).put(url, headers={"If-Match": etag}, json=despesa(usuario, valor))
+        respostas.append((resposta.status_code, valor))
+
+    threads = [threading.Thread(target=atualizar, args=(float(valor),)) for valor in range(11, 19)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    # Só uma das escritas vê a versão esperada; as outras recebem 412
+    vencedoras = [valor for status, valor in respostas if status == 200]
+    assert len(vencedoras) == 1 and sorted(status for status, _ in respostas)[1:] == [412] * 7
+    assert cliente.get(url).json()["valor"] == vencedoras[0]
@@ -0,0 +1,86 @@
+"""Isolamento entre usuários pelo cabeçalho ``X-Usuario-Id``."""
+
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from conftest import como, despesa, meta
+
+_CONSULTAS = [
+    ("/despesas/", {}),
+    ("/rendas/", {}),
+    ("/metas/", {}),
+    ("/orcamentos/", {}),
+    ("/orcamentos/alertas", {}),
+    ("/orcamentos/status", {}),
+    ("/metas/progresso", {}),
+    ("/contas-recorrentes/", {}),
+    ("/resumo/", {}),
+    ("/projecao/", {"meses": 1}),
+    ("/conciliacao/", {"de": "2025-01-01", "ate": "2025-01-31"}),
+    ("/busca/", {"q": "teste"}),
+    ("/changes", {}),
+]
+
+
+@pytest.mark.parametrize("rota, parametros", _CONSULTAS)
+def test_consulta_sem_usuario_responde_401(rota, parametros):
+    assert TestClient(app).get(rota, params=parametros).status_code == 401
+
+
+def test_escritas_sem_usuario_respondem_401(cliente, usuario):
+    criada = cliente.post("/despesas/", json=despesa(usuario)).json()
+    anonimo = TestClient(app)
+    assert anonimo.post("/despesas/", json=despesa(usuario)).status_code == 401
+    assert anonimo.get(f"/despesas/{criada['id']}").status_code == 401
+    assert anonimo.put(f"/despesas/{criada['id']}", json=despesa(usuario, 20.0)).status_code == 401
+    assert anonimo.delete(f"/despesas/{criada['id']}").status_code == 401
+    assert anonimo.post("/batch", json={"operacoes": []}).status_code == 401
+    assert cliente.get(f"/despesas/{criada['id']}").json() == criada
+
+
+def test_rotas_compartilhadas_nao_exigem_usuario():
+    anonimo = TestClient(app)
+    assert anonimo.get("/categorias/").status_code == 200
+    assert anonimo.get("/health").status_code == 200
+
+
+@pytest.mark.parametrize("rota, parametros", _CONSULTAS)
+def test_consulta_de_outro_usuario_responde_403(cliente, outro_usuario, rota, parametros):
+    assert cliente.get(rota, params={**parametros, "usuario_id": outro_usuario}).status_code == 403
+
+
+def test_registro_de_outro_usuario_nao_existe(cliente, cliente_outro, usuario, outro_usuario):
+    alheia = cliente_outro.post("/despesas/", json=despesa(outro_usuario)).json()
+    url = f"/despesas/{alheia['id']}"
+    assert cliente.get(url).status_code == 404
+    assert cliente.put(url, json=despesa(usuario)).status_code == 404
+    assert cliente.delete(url).status_code == 404
+    assert cliente_outro.get(url).json() == alheia
+
+
+def test_criar_ou_mover_para_outro_usuario_responde_403(cliente, usuario, outro_usuario):
+    assert cliente.post("/despesas/", json=despesa(outro_usuario)).status_code == 403
+    propria = cliente.post("/metas/", json=meta(usuario)).json()
+    movida = cliente.put(f"/metas/{propria['id']}", json={**propria, "usuario_id": outro_usuario})
+    assert movida.status_code == 403
+
+
+def test_consultas_ficam_restritas_ao_usuario_da_requisicao(cliente, usuario, outro_usuario):
+    for usuario_id in (usuario, outro_usuario):
+        corpo = {**despesa(usuario_id), "descricao": "Farmacia isolamento"}
+        cliente.post("/despesas/", headers=como(usuario_id), json=corpo)
+
+    encontrados = cliente.get("/busca/", params={"q": "farmacia isolamento"}).json()
+    assert encontrados and {r["usuario_id"] for r in encontrados} == {usuario}
+    assert {d["usuario_id"] for d in cliente.get("/despesas/").json()} == {usuario}
+    conciliacao = cliente.get("/conciliacao/", params={"de": "2025-01-01", "ate": "2025-01-31"}).json()
+    assert conciliacao["usuario_id"] == usuario
+
+
+def test_stream_aceita_o_usuario_na_query():
+    anonimo = TestClient(app)
+    # Sem usuário, a requisição é recusada antes de o stream começar
+    assert anonimo.get("/changes/stream").status_code == 401
+    assert anonimo.get("/changes/stream", params={"usuario_id": 1}, headers=como(2)).status_code == 403
@@ -0,0 +1,57 @@
+"""Valores monetários: decimais exatos com duas casas e a migração do SQLite para centavos."""
+
+
+import sqlite3
+from decimal import Decimal
+
+import pytest
+from pydantic import ValidationError
+
+from app.armazenamento import ConexoesSQLite, RepositorioSQLite
+from app.dinheiro import centavos, reais
+from app.schemas import DespesaSchema
+from conftest import despesa
+
+
+def test_valores_sao_decimais_exatos():
+    valores = [DespesaSchema(**despesa(1, valor)).valor for valor in (0.1, 0.2, "19.9", 1234)]
+    assert valores == [Decimal("0.10"), Decimal("0.20"), Decimal("19.90"), Decimal("1234.00")]
+    assert sum(valores[:2]) == Decimal("0.30")
+    assert centavos(Decimal("19.99")) == 1999 and reais(1999) == Decimal("19.99")
+
+
+@pytest.mark.parametrize("valor", ["0.001", "10.005", 19.999])
+def test_fracao_de_centavo_e_recusada(valor):
+    with pytest.raises(ValidationError, match="duas casas decimais"):
+        DespesaSchema(**despesa(1, valor))
+
+
+def test_fracao_de_centavo_na_api_responde_422(cliente, usuario):
+    assert cliente.post("/despesas/", json=despesa(usuario, "10.005")).status_code == 422
+    criada = cliente.post("/despesas/", json=despesa(usuario, "10.50"))
+    assert criada.status_code == 201 and criada.json()["valor"] == 10.5
+
+
+def test_colunas_em_reais_sao_migradas_para_centavos(tmp_path):
+    caminho = str(tmp_path / "antigo.db")
+    antigo = sqlite3.connect(caminho)
+    antigo.execute(
+        "CREATE TABLE despesas (id INTEGER PRIMARY KEY, valor REAL, data TEXT, descricao TEXT, "
+        "categoria_id INTEGER, usuario_id INTEGER, recorrente INTEGER)"
+    )
+    antigo.executemany(
+        "INSERT INTO despesas VALUES (?, ?, '2025-01-01', 'x', 1, 1, 0)", [(1, 0.1), (2, 19.99), (3, 1234.5)]
+    )
+    antigo.commit()
+    antigo.close()
+
+    repositorio = RepositorioSQLite(DespesaSchema, ConexoesSQLite(caminho), "despesas", indices=("usuario_id",))
+
+    assert [d.valor for d in repositorio.listar()] == [Decimal("0.10"), Decimal("19.99"), Decimal("1234.50")]
+    conexao = sqlite3.connect(caminho)
+    tipos = {linha[1]: linha[2] for linha in conexao.execute("PRAGMA table_info(despesas)")}
+    assert tipos["valor"] == "INTEGER"
+    assert [linha[0] for linha in conexao.execute("SELECT valor FROM despesas ORDER BY id")] == [10, 1999, 123450]
+    # Os índices são recriados na tabela nova
+    indices = {linha[1] for linha in conexao.execute("PRAGMA index_list(despesas)")}
+    assert "idx_despesas_usuario_id_data" in indices
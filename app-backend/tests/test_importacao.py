@@ -0,0 +1,76 @@
+"""Importação de extratos (``/despesas/bulk``): leitores CSV, NDJSON e OFX e o relatório de erros."""
+
+
+import io
+import json
+
+import pytest
+
+import app.importacao
+from app.importacao import ler_ofx
+
+
+def _transacao(valor: str, data: str = "20250105", memo: str = "Mercado") -> str:
+    return f"<STMTTRN>\n<TRNTYPE>DEBIT\n<DTPOSTED>{data}120000\n<TRNAMT>{valor}\n<MEMO>{memo}\n</STMTTRN>\n"
+
+
+def _ofx(*transacoes: str, preambulo: str = "") -> bytes:
+    return f"OFXHEADER:100\n{preambulo}<OFX><BANKTRANLIST>\n{''.join(transacoes)}</BANKTRANLIST></OFX>\n".encode("latin-1")
+
+
+def _ler(conteudo: bytes, tipo: str = "despesa") -> list:
+    return list(ler_ofx(io.BytesIO(conteudo), tipo))
+
+
+def _importar(cliente, nome: str, conteudo: bytes, **parametros) -> dict:
+    resposta = cliente.post("/despesas/bulk", files={"arquivo": (nome, conteudo)}, params={"categoria_id": 3, **parametros})
+    assert resposta.status_code == 200
+    return resposta.json()
+
+
+def test_csv_com_linhas_invalidas(cliente, usuario):
+    conteudo = b"valor,data,descricao\n10.50,2025-01-05,Padaria\nabc,2025-01-06,Erro\n7,2025-01-07,Feira\n"
+    resultado = _importar(cliente, "extrato.csv", conteudo)
+    assert resultado["importadas"] == 2 and resultado["total_erros"] == 1
+    assert resultado["erros"][0]["linha"] == 3
+    assert sorted(float(d["valor"]) for d in cliente.get("/despesas/").json()) == [7.0, 10.5]
+
+
+def test_ndjson(cliente, usuario):
+    linhas = [{"valor": 12, "data": "2025-02-01", "descricao": "Cinema"}, {"valor": 3, "data": "2025-02-02"}]
+    conteudo = "\n".join(map(json.dumps, linhas)).encode() + b"\n{quebrado\n"
+    resultado = _importar(cliente, "extrato.ndjson", conteudo)
+    assert resultado["importadas"] == 2 and resultado["erros"][0]["linha"] == 3
+
+
+def test_ofx_separa_debitos_e_creditos(cliente, usuario):
+    conteudo = _ofx(_transacao("-45.90"), _transacao("1500.00", memo="Salário"), _transacao("-12,00"))
+    resultado = _importar(cliente, "extrato.ofx", conteudo)
+    assert resultado["importadas"] == 2 and resultado["ignoradas"] == 1
+    assert sorted(float(d["valor"]) for d in cliente.get("/despesas/").json()) == [12.0, 45.9]
+
+
+def test_ofx_com_transacoes_divididas_entre_blocos(monkeypatch):
+    monkeypatch.setattr(app.importacao, "_BLOCO_LEITURA", 7)
+    transacoes = [_transacao(f"-{i}.00", memo=f"Compra {i}") for i in range(1, 21)]
+    linhas = _ler(_ofx(*transacoes, preambulo="<SIGNONMSGSRSV1>" * 50))
+    assert [numero for numero, _ in linhas] == list(range(1, 21))
+    assert [dados["descricao"] for _, dados in linhas] == [f"Compra {i}" for i in range(1, 21)]
+
+
+def test_ofx_transacao_longa_demais_vira_erro_da_linha(monkeypatch):
+    monkeypatch.setattr(app.importacao, "MAX_TRANSACAO_OFX", 200)
+    longa = _transacao("-1.00", memo="x" * 1000)
+    linhas = _ler(_ofx(_transacao("-2.00"), longa, _transacao("-3.00")))
+    assert [numero for numero, _ in linhas] == [1, 2, 3]
+    assert isinstance(linhas[1][1], ValueError) and "maior que 200" in str(linhas[1][1])
+    assert [dados["valor"] for _, dados in (linhas[0], linhas[2])] == [2, 3]
+
+
+@pytest.mark.parametrize("bloco", [5, 64 * 1024])
+def test_ofx_truncado_reporta_a_transacao_incompleta(monkeypatch, bloco):
+    monkeypatch.setattr(app.importacao, "_BLOCO_LEITURA", bloco)
+    conteudo = _ofx(_transacao("-2.00")).replace(b"</BANKTRANLIST></OFX>\n", b"<STMTTRN>\n<TRNAMT>-5")
+    linhas = _ler(conteudo)
+    assert [numero for numero, _ in linhas] == [1, 2]
+    assert isinstance(linhas[1][1], ValueError)
@@ -0,0 +1,101 @@
+"""Lotes (``POST /batch``): tudo ou nada, sem efeitos das escritas desfeitas."""
+
+
+from conftest import despesa, meta, orcamento
+
+
+def _cursor(cliente) -> int:
+    return cliente.get("/changes").json()["ultimo"]
+
+
+def _alteracoes(cliente, desde: int) -> list:
+    return cliente.get("/changes", params={"since": desde}).json()["alteracoes"]
+
+
+def _alertas(cliente) -> list:
+    return cliente.get("/orcamentos/alertas").json()
+
+
+def _preparar(cliente, usuario_id: int):
+    """Cria uma despesa, uma meta e um orçamento do usuário."""
+    existente = cliente.post("/despesas/", json=despesa(usuario_id, 5.0, categoria_id=4)).json()
+    criada = cliente.post("/metas/", json=meta(usuario_id)).json()
+    limite = cliente.post("/orcamentos/", json=orcamento(usuario_id, categoria_id=4)).json()
+    return existente, criada, limite
+
+
+def test_falha_desfaz_escritas_em_varias_entidades(cliente, usuario):
+    existente, criada, limite = _preparar(cliente, usuario)
+    despesas_antes = cliente.get("/despesas/").json()
+    cursor = _cursor(cliente)
+
+    resposta = cliente.post("/batch", json={"operacoes": [
+        # Faria o orçamento cruzar 80% e 100% do limite
+        {"operacao": "criar", "entidade": "despesas", "dados": despesa(usuario, 150.0, categoria_id=4)},
+        {"operacao": "atualizar", "entidade": "despesas", "id": existente["id"], "dados": despesa(usuario, 7.0, categoria_id=4)},
+        {"operacao": "adicionar_valor", "entidade": "metas", "id": criada["id"], "valor": 50},
+        {"operacao": "atualizar", "entidade": "orcamentos", "id": limite["id"], "dados": orcamento(usuario, 4, 500.0)},
+        {"operacao": "remover", "entidade": "despesas", "id": 999_999_999},
+    ]})
+
+    assert resposta.status_code == 404
+    corpo = resposta.json()
+    assert corpo["aplicado"] is False
+    assert [r["status"] for r in corpo["resultados"]] == [424, 424, 424, 424, 404]
+    assert cliente.get("/despesas/").json() == despesas_antes
+    assert cliente.get(f"/metas/{criada['id']}").json() == criada
+    assert cliente.get(f"/metas/{criada['id']}/aportes").json() == []
+    assert cliente.get(f"/orcamentos/{limite['id']}").json() == limite
+    # As escritas desfeitas (e as inversas que as desfazem) não deixam alterações nem alertas
+    assert _alteracoes(cliente, cursor) == []
+    assert _alertas(cliente) == []
+
+
+def test_lote_aplicado_emite_efeitos_uma_vez(cliente, usuario):
+    _, criada, limite = _preparar(cliente, usuario)
+    cursor = _cursor(cliente)
+
+    resposta = cliente.post("/batch", json={"operacoes": [
+        {"operacao": "criar", "entidade": "despesas", "dados": despesa(usuario, 80.0, categoria_id=4)},
+        {"operacao": "adicionar_valor", "entidade": "metas", "id": criada["id"], "valor": 50},
+    ]})
+
+    assert resposta.status_code == 200
+    assert resposta.json()["aplicado"] is True
+    entidades = sorted(a["entidade"] for a in _alteracoes(cliente, cursor))
+    assert entidades == ["despesas", "metas"]
+    assert [a["limiar"] for a in _alertas(cliente)] == [80]
+    # O limiar já alertado no período não é alertado de novo
+    cliente.post("/despesas/", json=despesa(usuario, 1.0, categoria_id=4))
+    assert [a["limiar"] for a in _alertas(cliente)] == [80]
+
+
+def test_if_match_desatualizado_responde_412_e_desfaz(cliente, usuario):
+    _, criada, _ = _preparar(cliente, usuario)
+    etag = cliente.get(f"/metas/{criada['id']}").headers["ETag"]
+    cliente.patch(f"/metas/{criada['id']}/adicionar-valor", params={"valor": 1})
+
+    resposta = cliente.post("/batch", json={"operacoes": [
+        {"operacao": "criar", "entidade": "despesas", "dados": despesa(usuario)},
+        {"operacao": "adicionar_valor", "entidade": "metas", "id": criada["id"], "valor": 10, "if_match": etag},
+    ]})
+
+    assert resposta.status_code == 412
+    assert [r["status"] for r in resposta.json()["resultados"]] == [424, 412]
+    assert len(cliente.get("/despesas/").json()) == 1
+    assert cliente.get(f"/metas/{criada['id']}").json()["valor_atual"] == 1.0
+
+
+def test_operacoes_em_registros_de_outro_usuario(cliente, cliente_outro, outro_usuario):
+    alheia = cliente_outro.post("/despesas/", json=despesa(outro_usuario)).json()
+
+    resposta = cliente.post("/batch", json={"operacoes": [
+        {"operacao": "remover", "entidade": "despesas", "id": alheia["id"]},
+    ]})
+    assert resposta.status_code == 404
+
+    resposta = cliente.post("/batch", json={"operacoes": [
+        {"operacao": "criar", "entidade": "despesas", "dados": despesa(outro_usuario)},
+    ]})
+    assert resposta.status_code == 403
+    assert cliente_outro.get("/despesas/").json() == [alheia]
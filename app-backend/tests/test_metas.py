@@ -0,0 +1,83 @@
+"""Metas: histórico de aportes gravado com a meta, ajustes de ``valor_atual`` e exclusão."""
+
+
+import threading
+import time
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.metas import _aportes_db, _totais_aportes, _transacao_com_aportes
+from conftest import como, meta
+
+
+def _progresso(cliente, meta_id: int) -> dict:
+    return cliente.get(f"/metas/{meta_id}/progresso").json()
+
+
+def test_put_de_meta_registra_ajuste_de_valor_atual(cliente, usuario):
+    criada = cliente.post("/metas/", json=meta(usuario, 100.0)).json()
+    cliente.put(f"/metas/{criada['id']}", json={**criada, "valor_atual": 60.0})
+    aportes = cliente.get(f"/metas/{criada['id']}/aportes").json()
+    assert [aporte["valor"] for aporte in aportes] == [-40.0]
+
+
+def test_meta_e_historico_mudam_juntos(usuario):
+    criada = TestClient(app, headers=como(usuario)).post("/metas/", json=meta(usuario)).json()
+    url = f"/metas/{criada['id']}/adicionar-valor"
+    parar = threading.Event()
+
+    def aportar() -> None:
+        cliente = TestClient(app, headers=como(usuario))
+        for _ in range(50):
+            cliente.patch(url, params={"valor": 1})
+        parar.set()
+
+    escritor = threading.Thread(target=aportar)
+    escritor.start()
+    leituras = 0
+    while not parar.is_set() or leituras == 0:
+        # Com as duas transações abertas, nunca se vê a meta somada sem o aporte (ou o contrário)
+        with _transacao_com_aportes(usuario) as metas:
+            valor_atual = metas.obter(criada["id"]).valor_atual
+            aportes = _aportes_db.particao_do_usuario(usuario).buscar(meta_id=criada["id"])
+            assert valor_atual == sum(aporte.valor for aporte in aportes)
+        leituras += 1
+        # Sem a pausa, o laço retomaria o lock antes do escritor (no SQLite, BEGIN IMMEDIATE)
+        time.sleep(0.001)
+    escritor.join()
+    assert _progresso(TestClient(app, headers=como(usuario)), criada["id"])["quantidade_aportes"] == 50
+
+
+def test_excluir_meta_remove_o_historico(cliente, usuario):
+    criada = cliente.post("/metas/", json=meta(usuario)).json()
+    for valor in (10, 20):
+        cliente.patch(f"/metas/{criada['id']}/adicionar-valor", params={"valor": valor})
+    assert _progresso(cliente, criada["id"])["quantidade_aportes"] == 2
+
+    assert cliente.delete(f"/metas/{criada['id']}").status_code == 200
+    assert cliente.get(f"/metas/{criada['id']}").status_code == 404
+    assert _aportes_db.buscar(meta_id=criada["id"]) == []
+    assert _totais_aportes.consultar(usuario, categoria_id=criada["id"]) == []
+    assert cliente.delete(f"/metas/{criada['id']}").status_code == 404
+
+
+def test_exclusao_de_meta_no_lote_e_desfeita_com_o_historico(cliente, usuario):
+    criada = cliente.post("/metas/", json=meta(usuario)).json()
+    cliente.patch(f"/metas/{criada['id']}/adicionar-valor", params={"valor": 10})
+    aportes = cliente.get(f"/metas/{criada['id']}/aportes").json()
+
+    resposta = cliente.post("/batch", json={"operacoes": [
+        {"operacao": "remover", "entidade": "metas", "id": criada["id"]},
+        {"operacao": "remover", "entidade": "despesas", "id": 999_999_999},
+    ]})
+    assert resposta.status_code == 404
+    assert cliente.get(f"/metas/{criada['id']}/aportes").json() == aportes
+    assert _progresso(cliente, criada["id"])["quantidade_aportes"] == 1
+
+    resposta = cliente.post("/batch", json={"operacoes": [
+        {"operacao": "remover", "entidade": "metas", "id": criada["id"]},
+    ]})
+    assert resposta.status_code == 200
+    assert _aportes_db.buscar(meta_id=criada["id"]) == []
+    assert _totais_aportes.consultar(usuario, categoria_id=criada["id"]) == []
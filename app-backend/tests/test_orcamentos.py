@@ -0,0 +1,83 @@
+"""Alertas de orçamento: um por limiar e período, gravados só depois do commit da escrita."""
+
+
+import threading
+from datetime import date
+from decimal import Decimal
+
+import pytest
+
+from app.armazenamento import ConexoesSQLite, RepositorioSQLite, apos_confirmar
+from app.di.dependency_injection import obter_repositorio
+from app.orcamentos import _alerta, _emitir, periodo_orcamento, verificar_orcamentos
+from app.schemas import DespesaSchema, OrcamentoSchema
+from conftest import despesa, orcamento
+
+
+def _limiares(cliente) -> list:
+    return [alerta["limiar"] for alerta in cliente.get("/orcamentos/alertas").json()]
+
+
+def test_cada_limiar_e_alertado_uma_vez_por_periodo(cliente, usuario):
+    cliente.post("/orcamentos/", json=orcamento(usuario, categoria_id=4, valor_limite=100.0))
+    cliente.post("/despesas/", json=despesa(usuario, 85.0, categoria_id=4))
+    assert _limiares(cliente) == [80]
+    cliente.post("/despesas/", json=despesa(usuario, 20.0, categoria_id=4))
+    cliente.post("/despesas/", json=despesa(usuario, 5.0, categoria_id=4))
+    assert _limiares(cliente) == [100, 80]
+    # A verificação noturna não repete os limiares já alertados
+    verificar_orcamentos(date.today())
+    assert _limiares(cliente) == [100, 80]
+
+
+def test_verificacao_noturna_emite_os_alertas_que_faltam(cliente, usuario):
+    cliente.post("/despesas/", json=despesa(usuario, 150.0, categoria_id=5))
+    cliente.post("/orcamentos/", json=orcamento(usuario, categoria_id=5, valor_limite=100.0))
+    assert _limiares(cliente) == []
+    assert verificar_orcamentos(date.today()) >= 2
+    alertas = cliente.get("/orcamentos/alertas").json()
+    assert sorted(a["limiar"] for a in alertas) == [80, 100]
+    assert all(a["despesa_id"] is None for a in alertas)
+
+
+def test_alertas_ficam_no_repositorio(cliente, usuario):
+    cliente.post("/orcamentos/", json=orcamento(usuario, categoria_id=4, valor_limite=100.0))
+    cliente.post("/despesas/", json=despesa(usuario, 100.0, categoria_id=4))
+    gravados = obter_repositorio("alertas_orcamento").buscar(usuario_id=usuario)
+    assert sorted(a.limiar for a in gravados) == [80, 100]
+    assert cliente.get("/orcamentos/alertas").json()[0]["id"] == max(a.id for a in gravados)
+
+
+def test_emissoes_simultaneas_gravam_um_alerta(usuario):
+    limite = OrcamentoSchema(id=10**6, categoria_id=4, usuario_id=usuario, valor_limite=Decimal("100.00"), periodo="mensal")
+    inicio, fim = periodo_orcamento("mensal", date.today())
+    emitidos = []
+
+    def emitir() -> None:
+        emitidos.append(_emitir(_alerta(limite, inicio, fim, 9000, 80, None)))
+
+    threads = [threading.Thread(target=emitir) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sorted(emitidos) == [False] * 7 + [True]
+    assert len(obter_repositorio("alertas_orcamento").buscar(orcamento_id=limite.id)) == 1
+
+
+def test_efeitos_das_escritas_so_apos_o_commit(tmp_path):
+    repositorio = RepositorioSQLite(DespesaSchema, ConexoesSQLite(str(tmp_path / "efeitos.db")), "despesas")
+    efeitos = []
+    repositorio.observar(lambda antigo, novo: apos_confirmar(lambda: efeitos.append(novo.id)))
+
+    with pytest.raises(RuntimeError):
+        with repositorio.transacao():
+            repositorio.criar(DespesaSchema(**despesa(1)))
+            assert efeitos == []
+            raise RuntimeError("falha")
+    assert efeitos == [] and len(repositorio) == 0
+
+    with repositorio.transacao():
+        criada = repositorio.criar(DespesaSchema(**despesa(1)))
+        assert efeitos == []
+    assert efeitos == [criada.id]
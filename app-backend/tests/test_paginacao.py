@@ -0,0 +1,43 @@
+"""Paginação por cursor, projeção de campos e a resposta rápida (``rapido=true``) das listagens."""
+
+
+import pytest
+
+from conftest import despesa, meta
+
+
+@pytest.mark.parametrize("rapido", [False, True])
+def test_pagina_por_cursor(cliente, usuario, rapido):
+    ids = [cliente.post("/despesas/", json=despesa(usuario, valor=v)).json()["id"] for v in (1.0, 2.0, 3.0)]
+    pagina = cliente.get("/despesas/", params={"limit": 2, "rapido": rapido})
+    assert [d["id"] for d in pagina.json()] == ids[:2]
+    cursor = pagina.headers["X-Next-Cursor"]
+    resto = cliente.get("/despesas/", params={"limit": 2, "after": cursor, "rapido": rapido})
+    assert [d["id"] for d in resto.json()] == ids[2:]
+    assert "X-Next-Cursor" not in resto.headers
+
+
+@pytest.mark.parametrize("rota", ["/despesas/", "/rendas/", "/metas/"])
+def test_resposta_rapida_igual_a_validada(cliente, usuario, rota):
+    corpo = meta(usuario) if rota == "/metas/" else despesa(usuario)
+    cliente.post(rota, json=corpo)
+    validada = cliente.get(rota)
+    rapida = cliente.get(rota, params={"rapido": True})
+    assert validada.status_code == rapida.status_code == 200
+    assert validada.json() == rapida.json()
+
+
+def test_aportes_com_e_sem_resposta_rapida(cliente, usuario):
+    meta_id = cliente.post("/metas/", json=meta(usuario)).json()["id"]
+    cliente.patch(f"/metas/{meta_id}/adicionar-valor", params={"valor": 25.0})
+    aportes = cliente.get(f"/metas/{meta_id}/aportes").json()
+    assert [a["valor"] for a in aportes] == [25.0]
+    assert cliente.get(f"/metas/{meta_id}/aportes", params={"rapido": True}).json() == aportes
+
+
+@pytest.mark.parametrize("rapido", [False, True])
+def test_projecao_de_campos(cliente, usuario, rapido):
+    cliente.post("/despesas/", json=despesa(usuario))
+    despesas = cliente.get("/despesas/", params={"fields": "id,valor", "rapido": rapido}).json()
+    assert despesas and all(set(d) == {"id", "valor"} for d in despesas)
+    assert cliente.get("/despesas/", params={"fields": "id,nada", "rapido": rapido}).status_code == 400
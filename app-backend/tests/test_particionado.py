@@ -0,0 +1,113 @@
+"""Repositório particionado por usuário: distribuição dos registros e mudança de partição."""
+
+
+import threading
+from datetime import date
+from decimal import Decimal
+
+import pytest
+
+from app.armazenamento import (
+    ConexoesSQLite,
+    RepositorioMemoria,
+    RepositorioParticionado,
+    RepositorioSQLite,
+    Sequencia,
+    particao,
+)
+from app.schemas import DespesaSchema
+
+
+def _despesa(registro_id: int, usuario_id: int, valor: str = "10.00") -> DespesaSchema:
+    return DespesaSchema(
+        id=registro_id, valor=Decimal(valor), data=date(2025, 1, 1), descricao="x", categoria_id=1,
+        usuario_id=usuario_id,
+    )
+
+
+@pytest.fixture(params=["memoria", "sqlite"])
+def particionado(request, tmp_path) -> RepositorioParticionado:
+    sequencia = Sequencia()
+    if request.param == "sqlite":
+        partes = [
+            RepositorioSQLite(
+                DespesaSchema, ConexoesSQLite(str(tmp_path / f"p{i}.db")), "despesas",
+                indices=("usuario_id",), sequencia=sequencia,
+            )
+            for i in range(4)
+        ]
+    else:
+        partes = [RepositorioMemoria(DespesaSchema, indices=("usuario_id",), sequencia=sequencia) for _ in range(4)]
+    return RepositorioParticionado(DespesaSchema, partes)
+
+
+def test_registros_ficam_na_particao_do_usuario(particionado):
+    criadas = [particionado.criar(_despesa(0, usuario_id)) for usuario_id in (1, 2, 5, 6, 1)]
+
+    assert [d.id for d in criadas] == [1, 2, 3, 4, 5]
+    for usuario_id in (1, 2, 5, 6):
+        parte = particionado.particao_do_usuario(usuario_id)
+        assert parte is particionado._partes[particao(usuario_id, 4)]
+        assert {d.usuario_id for d in parte.buscar(usuario_id=usuario_id)} == {usuario_id}
+    # As consultas sem usuário intercalam as partições em ordem de ID
+    assert [d.id for d in particionado.consultar()] == [1, 2, 3, 4, 5]
+    assert [d.id for d in particionado.consultar(apos=2, limite=2)] == [3, 4]
+
+
+def test_registro_que_muda_de_usuario_muda_de_particao(particionado):
+    criada = particionado.criar(_despesa(0, 1))
+
+    particionado.atualizar(criada.id, _despesa(criada.id, 2))
+
+    assert particionado.particao_do_usuario(1).obter(criada.id) is None
+    assert particionado.particao_do_usuario(2).obter(criada.id).usuario_id == 2
+    assert particionado.obter(criada.id).usuario_id == 2
+    assert len(particionado) == 1
+
+
+def test_mudancas_em_sentidos_opostos_nao_se_bloqueiam(particionado):
+    # Registros que vão e voltam entre as partições 1 e 2, em sentidos opostos, enquanto
+    # lotes reservam todas as partições
+    ida = particionado.criar(_despesa(0, 1))
+    volta = particionado.criar(_despesa(0, 2))
+
+    def mover(registro_id: int, usuarios) -> None:
+        for i in range(2000):
+            particionado.atualizar(registro_id, _despesa(registro_id, usuarios[i % 2]))
+
+    def lotes() -> None:
+        for _ in range(500):
+            with particionado.transacao():
+                pass
+
+    threads = [
+        threading.Thread(target=mover, args=(ida.id, (2, 1)), daemon=True),
+        threading.Thread(target=mover, args=(volta.id, (1, 2)), daemon=True),
+        threading.Thread(target=lotes, daemon=True),
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=30)
+    assert not any(thread.is_alive() for thread in threads)
+    assert sorted(d.id for d in particionado.listar()) == [ida.id, volta.id]
+
+
+def test_leitura_com_a_transacao_nao_ve_o_registro_sumir(particionado):
+    movida = particionado.criar(_despesa(0, 1))
+    parar = threading.Event()
+    sumiu = []
+
+    def ler() -> None:
+        while not parar.is_set():
+            with particionado.transacao():
+                if particionado.obter(movida.id) is None:
+                    sumiu.append(True)
+
+    leitor = threading.Thread(target=ler, daemon=True)
+    leitor.start()
+    for i in range(2000):
+        particionado.atualizar(movida.id, _despesa(movida.id, (2, 1)[i % 2]))
+    parar.set()
+    leitor.join(timeout=30)
+    assert not sumiu
@@ -0,0 +1,75 @@
+"""Expansão das contas recorrentes em ocorrências e a rota ``/contas-recorrentes/ocorrencias``."""
+
+
+from datetime import date
+from itertools import islice
+
+from app.recorrencias import datas, expandir, ocorrencias
+from app.schemas import ContaRecorrenteSchema
+
+_JANELA = {"de": "2025-01-01", "ate": "2025-12-31"}
+
+
+def conta(id: int, data_inicio: date, frequencia: str = "mensal", usuario_id: int = 1) -> ContaRecorrenteSchema:
+    return ContaRecorrenteSchema(
+        id=id,
+        valor=100.0,
+        descricao="Conta de teste",
+        categoria_id=3,
+        usuario_id=usuario_id,
+        tipo="despesa",
+        data_inicio=data_inicio,
+        frequencia=frequencia,
+    )
+
+
+def corpo(usuario_id: int, data_inicio: date, frequencia: str = "mensal") -> dict:
+    return conta(0, data_inicio, frequencia, usuario_id).model_dump(mode="json")
+
+
+def test_conta_do_dia_31_vence_no_ultimo_dia_dos_meses_curtos():
+    vencimentos = list(datas(conta(1, date(2023, 1, 31)), date(2024, 1, 1), date(2024, 5, 31)))
+    assert vencimentos == [date(2024, 1, 31), date(2024, 2, 29), date(2024, 3, 31), date(2024, 4, 30), date(2024, 5, 31)]
+
+
+def test_janela_comeca_no_meio_do_historico():
+    assert list(datas(conta(1, date(2020, 3, 10), "semanal"), date(2025, 1, 1), date(2025, 1, 20))) == [
+        date(2025, 1, 7), date(2025, 1, 14)
+    ]
+
+
+def test_intercalacao_e_baldes_dao_a_mesma_ordem():
+    contas = [
+        conta(1, date(2024, 1, 31)),
+        conta(2, date(2024, 12, 30), "semanal"),
+        conta(3, date(2024, 1, 1), "quinzenal"),
+        conta(4, date(2023, 6, 15), "anual"),
+        conta(5, date(2025, 3, 1), "diaria"),
+    ]
+    de, ate = date(2025, 1, 1), date(2025, 6, 30)
+    intercaladas = [o[:2] for o in ocorrencias(contas, de, ate)]
+    assert intercaladas == [o[:2] for o in expandir(contas, de, ate)]
+    assert intercaladas == sorted(intercaladas)
+
+
+def test_intercalacao_gera_so_o_que_e_consumido():
+    contas = [conta(1, date(2000, 1, 1), "diaria"), conta(2, date(2000, 1, 1), "diaria")]
+    primeiras = list(islice(ocorrencias(contas, date(2025, 1, 1), date(9999, 12, 31)), 3))
+    assert [o[:2] for o in primeiras] == [(date(2025, 1, 1), 1), (date(2025, 1, 1), 2), (date(2025, 1, 2), 1)]
+
+
+def test_limit_devolve_o_comeco_da_janela(cliente, usuario):
+    for inicio, frequencia in ((date(2024, 1, 31), "mensal"), (date(2024, 12, 30), "semanal")):
+        assert cliente.post("/contas-recorrentes/", json=corpo(usuario, inicio, frequencia)).status_code == 201
+    todas = cliente.get("/contas-recorrentes/ocorrencias", params=_JANELA).json()
+    assert len(todas) == 12 + 52
+    primeiras = cliente.get("/contas-recorrentes/ocorrencias", params={**_JANELA, "limit": 5}).json()
+    assert primeiras == todas[:5]
+    assert cliente.get("/contas-recorrentes/ocorrencias", params={**_JANELA, "limit": 0}).status_code == 422
+
+
+def test_janela_em_cache_e_invalidada_ao_criar_conta(cliente, usuario):
+    cliente.post("/contas-recorrentes/", json=corpo(usuario, date(2024, 1, 31)))
+    assert len(cliente.get("/contas-recorrentes/ocorrencias", params=_JANELA).json()) == 12
+    cliente.post("/contas-recorrentes/", json=corpo(usuario, date(2024, 6, 1), "trimestral"))
+    assert len(cliente.get("/contas-recorrentes/ocorrencias", params=_JANELA).json()) == 12 + 4
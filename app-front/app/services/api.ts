@@ -1,6 +1,8 @@
 import { formatDateToBR } from '../utils/dateUtils';
 
 const API_BASE_URL = 'http://localhost:5000';
+// Usuário enviado em todas as requisições (a API só expõe os dados dele)
+const USUARIO_ID = 1;
 
 // Interfaces baseadas nos schemas do backend
 export interface Categoria {
@@ -63,6 +65,7 @@ class ApiService {
     const response = await fetch(`${API_BASE_URL}${endpoint}`, {
       headers: {
         'Content-Type': 'application/json',
+        'X-Usuario-Id': String(USUARIO_ID),
         ...options?.headers,
       },
       ...options,